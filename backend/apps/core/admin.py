@@ -0,0 +1,139 @@
+"""
+Admin para la app Core.
+"""
+from django.contrib import admin
+from django.http import HttpResponse
+from django.utils.html import format_html
+
+from .models import ConfigPerfilado, EventoOutbox, Exportacion, PerfilRequest, ResumenMetrica
+
+
+@admin.register(ConfigPerfilado)
+class ConfigPerfiladoAdmin(admin.ModelAdmin):
+    list_display = [
+        'vista', 'cada_n', 'usuario', 'activo', 'activo_hasta',
+        'capturas', 'limite_capturas', 'created_at'
+    ]
+    list_filter = ['activo']
+    search_fields = ['vista']
+    readonly_fields = ['capturas', 'created_at']
+    raw_id_fields = ['usuario']
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Este proceso aplica el cambio de inmediato; el resto, al recargar
+        from .perfilado import muestreo
+        muestreo.invalidar()
+
+
+@admin.register(PerfilRequest)
+class PerfilRequestAdmin(admin.ModelAdmin):
+    list_display = [
+        'id', 'metodo', 'ruta', 'status_code', 'duracion_ms',
+        'total_consultas', 'duracion_consultas_ms', 'origen', 'usuario', 'created_at'
+    ]
+    list_filter = ['origen', 'metodo', 'status_code', 'created_at']
+    search_fields = ['ruta', 'vista', 'nota']
+    date_hierarchy = 'created_at'
+    raw_id_fields = ['usuario', 'config']
+    exclude = ['consultas', 'estadisticas', 'perfil']
+    readonly_fields = [
+        'metodo', 'ruta', 'vista', 'usuario', 'origen', 'nota', 'config',
+        'status_code', 'duracion_ms', 'total_consultas', 'duracion_consultas_ms',
+        'created_at', 'linea_tiempo_sql', 'estadisticas_cprofile'
+    ]
+    actions = ['descargar_perfil']
+
+    def get_queryset(self, request):
+        # El listado no necesita los campos pesados
+        return super().get_queryset(request).select_related('usuario').defer(
+            'consultas', 'estadisticas', 'perfil'
+        )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description='Línea de tiempo SQL')
+    def linea_tiempo_sql(self, obj):
+        lineas = [
+            f"{c['inicio_ms']:>9.1f} ms  +{c['duracion_ms']:.1f} ms  {c['sitio']}\n"
+            f"    {c['sql']}"
+            for c in obj.consultas
+        ]
+        if obj.total_consultas > len(obj.consultas):
+            lineas.append(f'... {obj.total_consultas - len(obj.consultas)} consultas más')
+        return format_html('<pre style="white-space: pre-wrap">{}</pre>', '\n'.join(lineas))
+
+    @admin.display(description='Estadísticas (cProfile)')
+    def estadisticas_cprofile(self, obj):
+        return format_html('<pre>{}</pre>', obj.estadisticas)
+
+    @admin.action(description='Descargar perfil (.prof, para snakeviz/pstats)')
+    def descargar_perfil(self, request, queryset):
+        perfil = queryset.first()
+        if queryset.count() != 1 or not perfil.perfil:
+            self.message_user(request, 'Selecciona un único perfil.', level='warning')
+            return None
+        response = HttpResponse(bytes(perfil.perfil), content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="perfil-{perfil.pk}.prof"'
+        return response
+
+
+@admin.register(ResumenMetrica)
+class ResumenMetricaAdmin(admin.ModelAdmin):
+    """Solo lectura: las filas las escribe la tarea core.actualizar_resumenes."""
+    list_display = [
+        'metrica', 'granularidad', 'periodo', 'dimension', 'valor_dimension',
+        'valor', 'actualizado_en'
+    ]
+    list_filter = ['granularidad', 'metrica', 'dimension']
+    date_hierarchy = 'periodo'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Exportacion)
+class ExportacionAdmin(admin.ModelAdmin):
+    list_display = ['id', 'recurso', 'formato', 'estado', 'filas', 'usuario', 'created_at', 'completada_en']
+    list_filter = ['estado', 'recurso', 'formato']
+    date_hierarchy = 'created_at'
+    raw_id_fields = ['usuario']
+    readonly_fields = [
+        'usuario', 'recurso', 'formato', 'parametros', 'estado', 'archivo',
+        'filas', 'error', 'created_at', 'completada_en'
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(EventoOutbox)
+class EventoOutboxAdmin(admin.ModelAdmin):
+    list_display = ['id', 'tipo', 'estado', 'intentos', 'proximo_intento', 'created_at', 'procesado_en']
+    list_filter = ['estado', 'tipo']
+    search_fields = ['clave']
+    date_hierarchy = 'created_at'
+    readonly_fields = [
+        'tipo', 'clave', 'datos', 'estado', 'completados', 'intentos',
+        'proximo_intento', 'error', 'created_at', 'procesado_en'
+    ]
+    actions = ['reintentar']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Reintentar eventos fallidos')
+    def reintentar(self, request, queryset):
+        from django.utils import timezone
+
+        reintentados = queryset.filter(estado='fallido').update(
+            estado='pendiente', intentos=0, proximo_intento=timezone.now()
+        )
+        self.message_user(request, f'{reintentados} evento(s) vuelven a la cola.')
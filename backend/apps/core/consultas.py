@@ -0,0 +1,166 @@
+"""
+Detector de consultas N+1.
+
+Registra las consultas SQL de un request (o de un test) y las agrupa por
+sentencia normalizada y sitio de llamada (primer frame del proyecto en la
+pila). Un grupo que se repite muchas veces es un patrón N+1 típico: una
+consulta por cada fila de un listado.
+
+- En desarrollo, DetectorConsultasMiddleware registra en el log los grupos
+  repetidos por encima de DETECTOR_CONSULTAS_UMBRAL.
+- Las vistas marcadas con @presupuesto_consultas(n) fallan en tests
+  (DETECTOR_CONSULTAS_ESTRICTO) si superan su presupuesto.
+"""
+import logging
+import re
+import sys
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+Consulta = namedtuple('Consulta', ['sql', 'sitio', 'duracion'])
+Grupo = namedtuple('Grupo', ['repeticiones', 'sql', 'sitio', 'duracion'])
+
+PATRON_LISTA_IN = re.compile(r'\bIN\s*\((?:\s*%s\s*,)*\s*%s\s*\)', re.IGNORECASE)
+PATRON_CADENA = re.compile(r"'(?:[^']|'')*'")
+PATRON_NUMERO = re.compile(r'(?<![\w"])\d+(?:\.\d+)?\b')
+PATRON_ESPACIOS = re.compile(r'\s+')
+# Control de transacción: los tests envuelven cada request en atomic() y
+# cada atomic() interno se vuelve un savepoint que en producción no existe.
+PATRON_SAVEPOINT = re.compile(r'^\s*(?:SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT)\b', re.IGNORECASE)
+
+# Frames que no cuentan como sitio de llamada
+_EXCLUIDOS = ('apps/core/consultas.py', 'apps/core/middleware/')
+
+
+class ExcesoConsultas(AssertionError):
+    """Una vista o test superó su presupuesto de consultas."""
+
+
+def normalizar_sql(sql):
+    """Sentencia sin literales, con listas IN colapsadas y espacios simples."""
+    sql = PATRON_LISTA_IN.sub('IN (...)', sql)
+    sql = PATRON_CADENA.sub('?', sql)
+    sql = PATRON_NUMERO.sub('?', sql)
+    return PATRON_ESPACIOS.sub(' ', sql).strip()
+
+
+def sitio_llamada():
+    """Primer frame del código del proyecto (apps/) en la pila actual."""
+    raiz = str(settings.BASE_DIR / 'apps')
+    frame = sys._getframe(1)
+    while frame is not None:
+        archivo = frame.f_code.co_filename
+        if archivo.startswith(raiz):
+            relativo = 'apps' + archivo[len(raiz):].replace('\\', '/')
+            if not relativo.startswith(_EXCLUIDOS):
+                return f'{relativo}:{frame.f_lineno} ({frame.f_code.co_name})'
+        frame = frame.f_back
+    return 'desconocido'
+
+
+# =====================================================
+# REGISTRO
+# =====================================================
+
+class RegistroConsultas:
+    """
+    execute_wrapper que guarda cada consulta normalizada con su sitio. Los
+    savepoints no cuentan (ver PATRON_SAVEPOINT).
+    """
+
+    def __init__(self):
+        self.consultas = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if PATRON_SAVEPOINT.match(sql):
+            return execute(sql, params, many, context)
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.consultas.append(Consulta(
+                normalizar_sql(sql), sitio_llamada(), time.perf_counter() - inicio
+            ))
+
+    @property
+    def total(self):
+        return len(self.consultas)
+
+    def agrupadas(self):
+        """Grupos (sentencia, sitio) ordenados por número de repeticiones."""
+        grupos = {}
+        for consulta in self.consultas:
+            clave = (consulta.sql, consulta.sitio)
+            repeticiones, duracion = grupos.get(clave, (0, 0.0))
+            grupos[clave] = (repeticiones + 1, duracion + consulta.duracion)
+        return sorted(
+            (Grupo(n, sql, sitio, duracion) for (sql, sitio), (n, duracion) in grupos.items()),
+            key=lambda g: (-g.repeticiones, -g.duracion)
+        )
+
+    def repetidas(self, umbral=None):
+        """Grupos que se repiten al menos `umbral` veces (posibles N+1)."""
+        umbral = umbral or settings.DETECTOR_CONSULTAS_UMBRAL
+        return [g for g in self.agrupadas() if g.repeticiones >= umbral]
+
+    def reporte(self, limite=5):
+        lineas = [f'{self.total} consultas']
+        for grupo in self.agrupadas()[:limite]:
+            lineas.append(
+                f'  {grupo.repeticiones}x {grupo.duracion * 1000:.1f}ms '
+                f'{grupo.sitio}\n      {grupo.sql[:300]}'
+            )
+        return '\n'.join(lineas)
+
+
+@contextmanager
+def detectar_consultas(alias=None):
+    """Registra las consultas ejecutadas dentro del bloque."""
+    from django.db import connections
+    registro = RegistroConsultas()
+    conexion = connections[alias] if alias else connection
+    with conexion.execute_wrapper(registro):
+        yield registro
+
+
+def verificar_presupuesto(registro, maximo, etiqueta):
+    """Lanza ExcesoConsultas si el registro supera el máximo de consultas."""
+    if registro.total > maximo:
+        raise ExcesoConsultas(
+            f'{etiqueta}: {registro.total} consultas (presupuesto {maximo})\n'
+            f'{registro.reporte()}'
+        )
+
+
+# =====================================================
+# PRESUPUESTO POR VISTA
+# =====================================================
+
+def presupuesto_consultas(maximo):
+    """
+    Marca una vista (clase o función) con su máximo de consultas por request.
+    El presupuesto no debe depender del tamaño de la página: si crece con
+    el número de filas, hay un N+1.
+    """
+    def decorador(vista):
+        vista.presupuesto_consultas = maximo
+        return vista
+    return decorador
+
+
+def presupuesto_de(match):
+    """Presupuesto declarado en la vista resuelta (o None)."""
+    if match is None:
+        return None
+    funcion = match.func
+    presupuesto = getattr(funcion, 'presupuesto_consultas', None)
+    if presupuesto is None:
+        clase = getattr(funcion, 'view_class', None) or getattr(funcion, 'cls', None)
+        presupuesto = getattr(clase, 'presupuesto_consultas', None)
+    return presupuesto
@@ -0,0 +1,414 @@
+"""
+Exportación de datos (solicitudes, simulacros, recomendaciones) en CSV y XLSX.
+
+Las filas se leen con proyecciones `values_list()` e `iterator(chunk_size=...)`,
+así que la memoria no depende del número de filas:
+
+- CSV: se transmite con StreamingHttpResponse a medida que se lee.
+- XLSX (requiere openpyxl): workbook en modo write-only, que vuelca las
+  filas a un archivo temporal en lugar de mantenerlas en memoria.
+
+Las exportaciones grandes (más de EXPORTACION_MAX_FILAS_SINCRONA filas) se
+generan en segundo plano (`core.generar_exportacion`) y se descargan con
+una URL firmada.
+
+Los campos JSON se pueden exportar de tres formas (parámetro `json`):
+- 'texto': el JSON completo en una columna (por defecto).
+- 'columnas': los diccionarios se abren en una columna por clave
+  (EXPORTACION_CLAVES_JSON) y las listas se resumen en una sola columna.
+- 'omitir': sin campos JSON.
+
+Los filtros del query string se validan contra el campo de cada lookup
+antes de consultar (`limpiar_filtros`). Las celdas de texto que empiezan
+con =, +, -, @ (o tabulador / retorno) se prefijan con ' para que Excel
+no las evalúe como fórmulas.
+"""
+import csv
+import json
+import tempfile
+from collections import namedtuple
+from datetime import datetime
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+Recurso = namedtuple('Recurso', ['modelo', 'columnas', 'json', 'filtros'])
+
+MODOS_JSON = ('texto', 'columnas', 'omitir')
+FORMATOS = ('csv', 'xlsx')
+
+# Caracteres con los que una hoja de cálculo interpreta la celda como fórmula
+PREFIJOS_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# Filtros comunes: parámetro -> lookup
+_FILTROS_FECHA = {
+    'desde': 'created_at__date__gte',
+    'hasta': 'created_at__date__lte',
+}
+
+RECURSOS = {
+    'solicitudes': Recurso(
+        modelo='solicitudes.Solicitud',
+        columnas=[
+            ('id', 'id'),
+            ('cliente', 'cliente__email'),
+            ('asesor', 'asesor__email'),
+            ('tipo_visa', 'tipo_visa'),
+            ('embajada', 'embajada'),
+            ('estado', 'estado'),
+            ('documentos', 'documentos_total'),
+            ('progreso_pct', 'progreso_pct'),
+            ('fecha_asignacion', 'fecha_asignacion'),
+            ('fecha_revision', 'fecha_revision'),
+            ('fecha_envio_embajada', 'fecha_envio_embajada'),
+            ('creada', 'created_at'),
+        ],
+        json=['datos_personales'],
+        filtros={
+            'estado': 'estado',
+            'embajada': 'embajada',
+            'tipo_visa': 'tipo_visa',
+            'asesor': 'asesor_id',
+            **_FILTROS_FECHA,
+        },
+    ),
+    'simulacros': Recurso(
+        modelo='preparacion.Simulacro',
+        columnas=[
+            ('id', 'id'),
+            ('cliente', 'cliente__email'),
+            ('asesor', 'asesor__email'),
+            ('solicitud', 'solicitud_id'),
+            ('fecha', 'fecha'),
+            ('hora', 'hora'),
+            ('modalidad', 'modalidad'),
+            ('estado', 'estado'),
+            ('duracion_minutos', 'duracion_minutos'),
+            ('analisis_ia_completado', 'analisis_ia_completado'),
+            ('creado', 'created_at'),
+        ],
+        json=[],
+        filtros={
+            'estado': 'estado',
+            'modalidad': 'modalidad',
+            'asesor': 'asesor_id',
+            **_FILTROS_FECHA,
+        },
+    ),
+    'recomendaciones': Recurso(
+        modelo='preparacion.Recomendacion',
+        columnas=[
+            ('id', 'id'),
+            ('simulacro', 'simulacro_id'),
+            ('cliente', 'simulacro__cliente__email'),
+            ('asesor', 'simulacro__asesor__email'),
+            ('estado_feedback', 'estado_feedback'),
+            ('nivel_preparacion', 'nivel_preparacion'),
+            ('claridad', 'claridad'),
+            ('coherencia', 'coherencia'),
+            ('seguridad', 'seguridad'),
+            ('pertinencia', 'pertinencia'),
+            ('publicada', 'publicada'),
+            ('creada', 'created_at'),
+        ],
+        json=['fortalezas', 'puntos_mejora', 'recomendaciones'],
+        filtros={
+            'nivel_preparacion': 'nivel_preparacion',
+            'estado_feedback': 'estado_feedback',
+            'asesor': 'simulacro__asesor_id',
+            **_FILTROS_FECHA,
+        },
+    ),
+}
+
+
+class ErrorExportacion(ValueError):
+    """Parámetros de exportación inválidos (se responde con 400)."""
+
+
+# =====================================================
+# CONSULTA Y FILAS
+# =====================================================
+
+def _campo(modelo, lookup):
+    """Campo del modelo al que apunta el lookup ('simulacro__asesor_id' -> asesor)."""
+    *relaciones, nombre = lookup.split('__')
+    for relacion in relaciones:
+        modelo = modelo._meta.get_field(relacion).related_model
+    return modelo._meta.get_field(nombre)
+
+
+def limpiar_filtros(recurso, filtros=None):
+    """
+    Filtros permitidos del recurso, convertidos al tipo de su campo: fechas
+    AAAA-MM-DD en desde/hasta, enteros en los ids y un valor de `choices`
+    donde el campo los tiene. Lanza ErrorExportacion si alguno no es válido.
+    """
+    definicion = RECURSOS[recurso]
+    modelo = apps.get_model(definicion.modelo)
+    limpios = {}
+    for parametro, valor in (filtros or {}).items():
+        if parametro not in definicion.filtros or valor in (None, ''):
+            continue
+        if parametro in _FILTROS_FECHA:
+            try:
+                fecha = parse_date(str(valor))
+            except ValueError:
+                fecha = None
+            if fecha is None:
+                raise ErrorExportacion(f"'{parametro}' debe ser una fecha AAAA-MM-DD")
+            limpios[parametro] = fecha.isoformat()
+            continue
+        campo = _campo(modelo, definicion.filtros[parametro])
+        try:
+            valor = campo.to_python(valor)
+        except ValidationError:
+            raise ErrorExportacion(f"Valor inválido para '{parametro}'")
+        if campo.choices:
+            opciones = [str(opcion) for opcion, _ in campo.flatchoices]
+            if str(valor) not in opciones:
+                raise ErrorExportacion(
+                    f"Valor inválido para '{parametro}'. Opciones: {', '.join(opciones)}"
+                )
+        limpios[parametro] = valor
+    return limpios
+
+
+def queryset(recurso, filtros=None):
+    """Queryset del recurso con los filtros permitidos, ordenado por id."""
+    definicion = RECURSOS[recurso]
+    modelo = apps.get_model(definicion.modelo)
+    lookups = {
+        definicion.filtros[parametro]: valor
+        for parametro, valor in limpiar_filtros(recurso, filtros).items()
+    }
+    return modelo.objects.filter(**lookups).order_by('id')
+
+
+def validar(recurso, formato, modo_json):
+    if recurso not in RECURSOS:
+        raise ErrorExportacion(f"Recurso inválido. Opciones: {', '.join(RECURSOS)}")
+    if formato not in FORMATOS:
+        raise ErrorExportacion(f"Formato inválido. Opciones: {', '.join(FORMATOS)}")
+    if modo_json not in MODOS_JSON:
+        raise ErrorExportacion(f"Modo JSON inválido. Opciones: {', '.join(MODOS_JSON)}")
+    if formato == 'xlsx' and not xlsx_disponible():
+        raise ErrorExportacion('La exportación XLSX requiere openpyxl instalado')
+
+
+def _claves(campo):
+    return settings.EXPORTACION_CLAVES_JSON.get(campo, ())
+
+
+def encabezados(recurso, modo_json='texto'):
+    definicion = RECURSOS[recurso]
+    nombres = [nombre for nombre, _ in definicion.columnas]
+    if modo_json == 'omitir':
+        return nombres
+    for campo in definicion.json:
+        claves = _claves(campo)
+        if modo_json == 'columnas' and claves:
+            nombres.extend(f'{campo}.{clave}' for clave in claves)
+        else:
+            nombres.append(campo)
+    return nombres
+
+
+def _celda(valor):
+    """Valor plano para CSV/XLSX (fechas en hora local, sin tz)."""
+    if isinstance(valor, datetime):
+        return timezone.localtime(valor).replace(tzinfo=None) if timezone.is_aware(valor) else valor
+    return valor
+
+
+def _sin_formula(valor):
+    """Texto que una hoja de cálculo evaluaría como fórmula -> prefijado con '."""
+    if isinstance(valor, str) and valor.startswith(PREFIJOS_FORMULA):
+        return "'" + valor
+    return valor
+
+
+def _resumir_lista(valor):
+    """Lista de objetos -> 'categoria: descripcion | ...' en una sola celda."""
+    partes = []
+    for item in valor:
+        if isinstance(item, dict):
+            texto = item.get('descripcion') or item.get('titulo') or json.dumps(item, ensure_ascii=False)
+            categoria = item.get('categoria')
+            partes.append(f'{categoria}: {texto}' if categoria else texto)
+        else:
+            partes.append(str(item))
+    return ' | '.join(partes)
+
+
+def _aplanar(campo, valor, modo_json):
+    """Celdas que aporta un campo JSON según el modo."""
+    claves = _claves(campo)
+    if modo_json == 'columnas' and claves:
+        valor = valor if isinstance(valor, dict) else {}
+        return [_texto_json(valor.get(clave)) for clave in claves]
+    if modo_json == 'columnas' and isinstance(valor, list):
+        return [_resumir_lista(valor)]
+    return [_texto_json(valor)]
+
+
+def _texto_json(valor):
+    if valor is None or isinstance(valor, (str, int, float, bool)):
+        return valor
+    return json.dumps(valor, ensure_ascii=False)
+
+
+def filas(recurso, filtros=None, modo_json='texto'):
+    """
+    Genera las filas (listas de celdas) del recurso. Lee por bloques de
+    EXPORTACION_CHUNK filas (cursor de servidor en PostgreSQL).
+    """
+    definicion = RECURSOS[recurso]
+    campos = [campo for _, campo in definicion.columnas]
+    json_campos = [] if modo_json == 'omitir' else list(definicion.json)
+    n = len(campos)
+    consulta = queryset(recurso, filtros).values_list(*campos, *json_campos)
+    for valores in consulta.iterator(chunk_size=settings.EXPORTACION_CHUNK):
+        fila = [_celda(valor) for valor in valores[:n]]
+        for campo, valor in zip(json_campos, valores[n:]):
+            fila.extend(_aplanar(campo, valor, modo_json))
+        yield [_sin_formula(celda) for celda in fila]
+
+
+def supera_limite_sincrono(recurso, filtros=None):
+    """True si la exportación debe ir a segundo plano (sin contar toda la tabla)."""
+    limite = settings.EXPORTACION_MAX_FILAS_SINCRONA
+    return queryset(recurso, filtros).values('pk')[limite:limite + 1].exists()
+
+
+# =====================================================
+# ESCRITURA
+# =====================================================
+
+class _Eco:
+    """Pseudo-archivo: write() devuelve lo escrito, para transmitir csv.writer."""
+
+    def write(self, valor):
+        return valor
+
+
+def lineas_csv(recurso, filtros=None, modo_json='texto'):
+    """Líneas CSV (con BOM para que Excel detecte UTF-8)."""
+    escritor = csv.writer(_Eco())
+    yield '\ufeff' + escritor.writerow(encabezados(recurso, modo_json))
+    for fila in filas(recurso, filtros, modo_json):
+        yield escritor.writerow(fila)
+
+
+def xlsx_disponible():
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def escribir(archivo, recurso, formato, filtros=None, modo_json='texto'):
+    """
+    Escribe la exportación en `archivo` (binario, abierto para escritura).
+    Retorna el número de filas escritas.
+    """
+    total = 0
+    if formato == 'csv':
+        for linea in lineas_csv(recurso, filtros, modo_json):
+            archivo.write(linea.encode('utf-8'))
+            total += 1
+        return total - 1
+
+    from openpyxl import Workbook
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet(recurso)
+    hoja.append(encabezados(recurso, modo_json))
+    for fila in filas(recurso, filtros, modo_json):
+        hoja.append(fila)
+        total += 1
+    libro.save(archivo)
+    return total
+
+
+def nombre_archivo(recurso, formato):
+    return f"{recurso}_{timezone.localtime():%Y%m%d_%H%M%S}.{formato}"
+
+
+def respuesta(recurso, formato, filtros=None, modo_json='texto'):
+    """Respuesta HTTP con la exportación completa (modo síncrono)."""
+    disposicion = f'attachment; filename="{nombre_archivo(recurso, formato)}"'
+    if formato == 'csv':
+        response = StreamingHttpResponse(
+            lineas_csv(recurso, filtros, modo_json),
+            content_type=CONTENT_TYPES['csv'],
+        )
+    else:
+        # El ZIP del XLSX se arma al final: se escribe a un temporal y se envía
+        temporal = tempfile.TemporaryFile()
+        escribir(temporal, recurso, formato, filtros, modo_json)
+        temporal.seek(0)
+        response = FileResponse(temporal, content_type=CONTENT_TYPES['xlsx'])
+    response['Content-Disposition'] = disposicion
+    response['Cache-Control'] = 'private, no-store'
+    return response
+
+
+# =====================================================
+# SEGUNDO PLANO
+# =====================================================
+
+def generar(exportacion):
+    """
+    Genera el archivo de una Exportacion pendiente y lo guarda en el
+    storage (media protegida). Lo ejecuta la tarea core.generar_exportacion.
+    """
+    from django.core.files import File
+
+    exportacion.estado = 'procesando'
+    exportacion.save(update_fields=['estado'])
+    parametros = exportacion.parametros or {}
+    with tempfile.NamedTemporaryFile(suffix=f'.{exportacion.formato}') as temporal:
+        total = escribir(
+            temporal, exportacion.recurso, exportacion.formato,
+            parametros.get('filtros'), parametros.get('json', 'texto')
+        )
+        temporal.seek(0)
+        exportacion.archivo.save(
+            nombre_archivo(exportacion.recurso, exportacion.formato),
+            File(temporal), save=False
+        )
+    exportacion.filas = total
+    exportacion.estado = 'completada'
+    exportacion.completada_en = timezone.now()
+    exportacion.save(update_fields=['archivo', 'filas', 'estado', 'completada_en'])
+    return exportacion
+
+
+def purgar(ahora=None):
+    """Elimina las exportaciones (y sus archivos) más viejas que la retención."""
+    from datetime import timedelta
+
+    from .models import Exportacion
+
+    ahora = ahora or timezone.now()
+    limite = ahora - timedelta(days=settings.EXPORTACION_RETENCION_DIAS)
+    viejas = Exportacion.objects.filter(created_at__lt=limite)
+    eliminadas = 0
+    for exportacion in viejas.iterator():
+        if exportacion.archivo:
+            exportacion.archivo.delete(save=False)
+        exportacion.delete()
+        eliminadas += 1
+    return eliminadas
+
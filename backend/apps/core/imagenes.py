@@ -0,0 +1,134 @@
+"""
+Derivados de imágenes (miniaturas y vistas previas web).
+
+Los derivados se guardan junto al original en el mismo storage, con un sufijo
+en el nombre, y se registran en campos dedicados del modelo para no tener que
+descargar el original a resolución completa.
+"""
+import logging
+import os
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONES_IMAGEN = ('.jpg', '.jpeg', '.png')
+
+# modelo -> (campo origen, {campo derivado: (sufijo, tamaño máximo)})
+DERIVADOS = {
+    'solicitudes.Documento': ('archivo', {
+        'vista_previa': ('web', settings.IMAGEN_VISTA_PREVIA_TAMANO),
+        'miniatura': ('miniatura', settings.IMAGEN_MINIATURA_TAMANO),
+    }),
+    'usuarios.Usuario': ('foto_perfil', {
+        'foto_perfil_miniatura': ('miniatura', settings.IMAGEN_MINIATURA_TAMANO),
+    }),
+}
+
+
+def es_imagen(nombre):
+    """Indica si el archivo tiene una extensión de imagen soportada."""
+    return bool(nombre) and nombre.lower().endswith(EXTENSIONES_IMAGEN)
+
+
+def ruta_derivado(nombre, sufijo):
+    """
+    Nombre del derivado junto al original.
+    'solicitudes/documentos/2025/01/pasaporte.png' -> '.../pasaporte_web.jpg'
+    """
+    base, _ = os.path.splitext(nombre)
+    return f"{base}_{sufijo}.jpg"
+
+
+def _abrir_imagen(archivo, tamano_maximo):
+    """Abre la imagen aplicando orientación EXIF y la convierte a RGB."""
+    from PIL import Image, ImageOps
+
+    with archivo.open('rb') as f:
+        imagen = Image.open(f)
+        # En JPEG, draft() decodifica directamente a una escala reducida
+        imagen.draft('RGB', tamano_maximo)
+        imagen.load()
+
+    imagen = ImageOps.exif_transpose(imagen)
+    if imagen.mode in ('RGBA', 'LA', 'P'):
+        imagen = imagen.convert('RGBA')
+        fondo = Image.new('RGB', imagen.size, (255, 255, 255))
+        fondo.paste(imagen, mask=imagen.split()[-1])
+        return fondo
+    return imagen.convert('RGB')
+
+
+def generar_derivados(modelo, pk):
+    """
+    Genera los derivados configurados en DERIVADOS para un registro.
+
+    Args:
+        modelo: Etiqueta 'app_label.Modelo'
+        pk: Clave primaria del registro
+
+    Returns:
+        dict {campo derivado: nombre guardado}; vacío si no aplica.
+    """
+    from PIL import Image
+
+    campo_origen, destinos = DERIVADOS[modelo]
+    Modelo = apps.get_model(modelo)
+    instancia = Modelo._default_manager.filter(pk=pk).only(
+        'pk', campo_origen, *destinos
+    ).first()
+    if instancia is None:
+        return {}
+
+    archivo = getattr(instancia, campo_origen)
+    if not archivo or not es_imagen(archivo.name):
+        return {}
+
+    # Los tamaños se procesan de mayor a menor, reduciendo en cascada
+    orden = sorted(destinos.items(), key=lambda item: item[1][1][0], reverse=True)
+    imagen = _abrir_imagen(archivo, orden[0][1][1])
+    storage = archivo.storage
+    valores = {}
+
+    for campo, (sufijo, tamano) in orden:
+        imagen.thumbnail(tamano, Image.Resampling.LANCZOS, reducing_gap=3.0)
+        buffer = BytesIO()
+        imagen.save(
+            buffer, 'JPEG',
+            quality=settings.IMAGEN_CALIDAD_JPEG,
+            optimize=True,
+            progressive=True,
+        )
+        nombre = ruta_derivado(archivo.name, sufijo)
+        if storage.exists(nombre):
+            storage.delete(nombre)
+        valores[campo] = storage.save(nombre, ContentFile(buffer.getvalue()))
+
+    # update() evita disparar save()/auto_now sobre el registro original
+    Modelo._default_manager.filter(pk=pk).update(**valores)
+    return valores
+
+
+def pendientes(modelo):
+    """QuerySet de pks con imagen original pero sin todos sus derivados."""
+    from django.db.models import Q
+
+    campo_origen, destinos = DERIVADOS[modelo]
+    Modelo = apps.get_model(modelo)
+    sin_derivado = Q()
+    for campo in destinos:
+        sin_derivado |= Q(**{f'{campo}__isnull': True}) | Q(**{campo: ''})
+
+    filtro_imagen = Q()
+    for extension in EXTENSIONES_IMAGEN:
+        filtro_imagen |= Q(**{f'{campo_origen}__iendswith': extension})
+
+    return (
+        Modelo._default_manager
+        .filter(filtro_imagen)
+        .filter(sin_derivado)
+        .values_list('pk', flat=True)
+    )
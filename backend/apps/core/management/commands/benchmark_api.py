@@ -0,0 +1,207 @@
+"""
+Benchmark de los flujos principales de la API.
+
+Reproduce en proceso (django.test.Client, sin servidor HTTP) los endpoints
+de dashboards, listados, agendamiento y notificaciones con usuarios reales
+de cada rol, y reporta latencia p50/p95/p99 y consultas SQL por request.
+Pensado para ejecutarse sobre el dataset de `generar_dataset`.
+
+Uso:
+    python manage.py benchmark_api --repeticiones 50 --salida base.json
+    # ... cambios ...
+    python manage.py benchmark_api --repeticiones 50 --comparar base.json
+"""
+import json
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.usuarios.infrastructure.authentication import TokenUsuario
+from apps.usuarios.models import Usuario
+
+
+def _flujos():
+    """(nombre, rol, url) de los flujos a medir. Solo lecturas: no alteran datos."""
+    hoy = timezone.localdate()
+    manana = hoy + timedelta(days=1)
+    return [
+        # Cliente
+        ('perfil', 'cliente', reverse('usuarios:perfil')),
+        ('dashboard_cliente', 'cliente', reverse('solicitudes:estadisticas_cliente')),
+        ('mis_solicitudes', 'cliente', reverse('solicitudes:mis_solicitudes')),
+        ('simulacros_cliente', 'cliente', reverse('preparacion:simulacros_list')),
+        ('mis_recomendaciones', 'cliente', reverse('preparacion:mis_recomendaciones')),
+        ('notificaciones', 'cliente', reverse('notificaciones:list')),
+        ('notificaciones_no_leidas', 'cliente', reverse('notificaciones:conteo_no_leidas')),
+        ('horarios_entrevista', 'cliente',
+         f"{reverse('horarios-disponibles')}?fecha={manana.isoformat()}&embajada=usa"),
+        ('agenda_cliente', 'cliente',
+         f"{reverse('preparacion:disponibilidad')}?desde={manana.isoformat()}"
+         f"&hasta={(manana + timedelta(days=6)).isoformat()}"),
+        # Asesor
+        ('dashboard_asesor', 'asesor', reverse('solicitudes:estadisticas_asesor')),
+        ('solicitudes_asignadas', 'asesor', reverse('solicitudes:solicitudes_asignadas')),
+        ('solicitudes_pendientes', 'asesor', reverse('solicitudes:solicitudes_pendientes')),
+        ('simulacros_asesor', 'asesor', reverse('preparacion:simulacros_list')),
+        ('simulacros_completados', 'asesor', reverse('preparacion:simulacros_completados')),
+        ('entrevistas', 'asesor', reverse('entrevistas-list')),
+        ('entrevistas_proximas', 'asesor', reverse('entrevistas-proximas')),
+        ('calendario', 'asesor', f"{reverse('calendario-eventos')}?mes={hoy:%Y-%m}"),
+        ('notificaciones_asesor', 'asesor', reverse('notificaciones:asesor_list')),
+        ('agenda_asesor', 'asesor',
+         f"{reverse('preparacion:disponibilidad')}?desde={manana.isoformat()}"
+         f"&hasta={(manana + timedelta(days=6)).isoformat()}"),
+        # Administrador
+        ('dashboard_admin', 'admin', reverse('usuarios:admin_estadisticas')),
+        ('admin_asesores', 'admin', reverse('usuarios:admin_asesores_list')),
+    ]
+
+
+def _percentil(valores, p):
+    valores = sorted(valores)
+    indice = min(len(valores) - 1, int(round(p / 100 * (len(valores) - 1))))
+    return valores[indice]
+
+
+class Command(BaseCommand):
+    help = 'Mide latencia (p50/p95/p99) y consultas por request de los flujos principales'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=20)
+        parser.add_argument('--calentamiento', type=int, default=2,
+                            help='Requests descartados por flujo antes de medir')
+        parser.add_argument('--flujo', action='append', default=None,
+                            help='Medir solo estos flujos (repetible)')
+        parser.add_argument('--host', default='localhost')
+        parser.add_argument('--salida', default=None, help='Guardar resultados en JSON')
+        parser.add_argument('--comparar', default=None, help='JSON de una ejecución anterior')
+        parser.add_argument('--tolerancia', type=float, default=20.0,
+                            help='Aumento de p95 (%%) considerado regresión')
+        parser.add_argument('--fallar-en-regresion', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['repeticiones'] < 1:
+            raise CommandError('--repeticiones debe ser mayor que 0')
+
+        usuarios = self._usuarios()
+        flujos = [f for f in _flujos() if not options['flujo'] or f[0] in options['flujo']]
+
+        resultados = {}
+        for nombre, rol, url in flujos:
+            usuario = usuarios.get(rol)
+            if usuario is None:
+                self.stdout.write(self.style.WARNING(f'{nombre}: sin usuario {rol}, omitido'))
+                continue
+            resultados[nombre] = self._medir(url, usuario, options)
+
+        self._reportar(resultados)
+
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as f:
+                json.dump({
+                    'fecha': timezone.now().isoformat(),
+                    'motor': connection.vendor,
+                    'repeticiones': options['repeticiones'],
+                    'flujos': resultados,
+                }, f, indent=2)
+            self.stdout.write(f"Resultados guardados en {options['salida']}")
+
+        if options['comparar']:
+            regresiones = self._comparar(resultados, options)
+            if regresiones and options['fallar_en_regresion']:
+                raise CommandError(f'{regresiones} flujo(s) con regresión')
+
+    # =====================================================
+    # MEDICIÓN
+    # =====================================================
+
+    def _usuarios(self):
+        """El asesor con más solicitudes, uno de sus clientes y un administrador."""
+        asesor = (
+            Usuario.objects.filter(rol='asesor', is_active=True)
+            .annotate(total=Count('solicitudes_asignadas'))
+            .order_by('-total', 'pk')
+            .first()
+        )
+        cliente = None
+        if asesor is not None:
+            cliente = Usuario.objects.filter(
+                rol='cliente', is_active=True, solicitudes_como_cliente__asesor=asesor
+            ).order_by('pk').first()
+        if cliente is None:
+            cliente = Usuario.objects.filter(rol='cliente', is_active=True).order_by('pk').first()
+        admin = Usuario.objects.filter(rol='admin', is_active=True).order_by('pk').first()
+        return {'cliente': cliente, 'asesor': asesor, 'admin': admin}
+
+    def _medir(self, url, usuario, options):
+        token = TokenUsuario.for_user(usuario).access_token
+        client = Client(HTTP_HOST=options['host'], HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        for _ in range(options['calentamiento']):
+            client.get(url)
+
+        latencias, consultas, estados = [], [], set()
+        for _ in range(options['repeticiones']):
+            with CaptureQueriesContext(connection) as capturadas:
+                inicio = time.perf_counter()
+                response = client.get(url)
+                latencias.append((time.perf_counter() - inicio) * 1000)
+            consultas.append(len(capturadas))
+            estados.add(response.status_code)
+
+        return {
+            'p50': round(_percentil(latencias, 50), 2),
+            'p95': round(_percentil(latencias, 95), 2),
+            'p99': round(_percentil(latencias, 99), 2),
+            'media': round(statistics.mean(latencias), 2),
+            'consultas': max(consultas),
+            'estados': sorted(estados),
+        }
+
+    # =====================================================
+    # REPORTE
+    # =====================================================
+
+    def _reportar(self, resultados):
+        self.stdout.write(
+            f"{'flujo':<26}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'consultas':>11}  estado"
+        )
+        for nombre, r in resultados.items():
+            linea = (
+                f"{nombre:<26}{r['p50']:>9.1f}{r['p95']:>9.1f}{r['p99']:>9.1f}"
+                f"{r['consultas']:>11}  {','.join(map(str, r['estados']))}"
+            )
+            if any(e >= 400 for e in r['estados']):
+                linea = self.style.WARNING(linea)
+            self.stdout.write(linea)
+
+    def _comparar(self, resultados, options):
+        with open(options['comparar'], encoding='utf-8') as f:
+            base = json.load(f)['flujos']
+
+        self.stdout.write(f"\nComparación con {options['comparar']}:")
+        regresiones = 0
+        for nombre, r in resultados.items():
+            anterior = base.get(nombre)
+            if anterior is None:
+                continue
+            delta = (r['p95'] - anterior['p95']) / max(anterior['p95'], 1e-9) * 100
+            mas_consultas = r['consultas'] - anterior['consultas']
+            linea = (
+                f"{nombre:<26} p95 {anterior['p95']:.1f} -> {r['p95']:.1f} ms ({delta:+.0f}%) "
+                f"consultas {anterior['consultas']} -> {r['consultas']}"
+            )
+            if delta > options['tolerancia'] or mas_consultas > 0:
+                regresiones += 1
+                self.stdout.write(self.style.ERROR(linea + '  REGRESIÓN'))
+            else:
+                self.stdout.write(linea)
+        return regresiones
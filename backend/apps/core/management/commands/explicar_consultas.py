@@ -0,0 +1,92 @@
+"""
+Verifica con EXPLAIN los planes de las consultas calientes.
+
+Ejecuta EXPLAIN sobre los accesos más frecuentes a solicitudes y
+simulacros (por cliente, por asesor y estado, por fecha de asignación)
+y muestra si el motor usa el índice parcial esperado, con el tiempo
+mediano de cada consulta. Pensado para correr sobre el dataset de
+`generar_dataset`. La verificación de los índices en CI está en
+apps/core/tests/test_indices.py.
+
+Uso:
+    python manage.py explicar_consultas
+"""
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.utils import timezone
+
+from apps.preparacion.models import Simulacro
+from apps.solicitudes.models import Entrevista, Solicitud
+from apps.usuarios.models import Usuario
+
+
+def consultas_calientes(cliente, asesor):
+    """(nombre, queryset, índice esperado) de los accesos calientes."""
+    ahora = timezone.now()
+    return [
+        ('solicitudes_cliente_estado',
+         Solicitud.objects.filter(cliente=cliente, estado='pendiente'),
+         'solicitud_cliente_estado_viva'),
+        ('solicitudes_asesor_estado',
+         Solicitud.objects.filter(asesor=asesor, estado='en_revision'),
+         'solicitud_asesor_estado_viva'),
+        ('solicitudes_asesor_asignacion',
+         Solicitud.objects.filter(asesor=asesor).order_by('-fecha_asignacion'),
+         'solicitud_asesor_fasig_viva'),
+        ('simulacros_cliente_estado',
+         Simulacro.objects.filter(cliente=cliente, estado='confirmado'),
+         'simulacro_cliente_est_viva'),
+        ('simulacros_asesor_estado_fecha',
+         Simulacro.objects.filter(asesor=asesor, estado='completado').order_by('-fecha'),
+         'simulacro_asesor_est_viva'),
+        ('simulacros_estado_programado',
+         Simulacro.objects.filter(estado='confirmado', programado_en__gte=ahora),
+         'simulacro_estado_prog_viva'),
+        ('entrevistas_estado_programado',
+         Entrevista.objects.filter(estado='agendada', programado_en__gte=ahora),
+         'entrevista_estado_prog'),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Muestra el plan (EXPLAIN) de las consultas calientes y si usan sus índices'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=20,
+                            help='Ejecuciones por consulta para medir el tiempo')
+        parser.add_argument('--sin-plan', action='store_true',
+                            help='No imprimir el plan completo')
+
+    def handle(self, *args, **options):
+        asesor = (
+            Usuario.objects.filter(rol='asesor')
+            .annotate(total=Count('solicitudes_asignadas'))
+            .order_by('-total', 'pk')
+            .first()
+        )
+        solicitud = Solicitud.objects.filter(asesor=asesor).order_by('pk').first()
+        if asesor is None or solicitud is None:
+            raise CommandError('No hay datos: ejecuta primero `manage.py generar_dataset`')
+
+        for nombre, queryset, indice in consultas_calientes(solicitud.cliente_id, asesor):
+            plan = queryset.explain()
+            tiempos = []
+            for _ in range(options['repeticiones']):
+                inicio = time.perf_counter()
+                list(queryset.all())
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+
+            usa_indice = indice in plan
+            estado = self.style.SUCCESS('OK') if usa_indice else self.style.ERROR('SIN ÍNDICE')
+            self.stdout.write(
+                f'{nombre:<32} {statistics.median(tiempos):>8.2f} ms  {indice:<30} {estado}'
+            )
+            if not options['sin_plan']:
+                for linea in plan.splitlines():
+                    self.stdout.write(f'    {linea}')
+
+        self.stdout.write(f'\nMotor: {connection.vendor}')
@@ -0,0 +1,26 @@
+"""
+Genera el valor de la cabecera X-Perfilar para perfilar requests concretos.
+
+Uso:
+    python manage.py firmar_perfilado --nota "ticket 123: asignadas lento"
+    curl -H "X-Perfilar: <token>" -H "Authorization: Bearer ..." https://.../api/...
+
+El perfil queda en el admin (Core > Perfiles de requests) y la respuesta
+incluye la cabecera X-Perfil-Id con su identificador.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.core.perfilado import firmar_cabecera
+
+
+class Command(BaseCommand):
+    help = 'Genera un token firmado para la cabecera X-Perfilar'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--nota', default='', help='Texto guardado con cada perfil')
+
+    def handle(self, *args, **options):
+        self.stdout.write(firmar_cabecera(options['nota']))
+        horas = settings.PERFILADO_FIRMA_MAX_AGE // 3600
+        self.stderr.write(f'Válido durante {horas} h. Cabecera: X-Perfilar: <token>')
@@ -0,0 +1,348 @@
+"""
+Genera un dataset sintético y reproducible para pruebas de carga.
+
+Crea asesores, clientes, solicitudes (con su historial de estados),
+documentos, entrevistas, simulacros, recomendaciones y notificaciones
+con bulk_create, en bloques de asesores
+para mantener acotada la memoria aunque se generen millones de filas.
+Los usuarios generados usan el dominio @dataset.local.
+
+Uso:
+    python manage.py generar_dataset                      # ~50k filas
+    python manage.py generar_dataset --asesores 10000     # millones de filas
+    python manage.py generar_dataset --limpiar --semilla 7
+
+Los archivos de documentos no se escriben en disco (solo la ruta).
+Después de generar, reconstruir el índice de búsqueda si se necesita:
+    python manage.py reindexar_busqueda
+"""
+import random
+import time
+from datetime import date, time as hora, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.models import combinar_fecha_hora
+from apps.notificaciones.models import Notificacion
+from apps.preparacion.models import Recomendacion, Simulacro
+from apps.solicitudes.models import Documento, Entrevista, EstadoSolicitud, Solicitud, recalcular_contadores
+from apps.usuarios.models import Usuario
+
+DOMINIO = 'dataset.local'
+PASSWORD = 'Dataset123!'
+
+NOMBRES = [
+    'Ana', 'Luis', 'María', 'José', 'Carmen', 'Jorge', 'Lucía', 'Pedro',
+    'Sofía', 'Diego', 'Valeria', 'Andrés', 'Camila', 'Miguel', 'Paula', 'Carlos',
+]
+APELLIDOS = [
+    'García', 'Rodríguez', 'López', 'Martínez', 'Pérez', 'Gómez', 'Sánchez',
+    'Torres', 'Ramírez', 'Flores', 'Vargas', 'Castro', 'Mendoza', 'Herrera',
+]
+DOCUMENTOS = [
+    'Pasaporte', 'Foto tipo carnet', 'Certificado bancario', 'Carta de empleo',
+    'Certificado de estudios', 'Antecedentes penales', 'Formulario DS-160',
+]
+
+# (valor, peso) según la distribución observada en producción
+ESTADOS_SOLICITUD = [
+    ('borrador', 5), ('pendiente', 15), ('en_revision', 20), ('aprobada', 15),
+    ('rechazada', 5), ('enviada_embajada', 15), ('entrevista_agendada', 15),
+    ('completada', 10),
+]
+ESTADOS_SIMULACRO = [
+    ('solicitado', 10), ('propuesto', 10), ('pendiente_respuesta', 5),
+    ('confirmado', 20), ('completado', 40), ('cancelado', 10), ('no_asistio', 5),
+]
+ESTADOS_DOCUMENTO = [('pendiente', 40), ('aprobado', 50), ('rechazado', 10)]
+ESTADOS_ENTREVISTA = [
+    ('agendada', 40), ('confirmada', 25), ('reprogramada', 10),
+    ('cancelada', 5), ('completada', 20),
+]
+TIPOS_NOTIFICACION = [
+    'solicitud_asignada', 'solicitud_aprobada', 'documento_aprobado',
+    'documento_rechazado', 'entrevista_agendada', 'recordatorio_entrevista',
+    'simulacro_propuesto', 'simulacro_confirmado', 'recomendaciones_listas', 'general',
+]
+
+# Recorrido normal de una solicitud y permanencia media en cada estado (horas)
+CAMINO_SOLICITUD = [
+    'borrador', 'pendiente', 'en_revision', 'aprobada',
+    'enviada_embajada', 'entrevista_agendada', 'completada',
+]
+PERMANENCIA_MEDIA = {
+    'borrador': 24, 'pendiente': 48, 'en_revision': 72, 'aprobada': 36,
+    'enviada_embajada': 240, 'entrevista_agendada': 336,
+}
+
+# Solicitudes que ya tienen entrevista con la embajada
+CON_ENTREVISTA = {'entrevista_agendada', 'completada'}
+
+
+def _elegir(rng, opciones):
+    valores, pesos = zip(*opciones)
+    return rng.choices(valores, weights=pesos)[0]
+
+
+def _camino(rng, estado):
+    """Estados recorridos hasta `estado` (rechazada sale desde pendiente o revisión)."""
+    if estado == 'rechazada':
+        return CAMINO_SOLICITUD[:rng.choice((2, 3))] + ['rechazada']
+    inicio = 0 if estado == 'borrador' or rng.random() < 0.3 else 1
+    return CAMINO_SOLICITUD[inicio:CAMINO_SOLICITUD.index(estado) + 1]
+
+
+class Command(BaseCommand):
+    help = 'Genera un dataset sintético reproducible con bulk_create'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--asesores', type=int, default=100)
+        parser.add_argument('--clientes-por-asesor', type=int, default=20)
+        parser.add_argument('--solicitudes-por-cliente', type=float, default=1.5,
+                            help='Promedio de solicitudes por cliente')
+        parser.add_argument('--documentos-por-solicitud', type=int, default=4)
+        parser.add_argument('--simulacros-por-cliente', type=float, default=1.0,
+                            help='Promedio de simulacros por cliente')
+        parser.add_argument('--notificaciones-por-usuario', type=int, default=10)
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--bloque', type=int, default=50,
+                            help='Asesores generados por transacción')
+        parser.add_argument('--lote', type=int, default=2000,
+                            help='Filas por INSERT (batch_size)')
+        parser.add_argument('--limpiar', action='store_true',
+                            help=f'Eliminar antes el dataset existente (@{DOMINIO})')
+
+    def handle(self, *args, **options):
+        existentes = Usuario.objects.filter(email__endswith=f'@{DOMINIO}')
+        if options['limpiar']:
+            self.stdout.write('Eliminando dataset anterior...')
+            self._limpiar(existentes)
+        elif existentes.exists():
+            raise CommandError(f'Ya existe un dataset (@{DOMINIO}). Use --limpiar para regenerarlo.')
+
+        self.rng = random.Random(options['semilla'])
+        self.opciones = options
+        self.password = make_password(PASSWORD)
+        self.hoy = timezone.localdate()
+        self.totales = dict.fromkeys(
+            ['usuarios', 'solicitudes', 'historial', 'documentos', 'entrevistas',
+             'simulacros', 'recomendaciones', 'notificaciones'], 0
+        )
+
+        inicio = time.perf_counter()
+        for desde in range(0, options['asesores'], options['bloque']):
+            hasta = min(desde + options['bloque'], options['asesores'])
+            with transaction.atomic():
+                self._generar_bloque(desde, hasta)
+            self.stdout.write(
+                f"  asesores {hasta}/{options['asesores']} | "
+                + ' '.join(f'{k}={v}' for k, v in self.totales.items())
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Dataset generado en {time.perf_counter() - inicio:.1f}s '
+            f'({sum(self.totales.values())} filas). Contraseña: {PASSWORD}'
+        ))
+
+    def _limpiar(self, usuarios):
+        """
+        Borra el dataset de abajo hacia arriba: solicitudes y simulacros
+        protegen a su cliente (PROTECT), y se borran con all_objects para
+        incluir los eliminados lógicamente.
+        """
+        solicitudes = Solicitud.all_objects.filter(cliente__in=usuarios)
+        with transaction.atomic():
+            Notificacion.objects.filter(usuario__in=usuarios).delete()
+            Simulacro.all_objects.filter(cliente__in=usuarios).delete()
+            Documento.objects.filter(solicitud__in=solicitudes).delete()
+            EstadoSolicitud.objects.filter(solicitud__in=solicitudes).delete()
+            solicitudes.delete()
+            usuarios.delete()
+
+    # =====================================================
+    # GENERACIÓN POR BLOQUE
+    # =====================================================
+
+    def _crear(self, modelo, objetos, total):
+        creados = modelo.objects.bulk_create(objetos, batch_size=self.opciones['lote'])
+        self.totales[total] += len(creados)
+        return creados
+
+    def _usuario(self, rol, numero):
+        return Usuario(
+            email=f'{rol}{numero}@{DOMINIO}',
+            password=self.password,
+            first_name=self.rng.choice(NOMBRES),
+            last_name=self.rng.choice(APELLIDOS),
+            rol=rol,
+            is_staff=rol == 'asesor',
+            telefono=f'09{self.rng.randint(10_000_000, 99_999_999)}',
+        )
+
+    def _fecha(self, dias_atras, dias_adelante):
+        return self.hoy + timedelta(days=self.rng.randint(-dias_atras, dias_adelante))
+
+    def _hora(self):
+        return hora(self.rng.randint(8, 17), self.rng.choice((0, 30)))
+
+    def _cantidad(self, promedio):
+        """Entero aleatorio con la media indicada."""
+        base = int(promedio)
+        return base + (1 if self.rng.random() < promedio - base else 0)
+
+    def _generar_bloque(self, desde, hasta):
+        rng = self.rng
+        o = self.opciones
+        ahora = timezone.now()
+
+        asesores = self._crear(
+            Usuario, [self._usuario('asesor', n) for n in range(desde, hasta)], 'usuarios'
+        )
+        clientes = self._crear(Usuario, [
+            self._usuario('cliente', n * o['clientes_por_asesor'] + i)
+            for n in range(desde, hasta)
+            for i in range(o['clientes_por_asesor'])
+        ], 'usuarios')
+        asesor_de = {
+            c.pk: asesores[i // o['clientes_por_asesor']] for i, c in enumerate(clientes)
+        }
+
+        # Solicitudes, con fechas de transición que terminan antes de `ahora`
+        solicitudes, transiciones = [], []
+        for cliente in clientes:
+            for _ in range(self._cantidad(o['solicitudes_por_cliente'])):
+                estado = _elegir(rng, ESTADOS_SOLICITUD)
+                asignada = estado not in ('borrador', 'pendiente')
+                camino = _camino(rng, estado)
+                duraciones = [
+                    timedelta(hours=rng.expovariate(1 / PERMANENCIA_MEDIA[e])) for e in camino[:-1]
+                ]
+                momento = ahora - sum(duraciones, timedelta()) - timedelta(
+                    hours=rng.uniform(0, PERMANENCIA_MEDIA.get(estado, 48))
+                )
+                fechas = [momento]
+                for duracion in duraciones:
+                    momento += duracion
+                    fechas.append(momento)
+                transiciones.append(list(zip(camino, fechas)))
+                solicitudes.append(Solicitud(
+                    created_at=fechas[0],
+                    cliente=cliente,
+                    asesor=asesor_de[cliente.pk] if asignada else None,
+                    tipo_visa=rng.choice(('vivienda', 'trabajo', 'estudio')),
+                    embajada=rng.choice(('usa', 'brasil', 'canada', 'espana')),
+                    estado=estado,
+                    datos_personales={
+                        'nombres': cliente.first_name,
+                        'apellidos': cliente.last_name,
+                        'pasaporte': f'P{rng.randint(1_000_000, 9_999_999)}',
+                        'nacionalidad': 'Ecuatoriana',
+                        'fecha_nacimiento': str(date(rng.randint(1960, 2004), rng.randint(1, 12), rng.randint(1, 28))),
+                    },
+                    fecha_asignacion=ahora - timedelta(days=rng.randint(1, 120)) if asignada else None,
+                ))
+        solicitudes = self._crear(Solicitud, solicitudes, 'solicitudes')
+        self._crear(EstadoSolicitud, [
+            EstadoSolicitud(
+                solicitud=solicitud,
+                estado_anterior=camino[i - 1][0] if i else None,
+                estado_nuevo=estado,
+                created_at=fecha,
+            )
+            for solicitud, camino in zip(solicitudes, transiciones)
+            for i, (estado, fecha) in enumerate(camino)
+        ], 'historial')
+
+        # Documentos y entrevistas
+        documentos, entrevistas = [], []
+        for solicitud in solicitudes:
+            for nombre in rng.sample(DOCUMENTOS, min(o['documentos_por_solicitud'], len(DOCUMENTOS))):
+                estado = _elegir(rng, ESTADOS_DOCUMENTO)
+                revisado = estado != 'pendiente' and solicitud.asesor is not None
+                documentos.append(Documento(
+                    solicitud=solicitud,
+                    nombre=nombre,
+                    archivo=f'documentos/dataset/{solicitud.pk}/{nombre.lower().replace(" ", "_")}.pdf',
+                    estado=estado if revisado else 'pendiente',
+                    motivo_rechazo='Documento ilegible' if revisado and estado == 'rechazado' else '',
+                    revisado_por=solicitud.asesor if revisado else None,
+                    fecha_revision=ahora - timedelta(days=rng.randint(0, 60)) if revisado else None,
+                ))
+            if solicitud.estado in CON_ENTREVISTA:
+                fecha_entrevista, hora_entrevista = self._fecha(30, 60), self._hora()
+                entrevistas.append(Entrevista(
+                    solicitud=solicitud,
+                    fecha=fecha_entrevista,
+                    hora=hora_entrevista,
+                    programado_en=combinar_fecha_hora(fecha_entrevista, hora_entrevista),
+                    ubicacion=f'Embajada {solicitud.get_embajada_display()}',
+                    estado='completada' if solicitud.estado == 'completada' else _elegir(rng, ESTADOS_ENTREVISTA),
+                ))
+        self._crear(Documento, documentos, 'documentos')
+        # bulk_create no pasa por Documento.save(): contadores de una vez
+        if solicitudes:
+            recalcular_contadores(Solicitud.all_objects.filter(
+                pk__range=(solicitudes[0].pk, solicitudes[-1].pk)
+            ))
+        self._crear(Entrevista, entrevistas, 'entrevistas')
+
+        # Simulacros y recomendaciones
+        simulacros = []
+        for cliente in clientes:
+            for _ in range(self._cantidad(o['simulacros_por_cliente'])):
+                estado = _elegir(rng, ESTADOS_SIMULACRO)
+                completado = estado == 'completado'
+                fecha = self._fecha(90, 0) if completado else self._fecha(10, 30)
+                hora_simulacro = self._hora()
+                simulacros.append(Simulacro(
+                    cliente=cliente,
+                    asesor=asesor_de[cliente.pk],
+                    fecha=fecha,
+                    hora=hora_simulacro,
+                    programado_en=combinar_fecha_hora(fecha, hora_simulacro),
+                    modalidad=rng.choice(('virtual', 'presencial')),
+                    estado=estado,
+                    duracion_minutos=rng.randint(20, 45) if completado else 0,
+                    analisis_ia_completado=completado,
+                    motivo_cancelacion='Conflicto de horario' if estado == 'cancelado' else '',
+                ))
+        simulacros = self._crear(Simulacro, simulacros, 'simulacros')
+
+        niveles = ('bajo', 'medio', 'alto')
+        self._crear(Recomendacion, [
+            Recomendacion(
+                simulacro=simulacro,
+                estado_feedback='generado',
+                claridad=rng.choice(niveles),
+                coherencia=rng.choice(niveles),
+                seguridad=rng.choice(niveles),
+                pertinencia=rng.choice(niveles),
+                nivel_preparacion=rng.choice(niveles),
+                fortalezas=[{'categoria': 'Comunicación', 'descripcion': 'Respuestas claras y directas', 'impacto': 'alto'}],
+                puntos_mejora=[{'categoria': 'Finanzas', 'descripcion': 'Detallar el sustento económico del viaje', 'impacto': 'medio'}],
+                recomendaciones=[{'titulo': 'Preparar documentos de solvencia', 'prioridad': 'alta'}],
+                accion_sugerida='Practicar preguntas sobre vínculos con el país de origen',
+                resumen_ejecutivo='El solicitante muestra una preparación adecuada con áreas puntuales de mejora.',
+                publicada=rng.random() < 0.8,
+                fecha_generacion=ahora - timedelta(days=rng.randint(0, 90)),
+            )
+            for simulacro in simulacros if simulacro.estado == 'completado'
+        ], 'recomendaciones')
+
+        # Notificaciones
+        notificaciones = []
+        for usuario in list(asesores) + list(clientes):
+            for _ in range(o['notificaciones_por_usuario']):
+                leida = rng.random() < 0.6
+                notificaciones.append(Notificacion(
+                    usuario=usuario,
+                    tipo=rng.choice(TIPOS_NOTIFICACION),
+                    titulo='Actualización de su trámite',
+                    mensaje='Hay novedades en su proceso migratorio.',
+                    leida=leida,
+                    fecha_lectura=ahora - timedelta(hours=rng.randint(1, 500)) if leida else None,
+                ))
+        self._crear(Notificacion, notificaciones, 'notificaciones')
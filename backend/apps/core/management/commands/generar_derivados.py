@@ -0,0 +1,86 @@
+"""
+Genera miniaturas y vistas previas para imágenes ya existentes.
+
+Uso:
+    python manage.py generar_derivados
+    python manage.py generar_derivados --modelo solicitudes.Documento --workers 8
+    python manage.py generar_derivados --encolar   # delega en los workers de Celery
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from apps.core.imagenes import DERIVADOS, generar_derivados, pendientes
+
+
+def _procesar(modelo, pk):
+    """Ejecuta la generación en un hilo del pool con su propia conexión."""
+    close_old_connections()
+    try:
+        return generar_derivados(modelo, pk)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = 'Genera derivados (miniatura/vista previa) de las imágenes existentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--modelo',
+            choices=sorted(DERIVADOS),
+            help='Procesar solo este modelo (por defecto: todos)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Tamaño del pool de procesamiento (por defecto: 4)',
+        )
+        parser.add_argument(
+            '--limite',
+            type=int,
+            default=None,
+            help='Máximo de registros a procesar por modelo',
+        )
+        parser.add_argument(
+            '--encolar',
+            action='store_true',
+            help='Encolar tareas de Celery en lugar de procesar localmente',
+        )
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers debe ser mayor o igual a 1')
+
+        modelos = [options['modelo']] if options['modelo'] else sorted(DERIVADOS)
+        for modelo in modelos:
+            pks = list(pendientes(modelo).order_by('pk')[:options['limite']])
+            self.stdout.write(f'{modelo}: {len(pks)} imágenes pendientes')
+            if not pks:
+                continue
+
+            if options['encolar']:
+                from apps.core.tasks import generar_derivados_imagen
+                for pk in pks:
+                    generar_derivados_imagen.delay(modelo, pk)
+                self.stdout.write(self.style.SUCCESS(f'  - Encoladas {len(pks)} tareas'))
+                continue
+
+            procesados = errores = 0
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                futuros = {pool.submit(_procesar, modelo, pk): pk for pk in pks}
+                for futuro in as_completed(futuros):
+                    try:
+                        futuro.result()
+                        procesados += 1
+                    except Exception as e:
+                        errores += 1
+                        self.stdout.write(self.style.ERROR(
+                            f'  - Error en {modelo}#{futuros[futuro]}: {e}'
+                        ))
+
+            self.stdout.write(self.style.SUCCESS(
+                f'  - Procesadas {procesados} imágenes ({errores} errores)'
+            ))
@@ -0,0 +1,158 @@
+"""
+Perfil del tiempo de arranque del proceso Django.
+
+Ejecuta en subprocesos limpios (`python -X importtime`) los arranques que
+más importan al escalar: `manage.py check` (lo mismo que carga un pod web
+antes de atender) y el arranque en frío de un worker (django.setup() más
+los módulos de tareas). Reporta el costo de importación por módulo y por
+paquete, y verifica el presupuesto de ARRANQUE_PRESUPUESTO_MS y que los
+módulos de ARRANQUE_MODULOS_DIFERIDOS no se importen al arrancar.
+
+Uso:
+    python manage.py perfil_arranque
+    python manage.py perfil_arranque --objetivo worker --top 40
+    python manage.py perfil_arranque --fallar   # CI: error si se excede el presupuesto
+"""
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+Importacion = namedtuple('Importacion', ['modulo', 'propio_us', 'acumulado_us', 'nivel'])
+
+# Arranque en frío de un worker: configuración de Celery (si está instalado),
+# django.setup() y los módulos tasks de cada app (lo que hace autodiscover).
+SCRIPT_WORKER = """
+import importlib
+try:
+    import celery  # noqa
+except ImportError:
+    pass
+else:
+    import config.celery  # noqa
+import django
+django.setup()
+from django.apps import apps
+for app in apps.get_app_configs():
+    try:
+        importlib.import_module(app.name + '.tasks')
+    except ModuleNotFoundError as e:
+        if e.name != app.name + '.tasks':
+            raise
+"""
+
+OBJETIVOS = {
+    'check': ['manage.py', 'check'],
+    'worker': ['-c', SCRIPT_WORKER],
+}
+
+
+def parsear_importtime(salida):
+    """Líneas de `-X importtime` -> lista de Importacion."""
+    importaciones = []
+    for linea in salida.splitlines():
+        if not linea.startswith('import time:'):
+            continue
+        partes = linea[len('import time:'):].split('|')
+        if len(partes) != 3 or not partes[0].strip().isdigit():
+            continue  # cabecera
+        nombre = partes[2].rstrip()
+        importaciones.append(Importacion(
+            nombre.strip(),
+            int(partes[0]),
+            int(partes[1]),
+            (len(nombre) - len(nombre.lstrip())) // 2,
+        ))
+    return importaciones
+
+
+class Command(BaseCommand):
+    help = 'Perfila el costo de importación y el tiempo de arranque (check y worker)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--objetivo', action='append', choices=sorted(OBJETIVOS),
+                            help='Arranque a medir (repetible; por defecto: todos)')
+        parser.add_argument('--repeticiones', type=int, default=3,
+                            help='Arranques por objetivo; se usa la mediana')
+        parser.add_argument('--top', type=int, default=20, help='Módulos a listar')
+        parser.add_argument('--presupuesto-ms', type=int, default=None,
+                            help='Sobrescribe ARRANQUE_PRESUPUESTO_MS para todos los objetivos')
+        parser.add_argument('--fallar', action='store_true',
+                            help='Error si se excede el presupuesto o se importa un módulo diferido')
+
+    def handle(self, *args, **options):
+        if options['repeticiones'] < 1:
+            raise CommandError('--repeticiones debe ser mayor que 0')
+
+        problemas = []
+        for objetivo in options['objetivo'] or sorted(OBJETIVOS):
+            problemas += self._perfilar(objetivo, options)
+
+        if problemas:
+            for problema in problemas:
+                self.stdout.write(self.style.ERROR(problema))
+            if options['fallar']:
+                raise CommandError(f'{len(problemas)} problema(s) de arranque')
+        else:
+            self.stdout.write(self.style.SUCCESS('Arranque dentro del presupuesto'))
+
+    def _ejecutar(self, objetivo):
+        inicio = time.perf_counter()
+        proceso = subprocess.run(
+            [sys.executable, '-X', 'importtime', *OBJETIVOS[objetivo]],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+        )
+        duracion_ms = (time.perf_counter() - inicio) * 1000
+        if proceso.returncode != 0:
+            errores = [l for l in proceso.stderr.splitlines() if not l.startswith('import time:')]
+            raise CommandError(f'El arranque "{objetivo}" falló:\n' + '\n'.join(errores[-20:]))
+        return duracion_ms, parsear_importtime(proceso.stderr)
+
+    def _perfilar(self, objetivo, options):
+        # El primer arranque compila .pyc y calienta la caché del sistema de archivos
+        self._ejecutar(objetivo)
+        duraciones, importaciones = [], []
+        for _ in range(options['repeticiones']):
+            duracion_ms, importaciones = self._ejecutar(objetivo)
+            duraciones.append(duracion_ms)
+        mediana = statistics.median(duraciones)
+
+        raiz = min((i.nivel for i in importaciones), default=0)
+        total_ms = sum(i.acumulado_us for i in importaciones if i.nivel == raiz) / 1000
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'\n{objetivo}: {mediana:.0f} ms de arranque (mediana de {len(duraciones)}), '
+            f'{total_ms:.0f} ms importando {len(importaciones)} módulos'
+        ))
+
+        self.stdout.write(f"{'acumulado ms':>13}{'propio ms':>11}  módulo")
+        for i in sorted(importaciones, key=lambda i: -i.acumulado_us)[:options['top']]:
+            self.stdout.write(
+                f'{i.acumulado_us / 1000:>13.1f}{i.propio_us / 1000:>11.1f}  {i.modulo}'
+            )
+
+        paquetes = defaultdict(int)
+        for i in importaciones:
+            paquetes[i.modulo.split('.')[0]] += i.propio_us
+        self.stdout.write(f"\n{'propio ms':>13}  paquete")
+        for paquete, propio in sorted(paquetes.items(), key=lambda p: -p[1])[:10]:
+            self.stdout.write(f'{propio / 1000:>13.1f}  {paquete}')
+
+        problemas = []
+        presupuesto = options['presupuesto_ms'] or settings.ARRANQUE_PRESUPUESTO_MS.get(objetivo)
+        if presupuesto and mediana > presupuesto:
+            problemas.append(f'{objetivo}: {mediana:.0f} ms supera el presupuesto de {presupuesto} ms')
+
+        importados = {i.modulo for i in importaciones}
+        for modulo in settings.ARRANQUE_MODULOS_DIFERIDOS:
+            if modulo in importados:
+                problemas.append(
+                    f'{objetivo}: "{modulo}" se importa al arrancar; impórtalo dentro de la '
+                    f'función que lo usa'
+                )
+        return problemas
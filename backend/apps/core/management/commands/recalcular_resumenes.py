@@ -0,0 +1,38 @@
+"""
+Reconstruye los resúmenes de métricas del dashboard admin.
+
+La tarea periódica solo toca la hora y el día en curso. Este comando
+rellena los flujos diarios históricos (al desplegar, o si beat estuvo
+detenido) y recalcula el periodo actual.
+
+Uso:
+    python manage.py recalcular_resumenes            # últimos 90 días
+    python manage.py recalcular_resumenes --dias 365
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.core.resumenes import actualizar, recalcular_dias
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los resúmenes de métricas (flujos diarios históricos y periodo actual)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=90,
+            help='Días hacia atrás a reconstruir (por defecto: 90)',
+        )
+
+    def handle(self, *args, **options):
+        hoy = timezone.localdate()
+        desde = hoy - timedelta(days=options['dias'])
+        recalcular_dias(desde, hoy - timedelta(days=1))
+        actualizar(forzar_existencias=True)
+        self.stdout.write(self.style.SUCCESS(
+            f"Resúmenes recalculados del {desde:%Y-%m-%d} al {hoy:%Y-%m-%d}"
+        ))
@@ -1,6 +1,6 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
-from apps.solicitudes.models import Solicitud, Documento
+from apps.solicitudes.models import Solicitud, Documento, recalcular_contadores
 from apps.preparacion.simulacion.models import Simulacro
 from apps.solicitudes.agendamiento.models import Entrevista
 from apps.notificaciones.coordinacion.models import NotificacionCoordinacion
@@ -46,6 +46,8 @@ class Command(BaseCommand):
         # Eliminar documentos
         try:
             count = Documento.objects.all().delete()[0]
+            # El borrado masivo no pasa por Documento.delete()
+            recalcular_contadores(Solicitud.all_objects.all())
             self.stdout.write(f'  - Eliminados {count} documentos')
         except Exception as e:
             self.stdout.write(self.style.ERROR(f'  - Error eliminando documentos: {e}'))
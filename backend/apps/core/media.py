@@ -0,0 +1,114 @@
+"""
+Servicio de archivos protegidos (media privada).
+
+Django solo autoriza la descarga; los bytes los entrega el servidor frontal
+mediante X-Accel-Redirect (nginx) o X-Sendfile (apache) usando sendfile.
+Las URLs firmadas (HMAC + timestamp) se validan sin consultar la base de datos.
+"""
+import mimetypes
+import os
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core import signing
+from django.http import FileResponse, Http404, HttpResponse
+from django.urls import reverse
+from django.utils._os import safe_join
+
+SALT_MEDIA = 'apps.core.media.url-firmada'
+
+# Tipo de un archivo comprimido que se entrega tal cual (sin Content-Encoding)
+TIPOS_COMPRIMIDOS = {
+    'gzip': 'application/gzip',
+    'bzip2': 'application/x-bzip2',
+    'xz': 'application/x-xz',
+    'br': 'application/x-brotli',
+}
+
+
+def firmar_ruta(nombre, descarga=False, decodificar=False):
+    """
+    Genera un token firmado para un archivo del storage.
+
+    Args:
+        nombre: Nombre relativo del archivo en MEDIA_ROOT (FieldFile.name)
+        descarga: Si True, se sirve como adjunto en lugar de inline
+        decodificar: Si True, un archivo comprimido (.gz) se entrega con
+            Content-Encoding para que el cliente lo descomprima
+    """
+    datos = {'r': nombre, 'd': int(descarga)}
+    if decodificar:
+        datos['z'] = 1
+    return signing.dumps(datos, salt=SALT_MEDIA, compress=True)
+
+
+def verificar_token(token, max_age=None):
+    """
+    Valida un token firmado y retorna (nombre, descarga, decodificar).
+    Lanza signing.BadSignature / signing.SignatureExpired si no es válido.
+    """
+    if max_age is None:
+        max_age = settings.MEDIA_URL_FIRMADA_MAX_AGE
+    datos = signing.loads(token, salt=SALT_MEDIA, max_age=max_age)
+    return datos['r'], bool(datos.get('d')), bool(datos.get('z'))
+
+
+def url_firmada(archivo, request=None, descarga=False, decodificar=False):
+    """
+    Construye la URL firmada y de corta duración para un FieldFile.
+    Retorna None si el campo está vacío.
+    """
+    if not archivo:
+        return None
+    token = firmar_ruta(archivo.name, descarga, decodificar)
+    ruta = reverse('core:media_firmada', kwargs={'token': token})
+    if request is not None:
+        return request.build_absolute_uri(ruta)
+    base_url = getattr(settings, 'SITE_URL', 'http://localhost:8000')
+    return f"{base_url}{ruta}"
+
+
+def respuesta_archivo(nombre, descarga=False, nombre_descarga=None, decodificar=False):
+    """
+    Construye la respuesta que entrega el archivo según MEDIA_SENDFILE_BACKEND:
+
+    - 'nginx': cabecera X-Accel-Redirect hacia la location interna.
+    - 'apache': cabecera X-Sendfile con la ruta absoluta.
+    - 'django': FileResponse (solo desarrollo; Python transmite los bytes).
+
+    Un archivo comprimido (p. ej. .txt.gz) se entrega como tal
+    (application/gzip). Solo con `decodificar` lleva el tipo del contenido
+    y Content-Encoding, y el cliente HTTP lo descomprime al recibirlo.
+    """
+    try:
+        ruta_absoluta = safe_join(settings.MEDIA_ROOT, nombre)
+    except Exception:
+        raise Http404('Archivo no encontrado')
+
+    backend = settings.MEDIA_SENDFILE_BACKEND
+    content_type, encoding = mimetypes.guess_type(nombre)
+    if encoding and not decodificar:
+        content_type = TIPOS_COMPRIMIDOS.get(encoding)
+        encoding = None
+    content_type = content_type or 'application/octet-stream'
+    if content_type.startswith('text/'):
+        content_type += '; charset=utf-8'
+    nombre_descarga = nombre_descarga or os.path.basename(nombre)
+
+    if backend == 'nginx':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_SENDFILE_PREFIX + quote(nombre)
+    elif backend == 'apache':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = ruta_absoluta
+    else:
+        if not os.path.isfile(ruta_absoluta):
+            raise Http404('Archivo no encontrado')
+        response = FileResponse(open(ruta_absoluta, 'rb'), content_type=content_type)
+
+    if encoding:
+        response['Content-Encoding'] = encoding
+    disposicion = 'attachment' if descarga else 'inline'
+    response['Content-Disposition'] = f"{disposicion}; filename*=UTF-8''{quote(nombre_descarga)}"
+    response['Cache-Control'] = 'private, no-store'
+    return response
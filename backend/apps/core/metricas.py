@@ -0,0 +1,209 @@
+"""
+Métricas por endpoint en formato de exposición de Prometheus.
+
+Cada request genera un conjunto de incrementos (muestras) que se agregan:
+- En memoria del proceso (un solo worker, desarrollo).
+- En un hash de Redis compartido por todos los workers (METRICAS_REDIS_URL);
+  los incrementos de un request se envían en un único pipeline.
+
+Los histogramas se guardan por bucket (no acumulados) y se acumulan al
+renderizar, para que cada observación cueste un solo incremento.
+"""
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CLAVE_REDIS = 'metricas'
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_CONSULTAS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+BUCKETS_BYTES = (256, 1024, 10_240, 102_400, 1_048_576, 10_485_760)
+BUCKETS_TAREAS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300)
+
+# nombre: (tipo, ayuda, buckets)
+METRICAS = {
+    'http_requests_total': (
+        'counter', 'Requests atendidos por vista, método y estado.', None
+    ),
+    'http_request_duration_seconds': (
+        'histogram', 'Latencia de los requests por vista.', BUCKETS_LATENCIA
+    ),
+    'http_response_size_bytes': (
+        'histogram', 'Tamaño de las respuestas por vista.', BUCKETS_BYTES
+    ),
+    'db_queries_per_request': (
+        'histogram', 'Consultas SQL ejecutadas por request.', BUCKETS_CONSULTAS
+    ),
+    'db_query_duration_seconds_total': (
+        'counter', 'Tiempo acumulado en consultas SQL por vista.', None
+    ),
+    'tareas_total': (
+        'counter', 'Tareas en segundo plano ejecutadas por el pool en proceso, por resultado.', None
+    ),
+    'tarea_duration_seconds': (
+        'histogram', 'Duración de las tareas del pool en proceso.', BUCKETS_TAREAS
+    ),
+}
+
+
+# =====================================================
+# MUESTRAS
+# =====================================================
+
+def _etiquetas(etiquetas):
+    return tuple(sorted(etiquetas.items()))
+
+
+def contador(nombre, etiquetas, valor=1):
+    """Muestra de un contador."""
+    return [((nombre, _etiquetas(etiquetas), ''), valor)]
+
+
+def histograma(nombre, etiquetas, valor):
+    """Muestras de una observación: su bucket, la suma y el conteo."""
+    buckets = METRICAS[nombre][2]
+    indice = len(buckets)
+    for i, limite in enumerate(buckets):
+        if valor <= limite:
+            indice = i
+            break
+    etiquetas = _etiquetas(etiquetas)
+    return [
+        ((nombre, etiquetas, f'bucket:{indice}'), 1),
+        ((nombre, etiquetas, 'sum'), valor),
+        ((nombre, etiquetas, 'count'), 1),
+    ]
+
+
+# =====================================================
+# REGISTROS
+# =====================================================
+
+class RegistroMemoria:
+    """Agregación en memoria del proceso."""
+
+    def __init__(self):
+        self._valores = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def registrar(self, muestras):
+        with self._lock:
+            for clave, valor in muestras:
+                self._valores[clave] += valor
+
+    def valores(self):
+        with self._lock:
+            return dict(self._valores)
+
+    def reiniciar(self):
+        with self._lock:
+            self._valores.clear()
+
+
+class RegistroRedis:
+    """Agregación compartida entre workers en un hash de Redis."""
+
+    def __init__(self, url):
+        self.url = url
+        self._cliente = None
+
+    def _redis(self):
+        if self._cliente is None:
+            import redis
+            self._cliente = redis.Redis.from_url(self.url)
+        return self._cliente
+
+    def registrar(self, muestras):
+        try:
+            pipe = self._redis().pipeline(transaction=False)
+            for clave, valor in muestras:
+                pipe.hincrbyfloat(CLAVE_REDIS, json.dumps(clave), valor)
+            pipe.execute()
+        except Exception as e:
+            # Las métricas nunca deben romper el request
+            logger.warning(f"No se pudieron registrar métricas: {e}")
+
+    def valores(self):
+        valores = {}
+        for campo, valor in self._redis().hgetall(CLAVE_REDIS).items():
+            nombre, etiquetas, sufijo = json.loads(campo)
+            clave = (nombre, tuple(tuple(e) for e in etiquetas), sufijo)
+            valores[clave] = float(valor)
+        return valores
+
+    def reiniciar(self):
+        self._redis().delete(CLAVE_REDIS)
+
+
+_registro = None
+_registro_lock = threading.Lock()
+
+
+def obtener_registro():
+    """Registro del proceso (singleton) según METRICAS_REDIS_URL."""
+    global _registro
+    if _registro is None:
+        with _registro_lock:
+            if _registro is None:
+                url = settings.METRICAS_REDIS_URL
+                _registro = RegistroRedis(url) if url else RegistroMemoria()
+    return _registro
+
+
+# =====================================================
+# EXPOSICIÓN
+# =====================================================
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _formatear_etiquetas(etiquetas):
+    if not etiquetas:
+        return ''
+    return '{' + ','.join(f'{k}="{_escapar(v)}"' for k, v in etiquetas) + '}'
+
+
+def _numero(valor):
+    if valor == int(valor):
+        return str(int(valor))
+    return repr(valor)
+
+
+def renderizar(valores):
+    """Texto en formato de exposición de Prometheus (version 0.0.4)."""
+    series = defaultdict(dict)
+    for (nombre, etiquetas, sufijo), valor in valores.items():
+        series[nombre].setdefault(etiquetas, {})[sufijo] = valor
+
+    lineas = []
+    for nombre, (tipo, ayuda, buckets) in METRICAS.items():
+        lineas.append(f'# HELP {nombre} {ayuda}')
+        lineas.append(f'# TYPE {nombre} {tipo}')
+        for etiquetas, partes in sorted(series.get(nombre, {}).items()):
+            if tipo == 'counter':
+                lineas.append(
+                    f'{nombre}{_formatear_etiquetas(etiquetas)} {_numero(partes.get("", 0))}'
+                )
+                continue
+
+            acumulado = 0
+            limites = [_numero(b) for b in buckets] + ['+Inf']
+            for i, limite in enumerate(limites):
+                acumulado += partes.get(f'bucket:{i}', 0)
+                etiquetas_bucket = etiquetas + (('le', limite),)
+                lineas.append(
+                    f'{nombre}_bucket{_formatear_etiquetas(etiquetas_bucket)} {_numero(acumulado)}'
+                )
+            lineas.append(
+                f'{nombre}_sum{_formatear_etiquetas(etiquetas)} {_numero(partes.get("sum", 0))}'
+            )
+            lineas.append(
+                f'{nombre}_count{_formatear_etiquetas(etiquetas)} {_numero(partes.get("count", 0))}'
+            )
+    return '\n'.join(lineas) + '\n'
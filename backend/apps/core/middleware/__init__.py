@@ -1,6 +1,10 @@
 """
 Middleware personalizado del sistema.
 """
+from .consultas import DetectorConsultasMiddleware
 from .logging import RequestLoggingMiddleware
+from .metricas import MetricasMiddleware
+from .perfilado import PerfiladoMiddleware
 
-__all__ = ['RequestLoggingMiddleware']
+__all__ = ['RequestLoggingMiddleware', 'MetricasMiddleware', 'DetectorConsultasMiddleware',
+           'PerfiladoMiddleware']
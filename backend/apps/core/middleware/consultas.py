@@ -0,0 +1,48 @@
+"""
+Middleware del detector de consultas N+1 (solo desarrollo y tests).
+Con DETECTOR_CONSULTAS=False Django lo descarta al arrancar.
+"""
+import logging
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from apps.core.consultas import detectar_consultas, presupuesto_de, verificar_presupuesto
+
+logger = logging.getLogger('apps.core.consultas')
+
+
+class DetectorConsultasMiddleware:
+    """
+    Registra las consultas de cada request, avisa de las repetidas y hace
+    cumplir el presupuesto de las vistas marcadas con @presupuesto_consultas.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DETECTOR_CONSULTAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with detectar_consultas() as registro:
+            response = self.get_response(request)
+
+        match = getattr(request, 'resolver_match', None)
+        vista = match.view_name if match else request.path
+        response['X-Consultas'] = str(registro.total)
+
+        for grupo in registro.repetidas():
+            logger.warning(
+                f"Posible N+1 en {vista}: {grupo.repeticiones}x en {grupo.sitio}\n"
+                f"    {grupo.sql[:300]}"
+            )
+
+        presupuesto = presupuesto_de(match)
+        if presupuesto is not None and registro.total > presupuesto:
+            if settings.DETECTOR_CONSULTAS_ESTRICTO:
+                verificar_presupuesto(registro, presupuesto, vista)
+            logger.error(
+                f"{vista} superó su presupuesto de consultas: "
+                f"{registro.total} > {presupuesto}\n{registro.reporte()}"
+            )
+        return response
@@ -0,0 +1,65 @@
+"""
+Middleware de métricas por endpoint (latencia, consultas SQL, tamaño y estado).
+Con METRICAS_HABILITADAS=False Django lo descarta al arrancar: costo cero.
+"""
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from apps.core.metricas import contador, histograma, obtener_registro
+
+
+class ContadorConsultas:
+    """execute_wrapper que cuenta las consultas y su tiempo total."""
+
+    def __init__(self):
+        self.total = 0
+        self.tiempo = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.total += 1
+            self.tiempo += time.perf_counter() - inicio
+
+
+class MetricasMiddleware:
+    """
+    Registra por nombre de URL resuelto: latencia, consultas SQL y su
+    tiempo, tamaño de la respuesta y código de estado.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICAS_HABILITADAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.registro = obtener_registro()
+
+    def __call__(self, request):
+        consultas = ContadorConsultas()
+        inicio = time.perf_counter()
+        with connection.execute_wrapper(consultas):
+            response = self.get_response(request)
+        duracion = time.perf_counter() - inicio
+
+        match = getattr(request, 'resolver_match', None)
+        vista = match.view_name if match else 'no_resuelta'
+        etiquetas = {'vista': vista, 'metodo': request.method}
+
+        if response.streaming:
+            tamano = int(response.get('Content-Length') or 0)
+        else:
+            tamano = len(response.content)
+
+        self.registro.registrar(
+            contador('http_requests_total', {**etiquetas, 'estado': response.status_code})
+            + histograma('http_request_duration_seconds', etiquetas, duracion)
+            + histograma('http_response_size_bytes', {'vista': vista}, tamano)
+            + histograma('db_queries_per_request', {'vista': vista}, consultas.total)
+            + contador('db_query_duration_seconds_total', {'vista': vista}, consultas.tiempo)
+        )
+        return response
@@ -0,0 +1,47 @@
+"""
+Middleware de perfilado bajo demanda (ver apps.core.perfilado).
+"""
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.urls import Resolver404, resolve
+
+from apps.core.perfilado import guardar_captura, muestreo, nota_de_cabecera, perfilar
+
+
+class PerfiladoMiddleware:
+    """
+    Perfila el request si trae una cabecera X-Perfilar válida o si una
+    ConfigPerfilado vigente lo selecciona por muestreo. El resto de
+    requests solo paga la resolución de la ruta.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PERFILADO_HABILITADO:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            vista = resolve(request.path_info).view_name
+        except Resolver404:
+            return self.get_response(request)
+
+        nota = nota_de_cabecera(request)
+        config = None
+        if nota is None:
+            config = muestreo.elegir(vista, request)
+            if config is None:
+                return self.get_response(request)
+
+        response, captura = perfilar(self.get_response, request)
+        perfil = guardar_captura(
+            request,
+            captura,
+            origen='cabecera' if config is None else 'muestreo',
+            vista=vista,
+            nota=nota or '',
+            config=config,
+        )
+        if perfil is not None:
+            response['X-Perfil-Id'] = str(perfil.pk)
+        return response
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.10 on 2026-10-19 11:53
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConfigPerfilado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vista', models.CharField(help_text='Nombre de la ruta (ej: solicitudes:solicitudes_asignadas)', max_length=200, verbose_name='Vista')),
+                ('cada_n', models.PositiveIntegerField(default=1, help_text='1 = perfilar todos los requests', verbose_name='Perfilar 1 de cada')),
+                ('activo', models.BooleanField(default=True, verbose_name='Activo')),
+                ('activo_hasta', models.DateTimeField(blank=True, null=True, verbose_name='Activo hasta')),
+                ('limite_capturas', models.PositiveIntegerField(default=20, verbose_name='Límite de capturas')),
+                ('capturas', models.PositiveIntegerField(default=0, editable=False, verbose_name='Capturas realizadas')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Fecha de creación')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Solo para el usuario')),
+            ],
+            options={
+                'verbose_name': 'Configuración de perfilado',
+                'verbose_name_plural': 'Configuraciones de perfilado',
+                'db_table': 'config_perfilado',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PerfilRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metodo', models.CharField(max_length=10, verbose_name='Método')),
+                ('ruta', models.CharField(max_length=500, verbose_name='Ruta')),
+                ('vista', models.CharField(blank=True, db_index=True, max_length=200, verbose_name='Vista')),
+                ('origen', models.CharField(choices=[('cabecera', 'Cabecera firmada'), ('muestreo', 'Muestreo')], max_length=20, verbose_name='Origen')),
+                ('nota', models.CharField(blank=True, max_length=200, verbose_name='Nota')),
+                ('status_code', models.PositiveSmallIntegerField(verbose_name='Código de respuesta')),
+                ('duracion_ms', models.FloatField(verbose_name='Tiempo total (ms)')),
+                ('total_consultas', models.PositiveIntegerField(default=0, verbose_name='Consultas SQL')),
+                ('duracion_consultas_ms', models.FloatField(default=0, verbose_name='Tiempo en SQL (ms)')),
+                ('consultas', models.JSONField(default=list, help_text='[{inicio_ms, duracion_ms, sql, sitio}]', verbose_name='Línea de tiempo SQL')),
+                ('estadisticas', models.TextField(blank=True, verbose_name='Estadísticas (cProfile)')),
+                ('perfil', models.BinaryField(blank=True, null=True, verbose_name='Perfil (pstats)')),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False, verbose_name='Fecha')),
+                ('config', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='perfiles', to='core.configperfilado', verbose_name='Configuración')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Perfil de request',
+                'verbose_name_plural': 'Perfiles de requests',
+                'db_table': 'perfiles_request',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.10 on 2026-10-19 12:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenMetrica',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularidad', models.CharField(choices=[('hora', 'Hora'), ('dia', 'Día')], max_length=4, verbose_name='Granularidad')),
+                ('periodo', models.DateTimeField(verbose_name='Inicio del periodo')),
+                ('metrica', models.CharField(max_length=50, verbose_name='Métrica')),
+                ('dimension', models.CharField(blank=True, help_text='Vacía para el total', max_length=30, verbose_name='Dimensión')),
+                ('valor_dimension', models.CharField(blank=True, max_length=50, verbose_name='Valor de la dimensión')),
+                ('valor', models.BigIntegerField(default=0, verbose_name='Valor')),
+                ('actualizado_en', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Actualizado')),
+            ],
+            options={
+                'verbose_name': 'Resumen de métrica',
+                'verbose_name_plural': 'Resúmenes de métricas',
+                'db_table': 'resumenes_metricas',
+                'ordering': ['-periodo', 'metrica', 'dimension', 'valor_dimension'],
+                'indexes': [models.Index(fields=['metrica', 'granularidad', 'periodo'], name='resumen_metrica_serie')],
+                'constraints': [models.UniqueConstraint(fields=('granularidad', 'periodo', 'metrica', 'dimension', 'valor_dimension'), name='resumen_metrica_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.10 on 2026-10-19 12:19
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_resumenes_metricas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Exportacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recurso', models.CharField(max_length=30, verbose_name='Recurso')),
+                ('formato', models.CharField(max_length=4, verbose_name='Formato')),
+                ('parametros', models.JSONField(default=dict, help_text='{filtros: {...}, json: texto|columnas|omitir}', verbose_name='Parámetros')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('completada', 'Completada'), ('error', 'Error')], default='pendiente', max_length=12, verbose_name='Estado')),
+                ('archivo', models.FileField(blank=True, null=True, upload_to='exportaciones/%Y/%m/', verbose_name='Archivo')),
+                ('filas', models.PositiveIntegerField(default=0, verbose_name='Filas exportadas')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False, verbose_name='Fecha de solicitud')),
+                ('completada_en', models.DateTimeField(blank=True, null=True, verbose_name='Completada')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exportaciones', to=settings.AUTH_USER_MODEL, verbose_name='Solicitada por')),
+            ],
+            options={
+                'verbose_name': 'Exportación',
+                'verbose_name_plural': 'Exportaciones',
+                'db_table': 'exportaciones',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
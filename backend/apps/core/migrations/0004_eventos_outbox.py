@@ -0,0 +1,37 @@
+# Generated by Django 5.2.10 on 2026-10-19 12:47
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_exportaciones'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(db_index=True, max_length=100, verbose_name='Tipo')),
+                ('datos', models.JSONField(default=dict, verbose_name='Datos')),
+                ('clave', models.CharField(max_length=200, unique=True, verbose_name='Clave de idempotencia')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesado', 'Procesado'), ('fallido', 'Fallido')], default='pendiente', max_length=12, verbose_name='Estado')),
+                ('completados', models.JSONField(default=list, verbose_name='Manejadores completados')),
+                ('intentos', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('proximo_intento', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Próximo intento')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Fecha de creación')),
+                ('procesado_en', models.DateTimeField(blank=True, null=True, verbose_name='Procesado')),
+            ],
+            options={
+                'verbose_name': 'Evento (outbox)',
+                'verbose_name_plural': 'Eventos (outbox)',
+                'db_table': 'eventos_outbox',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(condition=models.Q(('estado', 'pendiente')), fields=['proximo_intento'], name='evento_outbox_pendiente')],
+            },
+        ),
+    ]
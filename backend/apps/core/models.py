@@ -1,6 +1,7 @@
 """
 Modelos base compartidos por todas las apps.
 """
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
 
@@ -23,9 +24,79 @@ class TimeStampedModel(models.Model):
         abstract = True
 
 
+def combinar_fecha_hora(fecha, hora):
+    """datetime aware (zona del proyecto) a partir de fecha y hora locales."""
+    from datetime import datetime
+    if fecha is None or hora is None:
+        return None
+    return timezone.make_aware(datetime.combine(fecha, hora))
+
+
+class ProgramadoModel(models.Model):
+    """
+    Modelo abstracto para eventos agendados con `fecha` y `hora` locales.
+
+    Mantiene `programado_en` (datetime aware, indexado) sincronizado en
+    cada save() para que las ventanas de tiempo se resuelvan en SQL.
+    Las subclases definen los campos `fecha` y `hora`; los update()
+    masivos que los modifiquen deben actualizar `programado_en` también.
+    """
+    programado_en = models.DateTimeField(
+        'Programado para',
+        null=True,
+        blank=True,
+        editable=False
+    )
+
+    class Meta:
+        abstract = True
+
+    def momento_programado(self):
+        """programado_en, o calculado si la instancia aún no se guardó."""
+        return self.programado_en or self._combinar_fecha_hora()
+
+    def _combinar_fecha_hora(self):
+        # fecha/hora pueden llegar como cadenas ISO desde request.data
+        fecha = self._meta.get_field('fecha').to_python(self.fecha)
+        hora = self._meta.get_field('hora').to_python(self.hora)
+        return combinar_fecha_hora(fecha, hora)
+
+    def save(self, *args, **kwargs):
+        self.programado_en = self._combinar_fecha_hora()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'fecha', 'hora'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'programado_en'}
+        super().save(*args, **kwargs)
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    """QuerySet con borrado lógico masivo."""
+
+    def soft_delete(self):
+        return self.update(is_deleted=True, deleted_at=timezone.now())
+
+    def eliminados(self):
+        return self.filter(is_deleted=True)
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """
+    Manager por defecto: oculta los registros eliminados. Las relaciones
+    inversas (cliente.solicitudes_como_cliente, ...) también lo usan.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
 class SoftDeleteModel(models.Model):
     """
     Modelo abstracto que proporciona funcionalidad de borrado lógico.
+
+    `objects` solo ve registros vigentes; `all_objects` incluye los
+    eliminados (admin, restauración, auditoría). Los índices parciales
+    `WHERE is_deleted = false` de cada modelo cubren las consultas de
+    `objects`.
     """
     is_deleted = models.BooleanField(
         'Eliminado',
@@ -38,6 +109,9 @@ class SoftDeleteModel(models.Model):
         blank=True
     )
 
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
+
     class Meta:
         abstract = True
 
@@ -52,3 +126,256 @@ class SoftDeleteModel(models.Model):
         self.is_deleted = False
         self.deleted_at = None
         self.save()
+
+
+# =====================================================
+# PERFILADO DE REQUESTS
+# =====================================================
+
+class ConfigPerfilado(models.Model):
+    """
+    Muestreo de perfiles para un endpoint: se perfila 1 de cada `cada_n`
+    requests a la vista hasta alcanzar `limite_capturas` o `activo_hasta`.
+    Con `usuario` solo se perfilan los requests de ese usuario.
+    """
+    vista = models.CharField(
+        'Vista',
+        max_length=200,
+        help_text='Nombre de la ruta (ej: solicitudes:solicitudes_asignadas)'
+    )
+    cada_n = models.PositiveIntegerField(
+        'Perfilar 1 de cada',
+        default=1,
+        help_text='1 = perfilar todos los requests'
+    )
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Solo para el usuario'
+    )
+    activo = models.BooleanField('Activo', default=True)
+    activo_hasta = models.DateTimeField('Activo hasta', null=True, blank=True)
+    limite_capturas = models.PositiveIntegerField('Límite de capturas', default=20)
+    capturas = models.PositiveIntegerField('Capturas realizadas', default=0, editable=False)
+    created_at = models.DateTimeField('Fecha de creación', default=timezone.now, editable=False)
+
+    class Meta:
+        db_table = 'config_perfilado'
+        verbose_name = 'Configuración de perfilado'
+        verbose_name_plural = 'Configuraciones de perfilado'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.vista} (1/{self.cada_n})"
+
+    def vigente(self, ahora=None):
+        ahora = ahora or timezone.now()
+        return (
+            self.activo
+            and self.capturas < self.limite_capturas
+            and (self.activo_hasta is None or self.activo_hasta > ahora)
+        )
+
+
+class PerfilRequest(models.Model):
+    """
+    Perfil capturado de un request: estadísticas de cProfile, línea de
+    tiempo de las consultas SQL y tiempo total.
+    """
+
+    ORIGEN_CHOICES = [
+        ('cabecera', 'Cabecera firmada'),
+        ('muestreo', 'Muestreo'),
+    ]
+
+    metodo = models.CharField('Método', max_length=10)
+    ruta = models.CharField('Ruta', max_length=500)
+    vista = models.CharField('Vista', max_length=200, blank=True, db_index=True)
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Usuario'
+    )
+    origen = models.CharField('Origen', max_length=20, choices=ORIGEN_CHOICES)
+    nota = models.CharField('Nota', max_length=200, blank=True)
+    config = models.ForeignKey(
+        ConfigPerfilado,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='perfiles',
+        verbose_name='Configuración'
+    )
+    status_code = models.PositiveSmallIntegerField('Código de respuesta')
+    duracion_ms = models.FloatField('Tiempo total (ms)')
+    total_consultas = models.PositiveIntegerField('Consultas SQL', default=0)
+    duracion_consultas_ms = models.FloatField('Tiempo en SQL (ms)', default=0)
+    consultas = models.JSONField(
+        'Línea de tiempo SQL',
+        default=list,
+        help_text='[{inicio_ms, duracion_ms, sql, sitio}]'
+    )
+    estadisticas = models.TextField('Estadísticas (cProfile)', blank=True)
+    perfil = models.BinaryField('Perfil (pstats)', null=True, blank=True)
+    created_at = models.DateTimeField('Fecha', default=timezone.now, editable=False, db_index=True)
+
+    class Meta:
+        db_table = 'perfiles_request'
+        verbose_name = 'Perfil de request'
+        verbose_name_plural = 'Perfiles de requests'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.metodo} {self.ruta} ({self.duracion_ms:.0f} ms)"
+
+
+# =====================================================
+# RESÚMENES DE MÉTRICAS (DASHBOARD ADMIN)
+# =====================================================
+
+class ResumenMetrica(models.Model):
+    """
+    Valor agregado de un KPI de la plataforma en un periodo (hora o día),
+    opcionalmente desglosado por una dimensión (rol, estado, embajada...).
+    Lo calcula `apps.core.resumenes` en segundo plano; el dashboard admin
+    solo lee estas filas.
+    """
+
+    GRANULARIDADES = [
+        ('hora', 'Hora'),
+        ('dia', 'Día'),
+    ]
+
+    granularidad = models.CharField('Granularidad', max_length=4, choices=GRANULARIDADES)
+    periodo = models.DateTimeField('Inicio del periodo')
+    metrica = models.CharField('Métrica', max_length=50)
+    dimension = models.CharField(
+        'Dimensión',
+        max_length=30,
+        blank=True,
+        help_text='Vacía para el total'
+    )
+    valor_dimension = models.CharField('Valor de la dimensión', max_length=50, blank=True)
+    valor = models.BigIntegerField('Valor', default=0)
+    actualizado_en = models.DateTimeField('Actualizado', default=timezone.now)
+
+    class Meta:
+        db_table = 'resumenes_metricas'
+        verbose_name = 'Resumen de métrica'
+        verbose_name_plural = 'Resúmenes de métricas'
+        ordering = ['-periodo', 'metrica', 'dimension', 'valor_dimension']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['granularidad', 'periodo', 'metrica', 'dimension', 'valor_dimension'],
+                name='resumen_metrica_unico',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['metrica', 'granularidad', 'periodo'],
+                name='resumen_metrica_serie',
+            ),
+        ]
+
+    def __str__(self):
+        desglose = f" [{self.dimension}={self.valor_dimension}]" if self.dimension else ''
+        return f"{self.metrica}{desglose} {self.granularidad} {self.periodo:%Y-%m-%d %H:%M}: {self.valor}"
+
+
+# =====================================================
+# EXPORTACIONES EN SEGUNDO PLANO
+# =====================================================
+
+class Exportacion(models.Model):
+    """
+    Exportación grande (CSV/XLSX) generada por la tarea
+    core.generar_exportacion. El archivo se guarda en media protegida y se
+    descarga con una URL firmada (ver apps.core.exportaciones).
+    """
+
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('procesando', 'Procesando'),
+        ('completada', 'Completada'),
+        ('error', 'Error'),
+    ]
+
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='exportaciones',
+        verbose_name='Solicitada por'
+    )
+    recurso = models.CharField('Recurso', max_length=30)
+    formato = models.CharField('Formato', max_length=4)
+    parametros = models.JSONField(
+        'Parámetros',
+        default=dict,
+        help_text='{filtros: {...}, json: texto|columnas|omitir}'
+    )
+    estado = models.CharField('Estado', max_length=12, choices=ESTADOS, default='pendiente')
+    archivo = models.FileField('Archivo', upload_to='exportaciones/%Y/%m/', null=True, blank=True)
+    filas = models.PositiveIntegerField('Filas exportadas', default=0)
+    error = models.TextField('Error', blank=True)
+    created_at = models.DateTimeField('Fecha de solicitud', default=timezone.now, editable=False, db_index=True)
+    completada_en = models.DateTimeField('Completada', null=True, blank=True)
+
+    class Meta:
+        db_table = 'exportaciones'
+        verbose_name = 'Exportación'
+        verbose_name_plural = 'Exportaciones'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.recurso}.{self.formato} ({self.get_estado_display()})"
+
+
+class EventoOutbox(models.Model):
+    """
+    Evento de dominio escrito en la misma transacción que el cambio de
+    estado (outbox transaccional). El relay core.despachar_eventos lo
+    entrega después del commit a los manejadores registrados (ver
+    apps.core.outbox), al menos una vez.
+    """
+
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('procesado', 'Procesado'),
+        ('fallido', 'Fallido'),
+    ]
+
+    tipo = models.CharField('Tipo', max_length=100, db_index=True)
+    datos = models.JSONField('Datos', default=dict)
+    # Un mismo hecho publicado dos veces (reintento del request) es un solo evento
+    clave = models.CharField('Clave de idempotencia', max_length=200, unique=True)
+    estado = models.CharField('Estado', max_length=12, choices=ESTADOS, default='pendiente')
+    # Manejadores ya ejecutados: un reintento no los repite
+    completados = models.JSONField('Manejadores completados', default=list)
+    intentos = models.PositiveSmallIntegerField('Intentos', default=0)
+    proximo_intento = models.DateTimeField('Próximo intento', default=timezone.now)
+    error = models.TextField('Error', blank=True)
+    created_at = models.DateTimeField('Fecha de creación', default=timezone.now, editable=False)
+    procesado_en = models.DateTimeField('Procesado', null=True, blank=True)
+
+    class Meta:
+        db_table = 'eventos_outbox'
+        verbose_name = 'Evento (outbox)'
+        verbose_name_plural = 'Eventos (outbox)'
+        ordering = ['-created_at']
+        indexes = [
+            # Cola del relay: solo los pendientes, por vencimiento
+            models.Index(
+                fields=['proximo_intento'],
+                condition=models.Q(estado='pendiente'),
+                name='evento_outbox_pendiente',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} ({self.get_estado_display()})"
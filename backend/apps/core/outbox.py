@@ -0,0 +1,183 @@
+"""
+Outbox transaccional para los efectos secundarios del dominio.
+
+Las vistas no llaman a los servicios de notificación (ni a futuros
+webhooks) dentro del request. Publican un evento:
+
+    with transaction.atomic():
+        documento = Documento.objects.create(...)
+        publicar('documento.subido', f'documento.subido:{documento.pk}', documento_id=documento.pk)
+
+`publicar()` es un solo INSERT en la transacción del cambio de estado:
+si se revierte, el evento desaparece con él; si confirma, el evento queda
+aunque el proceso muera enseguida. Tras el commit se encola el relay
+`core.despachar_eventos`, que también corre cada minuto en beat como red
+de seguridad.
+
+El relay reserva lotes de OUTBOX_LOTE eventos (SKIP LOCKED y
+proximo_intento en el futuro). Ejecuta cada manejador registrado para el
+tipo en su propia transacción, junto con la marca del manejador en
+`completados`. La entrega es al menos una vez, pero un manejador que
+escribe solo en la base se aplica exactamente una vez: si falla otro
+manejador, el reintento no lo repite. Los fallos se reintentan con
+backoff exponencial hasta OUTBOX_MAX_INTENTOS.
+
+Los manejadores se registran con el decorador `manejador(tipo)` en el
+ready() de cada app (p. ej. apps.notificaciones.eventos). Reciben el
+EventoOutbox; `evento.datos` lleva solo ids, y el manejador lee el estado
+actual de la base.
+"""
+import logging
+import random
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import EventoOutbox
+
+logger = logging.getLogger(__name__)
+
+# tipo -> [manejadores]
+MANEJADORES = defaultdict(list)
+
+
+def manejador(tipo):
+    """Registra la función decorada como manejador de los eventos `tipo`."""
+    def registrar(funcion):
+        MANEJADORES[tipo].append(funcion)
+        return funcion
+    return registrar
+
+
+def _nombre(funcion):
+    return f'{funcion.__module__}.{funcion.__qualname__}'
+
+
+# =====================================================
+# PUBLICACIÓN
+# =====================================================
+
+def publicar(tipo, clave=None, **datos):
+    """
+    Escribe el evento en la transacción actual y programa el relay para
+    después del commit. `clave` identifica el hecho: si ya existe un evento
+    con la misma clave, no se duplica.
+    """
+    EventoOutbox.objects.bulk_create(
+        [EventoOutbox(tipo=tipo, clave=clave or f'{tipo}:{uuid.uuid4().hex}', datos=datos)],
+        ignore_conflicts=True,
+    )
+    # Un solo relay por transacción, aunque publique muchos eventos
+    if connection.in_atomic_block and any(
+        callback is _programar_relay for _, callback, *_ in connection.run_on_commit
+    ):
+        return
+    transaction.on_commit(_programar_relay)
+
+
+def _programar_relay():
+    from .tasks import despachar_eventos
+
+    try:
+        despachar_eventos.delay()
+    except Exception as e:
+        # El broker no responde: beat lo despachará en el próximo minuto
+        logger.error(f"No se pudo encolar el relay de eventos: {e}")
+
+
+# =====================================================
+# RELAY
+# =====================================================
+
+def backoff(intentos):
+    """Espera antes del reintento `intentos` (exponencial con jitter y tope)."""
+    espera = min(settings.OUTBOX_BACKOFF_BASE * 2 ** (intentos - 1), settings.OUTBOX_BACKOFF_MAX)
+    return timedelta(seconds=espera * random.uniform(0.8, 1.2))
+
+
+def reservar(lote, ahora=None):
+    """Toma hasta `lote` eventos pendientes vencidos y los aparta OUTBOX_RESERVA segundos."""
+    ahora = ahora or timezone.now()
+    with transaction.atomic():
+        pendientes = EventoOutbox.objects.filter(
+            estado='pendiente', proximo_intento__lte=ahora
+        ).order_by('proximo_intento', 'pk')
+        if connection.features.has_select_for_update_skip_locked:
+            pendientes = pendientes.select_for_update(skip_locked=True)
+        ids = list(pendientes.values_list('pk', flat=True)[:lote])
+        if ids:
+            EventoOutbox.objects.filter(pk__in=ids).update(
+                proximo_intento=ahora + timedelta(seconds=settings.OUTBOX_RESERVA),
+                intentos=F('intentos') + 1,
+            )
+    if not ids:
+        return []
+    return list(EventoOutbox.objects.filter(pk__in=ids).order_by('created_at', 'pk'))
+
+
+def _procesar(evento):
+    """Ejecuta los manejadores pendientes del evento. Devuelve el error o None."""
+    for funcion in MANEJADORES.get(evento.tipo, []):
+        nombre = _nombre(funcion)
+        if nombre in evento.completados:
+            continue
+        try:
+            with transaction.atomic():
+                funcion(evento)
+                evento.completados.append(nombre)
+                EventoOutbox.objects.filter(pk=evento.pk).update(completados=evento.completados)
+        except Exception as e:
+            logger.error(f"Error en {nombre} para el evento {evento.clave}: {e}")
+            return f'{nombre}: {type(e).__name__}: {e}'[:2000]
+    return None
+
+
+def despachar(lote=None):
+    """
+    Entrega los eventos pendientes, lote a lote, hasta vaciar la cola.
+    Devuelve {'procesados': n, 'reintentos': n, 'fallidos': n}.
+    """
+    lote = lote or settings.OUTBOX_LOTE
+    resumen = {'procesados': 0, 'reintentos': 0, 'fallidos': 0}
+    while True:
+        eventos = reservar(lote)
+        if not eventos:
+            break
+        procesados, con_error = [], []
+        for evento in eventos:
+            error = _procesar(evento)
+            if error is None:
+                procesados.append(evento.pk)
+            else:
+                evento.error = error
+                con_error.append(evento)
+
+        ahora = timezone.now()
+        if procesados:
+            EventoOutbox.objects.filter(pk__in=procesados).update(
+                estado='procesado', procesado_en=ahora, error=''
+            )
+        for evento in con_error:
+            if evento.intentos >= settings.OUTBOX_MAX_INTENTOS:
+                evento.estado = 'fallido'
+                resumen['fallidos'] += 1
+            else:
+                evento.proximo_intento = ahora + backoff(evento.intentos)
+                resumen['reintentos'] += 1
+        if con_error:
+            EventoOutbox.objects.bulk_update(con_error, ['estado', 'proximo_intento', 'error'])
+        resumen['procesados'] += len(procesados)
+        if len(eventos) < lote:
+            break
+    return resumen
+
+
+def purgar(dias=None):
+    """Elimina los eventos procesados hace más de OUTBOX_RETENCION_DIAS días."""
+    limite = timezone.now() - timedelta(days=dias or settings.OUTBOX_RETENCION_DIAS)
+    return EventoOutbox.objects.filter(estado='procesado', procesado_en__lt=limite).delete()[0]
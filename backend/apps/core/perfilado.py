@@ -0,0 +1,228 @@
+"""
+Perfilado de requests bajo demanda.
+
+Permite diagnosticar en producción un endpoint lento sin redesplegar:
+
+- Cabecera firmada: un request con `X-Perfilar: <token>` (generado con
+  `python manage.py firmar_perfilado`) se perfila siempre.
+- Muestreo: una ConfigPerfilado activa en el admin perfila 1 de cada N
+  requests de una vista (opcionalmente, solo los de un usuario).
+
+Cada captura guarda las estadísticas de cProfile, la línea de tiempo de
+las consultas SQL y el tiempo total en PerfilRequest (visible en el admin).
+"""
+import cProfile
+import io
+import logging
+import marshal
+import pstats
+import random
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from apps.core.consultas import sitio_llamada
+
+logger = logging.getLogger(__name__)
+
+SALT_PERFILADO = 'apps.core.perfilado.cabecera'
+CABECERA_META = 'HTTP_X_PERFILAR'
+
+
+# =====================================================
+# CABECERA FIRMADA
+# =====================================================
+
+def firmar_cabecera(nota=''):
+    """Token para la cabecera X-Perfilar; `nota` se guarda con el perfil."""
+    return signing.dumps({'n': nota[:200]}, salt=SALT_PERFILADO, compress=True)
+
+
+def nota_de_cabecera(request):
+    """
+    Retorna la nota del token de X-Perfilar, o None si el request no trae
+    la cabecera o su firma no es válida / expiró.
+    """
+    token = request.META.get(CABECERA_META)
+    if not token:
+        return None
+    try:
+        datos = signing.loads(
+            token, salt=SALT_PERFILADO, max_age=settings.PERFILADO_FIRMA_MAX_AGE
+        )
+    except signing.BadSignature:
+        logger.warning(f"X-Perfilar con firma inválida o expirada en {request.path}")
+        return None
+    return datos.get('n', '')
+
+
+# =====================================================
+# MUESTREO
+# =====================================================
+
+class Muestreo:
+    """
+    Configuraciones de muestreo vigentes, en memoria del proceso. Se
+    recargan cada PERFILADO_RECARGA segundos para no consultar la base
+    de datos en cada request.
+    """
+
+    def __init__(self):
+        self._configs = {}
+        self._recargar_en = 0.0
+
+    def _recargar(self):
+        from apps.core.models import ConfigPerfilado
+
+        ahora = timezone.now()
+        configs = {}
+        for config in ConfigPerfilado.objects.filter(activo=True):
+            if config.vigente(ahora):
+                configs.setdefault(config.vista, []).append(config)
+        self._configs = configs
+        self._recargar_en = time.monotonic() + settings.PERFILADO_RECARGA
+
+    def cargar(self):
+        """Recarga las configuraciones si ya venció el intervalo de recarga."""
+        if time.monotonic() < self._recargar_en:
+            return
+        try:
+            self._recargar()
+        except Exception as e:
+            # Sin tabla (migraciones pendientes) o sin base de datos
+            logger.debug(f"No se pudieron cargar las configuraciones de perfilado: {e}")
+            self._configs = {}
+            self._recargar_en = time.monotonic() + settings.PERFILADO_RECARGA
+
+    def elegir(self, vista, request):
+        """ConfigPerfilado que selecciona este request, o None."""
+        self.cargar()
+        for config in self._configs.get(vista, ()):
+            if config.usuario_id and str(config.usuario_id) != str(usuario_de_request(request)):
+                continue
+            if random.randrange(config.cada_n or 1) == 0:
+                return config
+        return None
+
+    def invalidar(self):
+        self._recargar_en = 0.0
+
+
+muestreo = Muestreo()
+
+
+def usuario_de_request(request):
+    """
+    ID del usuario antes de ejecutar la vista: sesión del admin o claims
+    del JWT (la autenticación de DRF ocurre después, dentro de la vista).
+    """
+    usuario = getattr(request, 'user', None)
+    if usuario is not None and usuario.is_authenticated:
+        return usuario.pk
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+    from rest_framework_simplejwt.settings import api_settings
+
+    autenticacion = JWTAuthentication()
+    cabecera = autenticacion.get_header(request)
+    token = autenticacion.get_raw_token(cabecera) if cabecera else None
+    if token is None:
+        return None
+    try:
+        return autenticacion.get_validated_token(token).get(api_settings.USER_ID_CLAIM)
+    except (InvalidToken, TokenError):
+        return None
+
+
+# =====================================================
+# CAPTURA
+# =====================================================
+
+class LineaTiempoSQL:
+    """execute_wrapper que registra inicio, duración y sitio de cada consulta."""
+
+    def __init__(self, inicio):
+        self.inicio = inicio
+        self.consultas = []
+        self.total = 0
+        self.duracion = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            fin = time.perf_counter()
+            self.total += 1
+            self.duracion += fin - inicio
+            if len(self.consultas) < settings.PERFILADO_MAX_CONSULTAS:
+                self.consultas.append({
+                    'inicio_ms': round((inicio - self.inicio) * 1000, 2),
+                    'duracion_ms': round((fin - inicio) * 1000, 2),
+                    'sql': sql[:2000],
+                    'sitio': sitio_llamada(),
+                })
+
+
+def perfilar(get_response, request):
+    """
+    Ejecuta el request bajo cProfile y la línea de tiempo SQL.
+    Retorna (response, captura) donde captura es un dict para PerfilRequest.
+    """
+    inicio = time.perf_counter()
+    linea_tiempo = LineaTiempoSQL(inicio)
+    perfilador = cProfile.Profile()
+
+    with connection.execute_wrapper(linea_tiempo):
+        perfilador.enable()
+        try:
+            response = get_response(request)
+        finally:
+            perfilador.disable()
+    duracion_ms = (time.perf_counter() - inicio) * 1000
+
+    salida = io.StringIO()
+    estadisticas = pstats.Stats(perfilador, stream=salida)
+    estadisticas.sort_stats('cumulative').print_stats(settings.PERFILADO_LINEAS)
+    captura = {
+        'status_code': response.status_code,
+        'duracion_ms': round(duracion_ms, 2),
+        'total_consultas': linea_tiempo.total,
+        'duracion_consultas_ms': round(linea_tiempo.duracion * 1000, 2),
+        'consultas': linea_tiempo.consultas,
+        'estadisticas': salida.getvalue(),
+        # Formato de pstats.Stats.dump_stats: se abre con snakeviz o pstats
+        'perfil': marshal.dumps(estadisticas.stats),
+    }
+    return response, captura
+
+
+def guardar_captura(request, captura, origen, vista='', nota='', config=None):
+    """Persiste la captura. Nunca propaga errores al request perfilado."""
+    from apps.core.models import ConfigPerfilado, PerfilRequest
+
+    usuario = getattr(request, 'user', None)
+    try:
+        perfil = PerfilRequest.objects.create(
+            metodo=request.method,
+            ruta=request.get_full_path()[:500],
+            vista=vista,
+            usuario_id=usuario.pk if usuario is not None and usuario.is_authenticated else None,
+            origen=origen,
+            nota=nota,
+            config=config,
+            **captura
+        )
+        if config is not None:
+            ConfigPerfilado.objects.filter(pk=config.pk).update(capturas=F('capturas') + 1)
+            config.capturas += 1
+            if not config.vigente():
+                muestreo.invalidar()
+        return perfil
+    except Exception as e:
+        logger.error(f"No se pudo guardar el perfil de {request.path}: {e}")
+        return None
@@ -0,0 +1,345 @@
+"""
+Resúmenes materializados de KPIs para el dashboard de administración.
+
+Una tarea periódica (`core.actualizar_resumenes`, Celery beat) calcula
+los KPIs con pocas consultas agrupadas y los guarda en ResumenMetrica,
+por hora (para el día en curso) y por día. El endpoint de estadísticas
+solo lee las filas del periodo, así que su costo no depende del tamaño
+de las tablas.
+
+Tipos de métrica:
+- Existencias: foto del momento (usuarios por rol, solicitudes por
+  estado...). Recorren las tablas completas, así que se toman una vez
+  por hora (la primera ejecución de cada hora) y no en cada ejecución.
+- Flujos: eventos ocurridos dentro del periodo (solicitudes creadas,
+  simulacros programados...). Se calculan por rango de fechas, así que
+  los periodos cerrados no se vuelven a tocar.
+
+El endpoint nunca recalcula: si el resumen está desactualizado sirve el
+que hay y encola la tarea (una vez por RESUMENES_REFRESCO_ESPERA).
+"""
+import logging
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DURACIONES = {
+    'hora': timedelta(hours=1),
+    'dia': timedelta(days=1),
+}
+
+EXISTENCIAS = ('usuarios', 'usuarios_activos', 'solicitudes', 'simulacros')
+FLUJOS = ('usuarios_registrados', 'solicitudes_creadas', 'simulacros_programados')
+METRICAS = EXISTENCIAS + FLUJOS
+
+CLAVE_REFRESCO = 'resumenes:refresco'
+
+
+# =====================================================
+# PERIODOS
+# =====================================================
+
+def inicio_periodo(momento, granularidad):
+    """Inicio (aware, hora local) de la hora o el día que contiene `momento`."""
+    local = timezone.localtime(momento)
+    if granularidad == 'hora':
+        return local.replace(minute=0, second=0, microsecond=0)
+    return timezone.make_aware(datetime.combine(local.date(), time.min))
+
+
+def _siguiente(periodo, granularidad):
+    # Sumar un día en hora local (respeta cambios de horario)
+    if granularidad == 'dia':
+        return timezone.make_aware(
+            datetime.combine(timezone.localtime(periodo).date() + timedelta(days=1), time.min)
+        )
+    return periodo + DURACIONES[granularidad]
+
+
+# =====================================================
+# CÁLCULO
+# =====================================================
+
+def _desglosar(metrica, filas, dimensiones):
+    """
+    Convierte filas agrupadas {dim1, dim2, ..., 'n'} en tuplas
+    (metrica, dimension, valor_dimension, valor): total y una entrada
+    por cada valor de cada dimensión.
+    """
+    total = 0
+    conteos = {dimension: Counter() for dimension in dimensiones}
+    for fila in filas:
+        total += fila['n']
+        for dimension in dimensiones:
+            conteos[dimension][str(fila[dimension])] += fila['n']
+    resultado = [(metrica, '', '', total)]
+    for dimension, contador in conteos.items():
+        resultado.extend(
+            (metrica, dimension, valor, n) for valor, n in sorted(contador.items())
+        )
+    return resultado
+
+
+def calcular_existencias():
+    """Foto actual de usuarios, solicitudes y simulacros (3 consultas)."""
+    from apps.preparacion.models import Simulacro
+    from apps.solicitudes.models import Solicitud
+    from apps.usuarios.models import Usuario
+
+    usuarios = list(Usuario.objects.order_by().values('rol', 'is_active').annotate(n=Count('id')))
+    activos = [fila for fila in usuarios if fila['is_active']]
+    solicitudes = Solicitud.objects.order_by().values(
+        'estado', 'embajada', 'tipo_visa'
+    ).annotate(n=Count('id'))
+    simulacros = Simulacro.objects.order_by().values('estado', 'modalidad').annotate(n=Count('id'))
+
+    return (
+        _desglosar('usuarios', usuarios, ['rol'])
+        + _desglosar('usuarios_activos', activos, ['rol'])
+        + _desglosar('solicitudes', solicitudes, ['estado', 'embajada', 'tipo_visa'])
+        + _desglosar('simulacros', simulacros, ['estado', 'modalidad'])
+    )
+
+
+def calcular_flujos(inicio, fin):
+    """Eventos ocurridos en [inicio, fin) (3 consultas acotadas por rango)."""
+    from apps.preparacion.models import Simulacro
+    from apps.solicitudes.models import Solicitud
+    from apps.usuarios.models import Usuario
+
+    registrados = Usuario.objects.filter(
+        date_joined__gte=inicio, date_joined__lt=fin
+    ).order_by().values('rol').annotate(n=Count('id'))
+    creadas = Solicitud.objects.filter(
+        created_at__gte=inicio, created_at__lt=fin
+    ).order_by().values('embajada', 'tipo_visa').annotate(n=Count('id'))
+    programados = Simulacro.objects.filter(
+        programado_en__gte=inicio, programado_en__lt=fin
+    ).order_by().values('estado').annotate(n=Count('id'))
+
+    return (
+        _desglosar('usuarios_registrados', registrados, ['rol'])
+        + _desglosar('solicitudes_creadas', creadas, ['embajada', 'tipo_visa'])
+        + _desglosar('simulacros_programados', programados, ['estado'])
+    )
+
+
+# =====================================================
+# ESCRITURA
+# =====================================================
+
+def guardar(granularidad, periodo, filas, ahora=None):
+    """
+    Reemplaza, en una transacción, las métricas presentes en `filas` para
+    el periodo. Escribe con upsert sobre `resumen_metrica_unico`, así que
+    dos actualizaciones concurrentes (beat y una encolada por el tablero)
+    no chocan: gana la última. Los desgloses que dejaron de existir (p. ej.
+    un estado que quedó en cero) se borran después.
+    """
+    from .models import ResumenMetrica
+
+    if not filas:
+        return
+    ahora = ahora or timezone.now()
+    metricas = {metrica for metrica, *_ in filas}
+    vigentes = Q()
+    for metrica, dimension, valor_dimension, _ in filas:
+        vigentes |= Q(metrica=metrica, dimension=dimension, valor_dimension=valor_dimension)
+    with transaction.atomic():
+        ResumenMetrica.objects.bulk_create(
+            [
+                ResumenMetrica(
+                    granularidad=granularidad,
+                    periodo=periodo,
+                    metrica=metrica,
+                    dimension=dimension,
+                    valor_dimension=valor_dimension,
+                    valor=valor,
+                    actualizado_en=ahora,
+                )
+                for metrica, dimension, valor_dimension, valor in filas
+            ],
+            update_conflicts=True,
+            unique_fields=['granularidad', 'periodo', 'metrica', 'dimension', 'valor_dimension'],
+            update_fields=['valor', 'actualizado_en'],
+        )
+        ResumenMetrica.objects.filter(
+            granularidad=granularidad, periodo=periodo, metrica__in=metricas
+        ).exclude(vigentes).delete()
+
+
+def _cerrar_anterior(granularidad, actual, ahora):
+    """
+    Completa los flujos del periodo anterior si su última actualización
+    fue antes de que terminara (los eventos del final del periodo).
+    """
+    from .models import ResumenMetrica
+
+    anterior = timezone.localtime(actual - DURACIONES[granularidad])
+    anterior = inicio_periodo(anterior, granularidad)
+    ultima = ResumenMetrica.objects.filter(
+        granularidad=granularidad, periodo=anterior
+    ).aggregate(ultima=Max('actualizado_en'))['ultima']
+    if ultima is not None and ultima < actual:
+        guardar(granularidad, anterior, calcular_flujos(anterior, actual), ahora)
+
+
+def _existencias_pendientes(ahora):
+    """Si la hora en curso aún no tiene su foto de existencias."""
+    from .models import ResumenMetrica
+
+    return not ResumenMetrica.objects.filter(
+        granularidad='hora', periodo=inicio_periodo(ahora, 'hora'), metrica=EXISTENCIAS[0]
+    ).exists()
+
+
+def actualizar(ahora=None, forzar_existencias=False):
+    """
+    Recalcula la hora y el día en curso, cierra los periodos anteriores y
+    purga las filas horarias viejas. Es lo que ejecuta la tarea periódica.
+
+    Las existencias se recalculan solo si la hora en curso aún no las tiene
+    (o con forzar_existencias); el resto de ejecuciones de la hora conserva
+    la foto y solo actualiza los flujos.
+    """
+    from .models import ResumenMetrica
+
+    ahora = ahora or timezone.now()
+    existencias = []
+    if forzar_existencias or _existencias_pendientes(ahora):
+        existencias = calcular_existencias()
+    for granularidad in ('hora', 'dia'):
+        periodo = inicio_periodo(ahora, granularidad)
+        _cerrar_anterior(granularidad, periodo, ahora)
+        guardar(
+            granularidad, periodo,
+            existencias + calcular_flujos(periodo, _siguiente(periodo, granularidad)),
+            ahora
+        )
+
+    limite = ahora - timedelta(hours=settings.RESUMENES_RETENCION_HORAS)
+    ResumenMetrica.objects.filter(granularidad='hora', periodo__lt=limite).delete()
+    return ahora
+
+
+def recalcular_dias(desde, hasta):
+    """Reconstruye los flujos diarios entre dos fechas (inclusive)."""
+    dia = desde
+    while dia <= hasta:
+        inicio = timezone.make_aware(datetime.combine(dia, time.min))
+        guardar('dia', inicio, calcular_flujos(inicio, _siguiente(inicio, 'dia')))
+        dia += timedelta(days=1)
+
+
+# =====================================================
+# LECTURA
+# =====================================================
+
+def _indexar(filas):
+    """{metrica: {(dimension, valor_dimension): valor}}"""
+    indice = {}
+    for fila in filas:
+        indice.setdefault(fila.metrica, {})[(fila.dimension, fila.valor_dimension)] = fila.valor
+    return indice
+
+
+def solicitar_actualizacion():
+    """
+    Encola core.actualizar_resumenes, como mucho una vez cada
+    RESUMENES_REFRESCO_ESPERA segundos aunque lleguen muchos requests.
+    """
+    from .tasks import actualizar_resumenes
+
+    if cache.add(CLAVE_REFRESCO, True, settings.RESUMENES_REFRESCO_ESPERA):
+        logger.info("Resumen de métricas desactualizado: actualización encolada")
+        actualizar_resumenes.delay()
+
+
+def tablero(ahora=None):
+    """
+    KPIs del dashboard admin a partir del resumen del día en curso.
+
+    Si está desactualizado (beat detenido) se sirve igual, con
+    `desactualizado`, y se encola la actualización. Si el día aún no tiene
+    resumen, las existencias salen del último día que lo tenga.
+    """
+    from .models import ResumenMetrica
+
+    ahora = ahora or timezone.now()
+    hoy = inicio_periodo(ahora, 'dia')
+    filas = list(ResumenMetrica.objects.filter(granularidad='dia', periodo=hoy))
+    del_dia = bool(filas)
+    if not del_dia:
+        ultimo = ResumenMetrica.objects.filter(
+            granularidad='dia', periodo__lt=hoy, metrica=EXISTENCIAS[0]
+        ).aggregate(periodo=Max('periodo'))['periodo']
+        if ultimo is not None:
+            filas = list(ResumenMetrica.objects.filter(
+                granularidad='dia', periodo=ultimo, metrica__in=EXISTENCIAS
+            ))
+    actualizado_en = max((fila.actualizado_en for fila in filas), default=None)
+    desactualizado = not del_dia or (
+        ahora - actualizado_en > timedelta(seconds=settings.RESUMENES_MAX_ANTIGUEDAD)
+    )
+    if desactualizado:
+        solicitar_actualizacion()
+
+    indice = _indexar(filas)
+
+    def valor(metrica, dimension='', valor_dimension=''):
+        return indice.get(metrica, {}).get((dimension, valor_dimension), 0)
+
+    semana = ResumenMetrica.objects.filter(
+        granularidad='dia',
+        metrica='simulacros_programados',
+        dimension='',
+        periodo__gte=hoy - timedelta(days=7),
+        periodo__lte=hoy,
+    ).aggregate(total=Sum('valor'))['total'] or 0
+
+    desglose = {}
+    for metrica, valores in indice.items():
+        for (dimension, valor_dimension), n in valores.items():
+            if dimension:
+                desglose.setdefault(metrica, {}).setdefault(dimension, {})[valor_dimension] = n
+
+    return {
+        'total_usuarios': valor('usuarios'),
+        'total_asesores': valor('usuarios', 'rol', 'asesor'),
+        'asesores_activos': valor('usuarios_activos', 'rol', 'asesor'),
+        'total_clientes': valor('usuarios', 'rol', 'cliente'),
+        'clientes_activos': valor('usuarios_activos', 'rol', 'cliente'),
+        'solicitudes_totales': valor('solicitudes'),
+        'solicitudes_pendientes': valor('solicitudes', 'estado', 'pendiente'),
+        'solicitudes_hoy': valor('solicitudes_creadas'),
+        'simulacros_hoy': valor('simulacros_programados'),
+        'simulacros_semana': semana,
+        'desglose': desglose,
+        'actualizado_en': actualizado_en,
+        'desactualizado': desactualizado,
+    }
+
+
+def serie(metrica, granularidad, desde, hasta, dimension=''):
+    """
+    Serie temporal de una métrica: [{periodo, valor_dimension, valor}]
+    ordenada por periodo. Sin dimensión devuelve el total.
+    """
+    from .models import ResumenMetrica
+
+    return list(
+        ResumenMetrica.objects.filter(
+            metrica=metrica,
+            granularidad=granularidad,
+            periodo__gte=desde,
+            periodo__lte=hasta,
+            dimension=dimension,
+        ).order_by('periodo', 'valor_dimension').values('periodo', 'valor_dimension', 'valor')
+    )
@@ -0,0 +1,299 @@
+"""
+Backend de ejecución de tareas en segundo plano.
+
+Los módulos tasks.py importan `shared_task` de aquí. TAREAS_BACKEND elige
+cómo se ejecuta `.delay()`:
+
+- 'celery': las tareas son de Celery (worker y broker, ver config/celery.py).
+- 'hilos': un pool de TAREAS_HILOS hilos en el propio proceso, con una
+  cola acotada (TAREAS_COLA_MAX). `.delay()` encola y vuelve enseguida, así
+  que un request no espera a la tarea.
+- 'sincrono': `.delay()` ejecuta la tarea en el llamador (tests).
+- 'auto' (por defecto): 'celery' si está instalado y hay un broker
+  configurado (CELERY_BROKER_URL en settings o en el entorno, que es lo
+  que lee Celery); si no, 'hilos'. Tener celery en requirements.txt no
+  basta: sin broker, `.delay()` fallaría en cada request.
+
+Con 'hilos':
+- Si la cola está llena, la tarea se ejecuta en el llamador: se frena al
+  productor en vez de perder trabajo.
+- Una excepción no capturada se reintenta hasta `max_retries` veces
+  (TAREAS_REINTENTOS por defecto), con espera exponencial desde
+  TAREAS_REINTENTO_ESPERA segundos. En Celery el equivalente es
+  `autoretry_for`.
+- Al salir el proceso se deja de aceptar trabajo y se espera hasta
+  TAREAS_APAGADO_TIMEOUT segundos a que la cola se vacíe.
+- Cada ejecución suma a `tareas_total` y `tarea_duration_seconds` en
+  /metrics (apps.core.metricas); `ejecutor.estado()` da la cola y los
+  hilos activos.
+
+Las tareas periódicas siguen necesitando Celery beat o cron: el pool solo
+ejecuta lo que se encola.
+"""
+import atexit
+import functools
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+logger = logging.getLogger(__name__)
+
+
+def backend():
+    """Backend efectivo según TAREAS_BACKEND."""
+    elegido = getattr(settings, 'TAREAS_BACKEND', 'auto')
+    if elegido != 'auto':
+        return elegido
+    if not (getattr(settings, 'CELERY_BROKER_URL', '') or os.environ.get('CELERY_BROKER_URL')):
+        return 'hilos'
+    try:
+        import celery  # noqa: F401
+    except ImportError:
+        return 'hilos'
+    return 'celery'
+
+
+# =====================================================
+# TAREAS
+# =====================================================
+
+class Tarea:
+    """
+    Función registrada como tarea. Llamarla la ejecuta en el acto;
+    `.delay()` y `.apply_async()` la envían al backend.
+    """
+
+    def __init__(self, funcion, name=None, max_retries=None, **opciones):
+        functools.update_wrapper(self, funcion)
+        self.funcion = funcion
+        self.name = name or f'{funcion.__module__}.{funcion.__name__}'
+        self.max_retries = max_retries
+        self.opciones = opciones
+
+    def __call__(self, *args, **kwargs):
+        return self.funcion(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        return self.apply_async(args, kwargs)
+
+    def apply_async(self, args=None, kwargs=None, countdown=None, **opciones):
+        args, kwargs = tuple(args or ()), dict(kwargs or {})
+        if backend() == 'sincrono':
+            return self(*args, **kwargs)
+        return ejecutor.enviar(self, args, kwargs, espera=countdown)
+
+    def __repr__(self):
+        return f'<Tarea {self.name}>'
+
+
+def shared_task(*args, **opciones):
+    """
+    Decorador de tareas con la firma del de Celery:
+    `@shared_task` o `@shared_task(name='app.tarea', max_retries=3)`.
+    """
+    if backend() == 'celery':
+        from celery import shared_task as shared_task_celery
+        return shared_task_celery(*args, **opciones)
+
+    def decorador(funcion):
+        return Tarea(funcion, **opciones)
+    if args and callable(args[0]):
+        return decorador(args[0])
+    return decorador
+
+
+# =====================================================
+# EJECUTOR EN HILOS
+# =====================================================
+
+class Trabajo:
+    __slots__ = ('tarea', 'args', 'kwargs', 'intento')
+
+    def __init__(self, tarea, args, kwargs, intento=0):
+        self.tarea = tarea
+        self.args = args
+        self.kwargs = kwargs
+        self.intento = intento
+
+
+_FIN = object()
+
+
+class EjecutorHilos:
+    """
+    Pool de hilos con cola acotada. Arranca en el primer envío y se
+    reinicia si el proceso se bifurca (workers de gunicorn con --preload).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cola = None
+        self._hilos = []
+        self._programados = {}
+        self._pid = None
+        self._cerrando = False
+        self._activas = 0
+
+    # ---------- ciclo de vida ----------
+
+    def _iniciar(self):
+        """Arranca el pool si hace falta. False si el ejecutor se está apagando."""
+        with self._lock:
+            if self._pid == os.getpid():
+                return not self._cerrando
+            self._cola = queue.Queue(maxsize=settings.TAREAS_COLA_MAX)
+            self._hilos = [
+                threading.Thread(target=self._trabajar, name=f'tareas-{i}', daemon=True)
+                for i in range(settings.TAREAS_HILOS)
+            ]
+            for hilo in self._hilos:
+                hilo.start()
+            self._programados = {}
+            self._cerrando = False
+            self._activas = 0
+            if self._pid is None:
+                atexit.register(self.apagar)
+            self._pid = os.getpid()
+            return True
+
+    def apagar(self, timeout=None):
+        """
+        Deja de aceptar tareas, espera a que la cola se vacíe (hasta
+        `timeout` segundos) y detiene los hilos. Devuelve las tareas que
+        quedaron sin ejecutar.
+        """
+        with self._lock:
+            if self._pid != os.getpid() or self._cerrando:
+                return 0
+            self._cerrando = True
+            for temporizador in self._programados.values():
+                temporizador.cancel()
+            pendientes = len(self._programados)
+            self._programados = {}
+
+        timeout = settings.TAREAS_APAGADO_TIMEOUT if timeout is None else timeout
+        limite = time.monotonic() + timeout
+        for _ in self._hilos:
+            try:
+                self._cola.put(_FIN, timeout=max(limite - time.monotonic(), 0))
+            except queue.Full:
+                break
+        for hilo in self._hilos:
+            hilo.join(max(limite - time.monotonic(), 0))
+
+        pendientes += sum(1 for trabajo in list(self._cola.queue) if trabajo is not _FIN)
+        if pendientes:
+            logger.warning(f"Ejecutor de tareas detenido con {pendientes} tarea(s) sin ejecutar")
+        return pendientes
+
+    # ---------- envío ----------
+
+    def enviar(self, tarea, args, kwargs, espera=None, intento=0):
+        """Encola la tarea (tras `espera` segundos, si se indica)."""
+        trabajo = Trabajo(tarea, args, kwargs, intento)
+        if not self._iniciar():
+            # Apagando (atexit): se ejecuta aquí para no perderla
+            self._ejecutar(trabajo)
+            return None
+        if espera:
+            temporizador = threading.Timer(espera, self._encolar_programado, args=(trabajo,))
+            temporizador.daemon = True
+            with self._lock:
+                self._programados[id(trabajo)] = temporizador
+            temporizador.start()
+            return None
+        self._encolar(trabajo)
+        return None
+
+    def _encolar_programado(self, trabajo):
+        with self._lock:
+            if self._programados.pop(id(trabajo), None) is None:
+                return  # cancelado al apagar
+        self._encolar(trabajo)
+
+    def _encolar(self, trabajo):
+        try:
+            self._cola.put_nowait(trabajo)
+        except queue.Full:
+            # Sin lugar en la cola: se ejecuta aquí para no perderla
+            logger.warning(f"Cola de tareas llena; {trabajo.tarea.name} se ejecuta en el llamador")
+            _registrar(trabajo.tarea.name, 'desbordada')
+            self._ejecutar(trabajo)
+
+    # ---------- ejecución ----------
+
+    def _trabajar(self):
+        try:
+            while True:
+                trabajo = self._cola.get()
+                try:
+                    if trabajo is _FIN:
+                        return
+                    with self._lock:
+                        self._activas += 1
+                    close_old_connections()
+                    self._ejecutar(trabajo)
+                finally:
+                    if trabajo is not _FIN:
+                        close_old_connections()
+                        with self._lock:
+                            self._activas -= 1
+                    self._cola.task_done()
+        finally:
+            # Las conexiones son por hilo: se cierran las de este
+            connections.close_all()
+
+    def _ejecutar(self, trabajo):
+        tarea = trabajo.tarea
+        inicio = time.perf_counter()
+        try:
+            tarea(*trabajo.args, **trabajo.kwargs)
+        except Exception as e:
+            maximo = settings.TAREAS_REINTENTOS if tarea.max_retries is None else tarea.max_retries
+            if trabajo.intento < maximo and not self._cerrando:
+                espera = settings.TAREAS_REINTENTO_ESPERA * 2 ** trabajo.intento
+                logger.warning(
+                    f"Tarea {tarea.name} falló ({e}); reintento {trabajo.intento + 1}/{maximo} en {espera}s"
+                )
+                _registrar(tarea.name, 'reintento', time.perf_counter() - inicio)
+                self.enviar(tarea, trabajo.args, trabajo.kwargs, espera=espera, intento=trabajo.intento + 1)
+            else:
+                logger.exception(f"Tarea {tarea.name} falló definitivamente: {e}")
+                _registrar(tarea.name, 'error', time.perf_counter() - inicio)
+        else:
+            _registrar(tarea.name, 'ok', time.perf_counter() - inicio)
+
+    # ---------- diagnóstico ----------
+
+    def estado(self):
+        """Hilos, cola y tareas en curso o programadas de este proceso."""
+        with self._lock:
+            iniciado = self._pid == os.getpid()
+            return {
+                'backend': backend(),
+                'hilos': sum(hilo.is_alive() for hilo in self._hilos) if iniciado else 0,
+                'en_cola': self._cola.qsize() if iniciado else 0,
+                'activas': self._activas if iniciado else 0,
+                'programadas': len(self._programados) if iniciado else 0,
+                'cerrando': self._cerrando,
+            }
+
+
+def _registrar(nombre, resultado, segundos=None):
+    from .metricas import contador, histograma, obtener_registro
+
+    muestras = contador('tareas_total', {'tarea': nombre, 'resultado': resultado})
+    if segundos is not None:
+        muestras += histograma('tarea_duration_seconds', {'tarea': nombre}, segundos)
+    try:
+        obtener_registro().registrar(muestras)
+    except Exception as e:
+        logger.warning(f"No se pudieron registrar métricas de tareas: {e}")
+
+
+ejecutor = EjecutorHilos()
@@ -0,0 +1,113 @@
+"""
+Tareas asíncronas con Celery para la app Core.
+
+NOTA: Sin Celery, las tareas corren en el pool de hilos del proceso
+(ver apps.core.tareas y TAREAS_BACKEND).
+"""
+import logging
+
+from .tareas import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name='core.generar_derivados_imagen')
+def generar_derivados_imagen(modelo, pk):
+    """
+    Genera miniatura y vista previa web de una imagen subida.
+    Se enruta a la cola 'media' (ver CELERY_TASK_ROUTES).
+    """
+    from .imagenes import generar_derivados
+
+    try:
+        derivados = generar_derivados(modelo, pk)
+        logger.info(f"Derivados generados para {modelo}#{pk}: {list(derivados)}")
+        return derivados
+    except Exception as e:
+        logger.error(f"Error generando derivados de {modelo}#{pk}: {e}")
+        return {}
+
+
+def programar_derivados(modelo, pk, nombre_archivo):
+    """
+    Encola la generación de derivados cuando la transacción actual confirme,
+    solo si el archivo es una imagen soportada.
+    """
+    from django.db import transaction
+    from .imagenes import es_imagen
+
+    if es_imagen(nombre_archivo):
+        transaction.on_commit(lambda: generar_derivados_imagen.delay(modelo, pk))
+
+
+@shared_task(name='core.actualizar_resumenes')
+def actualizar_resumenes():
+    """
+    Recalcula los resúmenes de KPIs del dashboard admin (hora y día en
+    curso). Programada cada 15 minutos en Celery beat; el tablero también
+    la encola si encuentra el resumen desactualizado.
+    """
+    from .resumenes import actualizar
+
+    try:
+        actualizado_en = actualizar()
+        logger.info(f"Resúmenes de métricas actualizados ({actualizado_en:%Y-%m-%d %H:%M})")
+    except Exception as e:
+        logger.error(f"Error actualizando resúmenes de métricas: {e}")
+
+
+@shared_task(name='core.generar_exportacion')
+def generar_exportacion(exportacion_id):
+    """Genera el archivo de una exportación grande (CSV/XLSX)."""
+    from .exportaciones import generar
+    from .models import Exportacion
+
+    try:
+        exportacion = Exportacion.objects.get(pk=exportacion_id, estado='pendiente')
+    except Exportacion.DoesNotExist:
+        logger.warning(f"Exportación {exportacion_id} no encontrada o ya procesada")
+        return None
+
+    try:
+        generar(exportacion)
+        logger.info(f"Exportación {exportacion_id} generada ({exportacion.filas} filas)")
+        return exportacion.filas
+    except Exception as e:
+        logger.error(f"Error generando exportación {exportacion_id}: {e}")
+        Exportacion.objects.filter(pk=exportacion_id).update(estado='error', error=str(e))
+        return None
+
+
+@shared_task(name='core.purgar_exportaciones')
+def purgar_exportaciones():
+    """Elimina las exportaciones con más de EXPORTACION_RETENCION_DIAS días."""
+    from .exportaciones import purgar
+
+    eliminadas = purgar()
+    logger.info(f"Exportaciones purgadas: {eliminadas}")
+    return eliminadas
+
+
+@shared_task(name='core.despachar_eventos')
+def despachar_eventos():
+    """
+    Relay del outbox: entrega los eventos pendientes a sus manejadores.
+    Se encola tras cada commit que publica eventos y corre cada minuto en
+    Celery beat para recoger los que quedaron (broker caído, reintentos).
+    """
+    from .outbox import despachar
+
+    resumen = despachar()
+    if any(resumen.values()):
+        logger.info(f"Eventos del outbox: {resumen}")
+    return resumen
+
+
+@shared_task(name='core.purgar_eventos')
+def purgar_eventos():
+    """Elimina los eventos procesados con más de OUTBOX_RETENCION_DIAS días."""
+    from .outbox import purgar
+
+    eliminados = purgar()
+    logger.info(f"Eventos del outbox purgados: {eliminados}")
+    return eliminados
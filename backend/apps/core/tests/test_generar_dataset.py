@@ -0,0 +1,58 @@
+"""
+Comando generar_dataset: reproducible con la misma semilla y regenerable
+con --limpiar sobre un dataset existente.
+"""
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from apps.notificaciones.models import Notificacion
+from apps.preparacion.models import Simulacro
+from apps.solicitudes.models import Documento, EstadoSolicitud, Solicitud
+from apps.usuarios.models import Usuario
+
+OPCIONES = {
+    'asesores': 2, 'clientes_por_asesor': 3, 'notificaciones_por_usuario': 2, 'bloque': 1,
+}
+
+
+def _generar(**opciones):
+    call_command('generar_dataset', stdout=StringIO(), **OPCIONES, **opciones)
+
+
+def _conteos():
+    return {
+        'usuarios': Usuario.objects.filter(email__endswith='@dataset.local').count(),
+        'solicitudes': Solicitud.all_objects.count(),
+        'historial': EstadoSolicitud.objects.count(),
+        'documentos': Documento.objects.count(),
+        'simulacros': Simulacro.all_objects.count(),
+        'notificaciones': Notificacion.objects.count(),
+    }
+
+
+@pytest.mark.django_db
+def test_limpiar_regenera_el_mismo_dataset():
+    _generar()
+    primero = _conteos()
+    assert primero['usuarios'] == 8
+    assert primero['solicitudes'] and primero['simulacros']
+
+    # Las filas eliminadas lógicamente también protegen al cliente
+    Solicitud.objects.filter(pk=Solicitud.objects.first().pk).delete()
+    Simulacro.objects.filter(pk=Simulacro.objects.first().pk).delete()
+
+    _generar(limpiar=True)
+    assert _conteos() == primero
+
+    _generar(limpiar=True)
+    assert _conteos() == primero
+
+
+@pytest.mark.django_db
+def test_sin_limpiar_no_duplica():
+    _generar()
+
+    with pytest.raises(CommandError, match='--limpiar'):
+        _generar()
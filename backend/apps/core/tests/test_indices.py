@@ -0,0 +1,62 @@
+"""
+Índices de las consultas calientes, verificados con EXPLAIN.
+
+Recorre las mismas consultas que `manage.py explicar_consultas`: si una
+deja de usar su índice parcial (por un cambio en el modelo o en la
+consulta), el test falla.
+"""
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from django.utils import timezone
+
+from apps.core.management.commands.explicar_consultas import consultas_calientes
+from apps.preparacion.models import Simulacro
+from apps.solicitudes.models import Entrevista, Solicitud
+
+FILAS = 30
+
+
+@pytest.fixture
+def datos(crear_usuario):
+    """Solicitudes, simulacros y entrevistas de un cliente y un asesor, con eliminados."""
+    cliente = crear_usuario('cliente')
+    asesor = crear_usuario('asesor')
+    solicitudes = Solicitud.objects.bulk_create([
+        Solicitud(
+            cliente=cliente, asesor=asesor, tipo_visa='estudio', embajada='usa',
+            estado=('pendiente', 'en_revision')[i % 2], is_deleted=i % 5 == 0,
+            fecha_asignacion=timezone.now() - timedelta(days=i),
+        )
+        for i in range(FILAS)
+    ])
+    Simulacro.objects.bulk_create([
+        Simulacro(
+            cliente=cliente, asesor=asesor, solicitud=solicitud,
+            fecha=date(2026, 1, 1) + timedelta(days=i), hora=time(10, 0),
+            programado_en=timezone.make_aware(datetime(2026, 1, 1, 10) + timedelta(days=i)),
+            estado=('confirmado', 'completado')[i % 2], is_deleted=i % 5 == 0,
+        )
+        for i, solicitud in enumerate(solicitudes)
+    ])
+    Entrevista.objects.bulk_create([
+        Entrevista(
+            solicitud=solicitud, fecha=date(2026, 2, 1), hora=time(9, 0),
+            programado_en=timezone.make_aware(datetime(2026, 2, 1, 9)), ubicacion='Embajada',
+        )
+        for solicitud in solicitudes
+    ])
+    return cliente, asesor
+
+
+@pytest.mark.django_db
+def test_consultas_calientes_usan_su_indice(datos):
+    cliente, asesor = datos
+
+    sin_indice = [
+        (nombre, indice, queryset.explain())
+        for nombre, queryset, indice in consultas_calientes(cliente.pk, asesor)
+        if indice not in queryset.explain()
+    ]
+
+    assert sin_indice == []
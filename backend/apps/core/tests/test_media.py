@@ -0,0 +1,172 @@
+"""
+Archivos protegidos: tokens firmados (vencimiento y manipulación),
+entrega por /api/media/<token>/, rutas del storage que las APIs no
+exponen y /media/ sin ruta pública.
+"""
+import gzip
+import importlib
+import time
+
+import pytest
+from django.core import signing
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import Resolver404
+from django.urls.resolvers import RegexPattern, URLResolver
+
+from apps.core.media import firmar_ruta, verificar_token
+from apps.solicitudes.models import Solicitud
+from config import urls
+
+
+@pytest.fixture(autouse=True)
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.MEDIA_SENDFILE_BACKEND = 'django'
+    (tmp_path / 'documentos').mkdir()
+    (tmp_path / 'documentos' / 'pasaporte.pdf').write_bytes(b'%PDF-1.4')
+    (tmp_path / 'documentos' / 'notas.txt.gz').write_bytes(gzip.compress('Transcripción'.encode()))
+    return tmp_path
+
+
+def _firmado_hace(segundos, *args, **kwargs):
+    """Token firmado `segundos` atrás."""
+    ahora = time.time()
+    with pytest.MonkeyPatch.context() as parche:
+        parche.setattr(signing.time, 'time', lambda: ahora - segundos)
+        return firmar_ruta(*args, **kwargs)
+
+
+def _contenido(respuesta):
+    return b''.join(respuesta.streaming_content)
+
+
+# =====================================================
+# TOKENS
+# =====================================================
+
+def test_token_ida_y_vuelta():
+    assert verificar_token(firmar_ruta('documentos/pasaporte.pdf')) == ('documentos/pasaporte.pdf', False, False)
+    assert verificar_token(firmar_ruta('a.txt.gz', descarga=True, decodificar=True)) == ('a.txt.gz', True, True)
+
+
+def test_token_vencido(settings):
+    settings.MEDIA_URL_FIRMADA_MAX_AGE = 300
+    assert verificar_token(_firmado_hace(299, 'documentos/pasaporte.pdf'))[0] == 'documentos/pasaporte.pdf'
+
+    with pytest.raises(signing.SignatureExpired):
+        verificar_token(_firmado_hace(301, 'documentos/pasaporte.pdf'))
+    # max_age explícito manda sobre el setting
+    with pytest.raises(signing.SignatureExpired):
+        verificar_token(_firmado_hace(61, 'documentos/pasaporte.pdf'), max_age=60)
+
+
+def test_token_manipulado():
+    token = firmar_ruta('documentos/pasaporte.pdf')
+    valor, firma = token.rsplit(':', 1)
+
+    with pytest.raises(signing.BadSignature):
+        verificar_token(f'{valor}:{firma[:-1]}{"A" if firma[-1] != "A" else "B"}')
+    # Otra ruta con la firma de la original
+    otra = firmar_ruta('documentos/otro.pdf').rsplit(':', 1)[0]
+    with pytest.raises(signing.BadSignature):
+        verificar_token(f'{otra}:{firma}')
+    # Firmado con otro salt (p. ej. tokens de sala)
+    with pytest.raises(signing.BadSignature):
+        verificar_token(signing.dumps({'r': 'documentos/pasaporte.pdf', 'd': 0}, compress=True))
+
+
+# =====================================================
+# /api/media/<token>/
+# =====================================================
+
+def _url(token):
+    return f'/api/media/{token}/'
+
+
+def test_entrega_inline_sin_autenticacion(client):
+    respuesta = client.get(_url(firmar_ruta('documentos/pasaporte.pdf')))
+
+    assert respuesta.status_code == 200
+    assert _contenido(respuesta) == b'%PDF-1.4'
+    assert respuesta['Content-Type'] == 'application/pdf'
+    assert respuesta['Content-Disposition'] == "inline; filename*=UTF-8''pasaporte.pdf"
+    assert respuesta['Cache-Control'] == 'private, no-store'
+
+
+def test_entrega_como_adjunto(client):
+    respuesta = client.get(_url(firmar_ruta('documentos/pasaporte.pdf', descarga=True)))
+
+    assert respuesta['Content-Disposition'].startswith('attachment;')
+
+
+@pytest.mark.parametrize('token', [
+    _firmado_hace(3600, 'documentos/pasaporte.pdf'),
+    firmar_ruta('documentos/pasaporte.pdf')[:-2] + 'xx',
+    signing.dumps({'r': 'documentos/pasaporte.pdf', 'd': 0}),
+    'sin-firma',
+])
+def test_token_invalido_o_vencido_es_404(client, token):
+    assert client.get(_url(token)).status_code == 404
+
+
+@pytest.mark.parametrize('nombre', ['documentos/no-existe.pdf', '../settings.py', '/etc/passwd'])
+def test_archivo_inexistente_o_fuera_de_media_es_404(client, nombre):
+    assert client.get(_url(firmar_ruta(nombre))).status_code == 404
+
+
+def test_nginx_delega_la_entrega(client, settings):
+    settings.MEDIA_SENDFILE_BACKEND = 'nginx'
+
+    respuesta = client.get(_url(firmar_ruta('documentos/pasaporte.pdf')))
+
+    assert respuesta.status_code == 200
+    assert respuesta['X-Accel-Redirect'] == '/media-protegida/documentos/pasaporte.pdf'
+    assert respuesta.content == b''
+
+
+def test_comprimido_se_entrega_tal_cual(client):
+    respuesta = client.get(_url(firmar_ruta('documentos/notas.txt.gz', descarga=True)))
+
+    assert respuesta['Content-Type'] == 'application/gzip'
+    assert not respuesta.has_header('Content-Encoding')
+    assert gzip.decompress(_contenido(respuesta)).decode() == 'Transcripción'
+
+
+def test_comprimido_con_decodificar_lleva_content_encoding(client):
+    respuesta = client.get(_url(firmar_ruta('documentos/notas.txt.gz', decodificar=True)))
+
+    assert respuesta['Content-Type'] == 'text/plain; charset=utf-8'
+    assert respuesta['Content-Encoding'] == 'gzip'
+
+
+# =====================================================
+# RUTAS DEL STORAGE
+# =====================================================
+
+
+@pytest.mark.django_db
+def test_documento_subido_no_expone_la_ruta(crear_usuario, cliente_api):
+    cliente = crear_usuario('cliente')
+    solicitud = Solicitud.objects.create(cliente=cliente, tipo_visa='estudio', embajada='usa')
+
+    respuesta = cliente_api(cliente).post(
+        f'/api/solicitudes/{solicitud.pk}/documentos/',
+        {'nombre': 'Pasaporte', 'archivo': SimpleUploadedFile('pasaporte.pdf', b'%PDF-1.4')},
+        format='multipart'
+    )
+
+    assert respuesta.status_code == 201, respuesta.data
+    documento = respuesta.data['documento']
+    assert 'archivo' not in documento
+    assert documento['archivo_nombre'] == 'pasaporte.pdf'
+    assert '/api/media/' in documento['archivo_url']
+
+
+def test_media_no_tiene_ruta_publica(settings):
+    # urls.py decide las rutas de desarrollo al importarse
+    settings.DEBUG = True
+    patrones = importlib.reload(urls).urlpatterns
+
+    resolver = URLResolver(RegexPattern(r'^/'), patrones)
+    with pytest.raises(Resolver404):
+        resolver.resolve('/media/documentos/pasaporte.pdf')
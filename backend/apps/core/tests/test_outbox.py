@@ -0,0 +1,135 @@
+"""
+Outbox transaccional: idempotencia por clave, manejadores completados que
+un reintento no repite y backoff hasta marcar el evento como fallido.
+"""
+from datetime import timedelta
+
+import pytest
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core import outbox
+from apps.core.models import EventoOutbox
+
+TIPO = 'prueba.evento'
+
+
+@pytest.fixture
+def manejadores(monkeypatch):
+    """Registra manejadores solo para TIPO durante el test."""
+    registrados = []
+    monkeypatch.setitem(outbox.MANEJADORES, TIPO, registrados)
+    return registrados
+
+
+def _vencer(evento):
+    """Adelanta el reintento para que el próximo despacho lo tome."""
+    EventoOutbox.objects.filter(pk=evento.pk).update(proximo_intento=timezone.now())
+
+
+@pytest.mark.django_db
+def test_misma_clave_es_un_solo_evento(django_capture_on_commit_callbacks, monkeypatch):
+    relays = []
+    monkeypatch.setattr(outbox, '_programar_relay', lambda: relays.append(1))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            outbox.publicar(TIPO, 'prueba:1', objeto_id=1)
+            outbox.publicar(TIPO, 'prueba:1', objeto_id=2)
+            outbox.publicar(TIPO, 'prueba:2', objeto_id=3)
+    # Un relay por transacción, aunque publique varios eventos
+    assert relays == [1]
+
+    # El mismo hecho publicado de nuevo (p. ej. un request reintentado)
+    EventoOutbox.objects.filter(clave='prueba:1').update(estado='procesado')
+    outbox.publicar(TIPO, 'prueba:1', objeto_id=4)
+
+    assert list(EventoOutbox.objects.order_by('clave').values_list('clave', 'datos', 'estado')) == [
+        ('prueba:1', {'objeto_id': 1}, 'procesado'), ('prueba:2', {'objeto_id': 3}, 'pendiente'),
+    ]
+
+
+@pytest.mark.django_db
+def test_reintento_no_repite_los_manejadores_completados(manejadores):
+    llamadas = []
+
+    def primero(evento):
+        llamadas.append('primero')
+
+    def segundo(evento):
+        llamadas.append('segundo')
+        if llamadas.count('segundo') == 1:
+            raise RuntimeError('servicio caído')
+
+    manejadores.extend([primero, segundo])
+    evento = EventoOutbox.objects.create(tipo=TIPO, clave='prueba:1')
+
+    assert outbox.despachar() == {'procesados': 0, 'reintentos': 1, 'fallidos': 0}
+    evento.refresh_from_db()
+    assert evento.estado == 'pendiente'
+    assert evento.intentos == 1
+    assert evento.completados == [outbox._nombre(primero)]
+    assert 'RuntimeError: servicio caído' in evento.error
+    assert evento.proximo_intento > timezone.now()
+    # Aún no vence: el relay no lo toma
+    assert outbox.despachar()['procesados'] == 0
+
+    _vencer(evento)
+    assert outbox.despachar() == {'procesados': 1, 'reintentos': 0, 'fallidos': 0}
+    evento.refresh_from_db()
+    assert evento.estado == 'procesado'
+    assert evento.error == ''
+    assert llamadas == ['primero', 'segundo', 'segundo']
+
+
+@pytest.mark.django_db
+def test_manejador_que_falla_revierte_sus_escrituras(manejadores):
+    def parcial(evento):
+        EventoOutbox.objects.create(tipo='otro', clave='escrito-por-el-manejador')
+        raise RuntimeError('a medias')
+
+    manejadores.append(parcial)
+    EventoOutbox.objects.create(tipo=TIPO, clave='prueba:1')
+
+    outbox.despachar()
+
+    assert not EventoOutbox.objects.filter(clave='escrito-por-el-manejador').exists()
+
+
+@pytest.mark.django_db
+def test_backoff_exponencial_hasta_fallido(manejadores, settings, monkeypatch):
+    settings.OUTBOX_MAX_INTENTOS = 4
+    settings.OUTBOX_BACKOFF_BASE = 30
+    settings.OUTBOX_BACKOFF_MAX = 100
+    monkeypatch.setattr(outbox.random, 'uniform', lambda a, b: 1.0)
+
+    def siempre_falla(evento):
+        raise RuntimeError('sin conexión')
+
+    manejadores.append(siempre_falla)
+    evento = EventoOutbox.objects.create(tipo=TIPO, clave='prueba:1')
+
+    esperas = []
+    for _ in range(settings.OUTBOX_MAX_INTENTOS - 1):
+        antes = timezone.now()
+        assert outbox.despachar()['reintentos'] == 1
+        evento.refresh_from_db()
+        esperas.append(round((evento.proximo_intento - antes).total_seconds()))
+        _vencer(evento)
+
+    assert esperas == [30, 60, 100]
+    assert outbox.despachar() == {'procesados': 0, 'reintentos': 0, 'fallidos': 1}
+    evento.refresh_from_db()
+    assert evento.estado == 'fallido'
+    assert evento.intentos == 4
+    # Un evento fallido no vuelve a despacharse
+    _vencer(evento)
+    assert outbox.despachar() == {'procesados': 0, 'reintentos': 0, 'fallidos': 0}
+
+
+def test_backoff_con_jitter_y_tope(settings):
+    settings.OUTBOX_BACKOFF_BASE = 30
+    settings.OUTBOX_BACKOFF_MAX = 3600
+
+    assert timedelta(seconds=24) <= outbox.backoff(1) <= timedelta(seconds=36)
+    assert timedelta(seconds=2880) <= outbox.backoff(20) <= timedelta(seconds=4320)
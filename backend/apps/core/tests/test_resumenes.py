@@ -0,0 +1,140 @@
+"""
+Resúmenes del dashboard admin: escrituras concurrentes, existencias una vez
+por hora y tablero que sirve el resumen desactualizado sin recalcularlo.
+"""
+import threading
+from datetime import timedelta
+
+import pytest
+from django.db import connections
+from django.utils import timezone
+
+from apps.core import resumenes
+from apps.core.models import ResumenMetrica
+
+HILOS = 6
+
+
+def _en_paralelo(*funciones):
+    """Ejecuta las funciones a la vez (una por hilo) y devuelve sus resultados en orden."""
+    barrera = threading.Barrier(len(funciones), timeout=30)
+    resultados = [None] * len(funciones)
+
+    def correr(i, funcion):
+        try:
+            barrera.wait()
+            resultados[i] = funcion()
+        except Exception as e:
+            resultados[i] = e
+        finally:
+            connections.close_all()
+
+    hilos = [threading.Thread(target=correr, args=(i, f)) for i, f in enumerate(funciones)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join(60)
+    return resultados
+
+
+@pytest.fixture
+def hora():
+    return resumenes.inicio_periodo(timezone.now(), 'hora')
+
+
+@pytest.mark.django_db(transaction=True)
+def test_guardar_concurrente_no_choca_con_la_restriccion_unica(hora):
+    def guardar(i):
+        filas = [
+            ('usuarios', '', '', 10 + i),
+            ('usuarios', 'rol', 'cliente', 8 + i),
+            ('usuarios', 'rol', 'asesor' if i % 2 else 'admin', 2),
+        ]
+        return lambda: resumenes.guardar('dia', hora, filas)
+
+    resultados = _en_paralelo(*[guardar(i) for i in range(HILOS)])
+
+    assert [r for r in resultados if isinstance(r, Exception)] == []
+    filas = ResumenMetrica.objects.filter(granularidad='dia', periodo=hora, metrica='usuarios')
+    total = filas.get(dimension='')
+    assert filas.get(valor_dimension='cliente').valor == total.valor - 2
+    # Solo quedan los desgloses de la última escritura
+    assert filas.count() == 3
+
+
+@pytest.mark.django_db
+def test_guardar_borra_los_desgloses_que_desaparecen(hora):
+    resumenes.guardar('dia', hora, [
+        ('solicitudes', '', '', 3), ('solicitudes', 'estado', 'pendiente', 2),
+        ('solicitudes', 'estado', 'aprobada', 1), ('simulacros', '', '', 4),
+    ])
+    resumenes.guardar('dia', hora, [('solicitudes', '', '', 3), ('solicitudes', 'estado', 'aprobada', 3)])
+
+    filas = ResumenMetrica.objects.filter(granularidad='dia', periodo=hora)
+    assert sorted(filas.values_list('metrica', 'valor_dimension', 'valor')) == [
+        ('simulacros', '', 4), ('solicitudes', '', 3), ('solicitudes', 'aprobada', 3),
+    ]
+
+
+@pytest.mark.django_db
+def test_existencias_una_vez_por_hora(hora, crear_usuario):
+    crear_usuario('cliente')
+
+    def usuarios(periodo):
+        return ResumenMetrica.objects.get(
+            granularidad='hora', periodo=periodo, metrica='usuarios', dimension=''
+        ).valor
+
+    resumenes.actualizar(hora + timedelta(minutes=1))
+    crear_usuario('cliente')
+    resumenes.actualizar(hora + timedelta(minutes=16))
+    assert usuarios(hora) == 1
+
+    siguiente = hora + timedelta(hours=1)
+    resumenes.actualizar(siguiente + timedelta(minutes=1))
+    assert usuarios(siguiente) == 2
+
+    resumenes.actualizar(siguiente + timedelta(minutes=16), forzar_existencias=True)
+    assert usuarios(siguiente) == 2
+
+
+@pytest.fixture
+def encolados(monkeypatch):
+    from apps.core.tasks import actualizar_resumenes
+
+    llamadas = []
+    monkeypatch.setattr(actualizar_resumenes, 'delay', lambda: llamadas.append(True))
+    return llamadas
+
+
+@pytest.fixture
+def resumen_viejo():
+    """Resumen del día escrito hace tres horas (beat detenido)."""
+    ahora = timezone.now()
+    hoy = resumenes.inicio_periodo(ahora, 'dia')
+    resumenes.guardar('dia', hoy, [('usuarios', '', '', 7)], ahora - timedelta(hours=3))
+    return ahora
+
+
+@pytest.mark.django_db
+@pytest.mark.presupuesto_consultas(2)
+def test_tablero_desactualizado_se_sirve_y_encola(resumen_viejo, encolados):
+    datos = resumenes.tablero(resumen_viejo)
+
+    assert datos['total_usuarios'] == 7
+    assert datos['desactualizado'] is True
+    assert encolados == [True]
+
+
+@pytest.mark.django_db
+def test_tablero_sin_resumen_del_dia_usa_las_existencias_del_ultimo(encolados):
+    ahora = timezone.now()
+    hoy = resumenes.inicio_periodo(ahora, 'dia')
+    ayer = resumenes.inicio_periodo(hoy - timedelta(hours=1), 'dia')
+    resumenes.guardar('dia', ayer, [('usuarios', '', '', 5), ('solicitudes_creadas', '', '', 9)])
+
+    datos = resumenes.tablero(ahora)
+
+    assert datos['total_usuarios'] == 5
+    assert datos['solicitudes_hoy'] == 0
+    assert encolados == [True]
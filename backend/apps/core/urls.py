@@ -0,0 +1,12 @@
+"""
+URLs compartidas del sistema.
+"""
+from django.urls import path
+
+from .views import MediaFirmadaView
+
+app_name = 'core'
+
+urlpatterns = [
+    path('media/<str:token>/', MediaFirmadaView.as_view(), name='media_firmada'),
+]
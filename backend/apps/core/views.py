@@ -0,0 +1,52 @@
+"""
+Views compartidas del sistema.
+"""
+from django.conf import settings
+from django.core import signing
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.views import View
+
+from .media import respuesta_archivo, verificar_token
+
+
+class MediaFirmadaView(View):
+    """
+    GET /api/media/<token>/
+    Entrega un archivo protegido a partir de una URL firmada.
+    La firma se valida sin consultar la base de datos.
+    """
+
+    def get(self, request, token):
+        try:
+            nombre, descarga, decodificar = verificar_token(token)
+        except signing.BadSignature:
+            raise Http404('Enlace inválido o expirado')
+        return respuesta_archivo(nombre, descarga=descarga, decodificar=decodificar)
+
+
+class MetricasView(View):
+    """
+    GET /metrics
+    Métricas por endpoint en formato de texto de Prometheus.
+    Con METRICAS_TOKEN configurado exige 'Authorization: Bearer <token>';
+    sin token solo se expone en DEBUG.
+    """
+
+    def get(self, request):
+        if not settings.METRICAS_HABILITADAS:
+            raise Http404('Métricas deshabilitadas')
+
+        token = settings.METRICAS_TOKEN
+        if token:
+            enviado = request.headers.get('Authorization', '').removeprefix('Bearer ')
+            if not constant_time_compare(enviado, token):
+                return HttpResponseForbidden()
+        elif not settings.DEBUG:
+            return HttpResponseForbidden()
+
+        from .metricas import obtener_registro, renderizar
+        return HttpResponse(
+            renderizar(obtener_registro().valores()),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
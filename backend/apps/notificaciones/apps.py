@@ -14,5 +14,6 @@ class NotificacionesConfig(AppConfig):
         Importar signals cuando la app esté lista.
         """
         from . import tasks  # noqa: F401
+        from . import eventos  # noqa: F401  (manejadores del outbox)
         # from .seguimiento import signals  # noqa
         # from .coordinacion import signals  # noqa
@@ -0,0 +1,267 @@
+"""
+Entregas de notificaciones por canales externos (outbox).
+
+1. Encolado: al crear una Notificacion se insertan sus EntregaNotificacion
+   en la misma transacción: una por canal de ENTREGAS_CANALES que las
+   preferencias del usuario (PreferenciaNotificacion) permiten. Si la
+   transacción se revierte, no queda nada que enviar.
+2. Envío: la tarea `notificaciones.enviar_entregas` toma las pendientes
+   vencidas por lotes de ENTREGAS_LOTE. Las reserva (SKIP LOCKED y
+   proximo_intento en el futuro) para que dos workers no las repitan y las
+   envía por una sola conexión por canal y ejecución: una conexión SMTP
+   para todos los emails.
+3. Resultado: las enviadas se marcan en un UPDATE; las fallidas se
+   reprograman con backoff exponencial hasta ENTREGAS_MAX_INTENTOS y luego
+   quedan 'fallida' con el último error.
+
+El backend de email es el de Django (EMAIL_BACKEND): SMTP en producción,
+consola/locmem/archivo en desarrollo y tests.
+"""
+import logging
+import random
+import smtplib
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import EntregaNotificacion
+
+logger = logging.getLogger(__name__)
+
+Usuario = get_user_model()
+
+# Preferencia de email que gobierna cada tipo; los tipos sin entrada
+# (solicitudes, contratos, mensajes) se envían siempre.
+PREFERENCIA_EMAIL = {
+    'entrevista_agendada': 'email_entrevistas',
+    'entrevista_reprogramada': 'email_entrevistas',
+    'entrevista_cancelada': 'email_entrevistas',
+    'recordatorio_entrevista': 'email_recordatorios',
+    'documento_subido': 'email_documentos',
+    'documento_aprobado': 'email_documentos',
+    'documento_rechazado': 'email_documentos',
+    'documento_por_vencer': 'email_documentos',
+    'preparacion_recomendada': 'email_simulacros',
+    'simulacro_propuesto': 'email_simulacros',
+    'simulacro_confirmado': 'email_simulacros',
+    'simulacion_completada': 'email_simulacros',
+    'recomendaciones_listas': 'email_simulacros',
+}
+
+CAMPOS_PREFERENCIA = sorted(set(PREFERENCIA_EMAIL.values())) + ['push_habilitado']
+
+
+# =====================================================
+# ENCOLADO
+# =====================================================
+
+def _canales_permitidos(notificacion, preferencias):
+    """Canales de ENTREGAS_CANALES que el usuario acepta para esta notificación."""
+    canales = []
+    for canal in settings.ENTREGAS_CANALES:
+        if canal == 'email':
+            campo = PREFERENCIA_EMAIL.get(notificacion.tipo)
+            # Sin fila de preferencias valen los defaults del modelo (email sí)
+            if campo is None or preferencias.get(campo) is not False:
+                canales.append(canal)
+        elif canal == 'push' and preferencias.get('push_habilitado'):
+            canales.append(canal)
+    return canales
+
+
+def encolar(notificaciones):
+    """
+    Inserta las entregas de notificaciones ya guardadas: una consulta para
+    usuarios y preferencias y un bulk_create. Debe llamarse dentro de la
+    transacción que creó las notificaciones.
+    """
+    if not settings.ENTREGAS_CANALES or not notificaciones:
+        return []
+    usuarios = {
+        fila['pk']: fila
+        for fila in Usuario.objects.filter(
+            pk__in={notificacion.usuario_id for notificacion in notificaciones},
+            is_active=True,
+        ).values('pk', 'email', *[f'preferencias_notificacion__{campo}' for campo in CAMPOS_PREFERENCIA])
+    }
+
+    entregas = []
+    for notificacion in notificaciones:
+        usuario = usuarios.get(notificacion.usuario_id)
+        if usuario is None:
+            continue
+        preferencias = {campo: usuario[f'preferencias_notificacion__{campo}'] for campo in CAMPOS_PREFERENCIA}
+        for canal in _canales_permitidos(notificacion, preferencias):
+            destino = usuario['email'] if canal == 'email' else str(usuario['pk'])
+            if destino:
+                entregas.append(EntregaNotificacion(notificacion=notificacion, canal=canal, destino=destino))
+    return EntregaNotificacion.objects.bulk_create(
+        entregas, batch_size=settings.ENTREGAS_LOTE, ignore_conflicts=True
+    )
+
+
+# =====================================================
+# CANALES
+# =====================================================
+
+class EnviadorEmail:
+    """
+    Envía emails por una única conexión del EMAIL_BACKEND, abierta en la
+    primera entrega y reutilizada hasta cerrar(). Si el servidor corta la
+    conexión, se reabre una vez y se reintenta el mensaje.
+    """
+
+    def __init__(self):
+        self.conexion = None
+        self.conexiones_abiertas = 0
+
+    def _abrir(self):
+        self.conexion = get_connection(fail_silently=False)
+        self.conexion.open()
+        self.conexiones_abiertas += 1
+
+    def mensaje(self, entrega):
+        notificacion = entrega.notificacion
+        cuerpo = [notificacion.mensaje]
+        if notificacion.detalle:
+            cuerpo.append(notificacion.detalle)
+        if notificacion.url_accion:
+            base_url = getattr(settings, 'SITE_URL', 'http://localhost:8000')
+            cuerpo.append(f'{base_url.rstrip("/")}{notificacion.url_accion}')
+        return EmailMessage(
+            subject=notificacion.titulo,
+            body='\n\n'.join(cuerpo),
+            to=[entrega.destino],
+            connection=self.conexion,
+        )
+
+    def enviar(self, entrega):
+        if self.conexion is None:
+            self._abrir()
+        try:
+            self.mensaje(entrega).send()
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # El servidor cerró la conexión reutilizada (timeout, límite de mensajes)
+            self.cerrar()
+            self._abrir()
+            self.mensaje(entrega).send()
+
+    def cerrar(self):
+        if self.conexion is not None:
+            try:
+                self.conexion.close()
+            except Exception as e:
+                logger.warning(f"Error cerrando la conexión de email: {e}")
+            self.conexion = None
+
+
+ENVIADORES = {
+    'email': EnviadorEmail,
+}
+
+
+# =====================================================
+# ENVÍO
+# =====================================================
+
+def backoff(intentos):
+    """Espera antes del reintento `intentos` (exponencial con jitter y tope)."""
+    espera = min(settings.ENTREGAS_BACKOFF_BASE * 2 ** (intentos - 1), settings.ENTREGAS_BACKOFF_MAX)
+    return timedelta(seconds=espera * random.uniform(0.8, 1.2))
+
+
+def reservar(lote, ahora=None):
+    """
+    Toma hasta `lote` entregas pendientes vencidas y las aparta durante
+    ENTREGAS_RESERVA segundos: si el worker muere, vuelven a la cola solas.
+    """
+    ahora = ahora or timezone.now()
+    with transaction.atomic():
+        pendientes = EntregaNotificacion.objects.filter(
+            estado='pendiente', proximo_intento__lte=ahora
+        ).order_by('proximo_intento')
+        if connection.features.has_select_for_update_skip_locked:
+            pendientes = pendientes.select_for_update(skip_locked=True)
+        ids = list(pendientes.values_list('pk', flat=True)[:lote])
+        if ids:
+            EntregaNotificacion.objects.filter(pk__in=ids).update(
+                proximo_intento=ahora + timedelta(seconds=settings.ENTREGAS_RESERVA),
+                intentos=F('intentos') + 1,
+            )
+    if not ids:
+        return []
+    return list(
+        EntregaNotificacion.objects.filter(pk__in=ids).select_related('notificacion').only(
+            'canal', 'destino', 'intentos', 'estado', 'proximo_intento',
+            'notificacion__titulo', 'notificacion__mensaje',
+            'notificacion__detalle', 'notificacion__url_accion',
+        ).order_by('canal', 'pk')
+    )
+
+
+def _registrar(enviadas, fallidas, ahora):
+    """Guarda el resultado de un lote: un UPDATE para las enviadas, bulk_update para las fallidas."""
+    if enviadas:
+        EntregaNotificacion.objects.filter(pk__in=enviadas).update(
+            estado='enviada', fecha_envio=ahora, error_envio=''
+        )
+    for entrega in fallidas:
+        if entrega.intentos >= settings.ENTREGAS_MAX_INTENTOS:
+            entrega.estado = 'fallida'
+        else:
+            entrega.proximo_intento = ahora + backoff(entrega.intentos)
+    if fallidas:
+        EntregaNotificacion.objects.bulk_update(
+            fallidas, ['estado', 'proximo_intento', 'error_envio'], batch_size=settings.ENTREGAS_LOTE
+        )
+
+
+def enviar_pendientes(lote=None, limite=None):
+    """
+    Envía las entregas pendientes vencidas, lote a lote, hasta vaciar la
+    cola o llegar a `limite`. Devuelve un resumen con los conteos, las
+    conexiones abiertas y la duración.
+    """
+    lote = lote or settings.ENTREGAS_LOTE
+    inicio = time.perf_counter()
+    enviadores = {}
+    resumen = {'enviadas': 0, 'reintentos': 0, 'fallidas': 0, 'conexiones': 0}
+    procesadas = 0
+    try:
+        while limite is None or procesadas < limite:
+            entregas = reservar(lote if limite is None else min(lote, limite - procesadas))
+            if not entregas:
+                break
+            procesadas += len(entregas)
+            enviadas, fallidas = [], []
+            for entrega in entregas:
+                if entrega.canal not in enviadores:
+                    if entrega.canal not in ENVIADORES:
+                        raise ImproperlyConfigured(f"Canal de entrega sin enviador: {entrega.canal}")
+                    enviadores[entrega.canal] = ENVIADORES[entrega.canal]()
+                try:
+                    enviadores[entrega.canal].enviar(entrega)
+                except Exception as e:
+                    entrega.error_envio = f'{type(e).__name__}: {e}'[:2000]
+                    fallidas.append(entrega)
+                else:
+                    enviadas.append(entrega.pk)
+            _registrar(enviadas, fallidas, timezone.now())
+            resumen['enviadas'] += len(enviadas)
+            for entrega in fallidas:
+                resumen['fallidas' if entrega.estado == 'fallida' else 'reintentos'] += 1
+            if len(entregas) < lote:
+                break
+    finally:
+        for enviador in enviadores.values():
+            resumen['conexiones'] += getattr(enviador, 'conexiones_abiertas', 0)
+            enviador.cerrar()
+    resumen['segundos'] = round(time.perf_counter() - inicio, 3)
+    return resumen
@@ -0,0 +1,122 @@
+"""
+Manejadores de eventos del outbox (apps.core.outbox) que crean
+notificaciones.
+
+Cada manejador recibe el EventoOutbox, lee el estado actual por los ids de
+`evento.datos` y crea las notificaciones en la transacción del relay. Si el
+objeto ya no existe (se eliminó antes del despacho), no hay nada que avisar.
+"""
+from apps.core.outbox import manejador
+
+from .services import NotificacionService
+
+
+@manejador('documento.subido')
+def notificar_documento_subido(evento):
+    from apps.solicitudes.models import Documento
+
+    documento = Documento.objects.select_related(
+        'solicitud__cliente', 'solicitud__asesor'
+    ).filter(pk=evento.datos['documento_id']).first()
+    if documento is not None:
+        NotificacionService.notificar_documento_subido(documento, documento.solicitud)
+
+
+@manejador('documento.aprobado')
+def notificar_documento_aprobado(evento):
+    from apps.solicitudes.models import Documento
+
+    documento = Documento.objects.select_related('solicitud__cliente').filter(
+        pk=evento.datos['documento_id']
+    ).first()
+    if documento is not None:
+        NotificacionService.notificar_documento_aprobado(documento, documento.solicitud)
+
+
+@manejador('documento.rechazado')
+def notificar_documento_rechazado(evento):
+    from apps.solicitudes.models import Documento
+
+    documento = Documento.objects.select_related('solicitud__cliente').filter(
+        pk=evento.datos['documento_id']
+    ).first()
+    if documento is not None:
+        NotificacionService.notificar_documento_rechazado(
+            documento, documento.solicitud, documento.motivo_rechazo
+        )
+
+
+@manejador('documentos.revisados')
+def notificar_documentos_revisados(evento):
+    from apps.solicitudes.models import Documento, Solicitud
+
+    solicitud = Solicitud.objects.select_related('cliente').filter(
+        pk=evento.datos['solicitud_id']
+    ).first()
+    if solicitud is None:
+        return
+    documentos = Documento.objects.in_bulk(evento.datos['aprobados'] + evento.datos['rechazados'])
+    NotificacionService.notificar_documentos_revisados(
+        solicitud,
+        [documentos[pk] for pk in evento.datos['aprobados'] if pk in documentos],
+        [documentos[pk] for pk in evento.datos['rechazados'] if pk in documentos],
+        solicitud.progreso_documentos(),
+    )
+
+
+@manejador('solicitud.asignada')
+def notificar_solicitud_asignada(evento):
+    from apps.solicitudes.models import Solicitud
+
+    solicitud = Solicitud.objects.select_related('cliente', 'asesor').filter(
+        pk=evento.datos['solicitud_id']
+    ).first()
+    if solicitud is not None and solicitud.asesor_id:
+        NotificacionService.crear_en_lote(NotificacionService.construir_solicitud_asignada(solicitud))
+
+
+@manejador('simulacro.completado')
+def notificar_simulacion_completada(evento):
+    from apps.preparacion.models import Simulacro
+
+    simulacro = Simulacro.objects.select_related('cliente', 'asesor').filter(
+        pk=evento.datos['simulacro_id']
+    ).first()
+    if simulacro is not None:
+        NotificacionService.notificar_simulacion_completada(simulacro)
+
+
+@manejador('recomendaciones.listas')
+def notificar_recomendaciones_listas(evento):
+    from apps.preparacion.models import Simulacro
+
+    simulacro = Simulacro.objects.select_related('cliente', 'asesor').filter(
+        pk=evento.datos['simulacro_id']
+    ).first()
+    if simulacro is not None:
+        NotificacionService.notificar_recomendaciones_listas(simulacro)
+
+
+@manejador('simulacro.propuesto')
+def notificar_simulacro_propuesto(evento):
+    from apps.preparacion.models import Simulacro
+
+    simulacro = Simulacro.objects.select_related('cliente', 'asesor').filter(
+        pk=evento.datos['simulacro_id']
+    ).first()
+    # Una solicitud del cliente sin asesor asignado no tiene a quién avisar
+    if simulacro is not None and (simulacro.asesor_id or evento.datos['propuesto_por'] == 'asesor'):
+        NotificacionService.notificar_simulacro_propuesto(
+            simulacro, propuesto_por=evento.datos['propuesto_por']
+        )
+
+
+@manejador('simulacro.confirmado')
+def notificar_simulacro_confirmado(evento):
+    from apps.preparacion.models import Simulacro
+
+    simulacro = Simulacro.objects.select_related('cliente', 'asesor').filter(
+        pk=evento.datos['simulacro_id']
+    ).first()
+    if simulacro is not None:
+        NotificacionService.notificar_simulacro_confirmado(simulacro)
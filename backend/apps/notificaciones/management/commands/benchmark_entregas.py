@@ -0,0 +1,139 @@
+"""
+Benchmark del outbox de entregas de notificaciones.
+
+Crea destinatarios y notificaciones sintéticos, mide el encolado
+(crear_en_lote) y el envío (enviar_pendientes, una conexión por
+ejecución) y, con --comparar, el envío ingenuo con una conexión por
+mensaje. Todo se hace en una transacción que se revierte al final.
+
+Uso:
+    # Backend en memoria (locmem): costo propio del outbox
+    python manage.py benchmark_entregas --destinatarios 10000
+
+    # Contra un servidor SMTP local, p. ej.:
+    #   python -m smtpd -n -c DebuggingServer 127.0.0.1:1025 > /dev/null
+    python manage.py benchmark_entregas --destinatarios 10000 --smtp 127.0.0.1:1025 --comparar
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+
+from apps.notificaciones.entregas import enviar_pendientes
+from apps.notificaciones.models import EntregaNotificacion, Notificacion
+from apps.notificaciones.services import NotificacionService
+
+Usuario = get_user_model()
+
+DOMINIO = 'benchmark-entregas.invalid'
+
+
+class Command(BaseCommand):
+    help = 'Mide el encolado y el envío de entregas de notificaciones (se revierte al terminar)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--destinatarios', type=int, default=10000)
+        parser.add_argument('--lote', type=int, default=None, help='Entregas por lote (por defecto: ENTREGAS_LOTE)')
+        parser.add_argument('--smtp', default=None, help='Servidor SMTP sin TLS (host:puerto); por defecto locmem')
+        parser.add_argument('--comparar', action='store_true',
+                            help='Mide también el envío con una conexión por mensaje')
+
+    def handle(self, *args, **options):
+        if options['destinatarios'] < 1:
+            raise CommandError('--destinatarios debe ser mayor que 0')
+
+        if options['smtp']:
+            host, _, puerto = options['smtp'].partition(':')
+            correo = {
+                'EMAIL_BACKEND': 'django.core.mail.backends.smtp.EmailBackend',
+                'EMAIL_HOST': host,
+                'EMAIL_PORT': int(puerto or 25),
+                'EMAIL_USE_TLS': False,
+                'EMAIL_HOST_USER': '',
+                'EMAIL_HOST_PASSWORD': '',
+            }
+        else:
+            correo = {'EMAIL_BACKEND': 'django.core.mail.backends.locmem.EmailBackend'}
+
+        with override_settings(ENTREGAS_CANALES=['email'], **correo), transaction.atomic():
+            resultado = self._ejecutar(options)
+            transaction.set_rollback(True)
+        self._reportar(resultado, options, correo['EMAIL_BACKEND'])
+
+    # =====================================================
+    # EJECUCIÓN
+    # =====================================================
+
+    def _ejecutar(self, options):
+        n = options['destinatarios']
+        password = make_password(None)
+        usuarios = Usuario.objects.bulk_create([
+            Usuario(email=f'destinatario{i}@{DOMINIO}', password=password, first_name='Bench', rol='cliente')
+            for i in range(n)
+        ], batch_size=1000)
+
+        inicio = time.perf_counter()
+        NotificacionService.crear_en_lote([
+            Notificacion(
+                usuario=usuario,
+                tipo='general',
+                titulo='Aviso de prueba',
+                mensaje='Mensaje del benchmark de entregas.',
+                url_accion='/notificaciones',
+            )
+            for usuario in usuarios
+        ], batch_size=1000)
+        tiempo_encolado = time.perf_counter() - inicio
+        encoladas = EntregaNotificacion.objects.filter(destino__endswith=f'@{DOMINIO}').count()
+
+        envio = enviar_pendientes(lote=options['lote'])
+
+        ingenuo = None
+        if options['comparar']:
+            inicio = time.perf_counter()
+            for usuario in usuarios:
+                EmailMessage(
+                    subject='Aviso de prueba',
+                    body='Mensaje del benchmark de entregas.',
+                    to=[usuario.email],
+                    connection=get_connection(fail_silently=False),
+                ).send()
+            ingenuo = time.perf_counter() - inicio
+
+        return {
+            'encoladas': encoladas,
+            'tiempo_encolado': tiempo_encolado,
+            'envio': envio,
+            'ingenuo': ingenuo,
+        }
+
+    # =====================================================
+    # REPORTE
+    # =====================================================
+
+    def _reportar(self, r, options, backend):
+        n = options['destinatarios']
+        envio = r['envio']
+        self.stdout.write(f'Backend: {backend}')
+        self.stdout.write(
+            f"Encolado: {r['encoladas']} entregas en {r['tiempo_encolado']:.2f}s "
+            f"({r['encoladas'] / max(r['tiempo_encolado'], 1e-9):.0f}/s)"
+        )
+        self.stdout.write(
+            f"Envío por lotes: {envio['enviadas']} enviadas, {envio['reintentos'] + envio['fallidas']} con error, "
+            f"{envio['conexiones']} conexión(es), {envio['segundos']:.2f}s "
+            f"({envio['enviadas'] / max(envio['segundos'], 1e-9):.0f} mensajes/s)"
+        )
+        if r['ingenuo'] is not None:
+            self.stdout.write(
+                f"Una conexión por mensaje: {n} conexiones, {r['ingenuo']:.2f}s "
+                f"({n / max(r['ingenuo'], 1e-9):.0f} mensajes/s)"
+            )
+        if envio['enviadas'] < r['encoladas']:
+            self.stdout.write(self.style.WARNING('No se enviaron todas las entregas encoladas'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Todas las entregas enviadas (datos revertidos)'))
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.10 on 2026-10-19 12:34
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notificaciones', '0002_tipo_documento_por_vencer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EntregaNotificacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Fecha de creación')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Fecha de actualización')),
+                ('canal', models.CharField(choices=[('email', 'Email'), ('push', 'Notificación Push')], max_length=20, verbose_name='Canal')),
+                ('destino', models.CharField(max_length=254, verbose_name='Destino')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('enviada', 'Enviada'), ('fallida', 'Fallida')], default='pendiente', max_length=20, verbose_name='Estado')),
+                ('intentos', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('proximo_intento', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Próximo Intento')),
+                ('fecha_envio', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Envío')),
+                ('error_envio', models.TextField(blank=True, verbose_name='Error de Envío')),
+                ('notificacion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entregas', to='notificaciones.notificacion', verbose_name='Notificación')),
+            ],
+            options={
+                'verbose_name': 'Entrega de Notificación',
+                'verbose_name_plural': 'Entregas de Notificación',
+                'db_table': 'entregas_notificacion',
+                'indexes': [models.Index(condition=models.Q(('estado', 'pendiente')), fields=['proximo_intento'], name='entrega_pendiente')],
+                'constraints': [models.UniqueConstraint(fields=('notificacion', 'canal'), name='entrega_unica_por_canal')],
+            },
+        ),
+    ]
@@ -1,8 +1,9 @@
 """
 Modelos para el módulo de Notificaciones.
 """
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.utils import timezone
 from apps.core.models import TimeStampedModel
 
 
@@ -49,6 +50,7 @@ class Notificacion(TimeStampedModel):
         ('documento_subido', 'Documento Subido'),
         ('documento_aprobado', 'Documento Aprobado'),
         ('documento_rechazado', 'Documento Rechazado'),
+        ('documento_por_vencer', 'Documento por Vencer'),
         
         # Entrevistas
         ('entrevista_agendada', 'Entrevista Agendada'),
@@ -121,6 +123,16 @@ class Notificacion(TimeStampedModel):
     def __str__(self):
         return f"{self.tipo} - {self.usuario}"
     
+    def save(self, *args, **kwargs):
+        """Al crearla, encola sus entregas por canal en la misma transacción."""
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+        from .entregas import encolar
+        
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            encolar([self])
+    
     def marcar_como_leida(self):
         """Marca la notificación como leída."""
         from django.utils import timezone
@@ -130,6 +142,59 @@ class Notificacion(TimeStampedModel):
             self.save()
 
 
+class EntregaNotificacion(TimeStampedModel):
+    """
+    Entrega pendiente o realizada de una notificación por un canal externo
+    (outbox). La crea Notificacion.save() / crear_en_lote() según las
+    preferencias del usuario; la envía la tarea notificaciones.enviar_entregas.
+    """
+    
+    CANALES = [
+        ('email', 'Email'),
+        ('push', 'Notificación Push'),
+    ]
+    
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('enviada', 'Enviada'),
+        ('fallida', 'Fallida'),
+    ]
+    
+    notificacion = models.ForeignKey(
+        Notificacion,
+        on_delete=models.CASCADE,
+        related_name='entregas',
+        verbose_name='Notificación'
+    )
+    canal = models.CharField('Canal', max_length=20, choices=CANALES)
+    destino = models.CharField('Destino', max_length=254)
+    estado = models.CharField('Estado', max_length=20, choices=ESTADOS, default='pendiente')
+    intentos = models.PositiveSmallIntegerField('Intentos', default=0)
+    # Próximo envío: reintentos con backoff y reserva del worker que la tomó
+    proximo_intento = models.DateTimeField('Próximo Intento', default=timezone.now)
+    fecha_envio = models.DateTimeField('Fecha de Envío', null=True, blank=True)
+    error_envio = models.TextField('Error de Envío', blank=True)
+    
+    class Meta:
+        db_table = 'entregas_notificacion'
+        verbose_name = 'Entrega de Notificación'
+        verbose_name_plural = 'Entregas de Notificación'
+        constraints = [
+            models.UniqueConstraint(fields=['notificacion', 'canal'], name='entrega_unica_por_canal'),
+        ]
+        indexes = [
+            # Cola del worker: solo las pendientes, por vencimiento
+            models.Index(
+                fields=['proximo_intento'],
+                condition=models.Q(estado='pendiente'),
+                name='entrega_pendiente',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.canal} - {self.destino} - {self.estado}"
+
+
 class ConfiguracionRecordatorio(models.Model):
     """
     Configuración de ventanas de recordatorio.
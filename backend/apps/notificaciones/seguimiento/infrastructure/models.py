@@ -5,47 +5,9 @@ from django.db import models
 from apps.core.models import TimeStampedModel
 
 
-class EstadoSolicitud(TimeStampedModel):
-    """
-    Modelo para registrar el historial de estados de una solicitud.
-    """
-    solicitud = models.ForeignKey(
-        'solicitudes.Solicitud',
-        on_delete=models.CASCADE,
-        related_name='historial_estados',
-        verbose_name='Solicitud'
-    )
-    estado_anterior = models.CharField(
-        'Estado Anterior',
-        max_length=50,
-        null=True,
-        blank=True
-    )
-    estado_nuevo = models.CharField(
-        'Estado Nuevo',
-        max_length=50
-    )
-    observacion = models.TextField(
-        'Observación',
-        blank=True
-    )
-    usuario_responsable = models.ForeignKey(
-        'usuarios.Usuario',
-        on_delete=models.SET_NULL,
-        null=True,
-        blank=True,
-        related_name='cambios_estado_realizados',
-        verbose_name='Usuario Responsable'
-    )
-
-    class Meta:
-        db_table = 'historial_estados_solicitud'
-        verbose_name = 'Estado de Solicitud'
-        verbose_name_plural = 'Historial de Estados'
-        ordering = ['-created_at']
-
-    def __str__(self):
-        return f"{self.solicitud} - {self.estado_anterior} → {self.estado_nuevo}"
+# El historial de estados vive en la app solicitudes (tabla
+# historial_estados_solicitud), donde Solicitud.save() lo registra.
+from apps.solicitudes.models import EstadoSolicitud  # noqa: E402,F401
 
 
 class Notificacion(TimeStampedModel):
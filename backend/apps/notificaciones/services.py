@@ -342,14 +342,14 @@ class NotificacionService:
         return Notificacion.objects.create(
             usuario=cliente,
             tipo='documento_aprobado',
-            titulo=f'Documento aprobado: {documento.tipo}',
-            mensaje=f'Tu documento "{documento.tipo}" ha sido revisado y aprobado.',
+            titulo=f'Documento aprobado: {documento.nombre}',
+            mensaje=f'Tu documento "{documento.nombre}" ha sido revisado y aprobado.',
             detalle='Buen trabajo. Continúa con los demás documentos requeridos.',
             solicitud=solicitud,
             url_accion=f'/solicitudes/{solicitud.id}/documentos',
             datos={
                 'documento_id': documento.id,
-                'documento_tipo': documento.tipo
+                'documento_tipo': documento.nombre
             }
         )
     
@@ -364,18 +364,88 @@ class NotificacionService:
         return Notificacion.objects.create(
             usuario=cliente,
             tipo='documento_rechazado',
-            titulo=f'Documento requiere correcciones: {documento.tipo}',
-            mensaje=f'Tu documento "{documento.tipo}" necesita correcciones.',
+            titulo=f'Documento requiere correcciones: {documento.nombre}',
+            mensaje=f'Tu documento "{documento.nombre}" necesita correcciones.',
             detalle=observaciones if observaciones else 'Por favor, revisa las observaciones y vuelve a subir el documento corregido.',
             solicitud=solicitud,
             url_accion=f'/solicitudes/{solicitud.id}/documentos',
             datos={
                 'documento_id': documento.id,
-                'documento_tipo': documento.tipo,
+                'documento_tipo': documento.nombre,
                 'observaciones': observaciones
             }
         )
     
+    @staticmethod
+    def construir_documento_por_vencer(documento, dias):
+        """
+        Aviso de vencimiento de un documento, sin guardar (ver crear_en_lote).
+        Destinatario: Cliente. Solo usa ids: `documento` puede venir con
+        .only() desde el recorrido de apps.solicitudes.vencimientos.
+        """
+        if dias == 0:
+            cuando = 'vence hoy'
+        else:
+            cuando = f'vence en {dias} día{"s" if dias != 1 else ""}'
+        return Notificacion(
+            usuario_id=documento.solicitud.cliente_id,
+            tipo='documento_por_vencer',
+            titulo=f'Documento por vencer: {documento.nombre}',
+            mensaje=f'Tu documento "{documento.nombre}" {cuando} ({documento.fecha_vencimiento:%d/%m/%Y}).',
+            detalle='Sube una versión vigente para que tu solicitud no se retrase.',
+            solicitud_id=documento.solicitud_id,
+            url_accion=f'/solicitudes/{documento.solicitud_id}/documentos',
+            datos={
+                'documento_id': documento.id,
+                'documento_tipo': documento.nombre,
+                'fecha_vencimiento': documento.fecha_vencimiento.isoformat(),
+                'dias': dias,
+            }
+        )
+    
+    @staticmethod
+    def notificar_documentos_revisados(solicitud, aprobados, rechazados, progreso):
+        """
+        Una sola notificación para una revisión masiva de documentos.
+        Destinatario: Cliente
+        
+        Args:
+            aprobados, rechazados: listas de Documento
+            progreso: dict de Solicitud.progreso_documentos()
+        """
+        partes = []
+        if aprobados:
+            partes.append(f'{len(aprobados)} aprobado{"s" if len(aprobados) != 1 else ""}')
+        if rechazados:
+            partes.append(f'{len(rechazados)} con correcciones')
+        if rechazados:
+            detalle = '\n'.join(
+                f'- {documento.nombre}: {documento.motivo_rechazo}' for documento in rechazados
+            )
+        else:
+            detalle = 'Buen trabajo. Continúa con los demás documentos requeridos.'
+        
+        return Notificacion.objects.create(
+            usuario=solicitud.cliente,
+            tipo='documento_rechazado' if rechazados else 'documento_aprobado',
+            titulo=f'Revisión de documentos: {", ".join(partes)}',
+            mensaje=(
+                f'Tu asesor revisó {len(aprobados) + len(rechazados)} documentos. '
+                f'Progreso: {progreso["aprobados"]} de {progreso["total"]} aprobados.'
+            ),
+            detalle=detalle,
+            solicitud=solicitud,
+            url_accion=f'/solicitudes/{solicitud.id}/documentos',
+            datos={
+                'aprobados': [documento.id for documento in aprobados],
+                'rechazados': [
+                    {'documento_id': documento.id, 'observaciones': documento.motivo_rechazo}
+                    for documento in rechazados
+                ],
+                'progreso': progreso,
+            }
+        )
+    
     # =====================================================
     # SOLICITUDES
     # =====================================================
@@ -483,10 +553,17 @@ class NotificacionService:
         Crea notificación cuando un cliente crea una nueva solicitud.
         Destinatario: Asesores disponibles y el cliente
         """
+        notificacion = NotificacionService.construir_solicitud_creada(solicitud)
+        notificacion.save()
+        return notificacion
+    
+    @staticmethod
+    def construir_solicitud_creada(solicitud):
+        """Notificación de solicitud creada, sin guardar (ver crear_en_lote)."""
         cliente = solicitud.cliente
         
         # Notificar al cliente
-        return Notificacion.objects.create(
+        return Notificacion(
             usuario=cliente,
             tipo='solicitud_creada',
             titulo='Tu solicitud ha sido registrada',
@@ -506,12 +583,20 @@ class NotificacionService:
         Crea notificación cuando una solicitud es asignada a un asesor.
         Destinatarios: Cliente y Asesor
         """
+        notificaciones = NotificacionService.construir_solicitud_asignada(solicitud)
+        for notificacion in notificaciones:
+            notificacion.save()
+        return notificaciones
+    
+    @staticmethod
+    def construir_solicitud_asignada(solicitud):
+        """Notificaciones de asignación (cliente y asesor), sin guardar."""
         notificaciones = []
         cliente = solicitud.cliente
         asesor = solicitud.asesor
         
         # Notificar al cliente
-        notificaciones.append(Notificacion.objects.create(
+        notificaciones.append(Notificacion(
             usuario=cliente,
             tipo='solicitud_asignada',
             titulo='Se te ha asignado un asesor',
@@ -526,7 +611,7 @@ class NotificacionService:
         ))
         
         # Notificar al asesor
-        notificaciones.append(Notificacion.objects.create(
+        notificaciones.append(Notificacion(
             usuario=asesor,
             tipo='solicitud_asignada',
             titulo='Nueva solicitud asignada',
@@ -543,6 +628,20 @@ class NotificacionService:
         
         return notificaciones
     
+    @staticmethod
+    def crear_en_lote(notificaciones, batch_size=500):
+        """
+        Inserta notificaciones construidas con construir_* en lotes
+        (bulk_create) y encola sus entregas (ver apps.notificaciones.entregas).
+        """
+        from django.db import transaction
+        from .entregas import encolar
+        
+        with transaction.atomic():
+            creadas = Notificacion.objects.bulk_create(notificaciones, batch_size=batch_size)
+            encolar(creadas)
+        return creadas
+    
     @staticmethod
     def notificar_solicitud_en_revision(solicitud):
         """
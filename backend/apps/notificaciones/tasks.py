@@ -3,27 +3,15 @@ Tareas asíncronas con Celery para la app de Notificaciones.
 Implementa recordatorios programados según especificación Gherkin.
 
 NOTA: Estas tareas están diseñadas para ejecutarse con Celery Beat.
-Si Celery no está instalado, las funciones pueden llamarse directamente 
-o configurarse con cron jobs.
+Sin Celery, `.delay()` las ejecuta en el pool de hilos del proceso (ver
+apps.core.tareas); las periódicas pueden llamarse directamente o
+configurarse con cron jobs.
 """
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Intentar importar Celery, si no está disponible, usar decorador dummy
-try:
-    from celery import shared_task
-except ImportError:
-    # Decorador dummy para cuando Celery no está instalado
-    def shared_task(*args, **kwargs):
-        def decorator(func):
-            func.delay = lambda *a, **kw: func(*a, **kw)  # Ejecutar síncronamente
-            return func
-        if args and callable(args[0]):
-            return decorator(args[0])
-        return decorator
-    
-    logger.warning("Celery no está instalado. Las tareas se ejecutarán síncronamente.")
+from apps.core.tareas import shared_task
 
 from django.utils import timezone
 from datetime import timedelta
@@ -32,10 +20,10 @@ from datetime import timedelta
 def _get_entrevista_model():
     """Intenta importar el modelo de Entrevista de forma segura."""
     try:
-        from apps.solicitudes.agendamiento.infrastructure.models import EntrevistaModel
-        return EntrevistaModel
+        from apps.solicitudes.models import Entrevista
+        return Entrevista
     except ImportError as e:
-        logger.warning(f"No se pudo importar EntrevistaModel: {e}")
+        logger.warning(f"No se pudo importar Entrevista: {e}")
         return None
 
 
@@ -49,6 +37,11 @@ def _get_simulacro_model():
         return None
 
 
+# Ventanas de recordatorio: horas antes -> margen (horas) alrededor del momento
+VENTANAS_RECORDATORIO = {24: 0.5, 2: 0.5}
+ESTADOS_ENTREVISTA_ACTIVA = ['agendada', 'confirmada', 'reprogramada']
+
+
 @shared_task(name='notificaciones.enviar_recordatorios_entrevista')
 def enviar_recordatorios_entrevista():
     """
@@ -58,10 +51,12 @@ def enviar_recordatorios_entrevista():
     Ventanas de recordatorio:
     - 24 horas antes
     - 2 horas antes
+    
+    Cada ventana se resuelve en SQL sobre `programado_en` (índice
+    estado + programado_en): solo se cargan las entrevistas que tocan.
     """
     from apps.notificaciones.services import notificacion_service
     from apps.notificaciones.models import Notificacion
-    from datetime import datetime
     
     Entrevista = _get_entrevista_model()
     if not Entrevista:
@@ -69,76 +64,41 @@ def enviar_recordatorios_entrevista():
         return "Error: modelo Entrevista no disponible"
     
     ahora = timezone.now()
-    enviados = {'24h': 0, '2h': 0}
+    enviados = {f'{horas}h': 0 for horas in VENTANAS_RECORDATORIO}
     
     try:
-        # Buscar entrevistas agendadas/confirmadas
-        entrevistas = Entrevista.objects.filter(
-            estado__in=['AGENDADA', 'CONFIRMADA']
-        ).select_related('solicitud')
-        
-        for entrevista in entrevistas:
-            try:
-                # Combinar fecha y hora de la entrevista
-                if not entrevista.fecha or not entrevista.hora:
-                    continue
+        for horas, margen in VENTANAS_RECORDATORIO.items():
+            entrevistas = Entrevista.objects.filter(
+                estado__in=ESTADOS_ENTREVISTA_ACTIVA,
+                programado_en__gte=ahora + timedelta(hours=horas - margen),
+                programado_en__lte=ahora + timedelta(hours=horas + margen),
+            ).select_related('solicitud__cliente')
+            
+            for entrevista in entrevistas:
+                try:
+                    solicitud = entrevista.solicitud
+                    cliente = solicitud.cliente
                     
-                fecha_entrevista = timezone.make_aware(
-                    datetime.combine(entrevista.fecha, entrevista.hora)
-                )
-                
-                tiempo_restante = fecha_entrevista - ahora
-                horas_restantes = tiempo_restante.total_seconds() / 3600
-                
-                # Obtener el cliente (puede ser 'solicitante' o 'usuario' dependiendo del modelo)
-                solicitud = entrevista.solicitud
-                cliente = getattr(solicitud, 'solicitante', None) or getattr(solicitud, 'usuario', None)
-                
-                if not cliente:
-                    logger.warning(f"No se pudo obtener el cliente para entrevista {entrevista.id}")
-                    continue
-                
-                # Recordatorio 24 horas antes (entre 23.5 y 24.5 horas)
-                if 23.5 <= horas_restantes <= 24.5:
                     # Verificar que no se haya enviado ya
                     ya_enviado = Notificacion.objects.filter(
                         usuario=cliente,
                         tipo='recordatorio_entrevista',
-                        datos__horas_restantes=24,
-                        created_at__gte=ahora - timedelta(hours=25)
-                    ).exists()
-                    
-                    if not ya_enviado:
-                        notificacion_service.notificar_recordatorio_entrevista(
-                            solicitud=solicitud,
-                            horas_restantes=24,
-                            fecha_entrevista=entrevista.fecha,
-                            hora_entrevista=entrevista.hora
-                        )
-                        enviados['24h'] += 1
-                        logger.info(f"Recordatorio 24h enviado a {cliente.email} para entrevista {entrevista.id}")
-                
-                # Recordatorio 2 horas antes (entre 1.5 y 2.5 horas)
-                elif 1.5 <= horas_restantes <= 2.5:
-                    ya_enviado = Notificacion.objects.filter(
-                        usuario=cliente,
-                        tipo='recordatorio_entrevista',
-                        datos__horas_restantes=2,
-                        created_at__gte=ahora - timedelta(hours=3)
+                        datos__horas_restantes=horas,
+                        created_at__gte=ahora - timedelta(hours=horas + 1)
                     ).exists()
                     
                     if not ya_enviado:
                         notificacion_service.notificar_recordatorio_entrevista(
                             solicitud=solicitud,
-                            horas_restantes=2,
+                            horas_restantes=horas,
                             fecha_entrevista=entrevista.fecha,
                             hora_entrevista=entrevista.hora
                         )
-                        enviados['2h'] += 1
-                        logger.info(f"Recordatorio 2h enviado a {cliente.email} para entrevista {entrevista.id}")
+                        enviados[f'{horas}h'] += 1
+                        logger.info(f"Recordatorio {horas}h enviado a {cliente.email} para entrevista {entrevista.id}")
                         
-            except Exception as e:
-                logger.error(f"Error procesando recordatorio para entrevista {entrevista.id}: {e}")
+                except Exception as e:
+                    logger.error(f"Error procesando recordatorio para entrevista {entrevista.id}: {e}")
         
     except Exception as e:
         logger.error(f"Error en enviar_recordatorios_entrevista: {e}")
@@ -175,15 +135,15 @@ def enviar_recomendaciones_preparacion():
     try:
         # Buscar entrevistas en los próximos 7 días
         entrevistas = Entrevista.objects.filter(
-            estado__in=['AGENDADA', 'CONFIRMADA'],
+            estado__in=ESTADOS_ENTREVISTA_ACTIVA,
             fecha__gte=hoy,
             fecha__lte=en_7_dias
-        ).select_related('solicitud')
+        ).select_related('solicitud__cliente')
         
         for entrevista in entrevistas:
             try:
                 solicitud = entrevista.solicitud
-                cliente = getattr(solicitud, 'solicitante', None) or getattr(solicitud, 'usuario', None)
+                cliente = solicitud.cliente
                 
                 if not cliente:
                     continue
@@ -253,6 +213,23 @@ def limpiar_notificaciones_antiguas(dias=90):
 # TAREAS SÍNCRONAS (para llamar desde signals/views)
 # =====================================================
 
+@shared_task(name='notificaciones.enviar_entregas')
+def enviar_entregas():
+    """
+    Envía por email/push las entregas pendientes de las notificaciones
+    (outbox de apps.notificaciones.entregas). Ejecutar cada minuto.
+    """
+    from apps.notificaciones.entregas import enviar_pendientes
+    
+    resumen = enviar_pendientes()
+    if resumen['enviadas'] or resumen['reintentos'] or resumen['fallidas']:
+        logger.info(
+            f"Entregas: {resumen['enviadas']} enviadas, {resumen['reintentos']} a reintentar, "
+            f"{resumen['fallidas']} fallidas en {resumen['segundos']}s"
+        )
+    return resumen
+
+
 @shared_task(name='notificaciones.notificar_simulacro_completado')
 def notificar_simulacro_completado(simulacro_id):
     """
@@ -0,0 +1,103 @@
+"""
+Outbox de entregas: encolado según preferencias, reserva con expiración y
+reintentos con backoff hasta 'fallida'. El email usa el backend locmem
+(`mailoutbox` de pytest-django).
+"""
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from apps.notificaciones import entregas
+from apps.notificaciones.models import EntregaNotificacion, Notificacion, PreferenciaNotificacion
+
+
+def _notificar(usuario, tipo):
+    return Notificacion.objects.create(usuario=usuario, tipo=tipo, titulo='Aviso', mensaje='Mensaje')
+
+
+@pytest.fixture
+def cliente(crear_usuario):
+    return crear_usuario('cliente')
+
+
+@pytest.mark.django_db
+def test_encolado_respeta_las_preferencias(crear_usuario, cliente):
+    PreferenciaNotificacion.objects.create(usuario=cliente, email_documentos=False)
+    inactivo = crear_usuario('cliente', is_active=False)
+
+    _notificar(cliente, 'documento_aprobado')
+    _notificar(cliente, 'solicitud_creada')
+    _notificar(inactivo, 'solicitud_creada')
+
+    assert list(EntregaNotificacion.objects.values_list('notificacion__tipo', 'canal', 'destino')) == [
+        ('solicitud_creada', 'email', cliente.email),
+    ]
+
+
+@pytest.mark.django_db
+def test_sin_preferencias_valen_los_defaults(cliente, settings):
+    settings.ENTREGAS_CANALES = ['email', 'push']
+
+    _notificar(cliente, 'documento_aprobado')
+
+    assert list(EntregaNotificacion.objects.values_list('canal', flat=True)) == ['email']
+
+
+@pytest.mark.django_db
+def test_envio_marca_enviadas(cliente, mailoutbox):
+    _notificar(cliente, 'solicitud_creada')
+
+    resumen = entregas.enviar_pendientes()
+
+    assert resumen['enviadas'] == 1
+    assert resumen['conexiones'] == 1
+    assert [m.to for m in mailoutbox] == [[cliente.email]]
+    entrega = EntregaNotificacion.objects.get()
+    assert entrega.estado == 'enviada'
+    assert entrega.fecha_envio is not None
+
+
+@pytest.mark.django_db
+def test_reserva_expira_y_la_entrega_vuelve_a_la_cola(cliente, settings):
+    _notificar(cliente, 'solicitud_creada')
+    ahora = timezone.now()
+
+    assert [e.intentos for e in entregas.reservar(10, ahora)] == [1]
+    # Otro worker no la ve mientras dura la reserva
+    assert entregas.reservar(10, ahora + timedelta(seconds=settings.ENTREGAS_RESERVA - 1)) == []
+    # Si el primero murió, vuelve a la cola al vencer la reserva
+    vencida = ahora + timedelta(seconds=settings.ENTREGAS_RESERVA + 1)
+    assert [e.intentos for e in entregas.reservar(10, vencida)] == [2]
+
+
+@pytest.mark.django_db
+def test_backoff_hasta_fallida(cliente, settings, monkeypatch):
+    settings.ENTREGAS_MAX_INTENTOS = 3
+
+    def caido(self, entrega):
+        raise ConnectionRefusedError('SMTP caído')
+
+    monkeypatch.setattr(entregas.EnviadorEmail, 'enviar', caido)
+    _notificar(cliente, 'solicitud_creada')
+
+    esperas = []
+    for intento in range(1, settings.ENTREGAS_MAX_INTENTOS + 1):
+        antes = timezone.now()
+        resumen = entregas.enviar_pendientes()
+        entrega = EntregaNotificacion.objects.get()
+        assert entrega.intentos == intento
+        if intento < settings.ENTREGAS_MAX_INTENTOS:
+            assert resumen['reintentos'] == 1
+            assert entrega.estado == 'pendiente'
+            esperas.append((entrega.proximo_intento - antes).total_seconds())
+            # Adelantar el reloj: el reintento ya venció
+            EntregaNotificacion.objects.update(proximo_intento=timezone.now())
+
+    assert resumen['fallidas'] == 1
+    assert entrega.estado == 'fallida'
+    assert entrega.error_envio == 'ConnectionRefusedError: SMTP caído'
+    base = settings.ENTREGAS_BACKOFF_BASE
+    assert 0.8 * base <= esperas[0] <= 1.2 * base + 1
+    assert 1.6 * base <= esperas[1] <= 2.4 * base + 1
+    assert entregas.enviar_pendientes()['fallidas'] == 0
@@ -0,0 +1,158 @@
+"""
+Notificaciones publicadas por el outbox: la revisión de documentos y las
+propuestas/confirmaciones de simulacros avisan desde el relay, y un fallo
+del manejador no rompe el request.
+
+Dentro de la transacción del test publicar() programa un solo relay, así
+que tras el primer request los tests despachan el outbox explícitamente.
+"""
+import pytest
+
+from apps.core.models import EventoOutbox
+from apps.core.outbox import despachar
+from apps.notificaciones.models import Notificacion
+from apps.notificaciones.services import NotificacionService
+from apps.preparacion.models import Simulacro
+from apps.solicitudes.models import Documento, Solicitud
+
+
+@pytest.fixture
+def cliente(crear_usuario):
+    return crear_usuario('cliente')
+
+
+@pytest.fixture
+def asesor(crear_usuario):
+    return crear_usuario('asesor')
+
+
+@pytest.fixture
+def solicitud(cliente, asesor):
+    return Solicitud.objects.create(cliente=cliente, asesor=asesor, tipo_visa='estudio', embajada='usa')
+
+
+def _documento(solicitud, nombre='Pasaporte'):
+    return Documento.objects.create(solicitud=solicitud, nombre=nombre, archivo=f'documentos/{nombre}.pdf')
+
+
+def _avisos(usuario):
+    return list(Notificacion.objects.filter(usuario=usuario).order_by('pk').values_list('tipo', 'detalle'))
+
+
+# =====================================================
+# DOCUMENTOS
+# =====================================================
+
+@pytest.mark.django_db
+def test_aprobar_y_rechazar_notifican_tras_el_commit(solicitud, cliente, asesor, cliente_api,
+                                                    django_capture_on_commit_callbacks):
+    documento = _documento(solicitud)
+    api = cliente_api(asesor)
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        assert api.patch(f'/api/documentos/{documento.pk}/aprobar/').status_code == 200
+        assert _avisos(cliente) == []
+    for callback in callbacks:
+        callback()
+
+    respuesta = api.patch(f'/api/documentos/{documento.pk}/rechazar/', {'motivo_rechazo': 'Ilegible'})
+    assert respuesta.status_code == 200
+    despachar()
+
+    assert _avisos(cliente) == [
+        ('documento_aprobado', 'Buen trabajo. Continúa con los demás documentos requeridos.'),
+        ('documento_rechazado', 'Ilegible'),
+    ]
+    assert set(EventoOutbox.objects.values_list('tipo', 'estado')) == {
+        ('documento.aprobado', 'procesado'), ('documento.rechazado', 'procesado'),
+    }
+
+
+@pytest.mark.django_db
+def test_revision_masiva_envia_una_notificacion(solicitud, cliente, asesor, cliente_api,
+                                                django_capture_on_commit_callbacks):
+    pasaporte, fotos = _documento(solicitud), _documento(solicitud, 'Fotos')
+
+    with django_capture_on_commit_callbacks(execute=True):
+        respuesta = cliente_api(asesor).post(f'/api/solicitudes/{solicitud.pk}/documentos/revisar/', {
+            'decisiones': [
+                {'documento_id': pasaporte.pk, 'accion': 'aprobar'},
+                {'documento_id': fotos.pk, 'accion': 'rechazar', 'motivo_rechazo': 'Fondo oscuro'},
+            ]
+        }, format='json')
+
+    assert respuesta.status_code == 200
+    assert _avisos(cliente) == [('documento_rechazado', '- Fotos: Fondo oscuro')]
+    assert Notificacion.objects.get(usuario=cliente).datos['aprobados'] == [pasaporte.pk]
+
+
+@pytest.mark.django_db
+def test_fallo_del_manejador_no_rompe_el_request(solicitud, cliente, asesor, cliente_api, monkeypatch,
+                                                 django_capture_on_commit_callbacks):
+    documento = _documento(solicitud)
+
+    def caido(*args, **kwargs):
+        raise RuntimeError('sin base de notificaciones')
+    monkeypatch.setattr(NotificacionService, 'notificar_documento_aprobado', caido)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        respuesta = cliente_api(asesor).patch(f'/api/documentos/{documento.pk}/aprobar/')
+
+    assert respuesta.status_code == 200
+    documento.refresh_from_db()
+    assert documento.estado == 'aprobado'
+    evento = EventoOutbox.objects.get(tipo='documento.aprobado')
+    assert evento.estado == 'pendiente'
+    assert 'sin base de notificaciones' in evento.error
+
+
+# =====================================================
+# SIMULACROS
+# =====================================================
+
+@pytest.mark.django_db
+def test_solicitud_del_cliente_avisa_al_asesor(solicitud, cliente, asesor, cliente_api,
+                                               django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        respuesta = cliente_api(cliente).post('/api/simulacros/solicitar/', {
+            'solicitud_id': solicitud.pk, 'fecha_propuesta': '2030-01-07', 'hora_propuesta': '10:00',
+        })
+
+    assert respuesta.status_code == 201
+    assert [tipo for tipo, _ in _avisos(asesor)] == ['simulacro_propuesto']
+    assert _avisos(cliente) == []
+
+
+@pytest.mark.django_db
+def test_solicitud_sin_asesor_no_deja_el_evento_pendiente(cliente, cliente_api,
+                                                          django_capture_on_commit_callbacks):
+    solicitud = Solicitud.objects.create(cliente=cliente, tipo_visa='estudio', embajada='usa')
+
+    with django_capture_on_commit_callbacks(execute=True):
+        respuesta = cliente_api(cliente).post('/api/simulacros/solicitar/', {'solicitud_id': solicitud.pk})
+
+    assert respuesta.status_code == 201
+    assert EventoOutbox.objects.get(tipo='simulacro.propuesto').estado == 'procesado'
+    assert not Notificacion.objects.exists()
+
+
+@pytest.mark.django_db
+def test_propuesta_y_aceptacion(cliente, asesor, cliente_api, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        propuesta = cliente_api(asesor).post('/api/simulacros/propuesta/', {
+            'cliente_id': cliente.pk, 'fecha': '2030-01-07', 'hora': '10:00', 'modalidad': 'virtual',
+        })
+    assert propuesta.status_code == 201
+    assert [tipo for tipo, _ in _avisos(cliente)] == ['simulacro_propuesto']
+
+    simulacro = Simulacro.objects.get()
+    aceptada = cliente_api(cliente).post(f'/api/simulacros/{simulacro.pk}/aceptar/')
+    # Un segundo intento no vuelve a confirmar ni a notificar
+    repetida = cliente_api(cliente).post(f'/api/simulacros/{simulacro.pk}/aceptar/')
+    despachar()
+
+    assert aceptada.status_code == 200
+    assert repetida.status_code == 400
+    assert [tipo for tipo, _ in _avisos(cliente)] == ['simulacro_propuesto', 'simulacro_confirmado']
+    assert [tipo for tipo, _ in _avisos(asesor)] == ['simulacro_confirmado']
+    assert EventoOutbox.objects.filter(tipo='simulacro.confirmado').count() == 1
@@ -0,0 +1,73 @@
+"""
+Presupuesto de consultas de los listados de notificaciones.
+
+Cada test hace un request autenticado con JWT (incluye la consulta de la
+versión del token) sobre más filas que una página; el presupuesto no debe
+depender del número de filas.
+"""
+import pytest
+
+from apps.notificaciones.models import Notificacion
+from apps.notificaciones.views import (
+    NotificacionesAsesorView, NotificacionesListView, NotificacionesNoLeidasView,
+)
+from apps.solicitudes.models import Solicitud
+
+FILAS = 25
+
+
+def _notificaciones(usuario, n=FILAS):
+    Notificacion.objects.bulk_create([
+        Notificacion(usuario=usuario, titulo=f'Aviso {i}', mensaje='Mensaje') for i in range(n)
+    ])
+
+
+@pytest.fixture
+def cliente(crear_usuario):
+    usuario = crear_usuario('cliente')
+    _notificaciones(usuario)
+    return usuario
+
+
+@pytest.fixture
+def asesor(crear_usuario):
+    """Asesor con notificaciones propias y de tres clientes asignados."""
+    usuario = crear_usuario('asesor')
+    clientes = [crear_usuario('cliente') for _ in range(3)]
+    Solicitud.objects.bulk_create([
+        Solicitud(cliente=cliente, asesor=usuario, tipo_visa='estudio', embajada='usa')
+        for cliente in clientes
+    ])
+    _notificaciones(usuario, 10)
+    for cliente in clientes:
+        _notificaciones(cliente, 5)
+    return usuario
+
+
+@pytest.mark.django_db
+@pytest.mark.presupuesto_consultas(NotificacionesListView.presupuesto_consultas)
+def test_listado_paginado(cliente, cliente_api):
+    respuesta = cliente_api(cliente).get('/api/notificaciones/')
+
+    assert respuesta.status_code == 200
+    assert respuesta.data['count'] == FILAS
+    assert len(respuesta.data['results']) == 20
+
+
+@pytest.mark.django_db
+@pytest.mark.presupuesto_consultas(NotificacionesNoLeidasView.presupuesto_consultas)
+def test_no_leidas(cliente, cliente_api):
+    respuesta = cliente_api(cliente).get('/api/notificaciones/no-leidas/')
+
+    assert respuesta.status_code == 200
+    assert len(respuesta.data['results']) == 10
+
+
+@pytest.mark.django_db
+@pytest.mark.presupuesto_consultas(NotificacionesAsesorView.presupuesto_consultas)
+def test_asesor_con_clientes_asignados(asesor, cliente_api):
+    respuesta = cliente_api(asesor).get('/api/notificaciones/asesor/')
+
+    assert respuesta.status_code == 200
+    assert respuesta.data['count'] == 25
+    assert len(respuesta.data['results']) == 20
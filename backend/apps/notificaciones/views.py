@@ -8,6 +8,8 @@ from rest_framework.pagination import PageNumberPagination
 from django.utils import timezone
 from django.db.models import Q
 
+from apps.core.consultas import presupuesto_consultas
+
 from .models import Notificacion, PreferenciaNotificacion
 from .serializers import (
     NotificacionSerializer,
@@ -23,6 +25,7 @@ class NotificacionPagination(PageNumberPagination):
     max_page_size = 100
 
 
+@presupuesto_consultas(3)
 class NotificacionesListView(generics.ListAPIView):
     """
     GET /api/notificaciones/
@@ -33,7 +36,9 @@ class NotificacionesListView(generics.ListAPIView):
     pagination_class = NotificacionPagination
     
     def get_queryset(self):
-        queryset = Notificacion.objects.filter(usuario=self.request.user)
+        queryset = Notificacion.objects.filter(
+            usuario=self.request.user
+        ).select_related('usuario')
         
         # Filtros
         tipo = self.request.query_params.get('tipo')
@@ -82,6 +87,7 @@ class ConteoNoLeidasView(APIView):
         return Response({'count': count})
 
 
+@presupuesto_consultas(3)
 class NotificacionesNoLeidasView(generics.ListAPIView):
     """
     GET /api/notificaciones/no-leidas/
@@ -94,7 +100,7 @@ class NotificacionesNoLeidasView(generics.ListAPIView):
         return Notificacion.objects.filter(
             usuario=self.request.user,
             leida=False
-        ).order_by('-created_at')[:10]
+        ).select_related('usuario').order_by('-created_at')[:10]
 
 
 class MarcarLeidaView(APIView):
@@ -280,6 +286,7 @@ class CrearNotificacionView(APIView):
         )
 
 
+@presupuesto_consultas(3)
 class NotificacionesAsesorView(generics.ListAPIView):
     """
     GET /api/notificaciones/asesor/
@@ -306,7 +313,7 @@ class NotificacionesAsesorView(generics.ListAPIView):
         # Notificaciones propias + de clientes asignados
         queryset = Notificacion.objects.filter(
             Q(usuario=user) | Q(usuario_id__in=clientes_ids)
-        )
+        ).select_related('usuario')
         
         # Filtros opcionales
         tipo = self.request.query_params.get('tipo')
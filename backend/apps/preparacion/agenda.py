@@ -0,0 +1,258 @@
+"""
+Agenda libre/ocupado de asesores y clientes.
+
+Los intervalos ocupados (simulacros activos y entrevistas consulares)
+se cargan en una sola consulta (UNION por participante), se ordenan y se
+fusionan; los horarios libres se obtienen recorriendo la lista fusionada
+una sola vez. Las propuestas de simulacro usan `buscar_conflicto()` para
+rechazar horarios que se solapan.
+
+Un simulacro solicitado o con contrapropuesta ocupa el horario propuesto
+(`fecha_propuesta`/`hora_propuesta`), no `fecha`/`hora`: sin propuesta no
+ocupa ningún horario.
+"""
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import CharField, F, IntegerField, Value
+from django.utils import timezone
+
+from apps.core.models import combinar_fecha_hora
+from apps.solicitudes.models import Entrevista
+
+from .models import Simulacro
+from .transiciones import ESTADOS_FINALES
+
+Intervalo = namedtuple('Intervalo', ['inicio', 'fin', 'tipo', 'pk'])
+
+# Estados cuyo horario es el propuesto por el cliente
+ESTADOS_CON_PROPUESTA = ('solicitado', 'contrapropuesta')
+ESTADOS_SIMULACRO_OCUPADO = tuple(
+    estado for estado, _ in Simulacro.ESTADOS
+    if estado not in ESTADOS_FINALES and estado not in ESTADOS_CON_PROPUESTA
+)
+ESTADOS_ENTREVISTA_OCUPADA = ('agendada', 'confirmada', 'reprogramada')
+
+
+def duracion_simulacro():
+    return timedelta(minutes=settings.AGENDA_DURACION_SIMULACRO)
+
+
+def duracion_entrevista():
+    return timedelta(minutes=settings.AGENDA_DURACION_ENTREVISTA)
+
+
+# =====================================================
+# CARGA DE INTERVALOS
+# =====================================================
+
+def intervalos_ocupados(desde, hasta, asesor=None, cliente=None, excluir=None):
+    """
+    Intervalos que se solapan con [desde, hasta) para el asesor y/o el
+    cliente, ordenados por inicio. Una sola consulta a la base de datos.
+
+    Args:
+        asesor, cliente: Usuario o ID (al menos uno)
+        excluir: ID de simulacro a ignorar (al reprogramar uno existente)
+    """
+    participantes = [
+        (campo, valor)
+        for campo, valor in (('asesor', asesor), ('cliente', cliente))
+        if valor is not None
+    ]
+    if not participantes:
+        return []
+
+    # Un evento se solapa si empieza antes de `hasta` y termina después de
+    # `desde`. Una rama por participante: con OR el motor no puede usar el
+    # índice (asesor, programado_en) para acotar el rango. Las ramas
+    # devuelven fecha y hora locales porque las propuestas no tienen
+    # columna datetime; el solape exacto se comprueba al combinarlas.
+    columnas = ('dia', 'hora_local', 'minutos', 'tipo', 'ref')
+    dias_propuesta = (
+        timezone.localtime(desde - duracion_simulacro()).date(),
+        timezone.localtime(hasta).date(),
+    )
+    ramas = []
+    for campo, valor in participantes:
+        simulacros = Simulacro.objects.filter(
+            **{campo: valor},
+            estado__in=ESTADOS_SIMULACRO_OCUPADO,
+            programado_en__gt=desde - duracion_simulacro(),
+            programado_en__lt=hasta,
+        )
+        propuestas = Simulacro.objects.filter(
+            **{campo: valor},
+            estado__in=ESTADOS_CON_PROPUESTA,
+            fecha_propuesta__range=dias_propuesta,
+            hora_propuesta__isnull=False,
+        )
+        if excluir is not None:
+            simulacros = simulacros.exclude(pk=excluir)
+            propuestas = propuestas.exclude(pk=excluir)
+        entrevistas = Entrevista.objects.filter(
+            **{f'solicitud__{campo}': valor},
+            estado__in=ESTADOS_ENTREVISTA_OCUPADA,
+            programado_en__gt=desde - duracion_entrevista(),
+            programado_en__lt=hasta,
+        )
+        for queryset, fecha, hora in (
+            (simulacros, 'fecha', 'hora'),
+            (propuestas, 'fecha_propuesta', 'hora_propuesta'),
+        ):
+            ramas.append(queryset.annotate(
+                dia=F(fecha),
+                hora_local=F(hora),
+                minutos=Value(settings.AGENDA_DURACION_SIMULACRO, output_field=IntegerField()),
+                tipo=Value('simulacro', output_field=CharField()),
+                ref=F('pk'),
+            ))
+        ramas.append(entrevistas.annotate(
+            dia=F('fecha'),
+            hora_local=F('hora'),
+            minutos=Value(settings.AGENDA_DURACION_ENTREVISTA, output_field=IntegerField()),
+            tipo=Value('entrevista', output_field=CharField()),
+            ref=F('pk'),
+        ))
+
+    # UNION (sin ALL) descarta los eventos compartidos por asesor y cliente
+    primera, *resto = [rama.order_by().values_list(*columnas) for rama in ramas]
+    filas = primera.union(*resto)
+
+    intervalos = []
+    for dia, hora, minutos, tipo, pk in filas:
+        inicio = combinar_fecha_hora(dia, hora)
+        fin = inicio + timedelta(minutes=minutos)
+        if inicio < hasta and fin > desde:
+            intervalos.append(Intervalo(inicio, fin, tipo, pk))
+    intervalos.sort()
+    return intervalos
+
+
+def bloquear_agenda(asesor=None, cliente=None):
+    """
+    Serializa las reservas sobre la agenda del asesor y del cliente
+    (SELECT ... FOR UPDATE sobre sus filas de usuario, en orden de ID para
+    no generar deadlocks). Debe llamarse dentro de transaction.atomic():
+    el bloqueo dura hasta el commit, así que la comprobación de conflicto
+    y el INSERT/UPDATE del simulacro van en la misma transacción.
+    """
+    ids = sorted({getattr(valor, 'pk', valor) for valor in (asesor, cliente) if valor is not None})
+    list(
+        get_user_model().objects.select_for_update()
+        .filter(pk__in=ids).order_by('pk').values_list('pk', flat=True)
+    )
+
+
+# =====================================================
+# FUSIÓN Y HORARIOS LIBRES
+# =====================================================
+
+def fusionar(intervalos):
+    """
+    Fusiona intervalos ordenados por inicio en bloques ocupados
+    disjuntos: [(inicio, fin), ...]. Intervalos contiguos se unen.
+    """
+    bloques = []
+    for intervalo in intervalos:
+        if bloques and intervalo.inicio <= bloques[-1][1]:
+            if intervalo.fin > bloques[-1][1]:
+                bloques[-1][1] = intervalo.fin
+        else:
+            bloques.append([intervalo.inicio, intervalo.fin])
+    return [tuple(bloque) for bloque in bloques]
+
+
+def _alinear(momento, paso):
+    """Redondea `momento` hacia arriba al siguiente múltiplo de `paso` del día."""
+    medianoche = momento.replace(hour=0, minute=0, second=0, microsecond=0)
+    resto = (momento - medianoche) % paso
+    return momento + (paso - resto) if resto else momento
+
+
+def _jornadas(desde, hasta):
+    """Ventanas [inicio, fin) del horario de atención entre desde y hasta."""
+    apertura, cierre = (time.fromisoformat(h) for h in settings.AGENDA_JORNADA)
+    dia = timezone.localtime(desde).date()
+    ultimo = timezone.localtime(hasta).date()
+    while dia <= ultimo:
+        if dia.weekday() in settings.AGENDA_DIAS_HABILES:
+            inicio = max(desde, combinar_fecha_hora(dia, apertura))
+            fin = min(hasta, combinar_fecha_hora(dia, cierre))
+            if inicio < fin:
+                yield inicio, fin
+        dia += timedelta(days=1)
+
+
+def horarios_libres(bloques, desde, hasta, duracion, paso=None, limite=None):
+    """
+    Inicios de los horarios libres de `duracion` dentro de la jornada.
+
+    Args:
+        bloques: Salida de fusionar() (disjuntos y ordenados)
+        paso: Granularidad de los inicios (por defecto AGENDA_PASO_MINUTOS)
+        limite: Máximo de horarios a devolver
+    """
+    paso = paso or timedelta(minutes=settings.AGENDA_PASO_MINUTOS)
+    finales = [fin for _, fin in bloques]
+    libres = []
+    for inicio_jornada, fin_jornada in _jornadas(desde, hasta):
+        # Primer bloque que termina después del inicio de la jornada
+        i = bisect_right(finales, inicio_jornada)
+        candidato = timezone.localtime(_alinear(timezone.localtime(inicio_jornada), paso))
+        while candidato + duracion <= fin_jornada:
+            while i < len(bloques) and bloques[i][1] <= candidato:
+                i += 1
+            if i < len(bloques) and bloques[i][0] < candidato + duracion:
+                candidato = timezone.localtime(_alinear(timezone.localtime(bloques[i][1]), paso))
+                continue
+            libres.append(candidato)
+            if limite and len(libres) >= limite:
+                return libres
+            candidato += paso
+    return libres
+
+
+# =====================================================
+# CONFLICTOS
+# =====================================================
+
+def buscar_conflicto(fecha, hora, asesor=None, cliente=None, excluir=None):
+    """
+    Retorna el primer Intervalo que se solapa con un simulacro en
+    fecha/hora para el asesor o el cliente, o None si está libre.
+
+    Bloquea antes la agenda de ambos (ver bloquear_agenda): debe llamarse
+    dentro de transaction.atomic() junto con la escritura del simulacro.
+    """
+    inicio = combinar_fecha_hora(fecha, hora)
+    if inicio is None:
+        return None
+    bloquear_agenda(asesor, cliente)
+    ocupados = intervalos_ocupados(
+        inicio, inicio + duracion_simulacro(),
+        asesor=asesor, cliente=cliente, excluir=excluir
+    )
+    return ocupados[0] if ocupados else None
+
+
+def mensaje_conflicto(intervalo):
+    """Texto para el usuario describiendo el horario ocupado."""
+    inicio = timezone.localtime(intervalo.inicio)
+    evento = 'un simulacro' if intervalo.tipo == 'simulacro' else 'una entrevista consular'
+    return (
+        f"El horario se solapa con {evento} el {inicio:%d/%m/%Y} "
+        f"de {inicio:%H:%M} a {timezone.localtime(intervalo.fin):%H:%M}"
+    )
+
+
+def parsear_fecha_hora(fecha, hora):
+    """Acepta date/time o cadenas ISO (como llegan en request.data)."""
+    if isinstance(fecha, str):
+        fecha = datetime.strptime(fecha, '%Y-%m-%d').date()
+    if isinstance(hora, str):
+        hora = time.fromisoformat(hora)
+    return fecha, hora
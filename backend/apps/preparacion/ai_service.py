@@ -4,7 +4,6 @@ Utiliza Google Gemini API para generar recomendaciones personalizadas.
 """
 import json
 import logging
-import requests
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
 
@@ -175,7 +174,10 @@ Responde ÚNICAMENTE con el JSON, sin explicaciones adicionales ni markdown."""
         if not self.api_key:
             logger.error("No hay API key de Gemini configurada")
             return None
-            
+
+        # Cliente HTTP diferido: solo lo cargan los procesos que llaman a Gemini
+        import requests
+
         try:
             headers = {
                 "Content-Type": "application/json"
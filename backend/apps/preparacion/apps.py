@@ -15,4 +15,4 @@ class PreparacionConfig(AppConfig):
         """
         # from .simulacion import signals  # noqa
         # from .recomendaciones import signals  # noqa
-        pass
+        from . import signals  # noqa
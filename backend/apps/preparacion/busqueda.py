@@ -0,0 +1,281 @@
+"""
+Búsqueda de texto completo sobre simulacros y recomendaciones.
+
+El índice no guarda una segunda copia completa del texto: la
+transcripción vive solo en su .txt.gz (ver transcripciones). Por
+documento se guardan el vocabulario (`terminos`, para buscar) y un
+`extracto` de EXTRACTO_CARACTERES caracteres del que sale el fragmento de
+cada resultado, sin leer la transcripción.
+
+- PostgreSQL: columna tsvector calculada al indexar + índice GIN,
+  websearch_to_tsquery, ts_rank y ts_headline sobre el extracto.
+- SQLite: tabla FTS5 de contenido externo sobre `terminos` y `extracto`,
+  ranking bm25 y snippet().
+- Otros motores: icontains sobre `terminos`, sin ranking; el fragmento se
+  arma en Python con `fragmento()`.
+
+Una coincidencia fuera del extracto se encuentra igual, pero su fragmento
+muestra el comienzo del documento. El motor marca las coincidencias con
+caracteres de control; el fragmento se escapa para HTML y solo después
+se cambian por <mark>...</mark>.
+"""
+import logging
+import re
+import unicodedata
+
+from django.db import connection
+from django.utils.html import escape
+
+logger = logging.getLogger(__name__)
+
+CAMPOS_RECOMENDACION = ('fortalezas', 'puntos_mejora', 'recomendaciones')
+
+PATRON_TERMINO = re.compile(r'\w+', re.UNICODE)
+PATRON_ESPACIOS = re.compile(r'\s+')
+
+# Caracteres del documento guardados para armar fragmentos
+EXTRACTO_CARACTERES = 2000
+PALABRAS_FRAGMENTO = 20
+# Marcas de coincidencia del motor (no aparecen en el texto de una transcripción)
+INICIO_MARCA, FIN_MARCA = '\x02', '\x03'
+
+
+def _textos(valor):
+    """Extrae recursivamente los textos de un valor JSON."""
+    if isinstance(valor, str):
+        yield valor
+    elif isinstance(valor, dict):
+        for item in valor.values():
+            yield from _textos(item)
+    elif isinstance(valor, (list, tuple)):
+        for item in valor:
+            yield from _textos(item)
+
+
+def construir_contenido(simulacro):
+    """Concatena transcripción y recomendación en un único documento."""
+    partes = [simulacro.obtener_transcripcion()]
+    recomendacion = getattr(simulacro, 'recomendacion', None)
+    if recomendacion is not None:
+        for campo in CAMPOS_RECOMENDACION:
+            partes.extend(_textos(getattr(recomendacion, campo)))
+        partes.append(recomendacion.resumen_ejecutivo)
+        partes.append(recomendacion.accion_sugerida)
+    return '\n'.join(p for p in partes if p)
+
+
+def extraer_terminos(texto):
+    """Vocabulario del documento: términos únicos en minúsculas, en orden de aparición."""
+    return ' '.join(dict.fromkeys(termino.lower() for termino in PATRON_TERMINO.findall(texto)))
+
+
+def actualizar_indice(simulacro_id):
+    """Reconstruye el documento de búsqueda de un simulacro."""
+    from .models import Simulacro, IndiceBusquedaSimulacro
+
+    simulacro = (
+        Simulacro.objects
+        .select_related('recomendacion')
+        .filter(pk=simulacro_id)
+        .first()
+    )
+    if simulacro is None:
+        IndiceBusquedaSimulacro.objects.filter(simulacro_id=simulacro_id).delete()
+        return
+
+    contenido = construir_contenido(simulacro)
+    if not contenido:
+        IndiceBusquedaSimulacro.objects.filter(simulacro_id=simulacro_id).delete()
+        return
+
+    postgres = connection.vendor == 'postgresql'
+    IndiceBusquedaSimulacro.objects.update_or_create(
+        simulacro_id=simulacro_id,
+        defaults={
+            'asesor_id': simulacro.asesor_id,
+            'cliente_id': simulacro.cliente_id,
+            # En PostgreSQL basta el tsvector (conserva frecuencias y posiciones)
+            'terminos': '' if postgres else extraer_terminos(contenido),
+            'extracto': contenido[:EXTRACTO_CARACTERES],
+        }
+    )
+    if postgres:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE simulacros_busqueda SET documento = to_tsvector('spanish', %s) "
+                "WHERE simulacro_id = %s",
+                [contenido, simulacro_id]
+            )
+
+
+def _plegar(texto):
+    """Minúsculas sin diacríticos, como el tokenizador del índice."""
+    return ''.join(
+        c for c in unicodedata.normalize('NFD', texto.lower()) if not unicodedata.combining(c)
+    )
+
+
+def _resaltar(fragmento_motor):
+    """Escapa para HTML un fragmento del motor y cambia sus marcas por <mark>."""
+    return escape(PATRON_ESPACIOS.sub(' ', fragmento_motor or '').strip()).replace(
+        INICIO_MARCA, '<mark>'
+    ).replace(FIN_MARCA, '</mark>')
+
+
+def fragmento(contenido, texto, palabras=PALABRAS_FRAGMENTO):
+    """
+    Fragmento de `contenido` alrededor de la primera coincidencia con los
+    términos de `texto`. El texto sale escapado para HTML y los términos
+    encontrados entre <mark>...</mark>.
+    """
+    terminos = [_plegar(t) for t in PATRON_TERMINO.findall(texto or '')]
+    tokens = list(PATRON_TERMINO.finditer(contenido or ''))
+    if not terminos or not tokens:
+        return ''
+
+    coincide = [any(_plegar(token.group()).startswith(t) for t in terminos) for token in tokens]
+    primero = next((i for i, c in enumerate(coincide) if c), 0)
+    inicio = max(primero - palabras // 4, 0)
+    fin = min(inicio + palabras, len(tokens))
+
+    partes = []
+    posicion = tokens[inicio].start()
+    for i in range(inicio, fin):
+        token = tokens[i]
+        partes.append(escape(PATRON_ESPACIOS.sub(' ', contenido[posicion:token.start()])))
+        palabra = escape(token.group())
+        partes.append(f'<mark>{palabra}</mark>' if coincide[i] else palabra)
+        posicion = token.end()
+    resultado = ''.join(partes)
+    if inicio > 0:
+        resultado = '…' + resultado
+    if fin < len(tokens):
+        resultado += '…'
+    return resultado
+
+
+def _consulta_fts5(texto):
+    """
+    Convierte la entrada del usuario en una consulta FTS5 segura:
+    cada término entre comillas (AND implícito) con prefijo en el último.
+    """
+    terminos = PATRON_TERMINO.findall(texto)
+    if not terminos:
+        return ''
+    partes = [f'"{t}"' for t in terminos]
+    partes[-1] += '*'
+    return ' '.join(partes)
+
+
+def buscar(asesor_id, texto, limite=20, desplazamiento=0):
+    """
+    Busca en los simulacros del asesor.
+
+    Returns:
+        (total, [{'simulacro_id', 'rank', 'fragmento'}]) ordenado por
+        relevancia. El fragmento ya está escapado para HTML.
+    """
+    texto = (texto or '').strip()
+    if not texto:
+        return 0, []
+
+    vendor = connection.vendor
+    if vendor == 'postgresql':
+        return _buscar_postgres(asesor_id, texto, limite, desplazamiento)
+    if vendor == 'sqlite':
+        return _buscar_sqlite(asesor_id, texto, limite, desplazamiento)
+    return _buscar_generico(asesor_id, texto, limite, desplazamiento)
+
+
+def _buscar_postgres(asesor_id, texto, limite, desplazamiento):
+    consulta = "websearch_to_tsquery('spanish', %s)"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT COUNT(*) FROM simulacros_busqueda "
+            f"WHERE asesor_id = %s AND documento @@ {consulta}",
+            [asesor_id, texto]
+        )
+        total = cursor.fetchone()[0]
+        if not total:
+            return 0, []
+
+        # ts_headline solo para las filas de la página
+        cursor.execute(
+            f"""
+            WITH pagina AS (
+                SELECT id, simulacro_id, ts_rank(documento, {consulta}) AS rank
+                FROM simulacros_busqueda
+                WHERE asesor_id = %s AND documento @@ {consulta}
+                ORDER BY rank DESC, simulacro_id DESC
+                LIMIT %s OFFSET %s
+            )
+            SELECT p.simulacro_id, p.rank, ts_headline('spanish', b.extracto, {consulta}, %s)
+            FROM pagina p
+            JOIN simulacros_busqueda b ON b.id = p.id
+            ORDER BY p.rank DESC, p.simulacro_id DESC
+            """,
+            [
+                texto, asesor_id, texto, limite, desplazamiento, texto,
+                f'StartSel={INICIO_MARCA}, StopSel={FIN_MARCA}, MaxFragments=1, '
+                f'MaxWords={PALABRAS_FRAGMENTO}, MinWords={PALABRAS_FRAGMENTO // 2}',
+            ]
+        )
+        filas = cursor.fetchall()
+
+    return total, [
+        {'simulacro_id': s, 'rank': float(r), 'fragmento': _resaltar(f)} for s, r, f in filas
+    ]
+
+
+def _buscar_sqlite(asesor_id, texto, limite, desplazamiento):
+    consulta = _consulta_fts5(texto)
+    if not consulta:
+        return 0, []
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT COUNT(*)
+            FROM simulacros_busqueda_fts f
+            JOIN simulacros_busqueda b ON b.id = f.rowid
+            WHERE simulacros_busqueda_fts MATCH %s AND b.asesor_id = %s
+            """,
+            [consulta, asesor_id]
+        )
+        total = cursor.fetchone()[0]
+        if not total:
+            return 0, []
+
+        # snippet() sobre la columna 1 (extracto)
+        cursor.execute(
+            """
+            SELECT b.simulacro_id, bm25(simulacros_busqueda_fts) AS rank,
+                   snippet(simulacros_busqueda_fts, 1, %s, %s, '…', %s)
+            FROM simulacros_busqueda_fts
+            JOIN simulacros_busqueda b ON b.id = simulacros_busqueda_fts.rowid
+            WHERE simulacros_busqueda_fts MATCH %s AND b.asesor_id = %s
+            ORDER BY rank, b.simulacro_id DESC
+            LIMIT %s OFFSET %s
+            """,
+            [INICIO_MARCA, FIN_MARCA, PALABRAS_FRAGMENTO, consulta, asesor_id, limite, desplazamiento]
+        )
+        filas = cursor.fetchall()
+
+    # bm25 es negativo: más bajo = más relevante
+    return total, [
+        {'simulacro_id': s, 'rank': -float(r), 'fragmento': _resaltar(f)} for s, r, f in filas
+    ]
+
+
+def _buscar_generico(asesor_id, texto, limite, desplazamiento):
+    from .models import IndiceBusquedaSimulacro
+
+    queryset = IndiceBusquedaSimulacro.objects.filter(asesor_id=asesor_id)
+    for termino in PATRON_TERMINO.findall(texto):
+        queryset = queryset.filter(terminos__icontains=termino.lower())
+    queryset = queryset.order_by('-simulacro_id')
+    total = queryset.count()
+    filas = queryset.values_list('simulacro_id', 'extracto')[desplazamiento:desplazamiento + limite]
+    return total, [
+        {'simulacro_id': s, 'rank': 0.0, 'fragmento': fragmento(extracto, texto)} for s, extracto in filas
+    ]
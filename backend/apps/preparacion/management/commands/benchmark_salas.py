@@ -0,0 +1,224 @@
+"""
+Benchmark del canal en tiempo real de salas de simulacro.
+
+Mide cuántas salas de espera concurrentes sostiene un nodo y la latencia
+de entrega de los cambios de estado.
+
+Uso:
+    # En proceso (sin servidor HTTP): mide el reparto del canal
+    python manage.py benchmark_salas --salas 2000
+
+    # Contra un servidor ASGI en ejecución (requiere SALAS_REDIS_URL)
+    uvicorn config.asgi:application --port 8000 &
+    python manage.py benchmark_salas --salas 1000 --url http://127.0.0.1:8000
+"""
+import asyncio
+import json
+import resource
+import statistics
+import time
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from apps.preparacion.salas import (
+    CanalMemoria, datos_estado, flujo_sala, obtener_canal, token_sala,
+)
+
+# IDs sintéticos para no chocar con simulacros reales
+ID_BASE = 10_000_000
+
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    valores = sorted(valores)
+    indice = min(len(valores) - 1, int(round(p / 100 * (len(valores) - 1))))
+    return valores[indice]
+
+
+class Command(BaseCommand):
+    help = 'Mide salas de espera concurrentes y latencia del canal SSE'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--salas', type=int, default=500, help='Salas concurrentes')
+        parser.add_argument('--participantes', type=int, default=2, help='Conexiones por sala')
+        parser.add_argument('--eventos', type=int, default=3, help='Cambios de estado por sala')
+        parser.add_argument('--url', default=None, help='Servidor ASGI a medir (ej. http://127.0.0.1:8000)')
+        parser.add_argument('--timeout', type=float, default=30.0, help='Espera máxima por evento (s)')
+
+    def handle(self, *args, **options):
+        if options['salas'] < 1 or options['participantes'] < 1:
+            raise CommandError('--salas y --participantes deben ser mayores que 0')
+
+        canal = obtener_canal()
+        if options['url'] and type(canal) is CanalMemoria:
+            raise CommandError(
+                'El modo --url requiere SALAS_REDIS_URL: el canal en memoria '
+                'no se comparte con el proceso del servidor.'
+            )
+
+        resultado = asyncio.run(self._ejecutar(canal, options))
+        self._reportar(resultado, options)
+
+    # =====================================================
+    # EJECUCIÓN
+    # =====================================================
+
+    async def _ejecutar(self, canal, options):
+        salas = [ID_BASE + i for i in range(options['salas'])]
+        for sala_id in salas:
+            canal.guardar_estado(sala_id, datos_estado(sala_id, 'confirmado'))
+
+        latencias = []
+        recibidos = {'total': 0}
+        esperados = options['eventos']
+        listos = asyncio.Event()
+        conectados = {'total': 0}
+        total_conexiones = len(salas) * options['participantes']
+
+        def registrar(datos):
+            enviado = datos.get('enviado')
+            if enviado:
+                latencias.append(time.time() - enviado)
+                recibidos['total'] += 1
+
+        def conectado():
+            conectados['total'] += 1
+            if conectados['total'] == total_conexiones:
+                listos.set()
+
+        if options['url']:
+            consumidor = self._consumidor_http
+        else:
+            consumidor = self._consumidor_local
+
+        inicio_conexion = time.perf_counter()
+        tareas = [
+            asyncio.create_task(consumidor(
+                canal, sala_id, p, options, esperados, registrar, conectado
+            ))
+            for sala_id in salas
+            for p in range(options['participantes'])
+        ]
+        try:
+            await asyncio.wait_for(listos.wait(), options['timeout'])
+        except asyncio.TimeoutError:
+            pass
+        tiempo_conexion = time.perf_counter() - inicio_conexion
+
+        # Publicar desde un hilo, como lo hacen las vistas síncronas
+        def publicar():
+            estados = ['en_sala_espera', 'en_progreso', 'en_sala_espera']
+            for n in range(esperados):
+                for sala_id in salas:
+                    evento = {'tipo': 'estado', **datos_estado(sala_id, estados[n % len(estados)])}
+                    evento['enviado'] = time.time()
+                    canal.publicar(sala_id, evento)
+
+        inicio_envio = time.perf_counter()
+        await asyncio.to_thread(publicar)
+        await asyncio.wait(tareas, timeout=options['timeout'])
+        tiempo_entrega = time.perf_counter() - inicio_envio
+
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+
+        return {
+            'conexiones': conectados['total'],
+            'esperadas': total_conexiones,
+            'tiempo_conexion': tiempo_conexion,
+            'tiempo_entrega': tiempo_entrega,
+            'latencias': latencias,
+            'recibidos': recibidos['total'],
+            'eventos_esperados': total_conexiones * esperados,
+        }
+
+    async def _consumidor_local(self, canal, sala_id, participante, options,
+                                esperados, registrar, conectado):
+        """Consume el mismo generador SSE que usa la vista, sin HTTP."""
+        recibidos = 0
+        flujo = flujo_sala(sala_id, f'bench:{participante}', canal=canal)
+        try:
+            async for bloque in flujo:
+                if bloque.startswith('event: estado') and recibidos == 0 and 'enviado' not in bloque:
+                    conectado()
+                    continue
+                if bloque.startswith('event: estado'):
+                    registrar(json.loads(bloque.split('data: ', 1)[1]))
+                    recibidos += 1
+                    if recibidos >= esperados:
+                        break
+        finally:
+            await flujo.aclose()
+
+    async def _consumidor_http(self, canal, sala_id, participante, options,
+                               esperados, registrar, conectado):
+        """Conexión SSE real contra el servidor ASGI."""
+        url = urlsplit(options['url'])
+        usuario = SimpleNamespace(id=ID_BASE + participante, rol='cliente')
+        ruta = reverse('preparacion:canal_sala', kwargs={'token': token_sala(sala_id, usuario)})
+
+        reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+        try:
+            writer.write(
+                f'GET {ruta} HTTP/1.1\r\nHost: {url.netloc}\r\n'
+                f'Accept: text/event-stream\r\n\r\n'.encode()
+            )
+            await writer.drain()
+
+            recibidos = 0
+            snapshot = False
+            while recibidos < esperados:
+                linea = await reader.readline()
+                if not linea:
+                    break
+                linea = linea.decode().strip()
+                if not linea.startswith('data: {'):
+                    continue
+                datos = json.loads(linea[6:])
+                if 'enviado' not in datos:
+                    if 'estado' in datos and not snapshot:
+                        snapshot = True
+                        conectado()
+                    continue
+                registrar(datos)
+                recibidos += 1
+        finally:
+            writer.close()
+
+    # =====================================================
+    # REPORTE
+    # =====================================================
+
+    def _reportar(self, r, options):
+        latencias_ms = [l * 1000 for l in r['latencias']]
+        memoria_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        modo = options['url'] or 'en proceso'
+
+        self.stdout.write(f"Modo: {modo} ({type(obtener_canal()).__name__})")
+        self.stdout.write(
+            f"Salas: {options['salas']} | Conexiones: {r['conexiones']}/{r['esperadas']} "
+            f"en {r['tiempo_conexion']:.2f}s"
+        )
+        self.stdout.write(
+            f"Eventos entregados: {r['recibidos']}/{r['eventos_esperados']} "
+            f"en {r['tiempo_entrega']:.2f}s "
+            f"({r['recibidos'] / max(r['tiempo_entrega'], 1e-9):.0f} ev/s)"
+        )
+        if latencias_ms:
+            self.stdout.write(
+                f"Latencia (ms): p50={_percentil(latencias_ms, 50):.1f} "
+                f"p95={_percentil(latencias_ms, 95):.1f} "
+                f"p99={_percentil(latencias_ms, 99):.1f} "
+                f"media={statistics.mean(latencias_ms):.1f}"
+            )
+        self.stdout.write(f"Memoria máxima del proceso: {memoria_mb:.0f} MB")
+
+        if r['recibidos'] < r['eventos_esperados'] or r['conexiones'] < r['esperadas']:
+            self.stdout.write(self.style.WARNING('El nodo no sostuvo toda la carga solicitada'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Carga sostenida sin pérdidas'))
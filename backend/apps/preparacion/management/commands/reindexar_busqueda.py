@@ -0,0 +1,40 @@
+"""
+Reconstruye el índice de búsqueda de texto completo de simulacros.
+
+Uso:
+    python manage.py reindexar_busqueda
+    python manage.py reindexar_busqueda --asesor 12
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from apps.preparacion.busqueda import actualizar_indice
+from apps.preparacion.models import Simulacro
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de búsqueda de transcripciones y recomendaciones'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--asesor',
+            type=int,
+            default=None,
+            help='Reindexar solo los simulacros de este asesor',
+        )
+
+    def handle(self, *args, **options):
+        queryset = Simulacro.objects.filter(
+            ~Q(transcripcion_texto='')
+            | (Q(transcripcion_archivo__isnull=False) & ~Q(transcripcion_archivo=''))
+            | Q(recomendacion__isnull=False)
+        )
+        if options['asesor']:
+            queryset = queryset.filter(asesor_id=options['asesor'])
+
+        total = 0
+        for simulacro_id in queryset.values_list('pk', flat=True).iterator(chunk_size=500):
+            actualizar_indice(simulacro_id)
+            total += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Reindexados {total} simulacros'))
@@ -0,0 +1,109 @@
+# Generated by Django 5.2.10 on 2026-10-19 11:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# tsvector calculado al indexar (apps.preparacion.busqueda): la tabla no
+# guarda el texto completo del que sale.
+POSTGRES_CREAR = [
+    "ALTER TABLE simulacros_busqueda ADD COLUMN documento tsvector",
+    "CREATE INDEX simulacros_busqueda_documento_gin ON simulacros_busqueda USING GIN (documento)",
+]
+
+POSTGRES_BORRAR = [
+    "DROP INDEX IF EXISTS simulacros_busqueda_documento_gin",
+    "ALTER TABLE simulacros_busqueda DROP COLUMN IF EXISTS documento",
+]
+
+# Tabla FTS5 de contenido externo: solo guarda el índice invertido de
+# `terminos` (vocabulario) y `extracto`, que permanecen en simulacros_busqueda.
+SQLITE_CREAR = [
+    """
+    CREATE VIRTUAL TABLE simulacros_busqueda_fts USING fts5(
+        terminos,
+        extracto,
+        content='simulacros_busqueda',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER simulacros_busqueda_ai AFTER INSERT ON simulacros_busqueda BEGIN
+        INSERT INTO simulacros_busqueda_fts(rowid, terminos, extracto)
+        VALUES (new.id, new.terminos, new.extracto);
+    END
+    """,
+    """
+    CREATE TRIGGER simulacros_busqueda_ad AFTER DELETE ON simulacros_busqueda BEGIN
+        INSERT INTO simulacros_busqueda_fts(simulacros_busqueda_fts, rowid, terminos, extracto)
+        VALUES ('delete', old.id, old.terminos, old.extracto);
+    END
+    """,
+    """
+    CREATE TRIGGER simulacros_busqueda_au AFTER UPDATE OF terminos, extracto ON simulacros_busqueda BEGIN
+        INSERT INTO simulacros_busqueda_fts(simulacros_busqueda_fts, rowid, terminos, extracto)
+        VALUES ('delete', old.id, old.terminos, old.extracto);
+        INSERT INTO simulacros_busqueda_fts(rowid, terminos, extracto)
+        VALUES (new.id, new.terminos, new.extracto);
+    END
+    """,
+]
+
+SQLITE_BORRAR = [
+    "DROP TRIGGER IF EXISTS simulacros_busqueda_au",
+    "DROP TRIGGER IF EXISTS simulacros_busqueda_ad",
+    "DROP TRIGGER IF EXISTS simulacros_busqueda_ai",
+    "DROP TABLE IF EXISTS simulacros_busqueda_fts",
+]
+
+
+def _ejecutar(schema_editor, sentencias):
+    for sql in sentencias:
+        schema_editor.execute(sql)
+
+
+def crear_indice_texto(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _ejecutar(schema_editor, POSTGRES_CREAR)
+    elif vendor == 'sqlite':
+        _ejecutar(schema_editor, SQLITE_CREAR)
+
+
+def borrar_indice_texto(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _ejecutar(schema_editor, POSTGRES_BORRAR)
+    elif vendor == 'sqlite':
+        _ejecutar(schema_editor, SQLITE_BORRAR)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('preparacion', '0005_add_configuracion_ia'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndiceBusquedaSimulacro',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('terminos', models.TextField(blank=True, verbose_name='Términos indexados')),
+                ('extracto', models.TextField(blank=True, verbose_name='Extracto')),
+                ('actualizado', models.DateTimeField(auto_now=True, verbose_name='Actualizado')),
+                ('asesor', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Asesor')),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Cliente')),
+                ('simulacro', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='indice_busqueda', to='preparacion.simulacro', verbose_name='Simulacro')),
+            ],
+            options={
+                'verbose_name': 'Índice de búsqueda',
+                'verbose_name_plural': 'Índices de búsqueda',
+                'db_table': 'simulacros_busqueda',
+            },
+        ),
+        migrations.RunPython(crear_indice_texto, borrar_indice_texto),
+    ]
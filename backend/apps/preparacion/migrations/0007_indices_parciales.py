@@ -0,0 +1,24 @@
+# Generated by Django 5.2.10 on 2026-10-19 11:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('preparacion', '0006_indice_busqueda'),
+        ('solicitudes', '0004_indices_parciales'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='simulacro',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['cliente', 'estado', 'fecha'], name='simulacro_cliente_est_viva'),
+        ),
+        migrations.AddIndex(
+            model_name='simulacro',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['asesor', 'estado', 'fecha'], name='simulacro_asesor_est_viva'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.10 on 2026-10-19 12:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def rellenar_programado_en(apps, schema_editor):
+    """Calcula programado_en (fecha + hora en la zona del proyecto) por lotes."""
+    from datetime import datetime
+    from django.utils import timezone
+
+    Simulacro = apps.get_model('preparacion', 'simulacro')
+    lote = []
+    pendientes = Simulacro.objects.filter(programado_en__isnull=True).only('id', 'fecha', 'hora')
+    for fila in pendientes.iterator(chunk_size=2000):
+        if fila.fecha is None or fila.hora is None:
+            continue
+        fila.programado_en = timezone.make_aware(datetime.combine(fila.fecha, fila.hora))
+        lote.append(fila)
+        if len(lote) >= 2000:
+            Simulacro.objects.bulk_update(lote, ['programado_en'])
+            lote = []
+    if lote:
+        Simulacro.objects.bulk_update(lote, ['programado_en'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('preparacion', '0007_indices_parciales'),
+        ('solicitudes', '0005_programado_en'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulacro',
+            name='programado_en',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Programado para'),
+        ),
+        migrations.RunPython(rellenar_programado_en, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='simulacro',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['estado', 'programado_en'], name='simulacro_estado_prog_viva'),
+        ),
+    ]
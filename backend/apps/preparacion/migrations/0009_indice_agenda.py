@@ -0,0 +1,20 @@
+# Generated by Django 5.2.10 on 2026-10-19 12:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('preparacion', '0008_programado_en'),
+        ('solicitudes', '0005_programado_en'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='simulacro',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['asesor', 'programado_en'], name='simulacro_asesor_prog_viva'),
+        ),
+    ]
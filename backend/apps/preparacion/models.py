@@ -3,10 +3,10 @@ Modelos para el módulo de Preparación (Simulacros).
 """
 from django.db import models
 from django.conf import settings
-from apps.core.models import TimeStampedModel, SoftDeleteModel
+from apps.core.models import TimeStampedModel, SoftDeleteModel, ProgramadoModel
 
 
-class Simulacro(TimeStampedModel, SoftDeleteModel):
+class Simulacro(TimeStampedModel, SoftDeleteModel, ProgramadoModel):
     """
     Modelo de Simulacro de Entrevista Consular.
     """
@@ -104,37 +104,77 @@ class Simulacro(TimeStampedModel, SoftDeleteModel):
         verbose_name = 'Simulacro'
         verbose_name_plural = 'Simulacros'
         ordering = ['-fecha', '-hora']
+        # Índices parciales: solo filas vigentes (las que ve `objects`)
+        indexes = [
+            models.Index(
+                fields=['cliente', 'estado', 'fecha'],
+                condition=models.Q(is_deleted=False),
+                name='simulacro_cliente_est_viva',
+            ),
+            models.Index(
+                fields=['asesor', 'estado', 'fecha'],
+                condition=models.Q(is_deleted=False),
+                name='simulacro_asesor_est_viva',
+            ),
+            models.Index(
+                fields=['estado', 'programado_en'],
+                condition=models.Q(is_deleted=False),
+                name='simulacro_estado_prog_viva',
+            ),
+            # Agenda libre/ocupado del asesor (apps.preparacion.agenda)
+            models.Index(
+                fields=['asesor', 'programado_en'],
+                condition=models.Q(is_deleted=False),
+                name='simulacro_asesor_prog_viva',
+            ),
+        ]
     
     def __str__(self):
         return f"Simulacro #{self.id} - {self.cliente} - {self.fecha}"
     
     def puede_cancelar(self, horas_anticipacion=24):
-        """Verifica si el simulacro puede ser cancelado."""
+        """
+        Verifica si el simulacro puede ser cancelado.
+        En listados usar la anotación `cancelable` (ver transiciones.anotar_permisos).
+        """
         from django.utils import timezone
-        from datetime import datetime, timedelta
+        from datetime import timedelta
         
         if self.estado in ['cancelado', 'completado', 'no_asistio']:
             return False
         
-        fecha_simulacro = datetime.combine(self.fecha, self.hora)
-        fecha_simulacro = timezone.make_aware(fecha_simulacro)
-        tiempo_restante = fecha_simulacro - timezone.now()
-        
+        tiempo_restante = self.momento_programado() - timezone.now()
         return tiempo_restante >= timedelta(hours=horas_anticipacion)
     
     def puede_ingresar_sala(self, minutos_anticipacion=15):
-        """Verifica si el cliente puede ingresar a la sala de espera."""
+        """
+        Verifica si el cliente puede ingresar a la sala de espera.
+        En listados usar la anotación `sala_abierta` (ver transiciones.anotar_permisos).
+        """
         from django.utils import timezone
-        from datetime import datetime, timedelta
+        from datetime import timedelta
         
         if self.estado not in ['confirmado']:
             return False
         
-        fecha_simulacro = datetime.combine(self.fecha, self.hora)
-        fecha_simulacro = timezone.make_aware(fecha_simulacro)
-        tiempo_restante = fecha_simulacro - timezone.now()
-        
+        tiempo_restante = self.momento_programado() - timezone.now()
         return timedelta(0) <= tiempo_restante <= timedelta(minutes=minutos_anticipacion)
+    
+    def tiene_transcripcion(self):
+        """Indica si hay transcripción sin necesidad de leer el archivo."""
+        return bool(self.transcripcion_texto or self.transcripcion_archivo)
+    
+    def obtener_transcripcion(self):
+        """
+        Retorna el texto de la transcripción, descomprimiendo bajo demanda.
+        Los registros antiguos conservan el texto en transcripcion_texto.
+        """
+        if self.transcripcion_texto:
+            return self.transcripcion_texto
+        if self.transcripcion_archivo:
+            from .transcripciones import leer_transcripcion
+            return leer_transcripcion(self.transcripcion_archivo)
+        return ''
 
 
 class Recomendacion(TimeStampedModel):
@@ -405,3 +445,49 @@ class ConfiguracionIA(TimeStampedModel):
     def get_api_url(self):
         """Obtiene la URL de la API según el modelo seleccionado."""
         return f"https://generativelanguage.googleapis.com/v1beta/models/{self.modelo}:generateContent"
+
+
+class IndiceBusquedaSimulacro(models.Model):
+    """
+    Documento de búsqueda de texto completo por simulacro (transcripción y
+    contenido de la recomendación), sin guardar el texto completo.
+
+    El índice real depende del motor (ver migración 0006):
+    - PostgreSQL: columna tsvector 'documento' con índice GIN.
+    - SQLite: tabla virtual FTS5 'simulacros_busqueda_fts' sobre `terminos`
+      y `extracto`, con triggers.
+    En SQLite, alterar esta tabla la reconstruye y elimina los triggers:
+    cualquier migración futura sobre ella debe volver a crearlos.
+    """
+    simulacro = models.OneToOneField(
+        Simulacro,
+        on_delete=models.CASCADE,
+        related_name='indice_busqueda',
+        verbose_name='Simulacro'
+    )
+    asesor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+',
+        verbose_name='Asesor'
+    )
+    cliente = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Cliente'
+    )
+    # Vocabulario del documento (términos únicos); vacío en PostgreSQL
+    terminos = models.TextField('Términos indexados', blank=True)
+    # Comienzo del documento, para los fragmentos de los resultados
+    extracto = models.TextField('Extracto', blank=True)
+    actualizado = models.DateTimeField('Actualizado', auto_now=True)
+    
+    class Meta:
+        db_table = 'simulacros_busqueda'
+        verbose_name = 'Índice de búsqueda'
+        verbose_name_plural = 'Índices de búsqueda'
+    
+    def __str__(self):
+        return f"Índice Simulacro #{self.simulacro_id}"
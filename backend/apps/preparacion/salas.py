@@ -0,0 +1,370 @@
+"""
+Canal en tiempo real de las salas de simulacro (presencia y estado).
+
+Reemplaza el polling de EstadoSalaView por un flujo Server-Sent Events
+servido en ASGI. Los eventos se distribuyen entre nodos con Redis:
+
+- Pub/sub: cada nodo mantiene una única suscripción por patrón
+  ('sala:*') y reparte localmente los eventos a sus conexiones abiertas.
+- Presencia: sorted set por sala con la expiración de cada conexión
+  ('<miembro>|<conexión>') como puntaje; los latidos (heartbeats)
+  renuevan la expiración. Un participante sigue presente mientras le
+  quede alguna conexión abierta (p. ej. otra pestaña).
+- Estado: clave por sala escrita en cada transición, para entregar la
+  instantánea inicial sin consultar la base de datos.
+
+Sin SALAS_REDIS_URL se usa un canal en memoria (un solo proceso), útil
+en desarrollo y pruebas.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core import signing
+
+logger = logging.getLogger(__name__)
+
+SALT_SALA = 'apps.preparacion.salas.canal'
+
+ESTADOS_FINALES = ('completado', 'cancelado', 'no_asistio')
+
+
+# =====================================================
+# TOKENS DE CANAL
+# =====================================================
+
+def token_sala(simulacro_id, usuario):
+    """
+    Token firmado que autoriza la suscripción al canal de una sala.
+    Se valida sin consultar la base de datos.
+    """
+    return signing.dumps(
+        {'s': simulacro_id, 'u': usuario.id, 'r': usuario.rol},
+        salt=SALT_SALA
+    )
+
+
+def verificar_token_sala(token):
+    """Retorna (simulacro_id, usuario_id, rol) o lanza signing.BadSignature."""
+    datos = signing.loads(token, salt=SALT_SALA, max_age=settings.SALAS_TOKEN_MAX_AGE)
+    return datos['s'], datos['u'], datos['r']
+
+
+# =====================================================
+# CANALES
+# =====================================================
+
+class CanalMemoria:
+    """
+    Canal en memoria: solo válido para un único proceso.
+
+    Una sala se descarta (suscriptores, presencia y estado) cuando se va
+    su último suscriptor; el estado además vence a los SALAS_ESTADO_TTL
+    segundos, como la clave de Redis.
+    """
+
+    def __init__(self):
+        self._suscriptores = defaultdict(set)
+        # sala -> miembro -> conexión -> expiración
+        self._presencia = {}
+        # sala -> (expiración, datos)
+        self._estados = {}
+        self._proxima_purga = 0
+        self._lock = threading.Lock()
+
+    # --- Suscripciones -------------------------------------------------
+
+    def suscribir(self, sala_id):
+        cola = asyncio.Queue(maxsize=settings.SALAS_COLA_MAXIMA)
+        with self._lock:
+            self._suscriptores[sala_id].add((asyncio.get_running_loop(), cola))
+        return cola
+
+    def desuscribir(self, sala_id, cola):
+        with self._lock:
+            suscriptores = self._suscriptores.get(sala_id, set())
+            for item in [s for s in suscriptores if s[1] is cola]:
+                suscriptores.discard(item)
+            if not suscriptores:
+                self._suscriptores.pop(sala_id, None)
+                self._presencia.pop(sala_id, None)
+                self._estados.pop(sala_id, None)
+
+    def _entregar(self, sala_id, evento):
+        with self._lock:
+            destinos = list(self._suscriptores.get(sala_id, ()))
+        for loop, cola in destinos:
+            loop.call_soon_threadsafe(_encolar, cola, evento)
+
+    def conexiones(self):
+        with self._lock:
+            return sum(len(s) for s in self._suscriptores.values())
+
+    # --- Publicación ---------------------------------------------------
+
+    def publicar(self, sala_id, evento):
+        self._entregar(sala_id, evento)
+
+    async def apublicar(self, sala_id, evento):
+        self._entregar(sala_id, evento)
+
+    # --- Estado --------------------------------------------------------
+
+    def guardar_estado(self, sala_id, datos):
+        ahora = time.time()
+        with self._lock:
+            # Purga de estados vencidos, como mucho una vez por latido
+            if ahora >= self._proxima_purga:
+                for otra, (expira, _) in list(self._estados.items()):
+                    if expira < ahora:
+                        del self._estados[otra]
+                self._proxima_purga = ahora + settings.SALAS_HEARTBEAT
+            self._estados[sala_id] = (ahora + settings.SALAS_ESTADO_TTL, datos)
+
+    async def obtener_estado(self, sala_id):
+        with self._lock:
+            expira, datos = self._estados.get(sala_id, (None, None))
+            if expira is not None and expira < time.time():
+                del self._estados[sala_id]
+                return None
+            return datos
+
+    # --- Presencia -----------------------------------------------------
+
+    async def marcar_presencia(self, sala_id, miembro, conexion):
+        with self._lock:
+            conexiones = self._presencia.setdefault(sala_id, {}).setdefault(miembro, {})
+            conexiones[conexion] = time.time() + settings.SALAS_PRESENCIA_TTL
+
+    async def quitar_presencia(self, sala_id, miembro, conexion):
+        with self._lock:
+            miembros = self._presencia.get(sala_id, {})
+            conexiones = miembros.get(miembro, {})
+            conexiones.pop(conexion, None)
+            if not conexiones:
+                miembros.pop(miembro, None)
+            if not miembros:
+                self._presencia.pop(sala_id, None)
+
+    async def presentes(self, sala_id):
+        ahora = time.time()
+        with self._lock:
+            miembros = self._presencia.get(sala_id, {})
+            for miembro, conexiones in list(miembros.items()):
+                for conexion, expira in list(conexiones.items()):
+                    if expira < ahora:
+                        del conexiones[conexion]
+                if not conexiones:
+                    del miembros[miembro]
+            if not miembros:
+                self._presencia.pop(sala_id, None)
+            return sorted(miembros)
+
+
+class CanalRedis(CanalMemoria):
+    """
+    Canal compartido entre nodos mediante Redis.
+    Reutiliza el reparto local de CanalMemoria; Redis solo transporta.
+    """
+
+    def __init__(self, url):
+        super().__init__()
+        self.url = url
+        self._cliente = None
+        self._clientes_async = {}
+        self._oyentes = {}
+
+    def _redis(self):
+        if self._cliente is None:
+            import redis
+            self._cliente = redis.Redis.from_url(self.url)
+        return self._cliente
+
+    def _aredis(self):
+        # Un cliente async por event loop
+        loop = asyncio.get_running_loop()
+        if loop not in self._clientes_async:
+            import redis.asyncio as aioredis
+            self._clientes_async[loop] = aioredis.Redis.from_url(self.url)
+        return self._clientes_async[loop]
+
+    @staticmethod
+    def _canal(sala_id):
+        return f'sala:{sala_id}'
+
+    def suscribir(self, sala_id):
+        cola = super().suscribir(sala_id)
+        loop = asyncio.get_running_loop()
+        oyente = self._oyentes.get(loop)
+        if oyente is None or oyente.done():
+            self._oyentes[loop] = loop.create_task(self._escuchar())
+        return cola
+
+    async def _escuchar(self):
+        """Suscripción única por nodo que reparte a las conexiones locales."""
+        pubsub = self._aredis().pubsub(ignore_subscribe_messages=True)
+        await pubsub.psubscribe('sala:*')
+        try:
+            async for mensaje in pubsub.listen():
+                try:
+                    sala_id = int(mensaje['channel'].decode().split(':', 1)[1])
+                    self._entregar(sala_id, json.loads(mensaje['data']))
+                except (ValueError, KeyError, IndexError) as e:
+                    logger.warning(f"Mensaje de sala inválido: {e}")
+        finally:
+            await pubsub.aclose()
+
+    def publicar(self, sala_id, evento):
+        self._redis().publish(self._canal(sala_id), json.dumps(evento, default=str))
+
+    async def apublicar(self, sala_id, evento):
+        await self._aredis().publish(self._canal(sala_id), json.dumps(evento, default=str))
+
+    def guardar_estado(self, sala_id, datos):
+        self._redis().set(
+            f'{self._canal(sala_id)}:estado',
+            json.dumps(datos, default=str),
+            ex=settings.SALAS_ESTADO_TTL
+        )
+
+    async def obtener_estado(self, sala_id):
+        valor = await self._aredis().get(f'{self._canal(sala_id)}:estado')
+        return json.loads(valor) if valor else None
+
+    async def marcar_presencia(self, sala_id, miembro, conexion):
+        clave = f'{self._canal(sala_id)}:presencia'
+        cliente = self._aredis()
+        await cliente.zadd(clave, {f'{miembro}|{conexion}': time.time() + settings.SALAS_PRESENCIA_TTL})
+        await cliente.expire(clave, settings.SALAS_ESTADO_TTL)
+
+    async def quitar_presencia(self, sala_id, miembro, conexion):
+        await self._aredis().zrem(f'{self._canal(sala_id)}:presencia', f'{miembro}|{conexion}')
+
+    async def presentes(self, sala_id):
+        clave = f'{self._canal(sala_id)}:presencia'
+        cliente = self._aredis()
+        await cliente.zremrangebyscore(clave, '-inf', time.time())
+        return sorted({
+            m.decode().rsplit('|', 1)[0] for m in await cliente.zrange(clave, 0, -1)
+        })
+
+
+def _encolar(cola, evento):
+    """Encola sin bloquear; si el consumidor es lento se descarta el más antiguo."""
+    if cola.full():
+        cola.get_nowait()
+    cola.put_nowait(evento)
+
+
+_canal = None
+_canal_lock = threading.Lock()
+
+
+def obtener_canal():
+    """Canal del proceso (singleton) según SALAS_REDIS_URL."""
+    global _canal
+    if _canal is None:
+        with _canal_lock:
+            if _canal is None:
+                url = settings.SALAS_REDIS_URL
+                _canal = CanalRedis(url) if url else CanalMemoria()
+    return _canal
+
+
+# =====================================================
+# EVENTOS
+# =====================================================
+
+def datos_estado(simulacro_id, estado, fecha_inicio=None):
+    """Carga útil del evento 'estado' (mismos campos que EstadoSalaView)."""
+    return {
+        'simulacro_id': simulacro_id,
+        'estado': estado,
+        'en_progreso': estado == 'en_progreso',
+        'en_sala_espera': estado == 'en_sala_espera',
+        'cliente_en_sala': estado in ['en_sala_espera', 'en_progreso'],
+        'fecha_inicio': fecha_inicio,
+    }
+
+
+def publicar_estado(simulacro_id, estado, fecha_inicio=None):
+    """Guarda la instantánea y difunde el nuevo estado de la sala."""
+    datos = datos_estado(simulacro_id, estado, fecha_inicio)
+    canal = obtener_canal()
+    try:
+        canal.guardar_estado(simulacro_id, datos)
+        canal.publicar(simulacro_id, {'tipo': 'estado', **datos})
+    except Exception as e:
+        # El canal es una optimización: nunca debe romper la transición
+        logger.error(f"Error publicando estado de sala {simulacro_id}: {e}")
+
+
+def _sse(evento, datos):
+    return f"event: {evento}\ndata: {json.dumps(datos, default=str)}\n\n"
+
+
+def _estado_desde_bd(simulacro_id):
+    from .models import Simulacro
+    fila = Simulacro.objects.filter(pk=simulacro_id).values(
+        'estado', 'fecha_inicio'
+    ).first()
+    if fila is None:
+        return None
+    return datos_estado(simulacro_id, fila['estado'], fila['fecha_inicio'])
+
+
+async def flujo_sala(simulacro_id, miembro, canal=None):
+    """
+    Generador SSE de una conexión: instantánea inicial, presencia y
+    eventos de estado hasta que el simulacro llega a un estado final.
+    """
+    from asgiref.sync import sync_to_async
+
+    canal = canal or obtener_canal()
+    conexion = uuid.uuid4().hex
+    cola = canal.suscribir(simulacro_id)
+    try:
+        await canal.marcar_presencia(simulacro_id, miembro, conexion)
+        await canal.apublicar(simulacro_id, {
+            'tipo': 'presencia', 'presentes': await canal.presentes(simulacro_id)
+        })
+
+        estado = await canal.obtener_estado(simulacro_id)
+        if estado is None:
+            estado = await sync_to_async(_estado_desde_bd)(simulacro_id)
+            if estado is not None:
+                await sync_to_async(canal.guardar_estado)(simulacro_id, estado)
+        yield f"retry: {settings.SALAS_HEARTBEAT * 1000}\n\n"
+        yield _sse('estado', estado or datos_estado(simulacro_id, None))
+
+        if estado and estado['estado'] in ESTADOS_FINALES:
+            return
+
+        while True:
+            try:
+                evento = await asyncio.wait_for(cola.get(), settings.SALAS_HEARTBEAT)
+            except asyncio.TimeoutError:
+                await canal.marcar_presencia(simulacro_id, miembro, conexion)
+                yield ": ping\n\n"
+                continue
+
+            # El mismo dict se reparte a varias conexiones: no mutarlo
+            tipo = evento.get('tipo', 'mensaje')
+            datos = {k: v for k, v in evento.items() if k != 'tipo'}
+            yield _sse(tipo, datos)
+            if tipo == 'estado' and datos.get('estado') in ESTADOS_FINALES:
+                return
+    finally:
+        canal.desuscribir(simulacro_id, cola)
+        try:
+            await canal.quitar_presencia(simulacro_id, miembro, conexion)
+            await canal.apublicar(simulacro_id, {
+                'tipo': 'presencia', 'presentes': await canal.presentes(simulacro_id)
+            })
+        except Exception as e:
+            logger.warning(f"Error liberando presencia en sala {simulacro_id}: {e}")
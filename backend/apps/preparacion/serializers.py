@@ -2,7 +2,11 @@
 Serializers para el módulo de Preparación (Simulacros).
 """
 from rest_framework import serializers
+from django.db import transaction
 from django.contrib.auth import get_user_model
+
+from apps.core.media import url_firmada
+from apps.core.outbox import publicar
 from .models import Simulacro, Recomendacion, Practica, ConfiguracionIA
 
 Usuario = get_user_model()
@@ -37,10 +41,13 @@ class SimulacroListSerializer(serializers.ModelSerializer):
         return obj.asesor.nombre_completo() if obj.asesor else None
     
     def get_puede_cancelar(self, obj):
-        return obj.puede_cancelar()
+        # Anotado en SQL por transiciones.anotar_permisos en los listados
+        cancelable = getattr(obj, 'cancelable', None)
+        return bool(cancelable) if cancelable is not None else obj.puede_cancelar()
     
     def get_puede_ingresar(self, obj):
-        return obj.puede_ingresar_sala()
+        sala_abierta = getattr(obj, 'sala_abierta', None)
+        return bool(sala_abierta) if sala_abierta is not None else obj.puede_ingresar_sala()
     
     def get_fecha_propuesta(self, obj):
         # Devolver fecha_propuesta si existe, sino fecha
@@ -69,7 +76,8 @@ class SimulacroDetailSerializer(serializers.ModelSerializer):
     tiene_recomendaciones = serializers.SerializerMethodField()  # Alias
     solicitud_tipo = serializers.SerializerMethodField()
     recomendacion = serializers.SerializerMethodField()
-    transcripcion_texto = serializers.CharField(read_only=True)
+    tiene_transcripcion = serializers.SerializerMethodField()
+    transcripcion_url = serializers.SerializerMethodField()
     
     class Meta:
         model = Simulacro
@@ -80,9 +88,21 @@ class SimulacroDetailSerializer(serializers.ModelSerializer):
             'fecha_propuesta', 'hora_propuesta', 'fecha_inicio', 'fecha_fin',
             'duracion_minutos', 'grabacion_activa', 'notas',
             'tiene_recomendacion', 'tiene_recomendaciones', 'recomendacion',
-            'transcripcion_texto', 'created_at', 'updated_at'
+            'tiene_transcripcion', 'transcripcion_url', 'created_at', 'updated_at'
         ]
     
+    def get_tiene_transcripcion(self, obj):
+        # El texto no viaja en el detalle: se lee de transcripcion_url o de
+        # GET /api/simulacros/<id>/transcripcion/ (registros antiguos)
+        con_texto = getattr(obj, 'con_texto_transcripcion', None)
+        if con_texto is None:
+            return obj.tiene_transcripcion()
+        return con_texto or bool(obj.transcripcion_archivo)
+    
+    def get_transcripcion_url(self, obj):
+        # El .txt.gz se entrega con Content-Encoding: gzip; el navegador lo descomprime
+        return url_firmada(obj.transcripcion_archivo, self.context.get('request'), decodificar=True)
+    
     def get_cliente_nombre(self, obj):
         return obj.cliente.nombre_completo() if obj.cliente else None
     
@@ -133,26 +153,32 @@ class SimulacroCreateSerializer(serializers.ModelSerializer):
         fields = ['cliente_id', 'fecha', 'hora', 'modalidad', 'ubicacion', 'solicitud']
     
     def create(self, validated_data):
+        from .agenda import buscar_conflicto, mensaje_conflicto
         cliente_id = validated_data.pop('cliente_id')
         cliente = Usuario.objects.get(id=cliente_id, rol='cliente')
         
         request = self.context.get('request')
         asesor = request.user if request.user.rol == 'asesor' else None
         
-        simulacro = Simulacro.objects.create(
-            cliente=cliente,
-            asesor=asesor,
-            estado='pendiente_respuesta',
-            **validated_data
-        )
-        
-        # Notificar al cliente sobre la propuesta
-        try:
-            from apps.notificaciones.services import notificacion_service
-            notificacion_service.notificar_simulacro_propuesto(simulacro, propuesto_por='asesor')
-        except Exception as e:
-            import logging
-            logging.getLogger(__name__).error(f"Error creando notificación: {e}")
+        # Rechaza horarios que se solapan con la agenda del asesor o del
+        # cliente; la comprobación y el INSERT comparten el bloqueo.
+        with transaction.atomic():
+            conflicto = buscar_conflicto(
+                validated_data['fecha'], validated_data['hora'], asesor=asesor, cliente=cliente
+            )
+            if conflicto:
+                raise serializers.ValidationError({'non_field_errors': [mensaje_conflicto(conflicto)]})
+            simulacro = Simulacro.objects.create(
+                cliente=cliente,
+                asesor=asesor,
+                estado='pendiente_respuesta',
+                **validated_data
+            )
+            # El cliente se notifica desde el outbox, después del commit
+            publicar(
+                'simulacro.propuesto', f'simulacro.propuesto:{simulacro.pk}',
+                simulacro_id=simulacro.pk, propuesto_por='asesor'
+            )
         
         return simulacro
 
@@ -234,7 +260,7 @@ class SimulacroCompletadoSerializer(serializers.ModelSerializer):
         return obj.cliente.nombre_completo() if obj.cliente else None
     
     def get_tiene_transcripcion(self, obj):
-        return bool(obj.transcripcion_texto or obj.transcripcion_archivo)
+        return obj.tiene_transcripcion()
     
     def get_tiene_recomendacion(self, obj):
         return hasattr(obj, 'recomendacion')
@@ -265,6 +291,7 @@ class RecomendacionIASerializer(serializers.ModelSerializer):
     )
     simulacro_info = serializers.SerializerMethodField()
     indicadores = serializers.SerializerMethodField()
+    documento_pdf_url = serializers.SerializerMethodField()
     
     class Meta:
         model = Recomendacion
@@ -274,10 +301,13 @@ class RecomendacionIASerializer(serializers.ModelSerializer):
             'nivel_preparacion', 'nivel_preparacion_display',
             'fortalezas', 'puntos_mejora', 'recomendaciones',
             'accion_sugerida', 'resumen_ejecutivo', 'estado_feedback',
-            'documento_pdf', 'error_mensaje',
+            'documento_pdf_url', 'error_mensaje',
             'publicada', 'fecha_generacion', 'fecha_publicacion'
         ]
     
+    def get_documento_pdf_url(self, obj):
+        return url_firmada(obj.documento_pdf, self.context.get('request'), descarga=True)
+    
     def get_simulacro_info(self, obj):
         return {
             'id': obj.simulacro.id,
@@ -303,6 +333,7 @@ class RecomendacionClienteSerializer(serializers.ModelSerializer):
     indicadores = serializers.SerializerMethodField()
     fecha_simulacro = serializers.SerializerMethodField()
     asesor_nombre = serializers.SerializerMethodField()
+    documento_pdf_url = serializers.SerializerMethodField()
     
     class Meta:
         model = Recomendacion
@@ -310,10 +341,13 @@ class RecomendacionClienteSerializer(serializers.ModelSerializer):
             'id', 'fecha_simulacro', 'asesor_nombre',
             'indicadores', 'nivel_preparacion', 'nivel_preparacion_display',
             'fortalezas', 'puntos_mejora', 'recomendaciones',
-            'accion_sugerida', 'resumen_ejecutivo', 'documento_pdf',
+            'accion_sugerida', 'resumen_ejecutivo', 'documento_pdf_url',
             'publicada', 'fecha_publicacion'
         ]
     
+    def get_documento_pdf_url(self, obj):
+        return url_firmada(obj.documento_pdf, self.context.get('request'), descarga=True)
+    
     def get_indicadores(self, obj):
         return {
             'claridad': {'valor': obj.claridad, 'descripcion': self._get_descripcion_indicador(obj.claridad)},
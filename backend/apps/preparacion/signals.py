@@ -0,0 +1,39 @@
+"""
+Signals de la app Preparación.
+Mantienen incrementalmente el índice de búsqueda de texto completo: cada
+cambio encola la tarea preparacion.actualizar_indice_busqueda tras el commit.
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Simulacro, Recomendacion
+
+# Campos de Simulacro que afectan al documento indexado
+CAMPOS_INDEXADOS = {
+    'transcripcion_texto', 'transcripcion_archivo', 'asesor', 'cliente', 'is_deleted',
+}
+
+
+def _programar_indexacion(simulacro_id):
+    from .tasks import actualizar_indice_busqueda
+    transaction.on_commit(lambda: actualizar_indice_busqueda.delay(simulacro_id))
+
+
+@receiver(post_save, sender=Simulacro)
+def indexar_simulacro(sender, instance, created, update_fields=None, **kwargs):
+    if created and not instance.tiene_transcripcion():
+        return
+    if update_fields is not None and not CAMPOS_INDEXADOS.intersection(update_fields):
+        return
+    _programar_indexacion(instance.pk)
+
+
+@receiver(post_save, sender=Recomendacion)
+def indexar_recomendacion(sender, instance, **kwargs):
+    _programar_indexacion(instance.simulacro_id)
+
+
+@receiver(post_delete, sender=Recomendacion)
+def desindexar_recomendacion(sender, instance, **kwargs):
+    _programar_indexacion(instance.simulacro_id)
@@ -0,0 +1,23 @@
+"""
+Tareas asíncronas con Celery para la app Preparación.
+
+NOTA: Sin Celery, las tareas corren en el pool de hilos del proceso
+(ver apps.core.tareas y TAREAS_BACKEND).
+"""
+import logging
+
+from apps.core.tareas import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name='preparacion.actualizar_indice_busqueda')
+def actualizar_indice_busqueda(simulacro_id):
+    """
+    Reconstruye el documento de búsqueda de un simulacro. La encolan los
+    signals tras el commit: leer la transcripción (.txt.gz) no queda dentro
+    del request que la cambió.
+    """
+    from .busqueda import actualizar_indice
+
+    actualizar_indice(simulacro_id)
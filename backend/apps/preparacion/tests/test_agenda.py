@@ -0,0 +1,245 @@
+"""
+Agenda libre/ocupado: fusión de intervalos, horarios libres dentro de la
+jornada y rechazo de propuestas que se solapan, usando el horario
+propuesto de los simulacros solicitados o con contrapropuesta.
+"""
+from datetime import date, time, timedelta
+
+import pytest
+from django.db import transaction
+
+from apps.core.models import combinar_fecha_hora
+from apps.preparacion import agenda
+from apps.preparacion.agenda import Intervalo
+from apps.preparacion.models import Simulacro
+from apps.solicitudes.models import Entrevista, Solicitud
+
+# Lunes
+LUNES = date(2030, 1, 7)
+
+
+def _momento(dia, hhmm):
+    return combinar_fecha_hora(dia, time.fromisoformat(hhmm))
+
+
+def _intervalo(inicio, fin, dia=LUNES):
+    return Intervalo(_momento(dia, inicio), _momento(dia, fin), 'simulacro', 0)
+
+
+# =====================================================
+# FUSIÓN Y HORARIOS LIBRES
+# =====================================================
+
+def test_fusionar_solapados_contiguos_y_contenidos():
+    bloques = agenda.fusionar([
+        _intervalo('09:00', '10:00'),
+        _intervalo('09:30', '10:30'),
+        _intervalo('10:30', '11:00'),
+        _intervalo('12:00', '14:00'),
+        _intervalo('12:30', '13:00'),
+        _intervalo('15:00', '15:30'),
+    ])
+
+    assert bloques == [
+        (_momento(LUNES, '09:00'), _momento(LUNES, '11:00')),
+        (_momento(LUNES, '12:00'), _momento(LUNES, '14:00')),
+        (_momento(LUNES, '15:00'), _momento(LUNES, '15:30')),
+    ]
+    assert agenda.fusionar([]) == []
+
+
+def _horas(momentos):
+    return [f'{m:%a %H:%M}' for m in momentos]
+
+
+def test_horarios_libres_respetan_bloques_jornada_y_paso():
+    bloques = agenda.fusionar([_intervalo('09:00', '10:15'), _intervalo('11:00', '17:00')])
+
+    libres = agenda.horarios_libres(
+        bloques, _momento(LUNES, '00:00'), _momento(LUNES + timedelta(days=1), '00:00'),
+        timedelta(minutes=30)
+    )
+
+    # 10:15 se alinea a 10:30; 10:30-11:00 cabe justo antes del bloque
+    assert _horas(libres) == ['Mon 10:30', 'Mon 17:00', 'Mon 17:30']
+
+
+def test_horarios_libres_omiten_fin_de_semana_y_respetan_limite():
+    sabado = LUNES - timedelta(days=2)
+
+    libres = agenda.horarios_libres(
+        [], _momento(sabado, '00:00'), _momento(LUNES + timedelta(days=1), '00:00'),
+        timedelta(minutes=60), paso=timedelta(minutes=60), limite=3
+    )
+
+    assert _horas(libres) == ['Mon 09:00', 'Mon 10:00', 'Mon 11:00']
+
+
+def test_horarios_libres_desde_mitad_de_la_jornada():
+    libres = agenda.horarios_libres(
+        [], _momento(LUNES, '17:05'), _momento(LUNES, '23:00'), timedelta(minutes=30)
+    )
+
+    assert _horas(libres) == ['Mon 17:30']
+
+
+# =====================================================
+# INTERVALOS OCUPADOS
+# =====================================================
+
+@pytest.fixture
+def asesor(crear_usuario):
+    return crear_usuario('asesor')
+
+
+@pytest.fixture
+def cliente(crear_usuario):
+    return crear_usuario('cliente')
+
+
+@pytest.fixture
+def solicitud(cliente, asesor):
+    return Solicitud.objects.create(cliente=cliente, asesor=asesor, tipo_visa='estudio', embajada='usa')
+
+
+def _simulacro(cliente, asesor, hhmm, **campos):
+    campos.setdefault('estado', 'confirmado')
+    return Simulacro.objects.create(
+        cliente=cliente, asesor=asesor, fecha=LUNES, hora=time.fromisoformat(hhmm), **campos
+    )
+
+
+def _ocupados(**participantes):
+    return [
+        (i.tipo, f'{i.inicio:%H:%M}', f'{i.fin:%H:%M}')
+        for i in agenda.intervalos_ocupados(_momento(LUNES, '00:00'), _momento(LUNES, '23:59'), **participantes)
+    ]
+
+
+@pytest.mark.django_db
+def test_intervalos_de_asesor_y_cliente_en_una_consulta(cliente, asesor, solicitud, crear_usuario,
+                                                       django_assert_num_queries):
+    _simulacro(cliente, asesor, '09:00')
+    _simulacro(crear_usuario('cliente'), asesor, '11:00')
+    _simulacro(cliente, asesor, '13:00', estado='cancelado')
+    Entrevista.objects.create(solicitud=solicitud, fecha=LUNES, hora=time(15, 0), estado='agendada')
+
+    with django_assert_num_queries(1):
+        ocupados = _ocupados(asesor=asesor.pk, cliente=cliente.pk)
+
+    # El simulacro compartido por asesor y cliente aparece una sola vez
+    assert ocupados == [
+        ('simulacro', '09:00', '10:00'),
+        ('simulacro', '11:00', '12:00'),
+        ('entrevista', '15:00', '15:30'),
+    ]
+
+
+@pytest.mark.django_db
+def test_solicitados_y_contrapropuestas_ocupan_el_horario_propuesto(cliente, asesor):
+    # Sin propuesta no ocupa el 09:00 que rellena la fila
+    _simulacro(cliente, asesor, '09:00', estado='solicitado')
+    _simulacro(cliente, asesor, '10:00', estado='solicitado',
+               fecha_propuesta=LUNES, hora_propuesta=time(10, 0))
+    _simulacro(cliente, asesor, '12:00', estado='contrapropuesta',
+               fecha_propuesta=LUNES, hora_propuesta=time(16, 0))
+    _simulacro(cliente, asesor, '14:00', estado='contrapropuesta',
+               fecha_propuesta=LUNES + timedelta(days=1), hora_propuesta=time(14, 0))
+
+    assert _ocupados(asesor=asesor.pk) == [
+        ('simulacro', '10:00', '11:00'),
+        ('simulacro', '16:00', '17:00'),
+    ]
+
+
+@pytest.mark.django_db
+def test_buscar_conflicto_detecta_solapes_parciales(cliente, asesor):
+    existente = _simulacro(cliente, asesor, '10:00')
+
+    with transaction.atomic():
+        assert agenda.buscar_conflicto(LUNES, time(9, 30), asesor=asesor).pk == existente.pk
+        assert agenda.buscar_conflicto(LUNES, time(10, 59), asesor=asesor).pk == existente.pk
+        assert agenda.buscar_conflicto(LUNES, time(9, 0), asesor=asesor) is None
+        assert agenda.buscar_conflicto(LUNES, time(11, 0), asesor=asesor) is None
+        assert agenda.buscar_conflicto(LUNES, time(10, 0), asesor=asesor, excluir=existente.pk) is None
+
+
+# =====================================================
+# API
+# =====================================================
+
+def _fecha(dia=LUNES):
+    return dia.isoformat()
+
+
+@pytest.mark.django_db
+def test_propuesta_del_asesor_con_conflicto(cliente, asesor, cliente_api):
+    _simulacro(cliente, asesor, '10:00')
+    api = cliente_api(asesor)
+
+    rechazada = api.post('/api/simulacros/propuesta/', {
+        'cliente_id': cliente.pk, 'fecha': _fecha(), 'hora': '10:30', 'modalidad': 'virtual',
+    })
+    aceptada = api.post('/api/simulacros/propuesta/', {
+        'cliente_id': cliente.pk, 'fecha': _fecha(), 'hora': '11:00', 'modalidad': 'virtual',
+    })
+
+    assert rechazada.status_code == 400
+    assert 'se solapa con un simulacro' in rechazada.data['non_field_errors'][0]
+    assert aceptada.status_code == 201
+    assert Simulacro.objects.filter(estado='pendiente_respuesta').count() == 1
+
+
+@pytest.mark.django_db
+def test_solicitud_del_cliente_con_conflicto(cliente, asesor, solicitud, cliente_api):
+    Entrevista.objects.create(solicitud=solicitud, fecha=LUNES, hora=time(15, 0), estado='agendada')
+    api = cliente_api(cliente)
+
+    rechazada = api.post('/api/simulacros/solicitar/', {
+        'solicitud_id': solicitud.pk, 'fecha_propuesta': _fecha(), 'hora_propuesta': '14:30',
+    })
+    assert rechazada.status_code == 400
+    assert 'entrevista consular' in rechazada.data['error']
+
+    sin_horario = api.post('/api/simulacros/solicitar/', {'solicitud_id': solicitud.pk})
+    assert sin_horario.status_code == 201
+    simulacro = Simulacro.objects.get(pk=sin_horario.data['simulacro']['id'])
+    assert simulacro.fecha_propuesta is None and simulacro.hora_propuesta is None
+
+
+@pytest.mark.django_db
+def test_contrapropuesta_libera_el_horario_original(cliente, asesor, crear_usuario, cliente_api):
+    simulacro = _simulacro(cliente, asesor, '10:00', estado='pendiente_respuesta')
+    otro = crear_usuario('cliente')
+    _simulacro(otro, asesor, '15:00')
+
+    api = cliente_api(cliente)
+    rechazada = api.post(f'/api/simulacros/{simulacro.pk}/contrapropuesta/',
+                         {'fecha': _fecha(), 'hora': '15:30'})
+    aceptada = api.post(f'/api/simulacros/{simulacro.pk}/contrapropuesta/',
+                        {'fecha': _fecha(), 'hora': '10:30'})
+
+    assert rechazada.status_code == 400
+    # Solapa con su propio horario original, que se excluye
+    assert aceptada.status_code == 200
+    assert _ocupados(asesor=asesor.pk) == [
+        ('simulacro', '10:30', '11:30'),
+        ('simulacro', '15:00', '16:00'),
+    ]
+
+
+@pytest.mark.django_db
+def test_disponibilidad_del_asesor(cliente, asesor, cliente_api):
+    _simulacro(cliente, asesor, '09:00')
+    _simulacro(cliente, asesor, '10:00', estado='contrapropuesta',
+               fecha_propuesta=LUNES, hora_propuesta=time(17, 0))
+
+    respuesta = cliente_api(asesor).get('/api/simulacros/disponibilidad/', {
+        'desde': _fecha(), 'duracion': 60, 'limite': 3,
+    })
+
+    assert respuesta.status_code == 200
+    assert [(o['inicio'].strftime('%H:%M'), o['fin'].strftime('%H:%M')) for o in respuesta.data['ocupados']] == [
+        ('09:00', '10:00'), ('17:00', '18:00'),
+    ]
+    assert [h['hora'] for h in respuesta.data['horarios_libres']] == [time(10, 0), time(10, 30), time(11, 0)]
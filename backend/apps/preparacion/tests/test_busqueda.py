@@ -0,0 +1,130 @@
+"""
+Búsqueda de texto completo en simulacros: indexación en segundo plano
+desde los signals, fragmentos del motor escapados para HTML y resultados
+que no leen la transcripción.
+"""
+from datetime import date, time
+
+import pytest
+
+from apps.preparacion import busqueda
+from apps.preparacion.models import IndiceBusquedaSimulacro, Recomendacion, Simulacro
+from apps.preparacion.tasks import actualizar_indice_busqueda
+
+TRANSCRIPCION = (
+    'Asesor: ¿Cuál es el motivo del viaje? '
+    'Cliente: Voy a estudiar una maestría en <script>alert(1)</script> Boston. '
+    'Asesor: ¿Quién financia sus estudios? Cliente: Mis padres.'
+)
+
+
+@pytest.fixture
+def asesor(crear_usuario):
+    return crear_usuario('asesor')
+
+
+@pytest.fixture
+def crear_simulacro(crear_usuario, asesor, django_capture_on_commit_callbacks):
+    """Crea un simulacro y ejecuta la indexación que encolan los signals."""
+    def crear(**campos):
+        campos.setdefault('cliente', crear_usuario('cliente'))
+        with django_capture_on_commit_callbacks(execute=True):
+            return Simulacro.objects.create(
+                asesor=asesor, fecha=date(2026, 1, 5), hora=time(10, 0), estado='completado', **campos
+            )
+    return crear
+
+
+def _buscar(cliente_api, asesor, q):
+    respuesta = cliente_api(asesor).get('/api/simulacros/buscar/', {'q': q})
+    assert respuesta.status_code == 200
+    return respuesta.data
+
+
+@pytest.mark.django_db
+def test_signals_encolan_la_indexacion_tras_el_commit(crear_usuario, asesor, monkeypatch,
+                                                       django_capture_on_commit_callbacks):
+    encoladas = []
+    monkeypatch.setattr(actualizar_indice_busqueda, 'delay', encoladas.append)
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        simulacro = Simulacro.objects.create(
+            cliente=crear_usuario('cliente'), asesor=asesor, fecha=date(2026, 1, 5), hora=time(10, 0),
+            transcripcion_texto=TRANSCRIPCION,
+        )
+        assert encoladas == []
+    for callback in callbacks:
+        callback()
+
+    assert encoladas == [simulacro.pk]
+    assert not IndiceBusquedaSimulacro.objects.exists()
+
+
+@pytest.mark.django_db
+def test_fragmento_escapado_y_resaltado(crear_simulacro, asesor, cliente_api, monkeypatch):
+    simulacro = crear_simulacro(transcripcion_texto=TRANSCRIPCION)
+
+    def sin_leer(self):
+        raise AssertionError('la búsqueda no debe leer la transcripción')
+    monkeypatch.setattr(Simulacro, 'obtener_transcripcion', sin_leer)
+
+    datos = _buscar(cliente_api, asesor, 'maestria boston')
+
+    assert datos['count'] == 1
+    resultado = datos['results'][0]
+    assert resultado['id'] == simulacro.pk
+    assert '<mark>maestría</mark>' in resultado['fragmento']
+    assert '<mark>Boston</mark>' in resultado['fragmento']
+    assert '&lt;script&gt;' in resultado['fragmento']
+    assert '<script>' not in resultado['fragmento']
+
+
+@pytest.mark.django_db
+def test_coincidencia_fuera_del_extracto(crear_simulacro, asesor, cliente_api, monkeypatch):
+    monkeypatch.setattr(busqueda, 'EXTRACTO_CARACTERES', 40)
+    crear_simulacro(transcripcion_texto=TRANSCRIPCION)
+
+    indice = IndiceBusquedaSimulacro.objects.get()
+    assert indice.extracto == TRANSCRIPCION[:40]
+    datos = _buscar(cliente_api, asesor, 'padres')
+
+    assert datos['count'] == 1
+    fragmento = datos['results'][0]['fragmento']
+    assert fragmento.startswith('Asesor: ¿Cuál es el motivo')
+    assert '<mark>' not in fragmento
+
+
+@pytest.mark.django_db
+def test_recomendacion_y_borrado_mantienen_el_indice(crear_simulacro, asesor, cliente_api,
+                                                      django_capture_on_commit_callbacks):
+    simulacro = crear_simulacro(transcripcion_texto=TRANSCRIPCION)
+    assert _buscar(cliente_api, asesor, 'solvencia')['count'] == 0
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Recomendacion.objects.create(
+            simulacro=simulacro, resumen_ejecutivo='Preparar documentos de solvencia económica.'
+        )
+    assert _buscar(cliente_api, asesor, 'solvencia')['count'] == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        simulacro.recomendacion.delete()
+    assert _buscar(cliente_api, asesor, 'solvencia')['count'] == 0
+
+    with django_capture_on_commit_callbacks(execute=True):
+        simulacro.delete()
+    assert _buscar(cliente_api, asesor, 'maestria')['count'] == 0
+    assert not IndiceBusquedaSimulacro.objects.exists()
+
+
+@pytest.mark.django_db
+def test_solo_busca_en_los_simulacros_del_asesor(crear_simulacro, crear_usuario, cliente_api):
+    crear_simulacro(transcripcion_texto=TRANSCRIPCION)
+
+    assert _buscar(cliente_api, crear_usuario('asesor'), 'maestria')['count'] == 0
+
+
+def test_fragmento_generico_escapa_el_texto():
+    resultado = busqueda.fragmento(TRANSCRIPCION, 'boston')
+
+    assert '<mark>Boston</mark>' in resultado
+    assert '&lt;script&gt;alert(1)&lt;/script&gt;' in resultado
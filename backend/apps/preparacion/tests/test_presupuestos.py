@@ -0,0 +1,104 @@
+"""
+Presupuesto de consultas de los listados de simulacros y recomendaciones.
+
+Cada test hace un request autenticado con JWT (incluye la consulta de la
+versión del token) sobre más filas que una página; el presupuesto no debe
+depender del número de filas.
+"""
+from datetime import date, time, timedelta
+
+import pytest
+from django.utils import timezone
+
+from apps.preparacion.models import Recomendacion, Simulacro
+from apps.preparacion.views import (
+    PropuestasPendientesView, RecomendacionClienteView, SimulacrosCompletadosAsesorView,
+    SimulacrosListView,
+)
+from apps.solicitudes.models import Solicitud
+
+FILAS = 25
+
+
+@pytest.fixture
+def simulacros(crear_usuario):
+    """
+    FILAS simulacros de un mismo cliente y asesor en cada estado usado por
+    los listados: completados (con recomendación publicada) y pendientes de
+    respuesta.
+    """
+    cliente = crear_usuario('cliente')
+    asesor = crear_usuario('asesor')
+    solicitud = Solicitud.objects.create(
+        cliente=cliente, asesor=asesor, tipo_visa='estudio', embajada='usa'
+    )
+    fin = timezone.now()
+    completados = Simulacro.objects.bulk_create([
+        Simulacro(
+            cliente=cliente, asesor=asesor, solicitud=solicitud,
+            fecha=date(2026, 1, 1) + timedelta(days=i), hora=time(10, 0),
+            estado='completado', fecha_fin=fin - timedelta(hours=i),
+        )
+        for i in range(FILAS)
+    ])
+    Recomendacion.objects.bulk_create([
+        Recomendacion(simulacro=simulacro, estado_feedback='completado', publicada=True)
+        for simulacro in completados
+    ])
+    Simulacro.objects.bulk_create([
+        Simulacro(
+            cliente=cliente, asesor=asesor, solicitud=solicitud,
+            fecha=date(2026, 3, 1) + timedelta(days=i), hora=time(9, 0),
+            estado='pendiente_respuesta',
+        )
+        for i in range(FILAS)
+    ])
+    return completados
+
+
+@pytest.mark.django_db
+@pytest.mark.presupuesto_consultas(SimulacrosListView.presupuesto_consultas)
+def test_listado(simulacros, cliente_api):
+    respuesta = cliente_api(simulacros[0].cliente).get('/api/simulacros/')
+
+    assert respuesta.status_code == 200
+    assert len(respuesta.data) == 2 * FILAS
+
+
+@pytest.mark.django_db
+@pytest.mark.presupuesto_consultas(PropuestasPendientesView.presupuesto_consultas)
+def test_propuestas_pendientes(simulacros, cliente_api):
+    respuesta = cliente_api(simulacros[0].asesor).get('/api/simulacros/propuestas/')
+
+    assert respuesta.status_code == 200
+    assert len(respuesta.data) == FILAS
+
+
+@pytest.mark.django_db
+@pytest.mark.presupuesto_consultas(SimulacrosCompletadosAsesorView.presupuesto_consultas)
+def test_completados_paginado(simulacros, cliente_api):
+    respuesta = cliente_api(simulacros[0].asesor).get('/api/simulacros/completados/')
+
+    assert respuesta.status_code == 200
+    assert respuesta.data['count'] == FILAS
+    assert len(respuesta.data['results']) == 20
+
+
+@pytest.mark.django_db
+@pytest.mark.presupuesto_consultas(RecomendacionClienteView.presupuesto_consultas)
+def test_mis_recomendaciones(simulacros, cliente_api):
+    respuesta = cliente_api(simulacros[0].cliente).get('/api/mis-recomendaciones/')
+
+    assert respuesta.status_code == 200
+    assert len(respuesta.data) == FILAS
+
+
+@pytest.mark.django_db
+@pytest.mark.presupuesto_consultas(RecomendacionClienteView.presupuesto_consultas)
+def test_mi_recomendacion(simulacros, cliente_api):
+    simulacro = simulacros[0]
+
+    respuesta = cliente_api(simulacro.cliente).get(f'/api/simulacros/{simulacro.pk}/mi-recomendacion/')
+
+    assert respuesta.status_code == 200
+    assert respuesta.data['simulacro_id'] == simulacro.pk
@@ -0,0 +1,114 @@
+"""
+Canal en memoria de las salas: presencia contada por conexión, vencimiento
+por TTL y descarte de la sala cuando se va su último suscriptor.
+"""
+import asyncio
+
+import pytest
+
+from apps.preparacion import salas
+from apps.preparacion.salas import CanalMemoria, datos_estado, flujo_sala
+
+SALA = 7
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    """Reloj controlable para los vencimientos del canal."""
+    ahora = [1_000_000.0]
+    monkeypatch.setattr(salas.time, 'time', lambda: ahora[0])
+    return ahora
+
+
+def _vacio(canal):
+    return not (canal._suscriptores or canal._presencia or canal._estados)
+
+
+def test_presencia_por_conexion():
+    canal = CanalMemoria()
+
+    async def escenario():
+        await canal.marcar_presencia(SALA, 'cliente:1', 'pestana-a')
+        await canal.marcar_presencia(SALA, 'cliente:1', 'pestana-b')
+        await canal.marcar_presencia(SALA, 'asesor:2', 'unica')
+        await canal.quitar_presencia(SALA, 'cliente:1', 'pestana-a')
+        con_una_pestana = await canal.presentes(SALA)
+        await canal.quitar_presencia(SALA, 'cliente:1', 'pestana-b')
+        await canal.quitar_presencia(SALA, 'asesor:2', 'unica')
+        return con_una_pestana, await canal.presentes(SALA)
+
+    con_una_pestana, al_final = asyncio.run(escenario())
+
+    assert con_una_pestana == ['asesor:2', 'cliente:1']
+    assert al_final == []
+    assert _vacio(canal)
+
+
+def test_presentes_no_crea_salas():
+    canal = CanalMemoria()
+
+    assert asyncio.run(canal.presentes(SALA)) == []
+    assert asyncio.run(canal.quitar_presencia(SALA, 'cliente:1', 'x')) is None
+    assert _vacio(canal)
+
+
+def test_presencia_vence_sin_latidos(reloj, settings):
+    settings.SALAS_PRESENCIA_TTL = 45
+    canal = CanalMemoria()
+
+    async def escenario():
+        await canal.marcar_presencia(SALA, 'cliente:1', 'a')
+        await canal.marcar_presencia(SALA, 'asesor:2', 'b')
+        reloj[0] += 30
+        await canal.marcar_presencia(SALA, 'asesor:2', 'b')
+        reloj[0] += 30
+        return await canal.presentes(SALA)
+
+    assert asyncio.run(escenario()) == ['asesor:2']
+    reloj[0] += 60
+    assert asyncio.run(canal.presentes(SALA)) == []
+    assert _vacio(canal)
+
+
+def test_estado_vence_y_se_purga(reloj, settings):
+    settings.SALAS_ESTADO_TTL = 100
+    settings.SALAS_HEARTBEAT = 15
+    canal = CanalMemoria()
+    canal.guardar_estado(SALA, datos_estado(SALA, 'confirmado'))
+    canal.guardar_estado(SALA + 1, datos_estado(SALA + 1, 'confirmado'))
+
+    reloj[0] += 99
+    assert asyncio.run(canal.obtener_estado(SALA))['estado'] == 'confirmado'
+    reloj[0] += 2
+    assert asyncio.run(canal.obtener_estado(SALA)) is None
+
+    # Otra escritura purga la sala vencida que nadie volvió a leer
+    canal.guardar_estado(SALA + 2, datos_estado(SALA + 2, 'confirmado'))
+    assert set(canal._estados) == {SALA + 2}
+
+
+def test_dos_pestanas_en_la_misma_sala():
+    canal = CanalMemoria()
+    canal.guardar_estado(SALA, datos_estado(SALA, 'confirmado'))
+
+    async def abrir():
+        flujo = flujo_sala(SALA, 'cliente:1', canal=canal)
+        for _ in range(2):  # retry + estado inicial
+            await flujo.__anext__()
+        return flujo
+
+    async def escenario():
+        primera = await abrir()
+        segunda = await abrir()
+        await primera.aclose()
+        tras_cerrar_una = await canal.presentes(SALA)
+        conexiones = canal.conexiones()
+        await segunda.aclose()
+        return tras_cerrar_una, conexiones
+
+    tras_cerrar_una, conexiones = asyncio.run(escenario())
+
+    assert tras_cerrar_una == ['cliente:1']
+    assert conexiones == 1
+    # Sin suscriptores la sala se descarta por completo
+    assert _vacio(canal)
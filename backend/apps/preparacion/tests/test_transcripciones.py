@@ -0,0 +1,224 @@
+"""
+Ingesta de transcripciones: decodificación y normalización, límite de
+tamaño, ida y vuelta por gzip y reemplazo del archivo anterior solo
+cuando la nueva copia quedó guardada.
+"""
+import codecs
+import gzip
+from datetime import date, time
+
+import pytest
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from apps.preparacion.models import Simulacro
+from apps.preparacion.transcripciones import (
+    TranscripcionInvalida,
+    leer_transcripcion,
+    procesar_transcripcion,
+)
+
+# BOM UTF-16 seguido de un sustituto alto sin pareja
+UTF16_INVALIDO = codecs.BOM_UTF16_LE + b'\x00\xd8' + 'a'.encode('utf-16-le') * 60
+
+TEXTO = (
+    'ENTREVISTADOR:   ¿Cuál es el motivo   del viaje?\r\n'
+    '\r\n\r\n'
+    '[cliente] - Estudiar una maestría en Boston, con beca parcial.\r\n'
+)
+
+
+@pytest.fixture(autouse=True)
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+def _archivo(datos, nombre='entrevista.txt'):
+    return SimpleUploadedFile(nombre, datos, content_type='text/plain')
+
+
+def _procesar(datos, **kwargs):
+    comprimido, estadisticas = procesar_transcripcion(_archivo(datos), **kwargs)
+    with comprimido:
+        return gzip.decompress(comprimido.read()).decode('utf-8'), estadisticas, comprimido.name
+
+
+# =====================================================
+# PROCESAMIENTO
+# =====================================================
+
+def test_ida_y_vuelta_por_gzip_normaliza():
+    texto, estadisticas, nombre = _procesar(TEXTO.encode('utf-8'))
+
+    assert nombre == 'entrevista.txt.gz'
+    assert texto == (
+        'Oficial: ¿Cuál es el motivo del viaje?\n'
+        '\n'
+        'Solicitante: Estudiar una maestría en Boston, con beca parcial.\n'
+    )
+    assert estadisticas == {'caracteres': len(texto), 'lineas': 3, 'codificacion': 'utf-8'}
+
+
+@pytest.mark.parametrize('datos, codificacion', [
+    (TEXTO.encode('utf-8-sig'), 'utf-8-sig'),
+    (TEXTO.encode('utf-16'), 'utf-16'),
+    (TEXTO.encode('cp1252'), 'cp1252'),
+])
+def test_detecta_la_codificacion(datos, codificacion):
+    texto, estadisticas, _ = _procesar(datos)
+
+    assert estadisticas['codificacion'] == codificacion
+    assert 'maestría' in texto
+
+
+def test_utf8_invalido_despues_del_prefijo_se_lee_como_cp1252():
+    datos = TEXTO.encode('utf-8') + b'x' * 5000 + 'Oficial: ¿Algo más?\n'.encode('cp1252')
+
+    texto, estadisticas, _ = _procesar(datos)
+
+    assert estadisticas['codificacion'] == 'utf-8'
+    assert texto.endswith('Oficial: ¿Algo más?\n')
+    # El prefijo UTF-8 se releyó como cp1252
+    assert 'maestrÃ­a' in texto
+
+
+def test_bom_con_contenido_invalido_se_rechaza():
+    with pytest.raises(TranscripcionInvalida, match='formato de texto'):
+        _procesar(UTF16_INVALIDO)
+
+
+def test_demasiado_corta():
+    with pytest.raises(TranscripcionInvalida, match='muy corta'):
+        _procesar(b'Oficial: hola\n\n\n')
+
+
+def test_supera_el_limite_declarado(settings):
+    settings.TRANSCRIPCION_MAX_BYTES = 1024
+
+    with pytest.raises(TranscripcionInvalida, match='1 KB'):
+        _procesar(b'a' * 1025)
+
+
+def test_supera_el_limite_al_normalizar(settings):
+    settings.TRANSCRIPCION_MAX_BYTES = 1024
+    archivo = _archivo(b'Oficial: hola\n' * 100)
+    # Tamaño declarado dentro del límite: lo corta el conteo por bloques
+    archivo.size = 10
+
+    with pytest.raises(TranscripcionInvalida, match='tamaño máximo'):
+        procesar_transcripcion(archivo)
+
+
+@pytest.mark.django_db
+def test_leer_transcripcion_comprimida_y_antigua(crear_usuario, media):
+    simulacro = Simulacro.objects.create(
+        cliente=crear_usuario('cliente'), asesor=crear_usuario('asesor'),
+        fecha=date(2026, 1, 5), hora=time(10, 0), estado='completado',
+    )
+    comprimido, _ = procesar_transcripcion(_archivo(TEXTO.encode('utf-8')))
+    with comprimido:
+        simulacro.transcripcion_archivo.save(comprimido.name, comprimido, save=False)
+    assert leer_transcripcion(simulacro.transcripcion_archivo).startswith('Oficial: ¿Cuál')
+
+    (media / 'antigua.txt').write_bytes('Cónsul: ¿Motivo?'.encode('cp1252'))
+    Simulacro.objects.filter(pk=simulacro.pk).update(transcripcion_archivo='antigua.txt')
+    simulacro.refresh_from_db()
+    assert leer_transcripcion(simulacro.transcripcion_archivo) == 'Cónsul: ¿Motivo?'
+
+
+# =====================================================
+# API
+# =====================================================
+
+@pytest.fixture
+def asesor(crear_usuario):
+    return crear_usuario('asesor')
+
+
+@pytest.fixture
+def simulacro(crear_usuario, asesor):
+    return Simulacro.objects.create(
+        cliente=crear_usuario('cliente'), asesor=asesor,
+        fecha=date(2026, 1, 5), hora=time(10, 0), estado='completado',
+    )
+
+
+def _subir(cliente_api, asesor, simulacro, datos, nombre='entrevista.txt'):
+    return cliente_api(asesor).post(
+        f'/api/simulacros/{simulacro.pk}/subir-transcripcion/',
+        {'archivo': _archivo(datos, nombre)}, format='multipart'
+    )
+
+
+@pytest.mark.django_db
+def test_reemplazo_borra_el_anterior_tras_el_commit(cliente_api, asesor, simulacro, media,
+                                                    django_capture_on_commit_callbacks):
+    _subir(cliente_api, asesor, simulacro, TEXTO.encode('utf-8'))
+    simulacro.refresh_from_db()
+    anterior = simulacro.transcripcion_archivo.name
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        respuesta = _subir(cliente_api, asesor, simulacro, (TEXTO + 'Oficial: Gracias.\n').encode('utf-8'))
+        assert (media / anterior).exists()
+    for callback in callbacks:
+        callback()
+
+    assert respuesta.status_code == 200
+    simulacro.refresh_from_db()
+    assert simulacro.transcripcion_archivo.name != anterior
+    assert not (media / anterior).exists()
+    assert simulacro.obtener_transcripcion().endswith('Oficial: Gracias.\n')
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('datos', [
+    UTF16_INVALIDO,
+    b'Oficial: hola\n',
+])
+def test_subida_invalida_conserva_la_transcripcion(cliente_api, asesor, simulacro, media, datos,
+                                                  django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        _subir(cliente_api, asesor, simulacro, TEXTO.encode('utf-8'))
+    simulacro.refresh_from_db()
+    anterior = simulacro.transcripcion_archivo.name
+
+    with django_capture_on_commit_callbacks(execute=True):
+        respuesta = _subir(cliente_api, asesor, simulacro, datos)
+
+    assert respuesta.status_code == 400
+    simulacro.refresh_from_db()
+    assert simulacro.transcripcion_archivo.name == anterior
+    assert simulacro.obtener_transcripcion().startswith('Oficial: ¿Cuál')
+
+
+@pytest.mark.django_db
+def test_error_del_storage_conserva_la_transcripcion(cliente_api, asesor, simulacro, media, monkeypatch,
+                                                    django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        _subir(cliente_api, asesor, simulacro, TEXTO.encode('utf-8'))
+    simulacro.refresh_from_db()
+    anterior = simulacro.transcripcion_archivo.name
+
+    def sin_espacio(*args, **kwargs):
+        raise OSError('sin espacio')
+    monkeypatch.setattr(FileSystemStorage, '_save', sin_espacio)
+
+    api = cliente_api(asesor)
+    api.raise_request_exception = False
+    respuesta = api.post(
+        f'/api/simulacros/{simulacro.pk}/subir-transcripcion/',
+        {'archivo': _archivo(TEXTO.encode('utf-8'))}, format='multipart'
+    )
+
+    assert respuesta.status_code == 500
+    assert (media / anterior).exists()
+    simulacro.refresh_from_db()
+    assert simulacro.transcripcion_archivo.name == anterior
+
+
+@pytest.mark.django_db
+def test_extension_invalida(cliente_api, asesor, simulacro):
+    respuesta = _subir(cliente_api, asesor, simulacro, TEXTO.encode('utf-8'), nombre='entrevista.pdf')
+
+    assert respuesta.status_code == 400
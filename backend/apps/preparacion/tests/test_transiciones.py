@@ -0,0 +1,168 @@
+"""
+Transiciones de Simulacro bajo concurrencia y duración calculada en SQL.
+
+Cada test de concurrencia lanza varios hilos contra la misma fila; cada
+hilo usa su propia conexión a la base de pruebas en archivo (ver
+conftest.py). El UPDATE condicional de transicionar() debe dejar pasar
+exactamente una transición.
+"""
+import threading
+from datetime import timedelta
+
+import pytest
+from django.db import connection, connections
+from django.utils import timezone
+
+from apps.core.models import EventoOutbox
+from apps.preparacion.models import Simulacro
+from apps.preparacion.transiciones import MinutosDesde
+
+HILOS = 6
+
+
+def _en_paralelo(*funciones):
+    """Ejecuta las funciones a la vez (una por hilo) y devuelve sus resultados en orden."""
+    barrera = threading.Barrier(len(funciones), timeout=30)
+    resultados = [None] * len(funciones)
+
+    def correr(i, funcion):
+        try:
+            barrera.wait()
+            resultados[i] = funcion()
+        finally:
+            connections.close_all()
+
+    hilos = [threading.Thread(target=correr, args=(i, f)) for i, f in enumerate(funciones)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join(60)
+    return resultados
+
+
+@pytest.fixture
+def simulacro(crear_usuario):
+    cliente = crear_usuario('cliente')
+    asesor = crear_usuario('asesor')
+    programado = timezone.localtime() + timedelta(days=3)
+    return Simulacro.objects.create(
+        cliente=cliente,
+        asesor=asesor,
+        fecha=programado.date(),
+        hora=programado.time().replace(microsecond=0),
+        estado='en_progreso',
+        fecha_inicio=timezone.now() - timedelta(minutes=30, seconds=20),
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_finalizar_concurrente_aplica_una_sola_transicion(simulacro, cliente_api):
+    url = f'/api/simulacros/{simulacro.pk}/finalizar/'
+
+    def finalizar():
+        return cliente_api(simulacro.asesor).post(url, {'notas': 'ok'}, format='json').status_code
+
+    estados = _en_paralelo(*[finalizar] * HILOS)
+
+    assert sorted(estados) == [200] + [404] * (HILOS - 1)
+    simulacro.refresh_from_db()
+    assert simulacro.estado == 'completado'
+    assert simulacro.fecha_fin is not None
+    assert simulacro.duracion_minutos == 30
+    assert EventoOutbox.objects.filter(clave=f'simulacro.completado:{simulacro.pk}').count() == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_cancelar_y_finalizar_concurrentes_no_pierden_la_transicion(simulacro, cliente_api):
+    def cancelar():
+        respuesta = cliente_api(simulacro.cliente).post(
+            f'/api/simulacros/{simulacro.pk}/cancelar/', {'motivo': 'viaje'}, format='json'
+        )
+        return 'cancelado' if respuesta.status_code == 200 else None
+
+    def finalizar():
+        respuesta = cliente_api(simulacro.asesor).post(f'/api/simulacros/{simulacro.pk}/finalizar/')
+        return 'completado' if respuesta.status_code == 200 else None
+
+    ganadores = [r for r in _en_paralelo(*[cancelar, finalizar] * (HILOS // 2)) if r]
+
+    assert len(ganadores) == 1
+    simulacro.refresh_from_db()
+    assert simulacro.estado == ganadores[0]
+    if simulacro.estado == 'cancelado':
+        assert simulacro.motivo_cancelacion == 'viaje'
+        assert simulacro.duracion_minutos == 0
+    else:
+        assert simulacro.motivo_cancelacion == ''
+        assert simulacro.duracion_minutos == 30
+
+
+@pytest.mark.django_db(transaction=True)
+def test_iniciar_concurrente_escribe_fecha_inicio_una_vez(simulacro, cliente_api):
+    Simulacro.objects.filter(pk=simulacro.pk).update(estado='en_sala_espera', fecha_inicio=None)
+
+    def iniciar():
+        return cliente_api(simulacro.asesor).post(f'/api/simulacros/{simulacro.pk}/iniciar/').data['mensaje']
+
+    mensajes = _en_paralelo(*[iniciar] * HILOS)
+
+    assert mensajes.count('Simulacro iniciado') == 1
+    assert mensajes.count('Simulacro ya está en progreso') == HILOS - 1
+    simulacro.refresh_from_db()
+    assert simulacro.estado == 'en_progreso'
+    assert simulacro.fecha_inicio is not None
+
+
+@pytest.mark.django_db
+def test_finalizar_sin_fecha_inicio_conserva_la_duracion(simulacro, cliente_api):
+    Simulacro.objects.filter(pk=simulacro.pk).update(fecha_inicio=None, duracion_minutos=12)
+
+    respuesta = cliente_api(simulacro.asesor).post(f'/api/simulacros/{simulacro.pk}/finalizar/')
+
+    assert respuesta.status_code == 200
+    assert respuesta.data['simulacro']['duracion_minutos'] == 12
+
+
+# =====================================================
+# MinutosDesde
+# =====================================================
+
+TRANSCURRIDOS = [
+    (timedelta(0), 0),
+    (timedelta(minutes=29, seconds=59), 29),
+    (timedelta(minutes=30), 30),
+    (timedelta(days=2, hours=3, minutes=5, seconds=1), 3065),
+]
+
+
+def _minutos(simulacro, momento):
+    return Simulacro.objects.filter(pk=simulacro.pk).annotate(
+        minutos=MinutosDesde('fecha_inicio', momento)
+    ).values_list('minutos', flat=True).get()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('transcurrido, minutos', TRANSCURRIDOS)
+def test_minutos_desde(simulacro, transcurrido, minutos):
+    assert _minutos(simulacro, simulacro.fecha_inicio + transcurrido) == minutos
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('transcurrido, minutos', TRANSCURRIDOS)
+def test_minutos_desde_con_la_expresion_generica(simulacro, monkeypatch, transcurrido, minutos):
+    # Sin as_sqlite se usa la resta de fechas del backend (microsegundos)
+    monkeypatch.delattr(MinutosDesde, 'as_sqlite')
+
+    assert _minutos(simulacro, simulacro.fecha_inicio + transcurrido) == minutos
+
+
+@pytest.mark.django_db
+def test_minutos_desde_con_intervalo_nativo_usa_extract(simulacro, monkeypatch):
+    monkeypatch.delattr(MinutosDesde, 'as_sqlite')
+    monkeypatch.setattr(connection.features, 'has_native_duration_field', True)
+    consulta = Simulacro.objects.annotate(minutos=MinutosDesde('fecha_inicio', timezone.now())).values('minutos')
+
+    sql, params = consulta.query.get_compiler(using='default').as_sql()
+
+    assert 'EXTRACT(DAY FROM' in sql and 'EXTRACT(MINUTE FROM' in sql
+    assert len(params) == 3
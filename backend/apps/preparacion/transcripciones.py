@@ -0,0 +1,217 @@
+"""
+Ingesta de transcripciones de simulacros.
+
+El archivo subido se procesa por bloques sin cargarlo completo en memoria:
+detección de codificación sobre el prefijo, decodificación incremental,
+normalización de espacios y etiquetas de hablante, límite de tamaño y
+compresión gzip en streaming. Se guarda una única copia canónica (.txt.gz).
+"""
+import codecs
+import gzip
+import os
+import re
+import tempfile
+import zlib
+
+from django.conf import settings
+from django.core.files import File
+
+# Tamaño del prefijo usado para detectar la codificación
+TAMANO_PREFIJO = 4096
+
+BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# Variantes de etiquetas de hablante -> etiqueta canónica
+ETIQUETAS_HABLANTE = {
+    'oficial': 'Oficial',
+    'consul': 'Oficial',
+    'cónsul': 'Oficial',
+    'entrevistador': 'Oficial',
+    'asesor': 'Oficial',
+    'solicitante': 'Solicitante',
+    'cliente': 'Solicitante',
+    'aplicante': 'Solicitante',
+    'entrevistado': 'Solicitante',
+}
+
+PATRON_ETIQUETA = re.compile(
+    r'^\s*[\[\(]?(' + '|'.join(ETIQUETAS_HABLANTE) + r')[\]\)]?\s*[:\-–—]\s*',
+    re.IGNORECASE
+)
+PATRON_ESPACIOS = re.compile(r'[ \t\f\v ]+')
+
+
+class TranscripcionInvalida(Exception):
+    """Error de validación de una transcripción subida."""
+    pass
+
+
+def detectar_codificacion(prefijo):
+    """
+    Detecta la codificación a partir del prefijo del archivo.
+    Prioriza BOM, luego UTF-8 estricto y por último cp1252.
+    """
+    for bom, codificacion in BOMS:
+        if prefijo.startswith(bom):
+            return codificacion
+    try:
+        # final=False tolera una secuencia multibyte cortada al final del prefijo
+        codecs.getincrementaldecoder('utf-8')().decode(prefijo, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp1252'
+
+
+def normalizar_linea(linea):
+    """Colapsa espacios y unifica la etiqueta de hablante de una línea."""
+    linea = PATRON_ESPACIOS.sub(' ', linea).strip()
+    coincidencia = PATRON_ETIQUETA.match(linea)
+    if coincidencia:
+        etiqueta = ETIQUETAS_HABLANTE[coincidencia.group(1).lower()]
+        linea = f"{etiqueta}: {linea[coincidencia.end():]}"
+    return linea
+
+
+def _lineas_normalizadas(archivo, codificacion):
+    """
+    Genera líneas normalizadas decodificando el archivo por bloques.
+    Omite líneas vacías repetidas.
+    """
+    # cp1252 tiene bytes sin asignar: se reemplazan en lugar de fallar
+    errores = 'replace' if codificacion == 'cp1252' else 'strict'
+    decodificador = codecs.getincrementaldecoder(codificacion)(errors=errores)
+    pendiente = ''
+    anterior_vacia = True
+
+    def emitir(texto):
+        nonlocal anterior_vacia
+        for linea in texto.splitlines():
+            linea = normalizar_linea(linea)
+            if not linea:
+                if anterior_vacia:
+                    continue
+                anterior_vacia = True
+            else:
+                anterior_vacia = False
+            yield linea
+
+    for bloque in archivo.chunks():
+        pendiente += decodificador.decode(bloque)
+        corte = pendiente.rfind('\n')
+        if corte == -1:
+            # Saltos de línea solo con '\r'; el último se reserva por si sigue '\n'
+            corte = pendiente.rfind('\r', 0, len(pendiente) - 1)
+        if corte == -1:
+            continue
+        completo, pendiente = pendiente[:corte + 1], pendiente[corte + 1:]
+        yield from emitir(completo)
+
+    pendiente += decodificador.decode(b'', final=True)
+    if pendiente:
+        yield from emitir(pendiente)
+
+
+def _comprimir(archivo, codificacion, destino, limite):
+    """
+    Escribe en `destino` el texto normalizado comprimido con gzip.
+    Retorna (caracteres, lineas, caracteres_no_blancos).
+    """
+    compresor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> formato gzip
+    caracteres = lineas = no_blancos = tamano = 0
+
+    for linea in _lineas_normalizadas(archivo, codificacion):
+        datos = (linea + '\n').encode('utf-8')
+        tamano += len(datos)
+        if tamano > limite:
+            raise TranscripcionInvalida(
+                f'La transcripción supera el tamaño máximo permitido '
+                f'({limite // 1024} KB).'
+            )
+        destino.write(compresor.compress(datos))
+        caracteres += len(linea) + 1
+        lineas += 1
+        no_blancos += len(linea)
+
+    destino.write(compresor.flush())
+    return caracteres, lineas, no_blancos
+
+
+def procesar_transcripcion(archivo, minimo_caracteres=50):
+    """
+    Procesa un archivo subido y retorna (File comprimido, estadísticas).
+
+    Args:
+        archivo: UploadedFile de Django
+        minimo_caracteres: Longitud mínima de contenido útil
+
+    Raises:
+        TranscripcionInvalida: Si el archivo excede el límite, no se puede
+        decodificar o es demasiado corto.
+    """
+    limite = settings.TRANSCRIPCION_MAX_BYTES
+    if archivo.size and archivo.size > limite:
+        raise TranscripcionInvalida(
+            f'La transcripción supera el tamaño máximo permitido ({limite // 1024} KB).'
+        )
+
+    archivo.seek(0)
+    codificacion = detectar_codificacion(archivo.read(TAMANO_PREFIJO))
+
+    # Se acumula el gzip en disco a partir de cierto tamaño para no usar RAM
+    destino = tempfile.SpooledTemporaryFile(max_size=256 * 1024)
+    try:
+        archivo.seek(0)
+        try:
+            caracteres, lineas, no_blancos = _comprimir(archivo, codificacion, destino, limite)
+        except UnicodeDecodeError:
+            # Con BOM la codificación es explícita: el archivo está corrupto
+            if codificacion != 'utf-8':
+                raise
+            # El prefijo parecía UTF-8 pero el resto no lo es: reintentar con cp1252
+            destino.seek(0)
+            destino.truncate()
+            archivo.seek(0)
+            caracteres, lineas, no_blancos = _comprimir(archivo, 'cp1252', destino, limite)
+    except UnicodeDecodeError:
+        destino.close()
+        raise TranscripcionInvalida(
+            'No se pudo leer el archivo. Asegúrate de que esté en formato de texto válido.'
+        )
+    except TranscripcionInvalida:
+        destino.close()
+        raise
+
+    if no_blancos < minimo_caracteres:
+        destino.close()
+        raise TranscripcionInvalida(
+            f'La transcripción es muy corta. Debe tener al menos {minimo_caracteres} caracteres.'
+        )
+
+    destino.seek(0)
+    base, _ = os.path.splitext(os.path.basename(archivo.name))
+    estadisticas = {
+        'caracteres': caracteres,
+        'lineas': lineas,
+        'codificacion': codificacion,
+    }
+    return File(destino, name=f'{base}.txt.gz'), estadisticas
+
+
+def leer_transcripcion(archivo):
+    """
+    Lee el contenido de un FieldFile de transcripción.
+    Descomprime si es .gz; los archivos .txt antiguos se leen tal cual.
+    """
+    with archivo.open('rb') as f:
+        if archivo.name.endswith('.gz'):
+            with gzip.GzipFile(fileobj=f) as descomprimido:
+                return descomprimido.read().decode('utf-8')
+        datos = f.read()
+    try:
+        return datos.decode('utf-8')
+    except UnicodeDecodeError:
+        return datos.decode('cp1252', errors='replace')
@@ -0,0 +1,204 @@
+"""
+Transiciones de estado del ciclo de vida de un Simulacro.
+
+Cada transición se aplica como un único UPDATE condicional
+(compare-and-set): WHERE id = ? AND estado IN (...) [AND condiciones].
+Solo se escriben los campos que cambian, y si dos usuarios actúan a la
+vez sobre el mismo simulacro, solo uno de ellos gana la transición.
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BooleanField, Case, ExpressionWrapper, F, Func, IntegerField, Q, Value, When
+from django.utils import timezone
+
+from .models import Simulacro
+
+Transicion = namedtuple('Transicion', ['origen', 'destino'])
+
+ESTADOS_FINALES = ('cancelado', 'completado', 'no_asistio')
+
+TRANSICIONES = {
+    'aceptar': Transicion(
+        origen=('solicitado', 'propuesto', 'pendiente_respuesta'),
+        destino='confirmado',
+    ),
+    'ingresar_sala': Transicion(
+        origen=('confirmado',),
+        destino='en_sala_espera',
+    ),
+    'iniciar': Transicion(
+        origen=('en_sala_espera',),
+        destino='en_progreso',
+    ),
+    'finalizar': Transicion(
+        origen=('en_progreso',),
+        destino='completado',
+    ),
+    'cancelar': Transicion(
+        origen=tuple(
+            estado for estado, _ in Simulacro.ESTADOS if estado not in ESTADOS_FINALES
+        ),
+        destino='cancelado',
+    ),
+}
+
+# En desarrollo se permite iniciar directamente desde 'confirmado'
+TRANSICIONES_DEBUG = {
+    'iniciar': Transicion(
+        origen=('confirmado', 'en_sala_espera'),
+        destino='en_progreso',
+    ),
+}
+
+
+def obtener_transicion(accion):
+    """Retorna la transición declarada para la acción."""
+    if settings.DEBUG and accion in TRANSICIONES_DEBUG:
+        return TRANSICIONES_DEBUG[accion]
+    return TRANSICIONES[accion]
+
+
+def transicionar(pk, accion, alcance=None, condicion=None, **campos):
+    """
+    Aplica la transición `accion` al simulacro `pk` de forma atómica.
+
+    Args:
+        pk: ID del simulacro
+        accion: Clave de TRANSICIONES
+        alcance: Q que limita a los simulacros del usuario (cliente/asesor)
+        condicion: Q adicional que debe cumplirse (p. ej. ventana horaria)
+        **campos: Campos adicionales a escribir junto al nuevo estado
+
+    Returns:
+        True si la transición se aplicó; False si el simulacro no existe,
+        no pertenece al alcance o no está en un estado de origen válido.
+    """
+    transicion = obtener_transicion(accion)
+    queryset = Simulacro.objects.filter(
+        pk=pk,
+        estado__in=transicion.origen,
+    )
+    if alcance is not None:
+        queryset = queryset.filter(alcance)
+    if condicion is not None:
+        queryset = queryset.filter(condicion)
+
+    # update() no aplica auto_now: se actualiza updated_at explícitamente
+    aplicada = queryset.update(
+        estado=transicion.destino,
+        updated_at=timezone.now(),
+        **campos
+    ) == 1
+
+    if aplicada:
+        # Notificar a los participantes conectados al canal de la sala
+        from .salas import publicar_estado
+        fecha_inicio = campos.get('fecha_inicio')
+        transaction.on_commit(
+            lambda: publicar_estado(pk, transicion.destino, fecha_inicio)
+        )
+    return aplicada
+
+
+# =====================================================
+# CONDICIONES SOBRE FECHA/HORA PROGRAMADA
+# =====================================================
+
+def programado_desde(momento):
+    """Q: simulacros programados en o después de `momento`."""
+    return Q(programado_en__gte=momento)
+
+
+def programado_hasta(momento):
+    """Q: simulacros programados en o antes de `momento`."""
+    return Q(programado_en__lte=momento)
+
+
+def condicion_cancelable(horas_anticipacion=24):
+    """Equivalente en SQL de Simulacro.puede_cancelar()."""
+    return programado_desde(timezone.now() + timedelta(hours=horas_anticipacion))
+
+
+def condicion_ingreso_sala(minutos_anticipacion=15):
+    """Equivalente en SQL de Simulacro.puede_ingresar_sala()."""
+    ahora = timezone.now()
+    return programado_desde(ahora) & programado_hasta(
+        ahora + timedelta(minutes=minutos_anticipacion)
+    )
+
+
+# =====================================================
+# CAMPOS CALCULADOS EN EL UPDATE
+# =====================================================
+
+class MinutosDesde(Func):
+    """
+    Minutos enteros (truncados) entre un campo de fecha y `momento`,
+    calculados por la base de datos. PostgreSQL y SQLite tienen una
+    expresión propia; el resto de motores parte de la resta de fechas del
+    backend (connection.ops.subtract_temporals).
+    """
+    output_field = IntegerField()
+
+    def __init__(self, campo, momento):
+        super().__init__(Value(momento), F(campo))
+
+    def as_sql(self, compiler, connection, **extra):
+        momento, campo = (compiler.compile(expresion) for expresion in self.get_source_expressions())
+        resta, params = connection.ops.subtract_temporals('DateTimeField', momento, campo)
+        if not connection.features.has_native_duration_field:
+            # Sin tipo intervalo la resta devuelve microsegundos (MySQL, MariaDB...)
+            return f'FLOOR(({resta}) / 60000000)', params
+        # Intervalo día a segundo de SQL estándar (Oracle...)
+        return (
+            f'(EXTRACT(DAY FROM {resta}) * 1440 + EXTRACT(HOUR FROM {resta}) * 60'
+            f' + EXTRACT(MINUTE FROM {resta}))',
+            (*params, *params, *params),
+        )
+
+    def as_postgresql(self, compiler, connection, **extra):
+        return super().as_sql(
+            compiler, connection,
+            template='FLOOR(EXTRACT(EPOCH FROM (%(expressions)s)) / 60)::integer',
+            arg_joiner=' - ', **extra
+        )
+
+    def as_sqlite(self, compiler, connection, **extra):
+        # julianday() en días; se redondea a segundos antes de truncar a minutos
+        return super().as_sql(
+            compiler, connection,
+            template='CAST(ROUND((julianday(%(expressions)s)) * 86400) AS INTEGER) / 60',
+            arg_joiner=') - julianday(', **extra
+        )
+
+
+def duracion_hasta(momento):
+    """
+    Expresión para `duracion_minutos` al finalizar: minutos desde
+    fecha_inicio hasta `momento`, o el valor actual si no hay inicio.
+    """
+    return Case(
+        When(fecha_inicio__isnull=False, then=MinutosDesde('fecha_inicio', momento)),
+        default=F('duracion_minutos'),
+        output_field=IntegerField(),
+    )
+
+
+def anotar_permisos(queryset):
+    """
+    Anota `cancelable` y `sala_abierta` calculados en SQL, para que los
+    listados no recalculen la ventana horaria objeto por objeto.
+    """
+    return queryset.annotate(
+        cancelable=ExpressionWrapper(
+            ~Q(estado__in=ESTADOS_FINALES) & condicion_cancelable(),
+            output_field=BooleanField()
+        ),
+        sala_abierta=ExpressionWrapper(
+            Q(estado='confirmado') & condicion_ingreso_sala(),
+            output_field=BooleanField()
+        ),
+    )
@@ -19,6 +19,7 @@ from .views import (
     PropuestasPendientesView,
     InfoSalaView,
     EstadoSalaView,
+    canal_sala_view,
     DebugUserInfoView,
     
     # Recomendaciones
@@ -28,8 +29,10 @@ from .views import (
     
     # Recomendaciones con IA
     SubirTranscripcionView,
+    TranscripcionSimulacroView,
     GenerarRecomendacionIAView,
     SimulacrosCompletadosAsesorView,
+    BuscarSimulacrosView,
     RecomendacionClienteView,
     RecomendacionDetalleClienteView,
     
@@ -60,6 +63,7 @@ urlpatterns = [
     path('simulacros/propuesta/', CrearPropuestaView.as_view(), name='crear_propuesta'),
     path('simulacros/propuestas/', PropuestasPendientesView.as_view(), name='propuestas_pendientes'),
     path('simulacros/solicitar/', SolicitarSimulacroView.as_view(), name='solicitar_simulacro'),
+    path('simulacros/buscar/', BuscarSimulacrosView.as_view(), name='buscar_simulacros'),
     path('simulacros/<int:pk>/', SimulacroDetailView.as_view(), name='simulacro_detail'),
     path('simulacros/<int:pk>/aceptar/', AceptarPropuestaView.as_view(), name='aceptar_propuesta'),
     path('simulacros/<int:pk>/contrapropuesta/', ContrapropuestaView.as_view(), name='contrapropuesta'),
@@ -67,6 +71,7 @@ urlpatterns = [
     path('simulacros/<int:pk>/sala-espera/', IngresarSalaView.as_view(), name='sala_espera'),
     path('simulacros/<int:pk>/sala/', InfoSalaView.as_view(), name='info_sala'),
     path('simulacros/<int:pk>/estado-sala/', EstadoSalaView.as_view(), name='estado_sala'),
+    path('simulacros/sala/eventos/<str:token>/', canal_sala_view, name='canal_sala'),
     path('simulacros/<int:pk>/iniciar/', IniciarSimulacroView.as_view(), name='iniciar_simulacro'),
     path('simulacros/<int:pk>/finalizar/', FinalizarSimulacroView.as_view(), name='finalizar_simulacro'),
     
@@ -78,6 +83,7 @@ urlpatterns = [
     # Recomendaciones con IA
     path('simulacros/completados/', SimulacrosCompletadosAsesorView.as_view(), name='simulacros_completados'),
     path('simulacros/<int:pk>/subir-transcripcion/', SubirTranscripcionView.as_view(), name='subir_transcripcion'),
+    path('simulacros/<int:pk>/transcripcion/', TranscripcionSimulacroView.as_view(), name='transcripcion_simulacro'),
     path('simulacros/<int:pk>/generar-recomendacion-ia/', GenerarRecomendacionIAView.as_view(), name='generar_recomendacion_ia'),
     path('simulacros/<int:pk>/mi-recomendacion/', RecomendacionClienteView.as_view(), name='mi_recomendacion'),
     path('simulacros/<int:pk>/feedback/', SimulacroFeedbackView.as_view(), name='simulacro_feedback'),
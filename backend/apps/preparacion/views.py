@@ -4,9 +4,14 @@ Views para el módulo de Preparación (Simulacros).
 from rest_framework import status, generics, permissions
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from django.db import transaction
 from django.utils import timezone
-from django.db.models import Count, Q
-from datetime import datetime, timedelta
+from django.db.models import BooleanField, Count, ExpressionWrapper, Q
+from django.http import HttpResponse
+
+from apps.core.consultas import presupuesto_consultas
+from apps.core.media import respuesta_archivo
+from apps.core.outbox import publicar
 
 from .models import Simulacro, Recomendacion, Practica, ConfiguracionIA
 from .serializers import (
@@ -22,6 +27,10 @@ from .serializers import (
     ConfiguracionIASerializer,
     ConfiguracionIAUpdateSerializer,
 )
+from .transiciones import (
+    transicionar, condicion_cancelable, condicion_ingreso_sala, anotar_permisos, duracion_hasta
+)
+from . import agenda
 
 
 # =====================================================
@@ -41,6 +50,17 @@ class EsAsesor(permissions.BasePermission):
 # SIMULACROS
 # =====================================================
 
+def _obtener_simulacro(pk, alcance=None):
+    """Carga el simulacro con sus relaciones para serializar la respuesta."""
+    queryset = Simulacro.objects.filter(pk=pk).select_related(
+        'cliente', 'asesor', 'solicitud', 'recomendacion'
+    )
+    if alcance is not None:
+        queryset = queryset.filter(alcance)
+    return queryset.first()
+
+
+@presupuesto_consultas(2)
 class SimulacrosListView(generics.ListAPIView):
     """
     GET /api/simulacros/
@@ -53,11 +73,11 @@ class SimulacrosListView(generics.ListAPIView):
         user = self.request.user
         
         if user.rol == 'cliente':
-            queryset = Simulacro.objects.filter(cliente=user, is_deleted=False)
+            queryset = Simulacro.objects.filter(cliente=user)
         elif user.rol == 'asesor':
-            queryset = Simulacro.objects.filter(asesor=user, is_deleted=False)
+            queryset = Simulacro.objects.filter(asesor=user)
         else:
-            queryset = Simulacro.objects.filter(is_deleted=False)
+            queryset = Simulacro.objects.all()
         
         # Filtros
         estado = self.request.query_params.get('estado')
@@ -68,7 +88,9 @@ class SimulacrosListView(generics.ListAPIView):
         if modalidad:
             queryset = queryset.filter(modalidad=modalidad)
         
-        return queryset.order_by('-fecha', '-hora')
+        return anotar_permisos(queryset).select_related(
+            'cliente', 'asesor', 'solicitud'
+        ).order_by('-fecha', '-hora')
     
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
@@ -76,6 +98,7 @@ class SimulacrosListView(generics.ListAPIView):
         return Response(serializer.data)
 
 
+@presupuesto_consultas(2)
 class PropuestasPendientesView(generics.ListAPIView):
     """
     GET /api/simulacros/propuestas/
@@ -88,19 +111,14 @@ class PropuestasPendientesView(generics.ListAPIView):
         user = self.request.user
         
         if user.rol == 'asesor':
-            return Simulacro.objects.filter(
-                asesor=user,
-                estado='pendiente_respuesta',
-                is_deleted=False
-            ).order_by('-created_at')
+            queryset = Simulacro.objects.filter(asesor=user, estado='pendiente_respuesta')
         elif user.rol == 'cliente':
-            return Simulacro.objects.filter(
-                cliente=user,
-                estado='pendiente_respuesta',
-                is_deleted=False
-            ).order_by('-created_at')
-        
-        return Simulacro.objects.none()
+            queryset = Simulacro.objects.filter(cliente=user, estado='pendiente_respuesta')
+        else:
+            return Simulacro.objects.none()
+        return anotar_permisos(queryset).select_related(
+            'cliente', 'asesor', 'solicitud'
+        ).order_by('-created_at')
     
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
@@ -117,12 +135,46 @@ class SimulacroDetailView(generics.RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        user = self.request.user
-        if user.rol == 'cliente':
-            return Simulacro.objects.filter(cliente=user, is_deleted=False)
-        elif user.rol == 'asesor':
-            return Simulacro.objects.filter(asesor=user, is_deleted=False)
-        return Simulacro.objects.filter(is_deleted=False)
+        # La transcripción antigua en texto plano no se carga en el detalle
+        return _simulacros_visibles(self.request.user).defer('transcripcion_texto').annotate(
+            con_texto_transcripcion=ExpressionWrapper(~Q(transcripcion_texto=''), output_field=BooleanField())
+        )
+
+
+def _simulacros_visibles(user):
+    """Simulacros que el usuario puede ver según su rol."""
+    if user.rol == 'cliente':
+        return Simulacro.objects.filter(cliente=user)
+    elif user.rol == 'asesor':
+        return Simulacro.objects.filter(asesor=user)
+    return Simulacro.objects.all()
+
+
+class TranscripcionSimulacroView(APIView):
+    """
+    GET /api/simulacros/<id>/transcripcion/
+    Entrega la transcripción como texto plano. El .txt.gz sale tal cual con
+    Content-Encoding: gzip (sendfile); Django no lo descomprime.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, pk):
+        simulacro = _simulacros_visibles(request.user).filter(pk=pk).only(
+            'id', 'transcripcion_archivo', 'transcripcion_texto'
+        ).first()
+        if simulacro is None or not simulacro.tiene_transcripcion():
+            return Response(
+                {'error': 'Transcripción no encontrada'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        if simulacro.transcripcion_archivo:
+            return respuesta_archivo(
+                simulacro.transcripcion_archivo.name,
+                nombre_descarga=f'transcripcion-simulacro-{simulacro.pk}.txt',
+                decodificar=True,
+            )
+        # Registros anteriores a la compresión
+        return HttpResponse(simulacro.transcripcion_texto, content_type='text/plain; charset=utf-8')
 
 
 class CrearPropuestaView(generics.CreateAPIView):
@@ -138,17 +190,23 @@ class DisponibilidadView(APIView):
     """
     GET /api/simulacros/disponibilidad/
     Verifica disponibilidad para nuevo simulacro.
+    
+    Con ?desde=YYYY-MM-DD[&hasta=YYYY-MM-DD&duracion=60&solicitud_id=]
+    incluye además los horarios libres del asesor (y del cliente), sin
+    solaparse con sus simulacros ni con las entrevistas consulares.
     """
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
+        if request.query_params.get('desde'):
+            return self._agenda(request)
+        
         user = request.user
         
         # Contar simulacros ACTIVOS del cliente (todos excepto cancelados)
         # Esto incluye: solicitado, propuesto, pendiente_respuesta, confirmado, en_progreso, completado
         simulacros_activos = Simulacro.objects.filter(
-            cliente=user,
-            is_deleted=False
+            cliente=user
         ).exclude(
             estado='cancelado'
         ).count()
@@ -170,6 +228,68 @@ class DisponibilidadView(APIView):
             'simulacros_disponibles': 0,
             'mensaje': f'Ha alcanzado el límite de {max_simulacros} simulacros por proceso'
         })
+    
+    def _agenda(self, request):
+        from datetime import date, time, timedelta
+        from django.conf import settings
+        from apps.core.models import combinar_fecha_hora
+        user = request.user
+        params = request.query_params
+        
+        try:
+            desde = date.fromisoformat(params['desde'])
+            hasta = date.fromisoformat(params.get('hasta') or params['desde'])
+            duracion = int(params.get('duracion') or settings.AGENDA_DURACION_SIMULACRO)
+            limite = int(params.get('limite') or 200)
+        except ValueError:
+            return Response(
+                {'error': 'Formato inválido: use desde/hasta YYYY-MM-DD y duracion en minutos'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if hasta < desde or (hasta - desde).days >= settings.AGENDA_MAX_DIAS or duracion <= 0:
+            return Response(
+                {'error': f'Rango inválido (máximo {settings.AGENDA_MAX_DIAS} días)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if user.rol == 'cliente':
+            from apps.solicitudes.models import Solicitud
+            solicitudes = Solicitud.objects.filter(cliente=user, asesor__isnull=False)
+            if params.get('solicitud_id'):
+                solicitudes = solicitudes.filter(pk=params['solicitud_id'])
+            asesor_id = solicitudes.order_by('-created_at').values_list(
+                'asesor_id', flat=True
+            ).first()
+            if asesor_id is None:
+                return Response(
+                    {'error': 'No tiene un asesor asignado'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            cliente_id = user.id
+        else:
+            asesor_id, cliente_id = user.id, None
+        
+        # No se ofrecen horarios pasados
+        inicio = max(combinar_fecha_hora(desde, time.min), timezone.now())
+        fin = combinar_fecha_hora(hasta + timedelta(days=1), time.min)
+        bloques = agenda.fusionar(agenda.intervalos_ocupados(
+            inicio, fin, asesor=asesor_id, cliente=cliente_id
+        ))
+        libres = agenda.horarios_libres(
+            bloques, inicio, fin, timedelta(minutes=duracion),
+            limite=limite
+        )
+        return Response({
+            'asesor_id': asesor_id,
+            'duracion': duracion,
+            'ocupados': [
+                {'inicio': timezone.localtime(a), 'fin': timezone.localtime(b)}
+                for a, b in bloques
+            ],
+            'horarios_libres': [
+                {'fecha': momento.date(), 'hora': momento.time()} for momento in libres
+            ],
+        })
 
 
 class ContadorSimulacrosView(APIView):
@@ -185,15 +305,13 @@ class ContadorSimulacrosView(APIView):
         # Contar simulacros completados
         completados = Simulacro.objects.filter(
             cliente=user,
-            estado='completado',
-            is_deleted=False
+            estado='completado'
         ).count()
         
         # Contar simulacros activos (pendientes, confirmados, solicitados, en_progreso)
         activos = Simulacro.objects.filter(
             cliente=user,
-            estado__in=['solicitado', 'propuesto', 'pendiente_respuesta', 'confirmado', 'en_progreso'],
-            is_deleted=False
+            estado__in=['solicitado', 'propuesto', 'pendiente_respuesta', 'confirmado', 'en_progreso']
         ).count()
         
         # Total de simulacros no cancelados
@@ -227,8 +345,7 @@ class SolicitarSimulacroView(APIView):
         
         # Verificar disponibilidad - contar TODOS los simulacros activos (no cancelados)
         simulacros_activos = Simulacro.objects.filter(
-            cliente=user,
-            is_deleted=False
+            cliente=user
         ).exclude(
             estado='cancelado'
         ).count()
@@ -255,39 +372,63 @@ class SolicitarSimulacroView(APIView):
         # Verificar que la solicitud pertenezca al cliente
         from apps.solicitudes.models import Solicitud
         try:
-            solicitud = Solicitud.objects.get(pk=solicitud_id, cliente=user, is_deleted=False)
+            solicitud = Solicitud.objects.get(pk=solicitud_id, cliente=user)
         except Solicitud.DoesNotExist:
             return Response(
                 {'error': 'Solicitud no encontrada'},
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Crear simulacro con estado 'solicitado'
-        # Usar valores por defecto si no se proporcionan fecha/hora
-        from datetime import date, time
-        fecha_default = date.today() if not fecha_propuesta else fecha_propuesta
-        hora_default = time(9, 0) if not hora_propuesta else hora_propuesta
-        
-        simulacro = Simulacro.objects.create(
-            cliente=user,
-            solicitud=solicitud,
-            asesor=solicitud.asesor,  # Asignar al asesor de la solicitud
-            modalidad=modalidad,
-            fecha=fecha_default,
-            hora=hora_default,
-            fecha_propuesta=fecha_propuesta if fecha_propuesta else None,
-            hora_propuesta=hora_propuesta if hora_propuesta else None,
-            estado='solicitado',
-            notas=f"Solicitud del cliente: {observaciones}" if observaciones else ""
-        )
+        if fecha_propuesta and hora_propuesta:
+            try:
+                fecha_propuesta, hora_propuesta = agenda.parsear_fecha_hora(
+                    fecha_propuesta, hora_propuesta
+                )
+            except ValueError:
+                return Response(
+                    {'error': 'Formato de fecha u hora inválido'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        else:
+            fecha_propuesta = hora_propuesta = None
         
-        # Notificar al asesor sobre la nueva solicitud de simulacro
-        try:
-            from apps.notificaciones.services import notificacion_service
-            notificacion_service.notificar_simulacro_propuesto(simulacro, propuesto_por='cliente')
-        except Exception as e:
-            import logging
-            logging.getLogger(__name__).error(f"Error creando notificación: {e}")
+        # Crear simulacro con estado 'solicitado'. Sin propuesta, fecha/hora
+        # solo rellenan las columnas obligatorias: la agenda usa la propuesta
+        # y un simulacro solicitado sin ella no ocupa ningún horario.
+        from datetime import date, time
+        fecha_default = fecha_propuesta or date.today()
+        hora_default = hora_propuesta or time(9, 0)
+        
+        with transaction.atomic():
+            # Rechazar horarios que se solapan con la agenda del asesor o del cliente
+            if fecha_propuesta:
+                conflicto = agenda.buscar_conflicto(
+                    fecha_propuesta, hora_propuesta,
+                    asesor=solicitud.asesor_id, cliente=user.id
+                )
+                if conflicto:
+                    return Response(
+                        {'error': agenda.mensaje_conflicto(conflicto)},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+            
+            simulacro = Simulacro.objects.create(
+                cliente=user,
+                solicitud=solicitud,
+                asesor=solicitud.asesor,  # Asignar al asesor de la solicitud
+                modalidad=modalidad,
+                fecha=fecha_default,
+                hora=hora_default,
+                fecha_propuesta=fecha_propuesta,
+                hora_propuesta=hora_propuesta,
+                estado='solicitado',
+                notas=f"Solicitud del cliente: {observaciones}" if observaciones else ""
+            )
+            # El asesor se notifica desde el outbox, después del commit
+            publicar(
+                'simulacro.propuesto', f'simulacro.propuesto:{simulacro.pk}',
+                simulacro_id=simulacro.pk, propuesto_por='cliente'
+            )
         
         return Response({
             'mensaje': 'Solicitud de simulacro enviada exitosamente',
@@ -309,47 +450,35 @@ class AceptarPropuestaView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def post(self, request, pk):
-        # Estados que pueden ser aceptados
-        estados_aceptables = ['solicitado', 'propuesto', 'pendiente_respuesta']
-        
-        try:
-            # Buscar simulacro donde el usuario sea cliente o asesor
-            simulacro = Simulacro.objects.get(
-                pk=pk,
-                is_deleted=False
-            )
-            
-            # Verificar que el usuario tenga permiso
-            user = request.user
-            if user.rol == 'cliente' and simulacro.cliente != user:
+        user = request.user
+        alcance = Q(cliente=user) if user.rol == 'cliente' else Q()
+        
+        with transaction.atomic():
+            aceptado = transicionar(pk, 'aceptar', alcance=alcance)
+            if aceptado:
+                # Cliente y asesor se notifican desde el outbox, después del commit
+                publicar('simulacro.confirmado', f'simulacro.confirmado:{pk}', simulacro_id=pk)
+        
+        if not aceptado:
+            simulacro = Simulacro.objects.filter(pk=pk).only(
+                'estado', 'cliente_id'
+            ).first()
+            if simulacro is None:
                 return Response(
-                    {'error': 'No tienes permiso para este simulacro'},
-                    status=status.HTTP_403_FORBIDDEN
+                    {'error': 'Simulacro no encontrado'},
+                    status=status.HTTP_404_NOT_FOUND
                 )
-            
-            # Verificar estado válido
-            if simulacro.estado not in estados_aceptables:
+            if user.rol == 'cliente' and simulacro.cliente_id != user.id:
                 return Response(
-                    {'error': f'El simulacro no puede ser aceptado en estado {simulacro.estado}'},
-                    status=status.HTTP_400_BAD_REQUEST
+                    {'error': 'No tienes permiso para este simulacro'},
+                    status=status.HTTP_403_FORBIDDEN
                 )
-                
-        except Simulacro.DoesNotExist:
             return Response(
-                {'error': 'Simulacro no encontrado'},
-                status=status.HTTP_404_NOT_FOUND
+                {'error': f'El simulacro no puede ser aceptado en estado {simulacro.estado}'},
+                status=status.HTTP_400_BAD_REQUEST
             )
         
-        simulacro.estado = 'confirmado'
-        simulacro.save()
-        
-        # Crear notificaciones de simulacro confirmado
-        try:
-            from apps.notificaciones.services import notificacion_service
-            notificacion_service.notificar_simulacro_confirmado(simulacro)
-        except Exception as e:
-            import logging
-            logging.getLogger(__name__).error(f"Error creando notificación: {e}")
+        simulacro = _obtener_simulacro(pk)
         
         return Response({
             'mensaje': 'Simulacro confirmado exitosamente',
@@ -369,8 +498,7 @@ class ContrapropuestaView(APIView):
             simulacro = Simulacro.objects.get(
                 pk=pk,
                 cliente=request.user,
-                estado='pendiente_respuesta',
-                is_deleted=False
+                estado='pendiente_respuesta'
             )
         except Simulacro.DoesNotExist:
             return Response(
@@ -387,10 +515,28 @@ class ContrapropuestaView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        simulacro.fecha_propuesta = fecha
-        simulacro.hora_propuesta = hora
-        simulacro.estado = 'contrapropuesta'
-        simulacro.save()
+        try:
+            fecha, hora = agenda.parsear_fecha_hora(fecha, hora)
+        except ValueError:
+            return Response(
+                {'error': 'Formato de fecha u hora inválido'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        with transaction.atomic():
+            conflicto = agenda.buscar_conflicto(
+                fecha, hora,
+                asesor=simulacro.asesor_id, cliente=simulacro.cliente_id, excluir=simulacro.pk
+            )
+            if conflicto:
+                return Response(
+                    {'error': agenda.mensaje_conflicto(conflicto)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            simulacro.fecha_propuesta = fecha
+            simulacro.hora_propuesta = hora
+            simulacro.estado = 'contrapropuesta'
+            simulacro.save()
         
         return Response({
             'mensaje': 'Contrapropuesta enviada',
@@ -407,31 +553,29 @@ class CancelarSimulacroView(APIView):
     
     def post(self, request, pk):
         user = request.user
+        alcance = Q(cliente=user) if user.rol == 'cliente' else Q(asesor=user)
         
-        try:
-            if user.rol == 'cliente':
-                simulacro = Simulacro.objects.get(pk=pk, cliente=user, is_deleted=False)
-            else:
-                simulacro = Simulacro.objects.get(pk=pk, asesor=user, is_deleted=False)
-        except Simulacro.DoesNotExist:
-            return Response(
-                {'error': 'Simulacro no encontrado'},
-                status=status.HTTP_404_NOT_FOUND
-            )
+        cancelado = transicionar(
+            pk, 'cancelar',
+            alcance=alcance,
+            condicion=condicion_cancelable(),
+            motivo_cancelacion=request.data.get('motivo', '')
+        )
         
-        if not simulacro.puede_cancelar():
+        if not cancelado:
+            if not Simulacro.objects.filter(alcance, pk=pk).exists():
+                return Response(
+                    {'error': 'Simulacro no encontrado'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
             return Response(
                 {'error': 'No puedes cancelar con menos de 24 horas de anticipación'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        simulacro.estado = 'cancelado'
-        simulacro.motivo_cancelacion = request.data.get('motivo', '')
-        simulacro.save()
-        
         return Response({
             'mensaje': 'Simulacro cancelado',
-            'simulacro': SimulacroDetailSerializer(simulacro).data
+            'simulacro': SimulacroDetailSerializer(_obtener_simulacro(pk)).data
         })
 
 
@@ -446,63 +590,46 @@ class IngresarSalaView(APIView):
         from django.conf import settings
         
         user = request.user
+        alcance = Q(asesor=user) if user.rol == 'asesor' else Q(cliente=user)
         
-        # Buscar el simulacro - puede ser cliente o asesor
-        try:
-            if user.rol == 'asesor':
-                simulacro = Simulacro.objects.get(
-                    pk=pk,
-                    asesor=user,
-                    is_deleted=False
-                )
-            else:
-                simulacro = Simulacro.objects.get(
-                    pk=pk,
-                    cliente=user,
-                    is_deleted=False
-                )
-        except Simulacro.DoesNotExist:
+        # En desarrollo, permitir siempre el acceso
+        condicion = None if settings.DEBUG else condicion_ingreso_sala()
+        transicionar(pk, 'ingresar_sala', alcance=alcance, condicion=condicion)
+        
+        simulacro = _obtener_simulacro(pk, alcance)
+        if simulacro is None:
             return Response(
                 {'error': 'Simulacro no encontrado'},
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Verificar estado permitido
-        estados_permitidos = ['confirmado', 'en_sala_espera']
-        if simulacro.estado not in estados_permitidos and not settings.DEBUG:
-            return Response(
-                {'error': f'El simulacro no está en estado permitido. Estado actual: {simulacro.estado}'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # En desarrollo, permitir siempre el acceso
-        if not settings.DEBUG and not simulacro.puede_ingresar_sala():
-            # Calcular tiempo restante
-            fecha_simulacro = datetime.combine(simulacro.fecha, simulacro.hora)
-            fecha_simulacro = timezone.make_aware(fecha_simulacro)
-            tiempo_restante = fecha_simulacro - timezone.now()
-            
-            if tiempo_restante.total_seconds() > 0:
-                minutos = int(tiempo_restante.total_seconds() / 60)
-                return Response({
-                    'error': f'Podrás ingresar 15 minutos antes. Faltan {minutos} minutos.',
-                    'tiempo_restante_minutos': minutos
-                }, status=status.HTTP_400_BAD_REQUEST)
-            else:
+        # Si el otro participante ya ingresó, el estado es 'en_sala_espera'
+        if simulacro.estado != 'en_sala_espera':
+            estados_permitidos = ['confirmado', 'en_sala_espera']
+            if simulacro.estado not in estados_permitidos and not settings.DEBUG:
                 return Response(
-                    {'error': 'El simulacro ya pasó'},
+                    {'error': f'El simulacro no está en estado permitido. Estado actual: {simulacro.estado}'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-        
-        # Solo cambiar estado si estaba en confirmado
-        if simulacro.estado == 'confirmado':
-            simulacro.estado = 'en_sala_espera'
-            simulacro.save()
+            
+            if not settings.DEBUG:
+                # Fuera de la ventana de ingreso: calcular tiempo restante
+                tiempo_restante = simulacro.momento_programado() - timezone.now()
+                
+                if tiempo_restante.total_seconds() > 0:
+                    minutos = int(tiempo_restante.total_seconds() / 60)
+                    return Response({
+                        'error': f'Podrás ingresar 15 minutos antes. Faltan {minutos} minutos.',
+                        'tiempo_restante_minutos': minutos
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                else:
+                    return Response(
+                        {'error': 'El simulacro ya pasó'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
         
         # Calcular tiempo para inicio
-        fecha_simulacro = datetime.combine(simulacro.fecha, simulacro.hora)
-        fecha_simulacro = timezone.make_aware(fecha_simulacro)
-        tiempo_restante = int((fecha_simulacro - timezone.now()).total_seconds() / 60)
+        tiempo_restante = int((simulacro.momento_programado() - timezone.now()).total_seconds() / 60)
         
         return Response({
             'mensaje': 'Has ingresado a la sala de espera',
@@ -519,44 +646,34 @@ class IniciarSimulacroView(APIView):
     permission_classes = [permissions.IsAuthenticated, EsAsesor]
     
     def post(self, request, pk):
-        from django.conf import settings
+        alcance = Q(asesor=request.user)
         
-        # Primero buscar el simulacro sin filtrar por estado
-        try:
-            simulacro = Simulacro.objects.get(
-                pk=pk,
-                asesor=request.user,
-                is_deleted=False
-            )
-        except Simulacro.DoesNotExist:
+        iniciado = transicionar(
+            pk, 'iniciar',
+            alcance=alcance,
+            fecha_inicio=timezone.now(),
+            grabacion_activa=True
+        )
+        
+        simulacro = _obtener_simulacro(pk, alcance)
+        if simulacro is None:
             return Response(
                 {'error': 'Simulacro no encontrado o no eres el asesor asignado'},
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Si ya está en progreso, simplemente devolver éxito
-        if simulacro.estado == 'en_progreso':
-            return Response({
-                'mensaje': 'Simulacro ya está en progreso',
-                'simulacro': SimulacroDetailSerializer(simulacro).data
-            })
-        
-        # Verificar estados permitidos
-        estados_permitidos = ['en_sala_espera']
-        if settings.DEBUG:
-            estados_permitidos = ['confirmado', 'en_sala_espera']
-        
-        if simulacro.estado not in estados_permitidos:
+        if not iniciado:
+            # Si ya está en progreso, simplemente devolver éxito
+            if simulacro.estado == 'en_progreso':
+                return Response({
+                    'mensaje': 'Simulacro ya está en progreso',
+                    'simulacro': SimulacroDetailSerializer(simulacro).data
+                })
             return Response(
                 {'error': f'El simulacro no está listo para iniciar. Estado actual: {simulacro.estado}'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        simulacro.estado = 'en_progreso'
-        simulacro.fecha_inicio = timezone.now()
-        simulacro.grabacion_activa = True
-        simulacro.save()
-        
         return Response({
             'mensaje': 'Simulacro iniciado',
             'simulacro': SimulacroDetailSerializer(simulacro).data
@@ -571,39 +688,27 @@ class FinalizarSimulacroView(APIView):
     permission_classes = [permissions.IsAuthenticated, EsAsesor]
     
     def post(self, request, pk):
-        try:
-            simulacro = Simulacro.objects.get(
-                pk=pk,
-                asesor=request.user,
-                estado='en_progreso',
-                is_deleted=False
-            )
-        except Simulacro.DoesNotExist:
-            return Response(
-                {'error': 'Simulacro no encontrado o no en progreso'},
-                status=status.HTTP_404_NOT_FOUND
+        fecha_fin = timezone.now()
+        with transaction.atomic():
+            # La duración se calcula en el mismo UPDATE, desde fecha_inicio
+            finalizado = transicionar(
+                pk, 'finalizar',
+                alcance=Q(asesor=request.user),
+                fecha_fin=fecha_fin,
+                duracion_minutos=duracion_hasta(fecha_fin),
+                grabacion_activa=False,
+                notas=request.data.get('notas', '')
             )
-        
-        simulacro.estado = 'completado'
-        simulacro.fecha_fin = timezone.now()
-        simulacro.grabacion_activa = False
-        
-        # Calcular duración
-        if simulacro.fecha_inicio:
-            duracion = simulacro.fecha_fin - simulacro.fecha_inicio
-            simulacro.duracion_minutos = int(duracion.total_seconds() / 60)
-        
-        simulacro.notas = request.data.get('notas', '')
-        simulacro.save()
-        
-        # Crear notificación de simulacro completado para el asesor
-        try:
-            from apps.notificaciones.services import notificacion_service
-            notificacion_service.notificar_simulacion_completada(simulacro)
-        except Exception as e:
-            # No fallar si la notificación no se puede crear
-            import logging
-            logging.getLogger(__name__).error(f"Error creando notificación: {e}")
+            if not finalizado:
+                return Response(
+                    {'error': 'Simulacro no encontrado o no en progreso'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            
+            simulacro = _obtener_simulacro(pk)
+            
+            # El asesor se notifica desde el outbox, después del commit
+            publicar('simulacro.completado', f'simulacro.completado:{pk}', simulacro_id=pk)
         
         return Response({
             'mensaje': 'Simulacro completado',
@@ -625,14 +730,12 @@ class InfoSalaView(APIView):
             if user.rol == 'cliente':
                 simulacro = Simulacro.objects.get(
                     pk=pk,
-                    cliente=user,
-                    is_deleted=False
+                    cliente=user
                 )
             elif user.rol == 'asesor':
                 simulacro = Simulacro.objects.get(
                     pk=pk,
-                    asesor=user,
-                    is_deleted=False
+                    asesor=user
                 )
             else:
                 return Response(
@@ -653,6 +756,9 @@ class InfoSalaView(APIView):
                 'estado_actual': simulacro.estado
             }, status=status.HTTP_400_BAD_REQUEST)
         
+        from django.urls import reverse
+        from .salas import token_sala
+        
         # Generar nombre de sala único para Jitsi
         # Usar un nombre largo y único basado en datos estables del simulacro
         import hashlib
@@ -693,6 +799,9 @@ class InfoSalaView(APIView):
             'puede_iniciar': user.rol == 'asesor' and simulacro.estado in ['confirmado', 'en_sala_espera'],
             'en_progreso': simulacro.estado == 'en_progreso',
             'fecha_inicio': simulacro.fecha_inicio,
+            'canal_url': request.build_absolute_uri(
+                reverse('preparacion:canal_sala', kwargs={'token': token_sala(simulacro.id, user)})
+            ),
         })
 
 
@@ -707,9 +816,9 @@ class EstadoSalaView(APIView):
         try:
             user = request.user
             if user.rol == 'cliente':
-                simulacro = Simulacro.objects.get(pk=pk, cliente=user, is_deleted=False)
+                simulacro = Simulacro.objects.get(pk=pk, cliente=user)
             elif user.rol == 'asesor':
-                simulacro = Simulacro.objects.get(pk=pk, asesor=user, is_deleted=False)
+                simulacro = Simulacro.objects.get(pk=pk, asesor=user)
             else:
                 return Response({'error': 'No autorizado'}, status=status.HTTP_403_FORBIDDEN)
         except Simulacro.DoesNotExist:
@@ -729,6 +838,42 @@ class EstadoSalaView(APIView):
         })
 
 
+async def canal_sala_view(request, token):
+    """
+    GET /api/simulacros/sala/eventos/<token>/
+    Flujo Server-Sent Events con el estado y la presencia de la sala.
+    Autenticado con el token firmado que entrega InfoSalaView (EventSource
+    no permite cabeceras), sin consultas a la base de datos por evento.
+    Requiere servidor ASGI; en WSGI el cliente debe usar EstadoSalaView.
+    """
+    from django.core import signing
+    from django.core.handlers.asgi import ASGIRequest
+    from django.http import JsonResponse, StreamingHttpResponse
+    from .salas import verificar_token_sala, flujo_sala
+    
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Método no permitido'}, status=405)
+    
+    try:
+        simulacro_id, usuario_id, rol = verificar_token_sala(token)
+    except signing.BadSignature:
+        return JsonResponse({'error': 'Token de sala inválido o expirado'}, status=403)
+    
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'error': 'El canal en tiempo real requiere un servidor ASGI'},
+            status=501
+        )
+    
+    response = StreamingHttpResponse(
+        flujo_sala(simulacro_id, f'{rol}:{usuario_id}'),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: no almacenar el flujo
+    return response
+
+
 # =====================================================
 # RECOMENDACIONES
 # =====================================================
@@ -781,8 +926,7 @@ class GenerarRecomendacionView(APIView):
             simulacro = Simulacro.objects.get(
                 pk=simulacro_id,
                 asesor=request.user,
-                estado='completado',
-                is_deleted=False
+                estado='completado'
             )
         except Simulacro.DoesNotExist:
             return Response(
@@ -797,31 +941,31 @@ class GenerarRecomendacionView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Crear recomendación con indicadores del request
-        recomendacion = Recomendacion.objects.create(
-            simulacro=simulacro,
-            claridad=request.data.get('claridad', 'medio'),
-            coherencia=request.data.get('coherencia', 'medio'),
-            seguridad=request.data.get('seguridad', 'medio'),
-            pertinencia=request.data.get('pertinencia', 'medio'),
-            fortalezas=request.data.get('fortalezas', []),
-            puntos_mejora=request.data.get('puntos_mejora', []),
-            recomendaciones=request.data.get('recomendaciones', []),
-            accion_sugerida=request.data.get('accion_sugerida', ''),
-            publicada=True
-        )
-        
-        # Calcular nivel de preparación
-        recomendacion.nivel_preparacion = recomendacion.calcular_nivel_preparacion()
-        recomendacion.save()
-        
-        # Notificar al cliente que las recomendaciones están listas
-        try:
-            from apps.notificaciones.services import notificacion_service
-            notificacion_service.notificar_recomendaciones_listas(simulacro)
-        except Exception as e:
-            import logging
-            logging.getLogger(__name__).error(f"Error creando notificación: {e}")
+        with transaction.atomic():
+            # Crear recomendación con indicadores del request
+            recomendacion = Recomendacion.objects.create(
+                simulacro=simulacro,
+                claridad=request.data.get('claridad', 'medio'),
+                coherencia=request.data.get('coherencia', 'medio'),
+                seguridad=request.data.get('seguridad', 'medio'),
+                pertinencia=request.data.get('pertinencia', 'medio'),
+                fortalezas=request.data.get('fortalezas', []),
+                puntos_mejora=request.data.get('puntos_mejora', []),
+                recomendaciones=request.data.get('recomendaciones', []),
+                accion_sugerida=request.data.get('accion_sugerida', ''),
+                publicada=True
+            )
+            
+            # Calcular nivel de preparación
+            recomendacion.nivel_preparacion = recomendacion.calcular_nivel_preparacion()
+            recomendacion.save()
+            
+            # El cliente se notifica desde el outbox, después del commit
+            publicar(
+                'recomendaciones.listas',
+                f'recomendaciones.listas:{recomendacion.pk}:manual',
+                simulacro_id=simulacro.pk
+            )
         
         return Response({
             'mensaje': 'Recomendaciones generadas',
@@ -831,7 +975,7 @@ class GenerarRecomendacionView(APIView):
 
 class SubirTranscripcionView(APIView):
     """
-    POST /api/simulacros/<id>/transcripcion/
+    POST /api/simulacros/<id>/subir-transcripcion/
     Sube un archivo de transcripción (.txt) para un simulacro completado.
     """
     permission_classes = [permissions.IsAuthenticated, EsAsesor]
@@ -841,8 +985,7 @@ class SubirTranscripcionView(APIView):
             simulacro = Simulacro.objects.get(
                 pk=pk,
                 asesor=request.user,
-                estado='completado',
-                is_deleted=False
+                estado='completado'
             )
         except Simulacro.DoesNotExist:
             return Response(
@@ -866,37 +1009,39 @@ class SubirTranscripcionView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Leer contenido
+        # Decodificar, normalizar y comprimir por bloques
+        from .transcripciones import procesar_transcripcion, TranscripcionInvalida
         try:
-            contenido = archivo.read().decode('utf-8')
-        except UnicodeDecodeError:
-            try:
-                archivo.seek(0)
-                contenido = archivo.read().decode('latin-1')
-            except Exception:
-                return Response(
-                    {'error': 'No se pudo leer el archivo. Asegúrate de que esté en formato de texto válido.'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        
-        # Validar contenido mínimo
-        if len(contenido.strip()) < 50:
+            comprimido, estadisticas = procesar_transcripcion(archivo)
+        except TranscripcionInvalida as e:
             return Response(
-                {'error': 'La transcripción es muy corta. Debe tener al menos 50 caracteres.'},
+                {'error': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Guardar transcripción
-        archivo.seek(0)
-        simulacro.transcripcion_archivo = archivo
-        simulacro.transcripcion_texto = contenido
-        simulacro.save()
+        # Guardar una única copia comprimida. El archivo anterior se borra
+        # solo cuando la fila ya apunta al nuevo y la transacción confirmó.
+        campo = simulacro.transcripcion_archivo
+        anterior = campo.name
+        try:
+            campo.save(comprimido.name, comprimido, save=False)
+        finally:
+            comprimido.close()
+        try:
+            with transaction.atomic():
+                simulacro.transcripcion_texto = ''
+                simulacro.save(update_fields=['transcripcion_archivo', 'transcripcion_texto', 'updated_at'])
+        except Exception:
+            campo.storage.delete(campo.name)
+            raise
+        if anterior and anterior != campo.name:
+            transaction.on_commit(lambda: campo.storage.delete(anterior))
         
         return Response({
             'mensaje': 'Transcripción subida exitosamente',
             'simulacro_id': simulacro.id,
-            'caracteres': len(contenido),
-            'lineas': len(contenido.split('\n'))
+            'caracteres': estadisticas['caracteres'],
+            'lineas': estadisticas['lineas']
         })
 
 
@@ -913,8 +1058,7 @@ class GenerarRecomendacionIAView(APIView):
             simulacro = Simulacro.objects.get(
                 pk=pk,
                 asesor=request.user,
-                estado='completado',
-                is_deleted=False
+                estado='completado'
             )
         except Simulacro.DoesNotExist:
             return Response(
@@ -923,7 +1067,7 @@ class GenerarRecomendacionIAView(APIView):
             )
         
         # Verificar transcripción (escenario 8)
-        if not simulacro.transcripcion_texto:
+        if not simulacro.tiene_transcripcion():
             return Response({
                 'error': f'No es posible generar recomendaciones: la transcripción del simulacro SIM-{simulacro.id:03d} no está disponible'
             }, status=status.HTTP_400_BAD_REQUEST)
@@ -959,7 +1103,7 @@ class GenerarRecomendacionIAView(APIView):
         try:
             from .ai_service import analizar_simulacro
             resultado = analizar_simulacro(
-                simulacro.transcripcion_texto, 
+                simulacro.obtener_transcripcion(), 
                 tipo_visa,
                 asesor_id=request.user.id  # Usa la configuración del asesor
             )
@@ -1000,20 +1144,20 @@ class GenerarRecomendacionIAView(APIView):
                 'seguridad': resultado.seguridad,
                 'pertinencia': resultado.pertinencia
             }
-            recomendacion.save()
-            
-            # Marcar simulacro como analizado
-            simulacro.analisis_ia_completado = True
-            simulacro.analisis_ia_fecha = timezone.now()
-            simulacro.save()
-            
-            # Notificar al cliente
-            try:
-                from apps.notificaciones.services import notificacion_service
-                notificacion_service.notificar_recomendaciones_listas(simulacro)
-            except Exception as e:
-                import logging
-                logging.getLogger(__name__).error(f"Error notificando: {e}")
+            with transaction.atomic():
+                recomendacion.save()
+                
+                # Marcar simulacro como analizado
+                simulacro.analisis_ia_completado = True
+                simulacro.analisis_ia_fecha = timezone.now()
+                simulacro.save()
+                
+                # El cliente se notifica desde el outbox, después del commit
+                publicar(
+                    'recomendaciones.listas',
+                    f'recomendaciones.listas:{recomendacion.pk}:ia',
+                    simulacro_id=simulacro.pk
+                )
             
             return Response({
                 'mensaje': 'Recomendaciones generadas exitosamente por IA',
@@ -1032,6 +1176,7 @@ class GenerarRecomendacionIAView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@presupuesto_consultas(3)
 class SimulacrosCompletadosAsesorView(generics.ListAPIView):
     """
     GET /api/simulacros/completados/
@@ -1043,11 +1188,63 @@ class SimulacrosCompletadosAsesorView(generics.ListAPIView):
     def get_queryset(self):
         return Simulacro.objects.filter(
             asesor=self.request.user,
-            estado='completado',
-            is_deleted=False
-        ).select_related('cliente', 'solicitud').order_by('-fecha_fin')
+            estado='completado'
+        ).select_related('cliente', 'solicitud', 'recomendacion').order_by('-fecha_fin')
 
 
+class BuscarSimulacrosView(APIView):
+    """
+    GET /api/simulacros/buscar/?q=<texto>&page=<n>
+    Búsqueda de texto completo en transcripciones y recomendaciones
+    de los simulacros del asesor, ordenada por relevancia.
+    """
+    permission_classes = [permissions.IsAuthenticated, EsAsesor]
+    
+    def get(self, request):
+        from rest_framework.settings import api_settings
+        from .busqueda import buscar
+        
+        texto = request.query_params.get('q', '').strip()
+        if len(texto) < 2:
+            return Response(
+                {'error': 'El término de búsqueda debe tener al menos 2 caracteres'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            pagina = max(int(request.query_params.get('page', 1)), 1)
+        except ValueError:
+            pagina = 1
+        tamano = api_settings.PAGE_SIZE
+        
+        total, coincidencias = buscar(
+            request.user.id, texto, limite=tamano, desplazamiento=(pagina - 1) * tamano
+        )
+        
+        simulacros = Simulacro.objects.filter(
+            pk__in=[c['simulacro_id'] for c in coincidencias]
+        ).select_related('cliente', 'asesor', 'solicitud', 'recomendacion').in_bulk()
+        
+        resultados = []
+        for coincidencia in coincidencias:
+            simulacro = simulacros.get(coincidencia['simulacro_id'])
+            if simulacro is None:
+                continue
+            datos = SimulacroListSerializer(simulacro).data
+            datos['rank'] = coincidencia['rank']
+            # Sale del extracto del índice, ya escapado para HTML
+            datos['fragmento'] = coincidencia['fragmento']
+            resultados.append(datos)
+        
+        return Response({
+            'count': total,
+            'page': pagina,
+            'total_pages': (total + tamano - 1) // tamano,
+            'results': resultados
+        })
+
+
+@presupuesto_consultas(2)
 class RecomendacionClienteView(APIView):
     """
     GET /api/mis-recomendaciones/ - Lista todas las recomendaciones del cliente
@@ -1067,10 +1264,9 @@ class RecomendacionClienteView(APIView):
         # Si se especifica pk, obtener recomendación de un simulacro específico
         if pk:
             try:
-                simulacro = Simulacro.objects.select_related('asesor', 'solicitud').get(
+                simulacro = Simulacro.objects.select_related('asesor', 'solicitud', 'recomendacion').get(
                     pk=pk,
-                    cliente=user,
-                    is_deleted=False
+                    cliente=user
                 )
             except Simulacro.DoesNotExist:
                 return Response(
@@ -1110,34 +1306,33 @@ class RecomendacionClienteView(APIView):
         simulacros = Simulacro.objects.filter(
             cliente=user,
             estado='completado',
-            is_deleted=False
-        ).select_related('asesor', 'solicitud')
+            recomendacion__publicada=True
+        ).select_related('asesor', 'solicitud', 'recomendacion')
         
         recomendaciones = []
         for sim in simulacros:
-            if hasattr(sim, 'recomendacion') and sim.recomendacion.publicada:
-                rec = sim.recomendacion
-                recomendaciones.append({
-                    'id': rec.id,
-                    'simulacro_id': sim.id,
-                    'simulacro_fecha': sim.fecha,
-                    'asesor_nombre': sim.asesor.get_full_name() if sim.asesor else None,
-                    'fecha_generacion': rec.fecha_generacion,
-                    'estado_feedback': rec.estado_feedback,
-                    'nivel_preparacion': rec.nivel_preparacion,
-                    'indicadores': {
-                        'claridad': rec.claridad,
-                        'coherencia': rec.coherencia,
-                        'seguridad': rec.seguridad,
-                        'pertinencia': rec.pertinencia
-                    },
-                    'fortalezas': rec.fortalezas,
-                    'puntos_mejora': rec.puntos_mejora,
-                    'recomendaciones': rec.recomendaciones,
-                    'recomendaciones_por_impacto': rec.organizar_por_impacto(),
-                    'accion_sugerida': rec.accion_sugerida or rec.obtener_accion_sugerida(),
-                    'resumen_ejecutivo': rec.resumen_ejecutivo
-                })
+            rec = sim.recomendacion
+            recomendaciones.append({
+                'id': rec.id,
+                'simulacro_id': sim.id,
+                'simulacro_fecha': sim.fecha,
+                'asesor_nombre': sim.asesor.get_full_name() if sim.asesor else None,
+                'fecha_generacion': rec.fecha_generacion,
+                'estado_feedback': rec.estado_feedback,
+                'nivel_preparacion': rec.nivel_preparacion,
+                'indicadores': {
+                    'claridad': rec.claridad,
+                    'coherencia': rec.coherencia,
+                    'seguridad': rec.seguridad,
+                    'pertinencia': rec.pertinencia
+                },
+                'fortalezas': rec.fortalezas,
+                'puntos_mejora': rec.puntos_mejora,
+                'recomendaciones': rec.recomendaciones,
+                'recomendaciones_por_impacto': rec.organizar_por_impacto(),
+                'accion_sugerida': rec.accion_sugerida or rec.obtener_accion_sugerida(),
+                'resumen_ejecutivo': rec.resumen_ejecutivo
+            })
         
         return Response(recomendaciones)
 
@@ -1625,8 +1820,7 @@ class SimulacroFeedbackView(APIView):
         try:
             simulacro = Simulacro.objects.get(
                 pk=pk,
-                asesor=request.user,
-                is_deleted=False
+                asesor=request.user
             )
         except Simulacro.DoesNotExist:
             return Response(
@@ -1829,7 +2023,7 @@ class DescargarPDFSimulacroView(APIView):
         try:
             simulacro = Simulacro.objects.select_related(
                 'cliente', 'asesor', 'solicitud'
-            ).get(pk=pk, is_deleted=False)
+            ).get(pk=pk)
         except Simulacro.DoesNotExist:
             return Response(
                 {'error': 'Simulacro no encontrado'},
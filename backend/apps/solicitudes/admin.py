@@ -2,20 +2,48 @@
 Admin para la app Solicitudes.
 """
 from django.contrib import admin
-from .models import Solicitud, Documento, Entrevista
+from .models import (
+    AlertaVencimiento, Documento, Entrevista, EstadoSolicitud, Solicitud, TrabajoImportacion,
+    recalcular_contadores,
+)
+
+
+class EstadoSolicitudInline(admin.TabularInline):
+    """Historial de estados (solo lectura: lo escribe Solicitud.save())."""
+    model = EstadoSolicitud
+    fields = ['created_at', 'estado_anterior', 'estado_nuevo', 'usuario_responsable', 'observacion']
+    readonly_fields = fields
+    ordering = ['created_at']
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(Solicitud)
 class SolicitudAdmin(admin.ModelAdmin):
     list_display = [
         'id', 'cliente', 'tipo_visa', 'embajada', 'estado',
-        'asesor', 'created_at'
+        'asesor', 'progreso_pct', 'created_at'
     ]
-    list_filter = ['estado', 'tipo_visa', 'embajada', 'created_at']
+    list_filter = ['estado', 'tipo_visa', 'embajada', 'is_deleted', 'created_at']
     search_fields = ['cliente__email', 'cliente__first_name', 'cliente__last_name']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = [
+        'created_at', 'updated_at', 'documentos_total',
+        'documentos_aprobados', 'documentos_rechazados', 'progreso_pct'
+    ]
     raw_id_fields = ['cliente', 'asesor']
     date_hierarchy = 'created_at'
+    inlines = [EstadoSolicitudInline]
+
+    def get_queryset(self, request):
+        # El admin también muestra las solicitudes eliminadas
+        return Solicitud.all_objects.select_related('cliente', 'asesor')
+
+    def save_model(self, request, obj, form, change):
+        obj.responsable_cambio = request.user
+        super().save_model(request, obj, form, change)
     
     fieldsets = (
         ('Información General', {
@@ -27,6 +55,9 @@ class SolicitudAdmin(admin.ModelAdmin):
         ('Datos', {
             'fields': ('datos_personales', 'documentos', 'observaciones', 'notas_asesor')
         }),
+        ('Progreso de documentos', {
+            'fields': ('documentos_total', 'documentos_aprobados', 'documentos_rechazados', 'progreso_pct')
+        }),
         ('Fechas', {
             'fields': ('fecha_revision', 'fecha_envio_embajada', 'created_at', 'updated_at'),
             'classes': ('collapse',)
@@ -36,11 +67,43 @@ class SolicitudAdmin(admin.ModelAdmin):
 
 @admin.register(Documento)
 class DocumentoAdmin(admin.ModelAdmin):
-    list_display = ['id', 'nombre', 'solicitud', 'estado', 'created_at']
-    list_filter = ['estado', 'created_at']
+    list_display = ['id', 'nombre', 'solicitud', 'estado', 'fecha_vencimiento', 'created_at']
+    list_filter = ['estado', 'created_at', 'fecha_vencimiento']
     search_fields = ['nombre', 'solicitud__id']
     raw_id_fields = ['solicitud', 'revisado_por']
 
+    def get_readonly_fields(self, request, obj=None):
+        # Mover un documento descuadraría los contadores de ambas solicitudes
+        if obj is not None:
+            return ['solicitud']
+        return []
+
+    def delete_queryset(self, request, queryset):
+        # El borrado masivo no pasa por Documento.delete()
+        solicitudes = set(queryset.values_list('solicitud_id', flat=True))
+        super().delete_queryset(request, queryset)
+        recalcular_contadores(Solicitud.all_objects.filter(pk__in=solicitudes))
+
+
+@admin.register(AlertaVencimiento)
+class AlertaVencimientoAdmin(admin.ModelAdmin):
+    list_display = ['id', 'documento', 'ventana', 'fecha_vencimiento', 'created_at']
+    list_filter = ['ventana', 'fecha_vencimiento']
+    search_fields = ['documento__nombre', 'documento__solicitud__id']
+    raw_id_fields = ['documento']
+
+
+@admin.register(TrabajoImportacion)
+class TrabajoImportacionAdmin(admin.ModelAdmin):
+    list_display = ['id', 'estado', 'usuario', 'created_at', 'completada_en']
+    list_filter = ['estado']
+    date_hierarchy = 'created_at'
+    raw_id_fields = ['usuario']
+    readonly_fields = ['usuario', 'archivo', 'estado', 'resumen', 'error', 'created_at', 'completada_en']
+
+    def has_add_permission(self, request):
+        return False
+
 
 @admin.register(Entrevista)
 class EntrevistaAdmin(admin.ModelAdmin):
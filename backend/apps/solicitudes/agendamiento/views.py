@@ -5,8 +5,9 @@ from rest_framework import status, generics, permissions
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import timedelta
 
+from apps.core.consultas import presupuesto_consultas
 from apps.solicitudes.models import Solicitud, Entrevista
 
 
@@ -24,6 +25,7 @@ REGLAS_EMBAJADA = {
 }
 
 
+@presupuesto_consultas(2)
 class EntrevistasListView(generics.ListAPIView):
     """
     GET /api/entrevistas/
@@ -37,13 +39,13 @@ class EntrevistasListView(generics.ListAPIView):
         if user.rol == 'cliente':
             entrevistas = Entrevista.objects.filter(
                 solicitud__cliente=user
-            ).select_related('solicitud')
+            ).select_related('solicitud__cliente')
         elif user.rol == 'asesor':
             entrevistas = Entrevista.objects.filter(
                 solicitud__asesor=user
-            ).select_related('solicitud')
+            ).select_related('solicitud__cliente')
         else:
-            entrevistas = Entrevista.objects.all().select_related('solicitud')
+            entrevistas = Entrevista.objects.all().select_related('solicitud__cliente')
         
         # Filtros
         estado = request.query_params.get('estado')
@@ -80,11 +82,15 @@ class EntrevistaDetailView(APIView):
         
         try:
             if user.rol == 'cliente':
-                entrevista = Entrevista.objects.get(pk=pk, solicitud__cliente=user)
+                entrevista = Entrevista.objects.select_related('solicitud__cliente').get(
+                    pk=pk, solicitud__cliente=user
+                )
             elif user.rol == 'asesor':
-                entrevista = Entrevista.objects.get(pk=pk, solicitud__asesor=user)
+                entrevista = Entrevista.objects.select_related('solicitud__cliente').get(
+                    pk=pk, solicitud__asesor=user
+                )
             else:
-                entrevista = Entrevista.objects.get(pk=pk)
+                entrevista = Entrevista.objects.select_related('solicitud__cliente').get(pk=pk)
         except Entrevista.DoesNotExist:
             return Response(
                 {'error': 'Entrevista no encontrada'},
@@ -173,7 +179,7 @@ class AgendarEntrevistaView(APIView):
             )
         
         try:
-            solicitud = Solicitud.objects.get(pk=solicitud_id, is_deleted=False)
+            solicitud = Solicitud.objects.get(pk=solicitud_id)
         except Solicitud.DoesNotExist:
             return Response(
                 {'error': 'Solicitud no encontrada'},
@@ -205,6 +211,7 @@ class AgendarEntrevistaView(APIView):
         
         # Actualizar estado de la solicitud
         solicitud.estado = 'entrevista_agendada'
+        solicitud.responsable_cambio = request.user
         solicitud.save()
         
         # Crear notificación
@@ -356,9 +363,7 @@ class CancelarEntrevistaView(APIView):
         reglas = REGLAS_EMBAJADA.get(embajada, {'min_horas_cancelacion': 24})
         
         # Calcular horas restantes
-        fecha_entrevista = datetime.combine(entrevista.fecha, entrevista.hora)
-        fecha_entrevista = timezone.make_aware(fecha_entrevista)
-        horas_restantes = (fecha_entrevista - timezone.now()).total_seconds() / 3600
+        horas_restantes = (entrevista.momento_programado() - timezone.now()).total_seconds() / 3600
         
         if horas_restantes < reglas['min_horas_cancelacion']:
             return Response({
@@ -393,9 +398,7 @@ class VerificarCancelacionView(APIView):
         embajada = entrevista.solicitud.embajada
         reglas = REGLAS_EMBAJADA.get(embajada, {'min_horas_cancelacion': 24})
         
-        fecha_entrevista = datetime.combine(entrevista.fecha, entrevista.hora)
-        fecha_entrevista = timezone.make_aware(fecha_entrevista)
-        horas_restantes = (fecha_entrevista - timezone.now()).total_seconds() / 3600
+        horas_restantes = (entrevista.momento_programado() - timezone.now()).total_seconds() / 3600
         
         puede = horas_restantes >= reglas['min_horas_cancelacion']
         
@@ -456,6 +459,7 @@ class CalendarioEventosView(APIView):
         return Response(eventos)
 
 
+@presupuesto_consultas(2)
 class EntrevistasProximasView(APIView):
     """
     GET /api/entrevistas/proximas/?dias=7
@@ -491,7 +495,7 @@ class EntrevistasProximasView(APIView):
             )
         
         data = []
-        for e in entrevistas.order_by('fecha', 'hora'):
+        for e in entrevistas.select_related('solicitud__cliente').order_by('fecha', 'hora'):
             data.append({
                 'id': e.id,
                 'solicitud_id': e.solicitud_id,
@@ -634,7 +638,7 @@ class SimularCitaEmbajadaView(APIView):
             )
         
         try:
-            solicitud = Solicitud.objects.get(pk=solicitud_id, is_deleted=False)
+            solicitud = Solicitud.objects.get(pk=solicitud_id)
         except Solicitud.DoesNotExist:
             return Response(
                 {'error': 'Solicitud no encontrada'},
@@ -677,6 +681,7 @@ class SimularCitaEmbajadaView(APIView):
         
         # Actualizar estado de la solicitud
         solicitud.estado = 'entrevista_agendada'
+        solicitud.responsable_cambio = request.user
         solicitud.save()
         
         return Response({
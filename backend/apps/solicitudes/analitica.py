@@ -0,0 +1,226 @@
+"""
+Analítica del ciclo de vida de las solicitudes sobre el historial de estados.
+
+- Permanencia: cuánto tiempo pasa una solicitud en cada estado. La salida
+  de cada fila del historial se obtiene en SQL con LEAD(created_at) OVER
+  (PARTITION BY solicitud ORDER BY created_at); en Python solo se agrupan
+  las duraciones y se calculan los percentiles.
+- Embudo: cuántas solicitudes alcanzan cada etapa del recorrido y la
+  conversión entre etapas, con una consulta agrupada por solicitud.
+
+Ambas se desglosan por embajada, tipo de visa y asesor, y excluyen las
+solicitudes eliminadas (soft delete). El resultado es
+costoso de calcular, así que se guarda en caché (ver `obtener()`); la
+tarea `solicitudes.calcular_analitica` lo precalcula periódicamente.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, F, IntegerField, Max, Value, When, Window
+from django.db.models.functions import Lead
+from django.utils import timezone
+
+from .models import EstadoSolicitud
+
+logger = logging.getLogger(__name__)
+
+# Etapas del embudo, en orden. 'rechazada' es una salida, no una etapa.
+ETAPAS = [
+    'borrador', 'pendiente', 'en_revision', 'aprobada',
+    'enviada_embajada', 'entrevista_agendada', 'completada',
+]
+ESTADOS_FINALES = ('rechazada', 'completada')
+
+DIMENSIONES = {
+    'embajada': 'solicitud__embajada',
+    'tipo_visa': 'solicitud__tipo_visa',
+    'asesor': 'solicitud__asesor_id',
+}
+
+PERCENTILES = (50, 75, 90, 95)
+
+
+def _clave_cache(dias):
+    return f'solicitudes:analitica:{dias}'
+
+
+# =====================================================
+# PERCENTILES
+# =====================================================
+
+def percentil(ordenados, p):
+    """Percentil `p` (0-100) con interpolación lineal sobre una lista ordenada."""
+    if not ordenados:
+        return None
+    posicion = (len(ordenados) - 1) * p / 100
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    fraccion = posicion - inferior
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * fraccion
+
+
+def _resumir(horas, en_curso):
+    horas.sort()
+    resumen = {
+        'transiciones': len(horas),
+        'en_curso': en_curso,
+        'media_horas': round(sum(horas) / len(horas), 2) if horas else None,
+    }
+    for p in PERCENTILES:
+        valor = percentil(horas, p)
+        resumen[f'p{p}_horas'] = round(valor, 2) if valor is not None else None
+    return resumen
+
+
+# =====================================================
+# PERMANENCIA POR ESTADO
+# =====================================================
+
+def permanencia(desde=None):
+    """
+    Percentiles de horas en cada estado: {'global': {estado: resumen},
+    'embajada': {valor: {estado: resumen}}, ...}. Las solicitudes que
+    siguen en un estado cuentan en `en_curso`, no en los percentiles.
+    """
+    historial = EstadoSolicitud.objects.filter(solicitud__is_deleted=False).order_by().annotate(
+        salida=Window(
+            Lead('created_at'),
+            partition_by=[F('solicitud_id')],
+            order_by=F('created_at').asc(),
+        )
+    )
+    if desde is not None:
+        # El WHERE se evalúa antes que LEAD, pero no cambia las salidas: la
+        # fila siguiente de una fila incluida es posterior, así que también
+        # está incluida
+        historial = historial.filter(created_at__gte=desde)
+    filas = historial.values_list(
+        'estado_nuevo', 'created_at', 'salida', *DIMENSIONES.values()
+    )
+
+    # (dimension, valor, estado) -> [horas]
+    duraciones = defaultdict(list)
+    abiertas = defaultdict(int)
+    for estado, entrada, salida, *valores in filas.iterator(chunk_size=5000):
+        claves = [('global', '', estado)] + [
+            (dimension, valor, estado)
+            for dimension, valor in zip(DIMENSIONES, valores)
+            if valor is not None
+        ]
+        if salida is None:
+            if estado not in ESTADOS_FINALES:
+                for clave in claves:
+                    abiertas[clave] += 1
+            continue
+        horas = (salida - entrada).total_seconds() / 3600
+        for clave in claves:
+            duraciones[clave].append(horas)
+
+    resultado = {'global': {}, **{dimension: {} for dimension in DIMENSIONES}}
+    for clave in duraciones.keys() | abiertas.keys():
+        dimension, valor, estado = clave
+        destino = resultado['global'] if dimension == 'global' else (
+            resultado[dimension].setdefault(str(valor), {})
+        )
+        destino[estado] = _resumir(duraciones.get(clave, []), abiertas.get(clave, 0))
+    return resultado
+
+
+# =====================================================
+# EMBUDO DE CONVERSIÓN
+# =====================================================
+
+def _embudo_de(conteos, rechazadas):
+    """Alcanzadas y conversión por etapa a partir de la etapa máxima de cada solicitud."""
+    total = sum(conteos.values())
+    etapas = []
+    alcanzadas = total
+    anterior = None
+    for indice, etapa in enumerate(ETAPAS):
+        if indice:
+            alcanzadas -= conteos.get(indice - 1, 0)
+        etapas.append({
+            'etapa': etapa,
+            'alcanzadas': alcanzadas,
+            'conversion_etapa': round(alcanzadas / anterior, 4) if anterior else None,
+            'conversion_total': round(alcanzadas / total, 4) if total else None,
+        })
+        anterior = alcanzadas
+    return {'solicitudes': total, 'rechazadas': rechazadas, 'etapas': etapas}
+
+
+def embudo(desde=None):
+    """
+    Embudo de las solicitudes con actividad desde `desde`. Una solicitud
+    que alcanzó una etapa cuenta también en todas las anteriores.
+    """
+    historial = EstadoSolicitud.objects.filter(solicitud__is_deleted=False).order_by()
+    if desde is not None:
+        historial = historial.filter(solicitud__created_at__gte=desde)
+    por_solicitud = historial.values('solicitud_id', *DIMENSIONES.values()).annotate(
+        etapa=Max(Case(
+            *[When(estado_nuevo=etapa, then=Value(i)) for i, etapa in enumerate(ETAPAS)],
+            default=Value(0),
+            output_field=IntegerField(),
+        )),
+        rechazada=Max(Case(
+            When(estado_nuevo='rechazada', then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
+        )),
+    )
+
+    # (dimension, valor) -> {etapa_max: n}
+    conteos = defaultdict(lambda: defaultdict(int))
+    rechazadas = defaultdict(int)
+    for fila in por_solicitud.iterator(chunk_size=5000):
+        claves = [('global', '')] + [
+            (dimension, fila[campo])
+            for dimension, campo in DIMENSIONES.items()
+            if fila[campo] is not None
+        ]
+        for clave in claves:
+            conteos[clave][fila['etapa']] += 1
+            rechazadas[clave] += fila['rechazada']
+
+    resultado = {dimension: {} for dimension in DIMENSIONES}
+    resultado['global'] = _embudo_de(conteos[('global', '')], rechazadas[('global', '')])
+    for (dimension, valor), etapas in conteos.items():
+        if dimension != 'global':
+            resultado[dimension][str(valor)] = _embudo_de(etapas, rechazadas[(dimension, valor)])
+    return resultado
+
+
+# =====================================================
+# CÁLCULO EN LOTE Y CACHÉ
+# =====================================================
+
+def calcular(dias=None):
+    """Calcula permanencia y embudo (últimos `dias`, o todo el historial)."""
+    ahora = timezone.now()
+    desde = ahora - timedelta(days=dias) if dias else None
+    return {
+        'dias': dias,
+        'generado_en': ahora.isoformat(),
+        'permanencia': permanencia(desde),
+        'embudo': embudo(desde),
+    }
+
+
+def obtener(dias=None):
+    """Analítica desde la caché; si no está, la calcula y la guarda."""
+    clave = _clave_cache(dias)
+    datos = cache.get(clave)
+    if datos is None:
+        datos = precalcular(dias)
+    return datos
+
+
+def precalcular(dias=None):
+    """Recalcula y reemplaza la entrada en caché (tarea periódica)."""
+    datos = calcular(dias)
+    cache.set(_clave_cache(dias), datos, settings.ANALITICA_SOLICITUDES_TTL)
+    return datos
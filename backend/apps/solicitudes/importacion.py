@@ -0,0 +1,397 @@
+"""
+Importación masiva de clientes y solicitudes desde CSV (alta de agencias).
+
+El archivo se lee como stream y se procesa por lotes de IMPORTACION_LOTE
+filas:
+
+1. Validación de cada fila con serializer más los chequeos entre filas:
+   emails ya registrados (una consulta por lote) y repetidos.
+2. Contraseñas hasheadas en un pool de procesos (PBKDF2 es CPU-bound).
+   Solo en el comando: la API importa en segundo plano con procesos=1
+   (ver ejecutar_trabajo), porque ni un proceso web con hilos ni un
+   worker de Celery pueden bifurcar hijos sin riesgo.
+3. Escritura con bulk_create en una transacción por lote: usuarios,
+   solicitudes, historial de estados y notificaciones. Si un registro
+   concurrente toma un email entre la consulta y el insert, las filas de
+   ese email se reportan y el resto del lote se vuelve a escribir.
+
+Las solicitudes se reparten entre los asesores activos con el mismo
+criterio que la creación individual (menor carga del día con cupo), pero
+para todo el archivo a la vez. Un email repetido en el archivo crea un
+solo cliente con varias solicitudes. Las filas con errores se omiten y se
+reportan; con `simular=True` no se escribe nada.
+
+Columnas: email, first_name, last_name, tipo_visa, embajada (obligatorias),
+telefono, password, observaciones y datos_personales.<clave>.
+"""
+import csv
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import EstadoSolicitud, Solicitud
+
+Usuario = get_user_model()
+
+COLUMNAS_OBLIGATORIAS = ('email', 'first_name', 'last_name', 'tipo_visa', 'embajada')
+PREFIJO_DATOS = 'datos_personales.'
+OBSERVACION_HISTORIAL = 'Importación masiva'
+
+
+class ErrorImportacion(ValueError):
+    """El archivo no se puede importar (encabezados inválidos, demasiadas filas)."""
+
+
+class FilaImportacionSerializer(serializers.Serializer):
+    """Valida una fila del CSV (cliente + solicitud)."""
+    email = serializers.EmailField()
+    first_name = serializers.CharField(max_length=150)
+    last_name = serializers.CharField(max_length=150)
+    telefono = serializers.CharField(max_length=20, required=False, allow_blank=True, default='')
+    password = serializers.CharField(required=False, allow_blank=True, default='')
+    tipo_visa = serializers.ChoiceField(choices=Solicitud.TIPOS_VISA)
+    embajada = serializers.ChoiceField(choices=Solicitud.EMBAJADAS)
+    observaciones = serializers.CharField(required=False, allow_blank=True, default='')
+    datos_personales = serializers.DictField(required=False, default=dict)
+
+    def validate_email(self, value):
+        return Usuario.objects.normalize_email(value)
+
+    def validate_password(self, value):
+        # Sin contraseña: el cliente la define con la recuperación de cuenta
+        if value:
+            try:
+                validate_password(value)
+            except DjangoValidationError as e:
+                raise serializers.ValidationError(list(e.messages))
+        return value
+
+
+# =====================================================
+# ASIGNACIÓN BALANCEADA
+# =====================================================
+
+class Balanceador:
+    """
+    Reparte solicitudes entre asesores activos: cada una va al asesor con
+    menos asignaciones hoy que aún tiene cupo (limite_solicitudes_diarias).
+    La carga inicial se lee en una consulta; el resto se lleva en un heap.
+    """
+
+    def __init__(self):
+        hoy = timezone.now().date()
+        asesores = Usuario.objects.filter(rol='asesor', is_active=True).annotate(
+            solicitudes_hoy=Count(
+                'solicitudes_asignadas',
+                filter=Q(solicitudes_asignadas__fecha_asignacion__date=hoy)
+            )
+        ).filter(solicitudes_hoy__lt=F('limite_solicitudes_diarias'))
+        self._heap = [(asesor.solicitudes_hoy, asesor.pk, asesor) for asesor in asesores]
+        heapq.heapify(self._heap)
+        self.asignaciones = {}
+
+    def siguiente(self):
+        """Asesor para la próxima solicitud, o None si no queda cupo."""
+        if not self._heap:
+            return None
+        carga, pk, asesor = heapq.heappop(self._heap)
+        if carga + 1 < asesor.limite_solicitudes_diarias:
+            heapq.heappush(self._heap, (carga + 1, pk, asesor))
+        self.asignaciones[asesor.email] = self.asignaciones.get(asesor.email, 0) + 1
+        return asesor
+
+    def guardar(self):
+        """Instantánea de la carga, para deshacer un lote que no se escribió."""
+        return list(self._heap), dict(self.asignaciones)
+
+    def restaurar(self, estado):
+        self._heap, self.asignaciones = list(estado[0]), dict(estado[1])
+
+
+# =====================================================
+# CONTRASEÑAS
+# =====================================================
+
+def _iniciar_proceso():
+    # Con el método 'spawn' el proceso hijo arranca sin Django configurado
+    import django
+    django.setup()
+
+
+def hashear_contrasenas(contrasenas, pool=None):
+    """make_password para cada contraseña; vacías -> contraseña inutilizable."""
+    pendientes = [(i, c) for i, c in enumerate(contrasenas) if c]
+    hashes = [None if c else make_password(None) for c in contrasenas]
+    if pool is not None and len(pendientes) > 1:
+        resultados = pool.map(make_password, [c for _, c in pendientes], chunksize=8)
+    else:
+        resultados = map(make_password, [c for _, c in pendientes])
+    for (i, _), hash_ in zip(pendientes, resultados):
+        hashes[i] = hash_
+    return hashes
+
+
+# =====================================================
+# IMPORTACIÓN
+# =====================================================
+
+class Importacion:
+    """
+    Importa un CSV (iterable de líneas de texto).
+
+    Uso:
+        resultado = Importacion(responsable=admin, simular=True).ejecutar(lineas)
+    """
+
+    def __init__(self, responsable=None, simular=False, lote=None, procesos=None):
+        self.responsable = responsable
+        self.simular = simular
+        self.lote = lote or settings.IMPORTACION_LOTE
+        self.procesos = settings.IMPORTACION_PROCESOS_HASH if procesos is None else procesos
+        self.balanceador = Balanceador()
+        # email -> Usuario creado (o None si su primera fila tuvo errores)
+        self.clientes = {}
+        self.filas = 0
+        self.usuarios_creados = 0
+        self.solicitudes_creadas = 0
+        self.notificaciones_creadas = 0
+        self.sin_asesor = 0
+        self.errores = []
+
+    def ejecutar(self, lineas):
+        lector = csv.DictReader(lineas)
+        faltantes = [c for c in COLUMNAS_OBLIGATORIAS if c not in (lector.fieldnames or [])]
+        if faltantes:
+            raise ErrorImportacion(f"Faltan columnas obligatorias: {', '.join(faltantes)}")
+
+        pool = None
+        if not self.simular and self.procesos > 1:
+            pool = ProcessPoolExecutor(max_workers=self.procesos, initializer=_iniciar_proceso)
+        try:
+            lote = []
+            # La fila 1 es el encabezado
+            for numero, fila in enumerate(lector, start=2):
+                lote.append((numero, fila))
+                if len(lote) >= self.lote:
+                    self._procesar_lote(lote, pool)
+                    lote = []
+            if lote:
+                self._procesar_lote(lote, pool)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return self.resumen()
+
+    def resumen(self):
+        return {
+            'simulacion': self.simular,
+            'filas': self.filas,
+            'filas_con_error': len(self.errores),
+            'usuarios_creados': self.usuarios_creados,
+            'solicitudes_creadas': self.solicitudes_creadas,
+            'notificaciones_creadas': self.notificaciones_creadas,
+            'sin_asesor': self.sin_asesor,
+            'asignaciones': self.balanceador.asignaciones,
+            'errores': sorted(self.errores, key=lambda error: error['fila']),
+        }
+
+    # -------------------------------------------------
+    # Lotes
+    # -------------------------------------------------
+
+    @staticmethod
+    def _normalizar(fila):
+        datos = {'datos_personales': {}}
+        for columna, valor in fila.items():
+            if columna is None:
+                continue
+            valor = (valor or '').strip()
+            if columna.startswith(PREFIJO_DATOS):
+                if valor:
+                    datos['datos_personales'][columna[len(PREFIJO_DATOS):]] = valor
+            else:
+                datos[columna] = valor
+        return datos
+
+    def _error(self, numero, email, errores):
+        self.errores.append({'fila': numero, 'email': email, 'errores': errores})
+
+    def _procesar_lote(self, lote, pool):
+        self.filas += len(lote)
+        validas = []  # (numero, datos validados)
+        for numero, fila in lote:
+            serializer = FilaImportacionSerializer(data=self._normalizar(fila))
+            if serializer.is_valid():
+                validas.append((numero, serializer.validated_data))
+            else:
+                email = serializer.initial_data.get('email', '')
+                self._error(numero, email, serializer.errors)
+                self.clientes.setdefault(email, None)
+        if not validas:
+            return
+
+        # Una consulta por lote para los emails ya registrados
+        registrados = set(Usuario.objects.filter(
+            email__in={datos['email'] for _, datos in validas}
+        ).values_list('email', flat=True))
+
+        nuevos = {}  # email -> (Usuario sin guardar, password)
+        filas = []   # (numero, datos, email)
+        for numero, datos in validas:
+            email = datos['email']
+            if email in registrados and email not in self.clientes:
+                self._error(numero, email, {'email': ['Ya existe un usuario con este email.']})
+                continue
+            if email in self.clientes and self.clientes[email] is None:
+                self._error(numero, email, {'email': ['La primera fila de este cliente tiene errores.']})
+                continue
+            if email not in self.clientes and email not in nuevos:
+                nuevos[email] = (
+                    Usuario(
+                        email=email,
+                        first_name=datos['first_name'],
+                        last_name=datos['last_name'],
+                        telefono=datos['telefono'],
+                        rol='cliente',
+                    ),
+                    datos['password'],
+                )
+            filas.append((numero, datos, email))
+
+        if self.simular:
+            for email in nuevos:
+                self.clientes[email] = Usuario(email=email)
+            self.usuarios_creados += len(nuevos)
+            for _ in filas:
+                if self.balanceador.siguiente() is None:
+                    self.sin_asesor += 1
+            self.solicitudes_creadas += len(filas)
+            return
+
+        hashes = hashear_contrasenas([password for _, password in nuevos.values()], pool)
+        for (usuario, _), hash_ in zip(nuevos.values(), hashes):
+            usuario.password = hash_
+        self._escribir(nuevos, filas)
+
+    def _escribir(self, nuevos, filas):
+        estado = self.balanceador.guardar()
+        try:
+            self._insertar(nuevos, filas)
+        except IntegrityError:
+            # El lote se revirtió: se deshacen las asignaciones y los clientes
+            self.balanceador.restaurar(estado)
+            for email in nuevos:
+                self.clientes.pop(email, None)
+            # Emails registrados entre la consulta del lote y el insert
+            tomados = set(Usuario.objects.filter(email__in=list(nuevos)).values_list('email', flat=True))
+            if not tomados:
+                for numero, _, email in filas:
+                    self._error(numero, email, {'non_field_errors': ['No se pudo guardar el lote.']})
+                return
+            for numero, _, email in filas:
+                if email in tomados:
+                    self._error(numero, email, {'email': ['Ya existe un usuario con este email.']})
+            self._escribir(
+                {email: nuevo for email, nuevo in nuevos.items() if email not in tomados},
+                [fila for fila in filas if fila[2] not in tomados],
+            )
+
+    def _insertar(self, nuevos, filas):
+        from apps.notificaciones.services import NotificacionService
+
+        ahora = timezone.now()
+        sin_asesor = 0
+        with transaction.atomic():
+            creados = Usuario.objects.bulk_create([usuario for usuario, _ in nuevos.values()])
+            for usuario in creados:
+                self.clientes[usuario.email] = usuario
+
+            solicitudes = []
+            for _, datos, email in filas:
+                asesor = self.balanceador.siguiente()
+                if asesor is None:
+                    sin_asesor += 1
+                solicitudes.append(Solicitud(
+                    cliente=self.clientes[email],
+                    asesor=asesor,
+                    tipo_visa=datos['tipo_visa'],
+                    embajada=datos['embajada'],
+                    estado='pendiente',
+                    datos_personales=datos['datos_personales'],
+                    observaciones=datos['observaciones'],
+                    fecha_asignacion=ahora if asesor else None,
+                ))
+            # bulk_create no pasa por Solicitud.save(): el historial se escribe aquí
+            solicitudes = Solicitud.objects.bulk_create(solicitudes)
+            EstadoSolicitud.objects.bulk_create([
+                EstadoSolicitud(
+                    solicitud=solicitud,
+                    estado_anterior='',
+                    estado_nuevo='pendiente',
+                    observacion=OBSERVACION_HISTORIAL,
+                    usuario_responsable=self.responsable,
+                )
+                for solicitud in solicitudes
+            ])
+
+            notificaciones = []
+            for solicitud in solicitudes:
+                notificaciones.append(NotificacionService.construir_solicitud_creada(solicitud))
+                if solicitud.asesor_id:
+                    notificaciones.extend(NotificacionService.construir_solicitud_asignada(solicitud))
+            NotificacionService.crear_en_lote(notificaciones)
+
+        self.sin_asesor += sin_asesor
+        self.usuarios_creados += len(creados)
+        self.solicitudes_creadas += len(solicitudes)
+        self.notificaciones_creadas += len(notificaciones)
+
+
+def ejecutar_trabajo(trabajo):
+    """
+    Importa el CSV de un TrabajoImportacion pendiente y guarda el resumen.
+    Lo ejecuta la tarea solicitudes.importar_clientes, sin pool de procesos:
+    corre en un hilo del proceso web o en un worker de Celery, que no
+    pueden bifurcar hijos. El CSV se borra al terminar.
+    """
+    import io
+
+    trabajo.estado = 'procesando'
+    trabajo.save(update_fields=['estado'])
+    importacion = Importacion(responsable=trabajo.usuario, procesos=1)
+    try:
+        with trabajo.archivo.open('rb') as archivo:
+            importacion.ejecutar(io.TextIOWrapper(archivo, encoding='utf-8-sig', newline=''))
+    except (ErrorImportacion, UnicodeDecodeError) as e:
+        # Los lotes anteriores al error ya se escribieron: quedan en el resumen
+        trabajo.estado = 'error'
+        trabajo.error = str(e)
+    else:
+        trabajo.estado = 'completada'
+    finally:
+        trabajo.archivo.delete(save=False)
+    trabajo.resumen = importacion.resumen()
+    trabajo.completada_en = timezone.now()
+    trabajo.save(update_fields=['archivo', 'estado', 'error', 'resumen', 'completada_en'])
+    return trabajo
+
+
+def escribir_reporte(errores, archivo):
+    """Reporte de errores en CSV: una línea por campo con error."""
+    escritor = csv.writer(archivo)
+    escritor.writerow(['fila', 'email', 'campo', 'mensaje'])
+    for error in errores:
+        for campo, mensajes in error['errores'].items():
+            if isinstance(mensajes, dict):
+                mensajes = [f'{clave}: {valor}' for clave, valor in mensajes.items()]
+            for mensaje in mensajes:
+                escritor.writerow([error['fila'], error['email'], campo, mensaje])
@@ -0,0 +1,76 @@
+"""
+Importa clientes y solicitudes desde un CSV (alta masiva de agencias).
+
+Uso:
+    python manage.py importar_clientes agencia.csv --simular
+    python manage.py importar_clientes agencia.csv --reporte errores.csv
+    python manage.py importar_clientes agencia.csv --lote 1000 --procesos 8
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.solicitudes.importacion import ErrorImportacion, Importacion, escribir_reporte
+
+
+class Command(BaseCommand):
+    help = 'Importa clientes y solicitudes desde un CSV (validación por lotes y bulk_create)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del CSV (UTF-8, con encabezados)')
+        parser.add_argument(
+            '--simular',
+            action='store_true',
+            help='Valida y calcula las asignaciones sin escribir nada',
+        )
+        parser.add_argument(
+            '--reporte',
+            help='Escribe el reporte de errores por fila en este CSV',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            help='Filas por lote (por defecto: IMPORTACION_LOTE)',
+        )
+        parser.add_argument(
+            '--procesos',
+            type=int,
+            help='Procesos para hashear contraseñas (por defecto: IMPORTACION_PROCESOS_HASH)',
+        )
+
+    def handle(self, *args, **options):
+        importacion = Importacion(
+            simular=options['simular'],
+            lote=options['lote'],
+            procesos=options['procesos'],
+        )
+        try:
+            with open(options['archivo'], newline='', encoding='utf-8-sig') as archivo:
+                resumen = importacion.ejecutar(archivo)
+        except (OSError, ErrorImportacion) as e:
+            raise CommandError(str(e))
+
+        if options['reporte']:
+            with open(options['reporte'], 'w', newline='', encoding='utf-8') as reporte:
+                escribir_reporte(resumen['errores'], reporte)
+
+        errores = resumen.pop('errores')
+        asignaciones = resumen.pop('asignaciones')
+        self.stdout.write(json.dumps(resumen, indent=2, ensure_ascii=False))
+        if asignaciones:
+            self.stdout.write(
+                f"Asignadas a {len(asignaciones)} asesores "
+                f"({min(asignaciones.values())}-{max(asignaciones.values())} por asesor)"
+            )
+        for error in errores[:10]:
+            self.stdout.write(self.style.WARNING(
+                f"Fila {error['fila']} ({error['email']}): {json.dumps(error['errores'], ensure_ascii=False)}"
+            ))
+        if len(errores) > 10:
+            self.stdout.write(self.style.WARNING(f"... {len(errores) - 10} filas más con errores"))
+
+        prefijo = 'Simulación' if options['simular'] else 'Importación'
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefijo} terminada: {resumen['solicitudes_creadas']} solicitudes, "
+            f"{resumen['usuarios_creados']} clientes, {len(errores)} filas con error"
+        ))
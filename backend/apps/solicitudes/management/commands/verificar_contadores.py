@@ -0,0 +1,74 @@
+"""
+Verifica los contadores de documentos materializados en Solicitud
+(documentos_total, documentos_aprobados, documentos_rechazados,
+progreso_pct) contra un recuento de la tabla de documentos.
+
+Recorre las solicitudes por rangos de pk; con --reparar recalcula las
+desviadas. Útil tras escrituras que no pasan por Documento.save()/delete()
+(SQL manual, restauraciones, scripts con bulk_create).
+
+Uso:
+    python manage.py verificar_contadores
+    python manage.py verificar_contadores --reparar --lote 10000
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Max
+
+from apps.solicitudes.models import (
+    CAMPOS_CONTADORES, Solicitud, expresiones_contadores, recalcular_contadores,
+)
+
+MAX_EJEMPLOS = 20
+
+
+class Command(BaseCommand):
+    help = 'Verifica (y opcionalmente repara) los contadores de documentos de las solicitudes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reparar',
+            action='store_true',
+            help='Recalcula los contadores de las solicitudes desviadas',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=5000,
+            help='Rango de pk revisado por consulta (por defecto: 5000)',
+        )
+
+    def handle(self, *args, **options):
+        lote = options['lote']
+        ultimo = Solicitud.all_objects.aggregate(maximo=Max('pk'))['maximo'] or 0
+        calculados = {f'calculado_{campo}': expresion for campo, expresion in expresiones_contadores().items()}
+
+        revisadas = 0
+        desviadas = []
+        for desde in range(1, ultimo + 1, lote):
+            rango = Solicitud.all_objects.filter(pk__gte=desde, pk__lt=desde + lote)
+            revisadas += rango.count()
+            ids = list(
+                rango.order_by().annotate(**calculados).exclude(**{
+                    campo: F(f'calculado_{campo}') for campo in CAMPOS_CONTADORES
+                }).values_list('pk', flat=True)
+            )
+            if not ids:
+                continue
+            desviadas.extend(ids)
+            if options['reparar']:
+                with transaction.atomic():
+                    recalcular_contadores(Solicitud.all_objects.filter(pk__in=ids))
+
+        if not desviadas:
+            self.stdout.write(self.style.SUCCESS(f'{revisadas} solicitudes revisadas: contadores correctos'))
+            return
+
+        ejemplos = ', '.join(str(pk) for pk in desviadas[:MAX_EJEMPLOS])
+        if len(desviadas) > MAX_EJEMPLOS:
+            ejemplos += ', ...'
+        mensaje = f'{revisadas} solicitudes revisadas, {len(desviadas)} con contadores desviados ({ejemplos})'
+        if options['reparar']:
+            self.stdout.write(self.style.SUCCESS(f'{mensaje}: reparadas'))
+        else:
+            self.stdout.write(self.style.WARNING(f'{mensaje}. Use --reparar para corregirlos.'))
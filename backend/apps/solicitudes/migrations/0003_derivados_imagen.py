@@ -0,0 +1,23 @@
+# Generated by Django 5.2.10 on 2026-10-19 11:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitudes', '0002_alter_solicitud_tipo_visa'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documento',
+            name='miniatura',
+            field=models.ImageField(blank=True, editable=False, upload_to='solicitudes/documentos/%Y/%m/', verbose_name='Miniatura'),
+        ),
+        migrations.AddField(
+            model_name='documento',
+            name='vista_previa',
+            field=models.ImageField(blank=True, editable=False, upload_to='solicitudes/documentos/%Y/%m/', verbose_name='Vista previa'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.10 on 2026-10-19 11:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitudes', '0003_derivados_imagen'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['cliente', 'estado'], name='solicitud_cliente_estado_viva'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['asesor', 'estado'], name='solicitud_asesor_estado_viva'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['asesor', 'fecha_asignacion'], name='solicitud_asesor_fasig_viva'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.10 on 2026-10-19 12:01
+
+from django.db import migrations, models
+
+
+def rellenar_programado_en(apps, schema_editor):
+    """Calcula programado_en (fecha + hora en la zona del proyecto) por lotes."""
+    from datetime import datetime
+    from django.utils import timezone
+
+    Entrevista = apps.get_model('solicitudes', 'entrevista')
+    lote = []
+    pendientes = Entrevista.objects.filter(programado_en__isnull=True).only('id', 'fecha', 'hora')
+    for fila in pendientes.iterator(chunk_size=2000):
+        if fila.fecha is None or fila.hora is None:
+            continue
+        fila.programado_en = timezone.make_aware(datetime.combine(fila.fecha, fila.hora))
+        lote.append(fila)
+        if len(lote) >= 2000:
+            Entrevista.objects.bulk_update(lote, ['programado_en'])
+            lote = []
+    if lote:
+        Entrevista.objects.bulk_update(lote, ['programado_en'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitudes', '0004_indices_parciales'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entrevista',
+            name='programado_en',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Programado para'),
+        ),
+        migrations.RunPython(rellenar_programado_en, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='entrevista',
+            index=models.Index(fields=['estado', 'programado_en'], name='entrevista_estado_prog'),
+        ),
+    ]
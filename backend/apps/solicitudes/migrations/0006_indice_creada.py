@@ -0,0 +1,19 @@
+# Generated by Django 5.2.10 on 2026-10-19 12:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitudes', '0005_programado_en'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['created_at'], name='solicitud_creada_viva'),
+        ),
+    ]
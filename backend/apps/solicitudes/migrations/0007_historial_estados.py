@@ -0,0 +1,72 @@
+# Generated by Django 5.2.10 on 2026-10-19 12:12
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def reconstruir_historial(apps, schema_editor):
+    """
+    Historial aproximado de las solicitudes existentes: la creación y, si
+    el estado cambió después, una transición al estado actual fechada con
+    el dato más cercano disponible (revisión, envío o última edición).
+    """
+    Solicitud = apps.get_model('solicitudes', 'solicitud')
+    EstadoSolicitud = apps.get_model('solicitudes', 'estadosolicitud')
+    nota = 'Reconstruido al migrar'
+    lote = []
+    for s in Solicitud.objects.order_by('pk').iterator(chunk_size=2000):
+        inicial = 'borrador' if s.estado == 'borrador' else 'pendiente'
+        lote.append(EstadoSolicitud(
+            solicitud_id=s.pk, estado_anterior=None, estado_nuevo=inicial,
+            observacion=nota, created_at=s.created_at
+        ))
+        if s.estado != inicial:
+            if s.estado == 'enviada_embajada' and s.fecha_envio_embajada:
+                fecha = s.fecha_envio_embajada
+            elif s.estado in ('aprobada', 'rechazada') and s.fecha_revision:
+                fecha = s.fecha_revision
+            else:
+                fecha = s.updated_at
+            lote.append(EstadoSolicitud(
+                solicitud_id=s.pk, estado_anterior=inicial, estado_nuevo=s.estado,
+                observacion=nota, created_at=max(fecha, s.created_at)
+            ))
+        if len(lote) >= 2000:
+            EstadoSolicitud.objects.bulk_create(lote)
+            lote = []
+    if lote:
+        EstadoSolicitud.objects.bulk_create(lote)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitudes', '0006_indice_creada'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadoSolicitud',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Fecha de creación')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Fecha de actualización')),
+                ('estado_anterior', models.CharField(blank=True, max_length=50, null=True, verbose_name='Estado Anterior')),
+                ('estado_nuevo', models.CharField(max_length=50, verbose_name='Estado Nuevo')),
+                ('observacion', models.TextField(blank=True, verbose_name='Observación')),
+                ('solicitud', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historial_estados', to='solicitudes.solicitud', verbose_name='Solicitud')),
+                ('usuario_responsable', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cambios_estado_realizados', to=settings.AUTH_USER_MODEL, verbose_name='Usuario Responsable')),
+            ],
+            options={
+                'verbose_name': 'Estado de Solicitud',
+                'verbose_name_plural': 'Historial de Estados',
+                'db_table': 'historial_estados_solicitud',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['solicitud', 'created_at'], name='historial_solicitud_fecha'), models.Index(fields=['estado_nuevo', 'created_at'], name='historial_estado_fecha')],
+            },
+        ),
+        migrations.RunPython(reconstruir_historial, migrations.RunPython.noop),
+    ]
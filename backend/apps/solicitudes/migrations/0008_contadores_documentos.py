@@ -0,0 +1,64 @@
+# Generated by Django 5.2.10 on 2026-10-19 12:26
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+CAMPOS = ['documentos_total', 'documentos_aprobados', 'documentos_rechazados', 'progreso_pct']
+
+
+def calcular_contadores(apps, schema_editor):
+    """Contadores iniciales desde los documentos existentes."""
+    Solicitud = apps.get_model('solicitudes', 'solicitud')
+    Documento = apps.get_model('solicitudes', 'documento')
+    conteos = Documento.objects.order_by().values('solicitud_id').annotate(
+        total=Count('pk'),
+        aprobados=Count('pk', filter=Q(estado='aprobado')),
+        rechazados=Count('pk', filter=Q(estado='rechazado')),
+    )
+    lote = []
+    for fila in conteos.iterator(chunk_size=2000):
+        lote.append(Solicitud(
+            pk=fila['solicitud_id'],
+            documentos_total=fila['total'],
+            documentos_aprobados=fila['aprobados'],
+            documentos_rechazados=fila['rechazados'],
+            # Redondeo de models.expresion_progreso (mitades hacia arriba)
+            progreso_pct=(fila['aprobados'] * 200 + fila['total']) // (fila['total'] * 2),
+        ))
+        if len(lote) >= 2000:
+            Solicitud.objects.bulk_update(lote, CAMPOS)
+            lote = []
+    if lote:
+        Solicitud.objects.bulk_update(lote, CAMPOS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitudes', '0007_historial_estados'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='solicitud',
+            name='documentos_aprobados',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Documentos aprobados'),
+        ),
+        migrations.AddField(
+            model_name='solicitud',
+            name='documentos_rechazados',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Documentos rechazados'),
+        ),
+        migrations.AddField(
+            model_name='solicitud',
+            name='documentos_total',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Documentos'),
+        ),
+        migrations.AddField(
+            model_name='solicitud',
+            name='progreso_pct',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Progreso (%)'),
+        ),
+        migrations.RunPython(calcular_contadores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.10 on 2026-10-19 12:30
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitudes', '0008_contadores_documentos'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertaVencimiento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Fecha de creación')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Fecha de actualización')),
+                ('ventana', models.PositiveSmallIntegerField(verbose_name='Ventana (días)')),
+                ('fecha_vencimiento', models.DateField(verbose_name='Fecha de Vencimiento')),
+            ],
+            options={
+                'verbose_name': 'Alerta de Vencimiento',
+                'verbose_name_plural': 'Alertas de Vencimiento',
+                'db_table': 'alertas_vencimiento_documento',
+            },
+        ),
+        migrations.AddField(
+            model_name='documento',
+            name='fecha_vencimiento',
+            field=models.DateField(blank=True, null=True, verbose_name='Fecha de Vencimiento'),
+        ),
+        migrations.AddIndex(
+            model_name='documento',
+            index=models.Index(condition=models.Q(('fecha_vencimiento__isnull', False)), fields=['fecha_vencimiento', 'id'], name='documento_vencimiento'),
+        ),
+        migrations.AddField(
+            model_name='alertavencimiento',
+            name='documento',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alertas_vencimiento', to='solicitudes.documento', verbose_name='Documento'),
+        ),
+        migrations.AddConstraint(
+            model_name='alertavencimiento',
+            constraint=models.UniqueConstraint(fields=('documento', 'ventana'), name='alerta_vencimiento_unica'),
+        ),
+    ]
@@ -1,9 +1,34 @@
 """
 Modelos de la app Solicitudes.
 """
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
-from apps.core.models import TimeStampedModel, SoftDeleteModel
+from django.utils import timezone
+from apps.core.models import TimeStampedModel, SoftDeleteModel, ProgramadoModel
+
+# Estado no cargado desde la base (consultas con .only()/.defer())
+_SIN_CARGAR = object()
+
+# Contadores de documentos: solo los escriben actualizar_contadores() y
+# recalcular_contadores() con UPDATE; Solicitud.save() no los sobrescribe.
+CAMPOS_CONTADORES = (
+    'documentos_total', 'documentos_aprobados', 'documentos_rechazados', 'progreso_pct'
+)
+
+
+def expresion_progreso(aprobados, total):
+    """
+    Porcentaje aprobado como expresión SQL, redondeado al entero más
+    cercano (las mitades hacia arriba): (aprobados * 200 + total) div
+    (total * 2). La división entera es la misma en PostgreSQL y SQLite.
+    """
+    from django.db.models import Case, Value, When
+    from django.db.models.lookups import GreaterThan
+    
+    return Case(
+        When(GreaterThan(total, 0), then=(aprobados * 200 + total) / (total * 2)),
+        default=Value(0),
+    )
 
 
 class Solicitud(TimeStampedModel, SoftDeleteModel):
@@ -114,28 +139,194 @@ class Solicitud(TimeStampedModel, SoftDeleteModel):
         blank=True
     )
     
+    # Progreso materializado (mantenido por Documento.save()/delete())
+    documentos_total = models.PositiveIntegerField('Documentos', default=0, editable=False)
+    documentos_aprobados = models.PositiveIntegerField('Documentos aprobados', default=0, editable=False)
+    documentos_rechazados = models.PositiveIntegerField('Documentos rechazados', default=0, editable=False)
+    progreso_pct = models.PositiveSmallIntegerField('Progreso (%)', default=0, editable=False)
+    
     class Meta:
         db_table = 'solicitudes'
         verbose_name = 'Solicitud'
         verbose_name_plural = 'Solicitudes'
         ordering = ['-created_at']
+        # Índices parciales: solo filas vigentes (las que ve `objects`)
+        indexes = [
+            models.Index(
+                fields=['cliente', 'estado'],
+                condition=models.Q(is_deleted=False),
+                name='solicitud_cliente_estado_viva',
+            ),
+            models.Index(
+                fields=['asesor', 'estado'],
+                condition=models.Q(is_deleted=False),
+                name='solicitud_asesor_estado_viva',
+            ),
+            models.Index(
+                fields=['asesor', 'fecha_asignacion'],
+                condition=models.Q(is_deleted=False),
+                name='solicitud_asesor_fasig_viva',
+            ),
+            # Flujos por periodo de los resúmenes de métricas (apps.core.resumenes)
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(is_deleted=False),
+                name='solicitud_creada_viva',
+            ),
+        ]
+    
+    # Autor y motivo del próximo cambio de estado (no son columnas): se
+    # copian al historial en save(). serializer.save(responsable_cambio=...)
+    # también los asigna.
+    responsable_cambio = None
+    observacion_cambio = ''
     
     def __str__(self):
         return f"Solicitud #{self.id} - {self.get_tipo_visa_display()} - {self.cliente}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Estado guardado, para detectar transiciones en save()
+        instance._estado_guardado = instance.__dict__.get('estado', _SIN_CARGAR)
+        return instance
+    
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        if 'estado' in self.__dict__:
+            self._estado_guardado = self.estado
+    
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        # Los contadores en memoria pueden estar desactualizados: solo se
+        # escriben si se piden en update_fields. Si la fila ya no existe,
+        # save() sigue cayendo al INSERT con todos los campos.
+        if not (update_fields and set(update_fields) & set(CAMPOS_CONTADORES)):
+            values = [valor for valor in values if valor[0].name not in CAMPOS_CONTADORES]
+        return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+    
+    def save(self, *args, **kwargs):
+        """Guarda y registra en EstadoSolicitud cada cambio de estado."""
+        update_fields = kwargs.get('update_fields')
+        guarda_estado = 'estado' in self.__dict__ and (
+            update_fields is None or 'estado' in update_fields
+        )
+        anterior = getattr(self, '_estado_guardado', None)
+        if guarda_estado and anterior is _SIN_CARGAR:
+            # Estado asignado sobre una instancia cargada sin él
+            anterior = Solicitud.all_objects.filter(pk=self.pk).values_list(
+                'estado', flat=True
+            ).first()
+        cambio = guarda_estado and (self._state.adding or anterior != self.estado)
+        if not cambio:
+            return super().save(*args, **kwargs)
+        
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            EstadoSolicitud.objects.create(
+                solicitud=self,
+                estado_anterior=anterior,
+                estado_nuevo=self.estado,
+                observacion=self.observacion_cambio or '',
+                usuario_responsable=self.responsable_cambio,
+            )
+        self._estado_guardado = self.estado
+        self.responsable_cambio = None
+        self.observacion_cambio = ''
+    
     def puede_ser_asignada(self) -> bool:
         """Verifica si la solicitud puede ser asignada a un asesor."""
         return self.estado in ['pendiente', 'borrador'] and self.asesor is None
     
-    def asignar_asesor(self, asesor):
+    def progreso_documentos(self):
+        """Progreso de documentos desde los contadores materializados."""
+        return {
+            'total': self.documentos_total,
+            'aprobados': self.documentos_aprobados,
+            'rechazados': self.documentos_rechazados,
+            'pendientes': self.documentos_total - self.documentos_aprobados - self.documentos_rechazados,
+            'porcentaje': self.progreso_pct,
+        }
+    
+    def actualizar_contadores(self, total=0, aprobados=0, rechazados=0):
+        """
+        Suma deltas a los contadores de documentos con un UPDATE atómico
+        (F expressions), sin leer la fila: las escrituras concurrentes se
+        serializan en el lock de la fila. El progreso se calcula en la
+        misma sentencia con los valores nuevos.
+        """
+        if not (total or aprobados or rechazados):
+            return
+        from django.db.models import F
+        
+        nuevo_total = F('documentos_total') + total
+        nuevos_aprobados = F('documentos_aprobados') + aprobados
+        Solicitud.all_objects.filter(pk=self.pk).update(
+            documentos_total=nuevo_total,
+            documentos_aprobados=nuevos_aprobados,
+            documentos_rechazados=F('documentos_rechazados') + rechazados,
+            progreso_pct=expresion_progreso(nuevos_aprobados, nuevo_total),
+        )
+    
+    def asignar_asesor(self, asesor, responsable=None):
         """Asigna un asesor a la solicitud."""
-        from django.utils import timezone
+        self.responsable_cambio = responsable
         self.asesor = asesor
         self.estado = 'pendiente'
         self.fecha_asignacion = timezone.now()
         self.save()
 
 
+class EstadoSolicitud(TimeStampedModel):
+    """
+    Historial de estados de una solicitud: una fila por transición,
+    incluida la creación (estado_anterior vacío). Lo escribe
+    Solicitud.save(); la analítica de permanencia y embudo se calcula
+    sobre esta tabla (ver apps.solicitudes.analitica).
+    """
+    solicitud = models.ForeignKey(
+        Solicitud,
+        on_delete=models.CASCADE,
+        related_name='historial_estados',
+        verbose_name='Solicitud'
+    )
+    estado_anterior = models.CharField(
+        'Estado Anterior',
+        max_length=50,
+        null=True,
+        blank=True
+    )
+    estado_nuevo = models.CharField(
+        'Estado Nuevo',
+        max_length=50
+    )
+    observacion = models.TextField(
+        'Observación',
+        blank=True
+    )
+    usuario_responsable = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='cambios_estado_realizados',
+        verbose_name='Usuario Responsable'
+    )
+    
+    class Meta:
+        db_table = 'historial_estados_solicitud'
+        verbose_name = 'Estado de Solicitud'
+        verbose_name_plural = 'Historial de Estados'
+        ordering = ['-created_at']
+        indexes = [
+            # Partición de las funciones de ventana (LEAD por solicitud)
+            models.Index(fields=['solicitud', 'created_at'], name='historial_solicitud_fecha'),
+            models.Index(fields=['estado_nuevo', 'created_at'], name='historial_estado_fecha'),
+        ]
+    
+    def __str__(self):
+        return f"{self.solicitud_id} - {self.estado_anterior} → {self.estado_nuevo}"
+
+
 class Documento(TimeStampedModel):
     """
     Modelo de Documento adjunto a una solicitud.
@@ -158,6 +349,19 @@ class Documento(TimeStampedModel):
         'Archivo',
         upload_to='solicitudes/documentos/%Y/%m/'
     )
+    # Derivados generados en segundo plano (apps.core.imagenes)
+    miniatura = models.ImageField(
+        'Miniatura',
+        upload_to='solicitudes/documentos/%Y/%m/',
+        blank=True,
+        editable=False
+    )
+    vista_previa = models.ImageField(
+        'Vista previa',
+        upload_to='solicitudes/documentos/%Y/%m/',
+        blank=True,
+        editable=False
+    )
     estado = models.CharField(
         'Estado',
         max_length=20,
@@ -180,17 +384,141 @@ class Documento(TimeStampedModel):
         null=True,
         blank=True
     )
+    fecha_vencimiento = models.DateField(
+        'Fecha de Vencimiento',
+        null=True,
+        blank=True
+    )
     
     class Meta:
         db_table = 'documentos_solicitud'
         verbose_name = 'Documento'
         verbose_name_plural = 'Documentos'
+        indexes = [
+            # Recorrido por rango y keyset (fecha, id) de apps.solicitudes.vencimientos
+            models.Index(
+                fields=['fecha_vencimiento', 'id'],
+                condition=models.Q(fecha_vencimiento__isnull=False),
+                name='documento_vencimiento',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.nombre} - {self.solicitud_id}"
+    
+    @staticmethod
+    def deltas_contadores(anterior, nuevo):
+        """Deltas (total, aprobados, rechazados) de pasar de `anterior` a `nuevo` (None = no existe)."""
+        def conteo(estado):
+            if estado is None:
+                return (0, 0, 0)
+            return (1, int(estado == 'aprobado'), int(estado == 'rechazado'))
+        return tuple(n - a for n, a in zip(conteo(nuevo), conteo(anterior)))
+    
+    def _estado_en_base(self):
+        """Estado guardado del documento, con la fila bloqueada hasta el commit."""
+        return Documento.objects.select_for_update().filter(pk=self.pk).values_list(
+            'estado', flat=True
+        ).first()
+    
+    def save(self, *args, **kwargs):
+        """
+        Guarda y ajusta los contadores de la solicitud en la misma
+        transacción. El delta sale del estado releído con la fila bloqueada,
+        no del cargado en memoria: dos aprobaciones concurrentes del mismo
+        documento se serializan y la segunda no vuelve a sumar.
+        """
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'estado' not in update_fields:
+            return super().save(*args, **kwargs)
+        
+        with transaction.atomic():
+            anterior = None if self._state.adding else self._estado_en_base()
+            super().save(*args, **kwargs)
+            Solicitud(pk=self.solicitud_id).actualizar_contadores(
+                *self.deltas_contadores(anterior, self.estado)
+            )
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            anterior = self._estado_en_base()
+            resultado = super().delete(*args, **kwargs)
+            if anterior is not None:
+                Solicitud(pk=self.solicitud_id).actualizar_contadores(
+                    *self.deltas_contadores(anterior, None)
+                )
+        return resultado
+
+
+class AlertaVencimiento(TimeStampedModel):
+    """
+    Aviso de vencimiento enviado por documento y ventana (días antes de
+    vencer). La restricción única evita avisos repetidos aunque la tarea
+    se ejecute varias veces el mismo día.
+    """
+    
+    documento = models.ForeignKey(
+        Documento,
+        on_delete=models.CASCADE,
+        related_name='alertas_vencimiento',
+        verbose_name='Documento'
+    )
+    ventana = models.PositiveSmallIntegerField('Ventana (días)')
+    # Fecha avisada: si el documento cambia de vencimiento, se vuelve a avisar
+    fecha_vencimiento = models.DateField('Fecha de Vencimiento')
+    
+    class Meta:
+        db_table = 'alertas_vencimiento_documento'
+        verbose_name = 'Alerta de Vencimiento'
+        verbose_name_plural = 'Alertas de Vencimiento'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['documento', 'ventana'],
+                name='alerta_vencimiento_unica',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.documento_id} - {self.ventana} días"
+
+
+def expresiones_contadores():
+    """
+    Expresiones que recalculan los contadores de documentos de cada
+    solicitud con subconsultas correlacionadas ({campo: expresión}).
+    """
+    from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+    from django.db.models.functions import Coalesce
+    
+    def conteo(filtro=Q()):
+        return Coalesce(Subquery(
+            Documento.objects.filter(filtro, solicitud=OuterRef('pk'))
+            .order_by().values('solicitud').annotate(n=Count('pk')).values('n'),
+            output_field=IntegerField(),
+        ), 0)
+    
+    total = conteo()
+    aprobados = conteo(Q(estado='aprobado'))
+    return {
+        'documentos_total': total,
+        'documentos_aprobados': aprobados,
+        'documentos_rechazados': conteo(Q(estado='rechazado')),
+        'progreso_pct': expresion_progreso(aprobados, total),
+    }
 
 
-class Entrevista(TimeStampedModel):
+def recalcular_contadores(solicitudes):
+    """
+    Recalcula desde cero los contadores de documentos de `solicitudes`
+    (queryset) con un único UPDATE. Devuelve las filas actualizadas. Lo
+    usan el comando verificar_contadores y las escrituras masivas
+    (bulk_create, delete de querysets) que no pasan por
+    Documento.save()/delete().
+    """
+    return solicitudes.order_by().update(**expresiones_contadores())
+
+
+class Entrevista(TimeStampedModel, ProgramadoModel):
     """
     Modelo de Entrevista agendada.
     """
@@ -238,6 +566,47 @@ class Entrevista(TimeStampedModel):
         verbose_name = 'Entrevista'
         verbose_name_plural = 'Entrevistas'
         ordering = ['fecha', 'hora']
+        indexes = [
+            models.Index(fields=['estado', 'programado_en'], name='entrevista_estado_prog'),
+        ]
     
     def __str__(self):
         return f"Entrevista - {self.solicitud} - {self.fecha}"
+
+
+class TrabajoImportacion(models.Model):
+    """
+    Importación de clientes por API, ejecutada por la tarea
+    solicitudes.importar_clientes (ver apps.solicitudes.importacion). El
+    CSV se guarda en media protegida hasta que la tarea termina; el
+    resumen (asignaciones y errores por fila) queda en `resumen`.
+    """
+    
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('procesando', 'Procesando'),
+        ('completada', 'Completada'),
+        ('error', 'Error'),
+    ]
+    
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='importaciones',
+        verbose_name='Solicitada por'
+    )
+    archivo = models.FileField('Archivo', upload_to='importaciones/%Y/%m/', null=True, blank=True)
+    estado = models.CharField('Estado', max_length=12, choices=ESTADOS, default='pendiente')
+    resumen = models.JSONField('Resumen', default=dict, blank=True)
+    error = models.TextField('Error', blank=True)
+    created_at = models.DateTimeField('Fecha de solicitud', default=timezone.now, editable=False, db_index=True)
+    completada_en = models.DateTimeField('Completada', null=True, blank=True)
+    
+    class Meta:
+        db_table = 'importaciones'
+        verbose_name = 'Importación'
+        verbose_name_plural = 'Importaciones'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Importación #{self.pk} ({self.get_estado_display()})"
@@ -1,9 +1,12 @@
 """
 Serializers para la API de Solicitudes.
 """
+import os
+
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.db.models import Q, F, Count
+from apps.core.media import url_firmada
 from .models import Solicitud, Documento, Entrevista
 
 Usuario = get_user_model()
@@ -12,26 +15,35 @@ Usuario = get_user_model()
 class DocumentoSerializer(serializers.ModelSerializer):
     """Serializer para documentos."""
     archivo_url = serializers.SerializerMethodField()
+    archivo_nombre = serializers.SerializerMethodField()
+    miniatura_url = serializers.SerializerMethodField()
+    vista_previa_url = serializers.SerializerMethodField()
     fecha_subida = serializers.DateTimeField(source='created_at', read_only=True)
     
     class Meta:
         model = Documento
         fields = [
-            'id', 'nombre', 'archivo', 'archivo_url', 'estado',
-            'motivo_rechazo', 'fecha_revision', 'created_at', 'fecha_subida'
+            'id', 'nombre', 'archivo', 'archivo_url', 'archivo_nombre',
+            'miniatura_url', 'vista_previa_url', 'estado',
+            'motivo_rechazo', 'fecha_revision', 'fecha_vencimiento',
+            'created_at', 'fecha_subida'
         ]
         read_only_fields = ['id', 'created_at', 'fecha_revision', 'fecha_subida']
+        # La ruta en el storage no se expone: se lee con archivo_url
+        extra_kwargs = {'archivo': {'write_only': True}}
     
     def get_archivo_url(self, obj):
-        if obj.archivo:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.archivo.url)
-            # Fallback: construir URL manualmente si no hay request
-            from django.conf import settings
-            base_url = getattr(settings, 'SITE_URL', 'http://localhost:8000')
-            return f"{base_url}{obj.archivo.url}"
-        return None
+        # URL firmada de corta duración (ver apps.core.media)
+        return url_firmada(obj.archivo, self.context.get('request'))
+    
+    def get_archivo_nombre(self, obj):
+        return os.path.basename(obj.archivo.name) if obj.archivo else None
+    
+    def get_miniatura_url(self, obj):
+        return url_firmada(obj.miniatura, self.context.get('request'))
+    
+    def get_vista_previa_url(self, obj):
+        return url_firmada(obj.vista_previa, self.context.get('request'))
 
 
 class EntrevistaSerializer(serializers.ModelSerializer):
@@ -55,8 +67,8 @@ class SolicitudListSerializer(serializers.ModelSerializer):
     cliente_nombre = serializers.SerializerMethodField()
     asesor_nombre = serializers.SerializerMethodField()
     tiene_entrevista = serializers.SerializerMethodField()
-    documentos_count = serializers.SerializerMethodField()
-    documentos_aprobados = serializers.SerializerMethodField()
+    # Contadores materializados en la solicitud (sin joins ni subconsultas)
+    documentos_count = serializers.IntegerField(source='documentos_total', read_only=True)
     
     class Meta:
         model = Solicitud
@@ -64,9 +76,14 @@ class SolicitudListSerializer(serializers.ModelSerializer):
             'id', 'tipo_visa', 'tipo_visa_display', 'embajada', 'embajada_display',
             'estado', 'estado_display', 'cliente_nombre', 'asesor_nombre',
             'tiene_entrevista', 'documentos_count', 'documentos_aprobados',
-            'created_at', 'updated_at'
+            'documentos_rechazados', 'progreso_pct', 'created_at', 'updated_at'
         ]
     
+    @staticmethod
+    def preparar_queryset(queryset):
+        """Carga relaciones en la misma consulta (evita N+1)."""
+        return queryset.select_related('cliente', 'asesor', 'entrevista').order_by('-created_at')
+    
     def get_cliente_nombre(self, obj):
         return obj.cliente.nombre_completo() if obj.cliente else None
     
@@ -75,12 +92,6 @@ class SolicitudListSerializer(serializers.ModelSerializer):
     
     def get_tiene_entrevista(self, obj):
         return hasattr(obj, 'entrevista')
-    
-    def get_documentos_count(self, obj):
-        return obj.documentos_adjuntos.count()
-    
-    def get_documentos_aprobados(self, obj):
-        return obj.documentos_adjuntos.filter(estado='aprobado').count()
 
 
 class SolicitudDetailSerializer(serializers.ModelSerializer):
@@ -100,6 +111,7 @@ class SolicitudDetailSerializer(serializers.ModelSerializer):
             'estado', 'estado_display', 'cliente', 'cliente_nombre',
             'asesor', 'asesor_nombre', 'datos_personales', 'documentos',
             'observaciones', 'notas_asesor', 'documentos_adjuntos', 'entrevista',
+            'documentos_total', 'documentos_aprobados', 'documentos_rechazados', 'progreso_pct',
             'fecha_asignacion', 'fecha_revision', 'fecha_envio_embajada',
             'created_at', 'updated_at'
         ]
@@ -136,7 +148,9 @@ class SolicitudCreateSerializer(serializers.ModelSerializer):
         validated_data['cliente'] = request.user
         validated_data['estado'] = 'pendiente'
         
-        solicitud = Solicitud.objects.create(**validated_data)
+        solicitud = Solicitud(**validated_data)
+        solicitud.responsable_cambio = request.user
+        solicitud.save()
         
         # Asignar automáticamente a un asesor disponible
         self._asignar_asesor(solicitud)
@@ -224,3 +238,28 @@ class AsignarAsesorSerializer(serializers.Serializer):
             )
         
         return value
+
+
+class DecisionDocumentoSerializer(serializers.Serializer):
+    """Decisión sobre un documento dentro de una revisión masiva."""
+    documento_id = serializers.IntegerField()
+    accion = serializers.ChoiceField(choices=['aprobar', 'rechazar'])
+    motivo_rechazo = serializers.CharField(required=False, allow_blank=True, default='')
+    
+    def validate(self, attrs):
+        if attrs['accion'] == 'rechazar' and not attrs['motivo_rechazo'].strip():
+            raise serializers.ValidationError({
+                'motivo_rechazo': 'Debe proporcionar un motivo de rechazo'
+            })
+        return attrs
+
+
+class RevisionDocumentosSerializer(serializers.Serializer):
+    """Serializer para revisar varios documentos de una solicitud a la vez."""
+    decisiones = DecisionDocumentoSerializer(many=True, allow_empty=False, max_length=100)
+    
+    def validate_decisiones(self, value):
+        ids = [decision['documento_id'] for decision in value]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError("Hay documentos repetidos en las decisiones")
+        return value
@@ -0,0 +1,70 @@
+"""
+Tareas asíncronas con Celery para la app Solicitudes.
+
+NOTA: Sin Celery, las tareas corren en el pool de hilos del proceso
+(ver apps.core.tareas y TAREAS_BACKEND).
+"""
+import logging
+
+from django.conf import settings
+
+from apps.core.tareas import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name='solicitudes.calcular_analitica')
+def calcular_analitica():
+    """
+    Precalcula la analítica de permanencia y embudo para cada ventana de
+    ANALITICA_SOLICITUDES_VENTANAS y la deja en caché.
+    """
+    from .analitica import precalcular
+
+    for dias in settings.ANALITICA_SOLICITUDES_VENTANAS:
+        try:
+            precalcular(dias)
+        except Exception as e:
+            logger.error(f"Error calculando analítica de solicitudes ({dias} días): {e}")
+    logger.info("Analítica de solicitudes precalculada")
+
+
+@shared_task(name='solicitudes.escanear_vencimientos')
+def escanear_vencimientos():
+    """
+    Avisa al cliente de los documentos que vencen dentro de las ventanas de
+    VENCIMIENTO_DOCUMENTOS_VENTANAS (ver apps.solicitudes.vencimientos).
+    """
+    from .vencimientos import escanear
+
+    resumen = escanear()
+    logger.info(
+        f"Vencimientos: {resumen['documentos']} documentos revisados, "
+        f"{resumen['alertas']} alertas creadas"
+    )
+    return resumen
+
+
+@shared_task(name='solicitudes.importar_clientes')
+def importar_clientes(trabajo_id):
+    """Importa el CSV de un TrabajoImportacion (alta masiva por API)."""
+    from .importacion import ejecutar_trabajo
+    from .models import TrabajoImportacion
+
+    try:
+        trabajo = TrabajoImportacion.objects.select_related('usuario').get(pk=trabajo_id, estado='pendiente')
+    except TrabajoImportacion.DoesNotExist:
+        logger.warning(f"Importación {trabajo_id} no encontrada o ya procesada")
+        return None
+
+    try:
+        ejecutar_trabajo(trabajo)
+        logger.info(
+            f"Importación {trabajo_id}: {trabajo.resumen['solicitudes_creadas']} solicitudes, "
+            f"{trabajo.resumen['filas_con_error']} filas con error"
+        )
+        return trabajo.resumen
+    except Exception as e:
+        logger.error(f"Error importando clientes ({trabajo_id}): {e}")
+        TrabajoImportacion.objects.filter(pk=trabajo_id).update(estado='error', error=str(e))
+        return None
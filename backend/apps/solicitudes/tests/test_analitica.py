@@ -0,0 +1,152 @@
+"""
+Historial de estados y analítica de permanencia y embudo.
+"""
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from apps.solicitudes import analitica
+from apps.solicitudes.models import EstadoSolicitud, Solicitud
+
+INICIO = timezone.now() - timedelta(days=10)
+
+
+def _solicitud(cliente, *pasos, **campos):
+    """Solicitud con historial (estado, horas desde INICIO), sin pasar por save()."""
+    solicitud = Solicitud.objects.bulk_create([
+        Solicitud(cliente=cliente, tipo_visa='estudio', embajada='usa', estado=pasos[-1][0], **campos)
+    ])[0]
+    Solicitud.all_objects.filter(pk=solicitud.pk).update(created_at=INICIO)
+    anterior = None
+    for estado, horas in pasos:
+        fila = EstadoSolicitud.objects.create(solicitud=solicitud, estado_anterior=anterior, estado_nuevo=estado)
+        EstadoSolicitud.objects.filter(pk=fila.pk).update(created_at=INICIO + timedelta(hours=horas))
+        anterior = estado
+    return solicitud
+
+
+@pytest.fixture
+def historial(crear_usuario):
+    cliente = crear_usuario('cliente')
+    _solicitud(cliente, ('pendiente', 0), ('en_revision', 2), ('aprobada', 6))
+    _solicitud(cliente, ('pendiente', 0), ('rechazada', 10))
+    # Eliminada: no debe contar
+    _solicitud(cliente, ('pendiente', 0), ('en_revision', 100), ('aprobada', 300), is_deleted=True)
+
+
+# =====================================================
+# PERCENTILES Y EMBUDO
+# =====================================================
+
+@pytest.mark.parametrize('valores, p, esperado', [
+    ([], 50, None),
+    ([5], 90, 5),
+    ([1, 2, 3, 4], 0, 1),
+    ([1, 2, 3, 4], 50, 2.5),
+    ([1, 2, 3, 4], 100, 4),
+    ([0, 10], 95, 9.5),
+])
+def test_percentil_interpola(valores, p, esperado):
+    assert analitica.percentil(valores, p) == esperado
+
+
+def test_embudo_de_acumula_las_etapas_anteriores():
+    # Etapa máxima: 3 en 'aprobada' (índice 3), 1 en 'pendiente' (índice 1)
+    resultado = analitica._embudo_de({3: 3, 1: 1}, rechazadas=1)
+
+    alcanzadas = {etapa['etapa']: etapa['alcanzadas'] for etapa in resultado['etapas']}
+    assert resultado['solicitudes'] == 4
+    assert resultado['rechazadas'] == 1
+    assert alcanzadas == {
+        'borrador': 4, 'pendiente': 4, 'en_revision': 3, 'aprobada': 3,
+        'enviada_embajada': 0, 'entrevista_agendada': 0, 'completada': 0,
+    }
+    en_revision = resultado['etapas'][2]
+    assert en_revision['conversion_etapa'] == 0.75
+    assert resultado['etapas'][0]['conversion_etapa'] is None
+
+
+def test_embudo_de_vacio():
+    resultado = analitica._embudo_de({}, rechazadas=0)
+
+    assert resultado['solicitudes'] == 0
+    assert all(etapa['conversion_total'] is None for etapa in resultado['etapas'])
+
+
+# =====================================================
+# SOBRE EL HISTORIAL
+# =====================================================
+
+@pytest.mark.django_db
+def test_permanencia_excluye_eliminadas(historial):
+    resultado = analitica.permanencia()['global']
+
+    assert resultado['pendiente']['transiciones'] == 2
+    assert resultado['pendiente']['p50_horas'] == 6.0
+    assert resultado['en_revision']['transiciones'] == 1
+    assert resultado['en_revision']['media_horas'] == 4.0
+    assert (resultado['aprobada']['transiciones'], resultado['aprobada']['en_curso']) == (0, 1)
+    assert 'rechazada' not in resultado
+
+
+@pytest.mark.django_db
+def test_permanencia_desde_conserva_las_salidas(historial):
+    resultado = analitica.permanencia(INICIO + timedelta(hours=1))['global']
+
+    assert 'pendiente' not in resultado
+    assert resultado['en_revision']['media_horas'] == 4.0
+
+
+@pytest.mark.django_db
+def test_embudo_excluye_eliminadas(historial):
+    resultado = analitica.embudo()['global']
+
+    alcanzadas = {etapa['etapa']: etapa['alcanzadas'] for etapa in resultado['etapas']}
+    assert resultado['solicitudes'] == 2
+    assert resultado['rechazadas'] == 1
+    assert alcanzadas['pendiente'] == 2
+    assert alcanzadas['aprobada'] == 1
+
+
+# =====================================================
+# REGISTRO EN Solicitud.save()
+# =====================================================
+
+@pytest.mark.django_db
+def test_save_registra_cada_cambio_de_estado(crear_usuario):
+    cliente = crear_usuario('cliente')
+    asesor = crear_usuario('asesor')
+    solicitud = Solicitud.objects.create(cliente=cliente, tipo_visa='estudio', embajada='usa')
+
+    solicitud.notas_asesor = 'sin cambio de estado'
+    solicitud.save()
+    solicitud.estado = 'pendiente'
+    solicitud.responsable_cambio = asesor
+    solicitud.observacion_cambio = 'Enviada por el cliente'
+    solicitud.save()
+    solicitud.estado = 'en_revision'
+    solicitud.save(update_fields=['updated_at'])
+
+    historial = list(solicitud.historial_estados.order_by('pk').values_list(
+        'estado_anterior', 'estado_nuevo', 'usuario_responsable', 'observacion'
+    ))
+    assert historial == [
+        (None, 'borrador', None, ''),
+        ('borrador', 'pendiente', asesor.pk, 'Enviada por el cliente'),
+    ]
+    assert solicitud.responsable_cambio is None
+
+
+@pytest.mark.django_db
+def test_save_con_estado_diferido_lo_relee(crear_usuario):
+    cliente = crear_usuario('cliente')
+    creada = Solicitud.objects.create(cliente=cliente, tipo_visa='estudio', embajada='usa')
+
+    solicitud = Solicitud.objects.only('pk', 'cliente').get(pk=creada.pk)
+    solicitud.estado = 'pendiente'
+    solicitud.save()
+
+    assert list(creada.historial_estados.order_by('pk').values_list('estado_anterior', 'estado_nuevo')) == [
+        (None, 'borrador'), ('borrador', 'pendiente'),
+    ]
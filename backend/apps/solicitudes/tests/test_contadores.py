@@ -0,0 +1,134 @@
+"""
+Contadores de documentos materializados en Solicitud: mantenimiento desde
+Documento.save()/delete(), guardados de Solicitud que no los pisan y
+reparación con verificar_contadores.
+"""
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from apps.solicitudes.models import Documento, Solicitud
+
+
+def _contadores(solicitud):
+    return Solicitud.all_objects.values_list(
+        'documentos_total', 'documentos_aprobados', 'documentos_rechazados', 'progreso_pct'
+    ).get(pk=solicitud.pk)
+
+
+@pytest.fixture
+def solicitud(crear_usuario):
+    return Solicitud.objects.create(
+        cliente=crear_usuario('cliente'), tipo_visa='estudio', embajada='usa', estado='pendiente'
+    )
+
+
+def _documento(solicitud, nombre='Pasaporte'):
+    return Documento.objects.create(solicitud=solicitud, nombre=nombre, archivo=f'documentos/{nombre}.pdf')
+
+
+@pytest.mark.django_db
+def test_crear_aprobar_rechazar_y_borrar(solicitud):
+    pasaporte = _documento(solicitud)
+    antecedentes = _documento(solicitud, 'Antecedentes')
+    fotos = _documento(solicitud, 'Fotos')
+    assert _contadores(solicitud) == (3, 0, 0, 0)
+
+    pasaporte.estado = 'aprobado'
+    pasaporte.save()
+    antecedentes.estado = 'aprobado'
+    antecedentes.save()
+    assert _contadores(solicitud) == (3, 2, 0, 67)
+
+    antecedentes.estado = 'rechazado'
+    antecedentes.save()
+    assert _contadores(solicitud) == (3, 1, 1, 33)
+
+    antecedentes.delete()
+    fotos.delete()
+    assert _contadores(solicitud) == (1, 1, 0, 100)
+
+
+@pytest.mark.django_db
+def test_guardar_dos_veces_el_mismo_estado_no_vuelve_a_sumar(solicitud):
+    documento = _documento(solicitud)
+    copia = Documento.objects.get(pk=documento.pk)
+
+    documento.estado = 'aprobado'
+    documento.save()
+    copia.estado = 'aprobado'
+    copia.save()
+
+    assert _contadores(solicitud) == (1, 1, 0, 100)
+
+
+@pytest.mark.django_db
+def test_guardar_sin_el_estado_no_cambia_los_contadores(solicitud):
+    documento = _documento(solicitud)
+    documento.estado = 'aprobado'
+    documento.save(update_fields=['nombre'])
+
+    assert _contadores(solicitud) == (1, 0, 0, 0)
+
+
+@pytest.mark.django_db
+def test_solicitud_desactualizada_no_pisa_los_contadores(solicitud):
+    en_memoria = Solicitud.objects.get(pk=solicitud.pk)
+    documento = _documento(solicitud)
+    documento.estado = 'aprobado'
+    documento.save()
+
+    en_memoria.observaciones = 'Revisada'
+    en_memoria.save()
+
+    assert _contadores(solicitud) == (1, 1, 0, 100)
+    assert Solicitud.objects.get(pk=solicitud.pk).observaciones == 'Revisada'
+
+
+@pytest.mark.django_db
+def test_update_fields_con_contadores_los_escribe(solicitud):
+    solicitud.documentos_total = 4
+    solicitud.save(update_fields=['documentos_total'])
+
+    assert _contadores(solicitud)[0] == 4
+
+
+@pytest.mark.django_db
+def test_guardar_una_fila_borrada_la_vuelve_a_insertar(solicitud):
+    Solicitud.all_objects.filter(pk=solicitud.pk).delete()
+
+    solicitud.observaciones = 'Restaurada'
+    solicitud.save()
+
+    assert Solicitud.objects.get(pk=solicitud.pk).observaciones == 'Restaurada'
+
+
+@pytest.mark.django_db
+def test_verificar_contadores_informa_y_repara(solicitud, crear_usuario):
+    _documento(solicitud)
+    aprobado = _documento(solicitud, 'Fotos')
+    aprobado.estado = 'aprobado'
+    aprobado.save()
+    correcta = Solicitud.objects.create(
+        cliente=crear_usuario('cliente'), tipo_visa='trabajo', embajada='canada', estado='pendiente'
+    )
+    _documento(correcta)
+    Solicitud.all_objects.filter(pk=solicitud.pk).update(
+        documentos_total=7, documentos_aprobados=0, progreso_pct=0
+    )
+
+    salida = StringIO()
+    call_command('verificar_contadores', lote=1, stdout=salida)
+    assert f'1 con contadores desviados ({solicitud.pk})' in salida.getvalue()
+    assert _contadores(solicitud) == (7, 0, 0, 0)
+
+    salida = StringIO()
+    call_command('verificar_contadores', reparar=True, stdout=salida)
+    assert 'reparadas' in salida.getvalue()
+    assert _contadores(solicitud) == (2, 1, 0, 50)
+    assert _contadores(correcta) == (1, 0, 0, 0)
+
+    salida = StringIO()
+    call_command('verificar_contadores', stdout=salida)
+    assert 'contadores correctos' in salida.getvalue()
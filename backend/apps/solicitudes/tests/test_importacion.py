@@ -0,0 +1,249 @@
+"""
+Importación masiva de clientes: simulación y trabajo en segundo plano por
+API, reporte de errores por fila, reparto entre asesores y emails tomados
+por un registro concurrente.
+"""
+import io
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+
+from apps.solicitudes.importacion import Importacion, escribir_reporte
+from apps.solicitudes.models import EstadoSolicitud, Solicitud, TrabajoImportacion
+
+Usuario = get_user_model()
+
+ENCABEZADO = 'email,first_name,last_name,tipo_visa,embajada,password,datos_personales.pasaporte\n'
+
+
+def _csv(*filas):
+    return io.StringIO(ENCABEZADO + ''.join(f'{fila}\n' for fila in filas))
+
+
+def _filas(n, prefijo='cliente'):
+    return [f'{prefijo}{i}@agencia.test,Ana,Pérez,estudio,usa,,P{i}' for i in range(n)]
+
+
+@pytest.fixture(autouse=True)
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+@pytest.fixture
+def admin(crear_usuario):
+    return crear_usuario('admin')
+
+
+# =====================================================
+# ASIGNACIÓN Y ERRORES
+# =====================================================
+
+@pytest.mark.django_db
+def test_reparte_por_carga_del_dia_y_cupo(crear_usuario):
+    libre = crear_usuario('asesor')
+    cargado = crear_usuario('asesor')
+    corto = crear_usuario('asesor', limite_solicitudes_diarias=2)
+    crear_usuario('asesor', is_active=False)
+    cliente = crear_usuario('cliente')
+    Solicitud.objects.bulk_create([
+        Solicitud(cliente=cliente, asesor=cargado, tipo_visa='estudio', embajada='usa',
+                  fecha_asignacion=timezone.now())
+        for _ in range(3)
+    ])
+
+    resumen = Importacion(lote=4).ejecutar(_csv(*_filas(12)))
+
+    assert resumen['asignaciones'] == {libre.email: 7, cargado.email: 3, corto.email: 2}
+    assert resumen['sin_asesor'] == 0
+    por_asesor = {
+        asesor: Solicitud.objects.filter(asesor=asesor, cliente__email__endswith='@agencia.test').count()
+        for asesor in (libre, cargado, corto)
+    }
+    assert por_asesor == {libre: 7, cargado: 3, corto: 2}
+
+
+@pytest.mark.django_db
+def test_sin_cupo_quedan_sin_asesor(crear_usuario):
+    crear_usuario('asesor', limite_solicitudes_diarias=1)
+
+    resumen = Importacion().ejecutar(_csv(*_filas(3)))
+
+    assert resumen['solicitudes_creadas'] == 3
+    assert resumen['sin_asesor'] == 2
+    assert Solicitud.objects.filter(asesor__isnull=True).count() == 2
+
+
+@pytest.mark.django_db
+def test_escribe_clientes_solicitudes_e_historial(crear_usuario):
+    asesor = crear_usuario('asesor')
+
+    resumen = Importacion().ejecutar(_csv(
+        'ana@agencia.test,Ana,Pérez,estudio,usa,Clave12345!,P1',
+        'ana@agencia.test,Ana,Pérez,trabajo,canada,,P1',
+    ))
+
+    assert resumen['usuarios_creados'] == 1
+    assert resumen['solicitudes_creadas'] == 2
+    cliente = Usuario.objects.get(email='ana@agencia.test')
+    assert cliente.rol == 'cliente' and cliente.check_password('Clave12345!')
+    solicitudes = Solicitud.objects.filter(cliente=cliente)
+    assert {s.asesor for s in solicitudes} == {asesor}
+    assert {s.datos_personales['pasaporte'] for s in solicitudes} == {'P1'}
+    assert EstadoSolicitud.objects.filter(solicitud__cliente=cliente, estado_nuevo='pendiente').count() == 2
+
+
+@pytest.mark.django_db
+def test_reporta_errores_por_fila(crear_usuario):
+    registrado = crear_usuario('cliente')
+
+    resumen = Importacion().ejecutar(_csv(
+        'malo@agencia.test,Ana,Pérez,estudio,marte,,',
+        'malo@agencia.test,Ana,Pérez,estudio,usa,,',
+        f'{registrado.email},Ana,Pérez,estudio,usa,,',
+        'corta@agencia.test,Ana,Pérez,estudio,usa,123,',
+        'bien@agencia.test,Ana,Pérez,estudio,usa,,',
+    ))
+
+    assert resumen['filas'] == 5
+    assert resumen['solicitudes_creadas'] == 1
+    assert [(e['fila'], e['email'], list(e['errores'])) for e in resumen['errores']] == [
+        (2, 'malo@agencia.test', ['embajada']),
+        (3, 'malo@agencia.test', ['email']),
+        (4, registrado.email, ['email']),
+        (5, 'corta@agencia.test', ['password']),
+    ]
+
+    reporte = io.StringIO()
+    escribir_reporte(resumen['errores'], reporte)
+    lineas = reporte.getvalue().splitlines()
+    assert lineas[0] == 'fila,email,campo,mensaje'
+    assert lineas[1].startswith('2,malo@agencia.test,embajada,')
+    assert len(lineas) > len(resumen['errores'])
+
+
+@pytest.mark.django_db
+def test_email_tomado_durante_el_insert_se_reporta(crear_usuario, monkeypatch):
+    crear_usuario('asesor')
+    insertar = Importacion._insertar
+    intentos = []
+
+    def registro_concurrente(self, nuevos, filas):
+        if not intentos:
+            Usuario.objects.create_user(email='tomado@agencia.test', password='x', rol='cliente')
+        intentos.append(sorted(nuevos))
+        return insertar(self, nuevos, filas)
+
+    monkeypatch.setattr(Importacion, '_insertar', registro_concurrente)
+    resumen = Importacion().ejecutar(_csv(
+        'libre@agencia.test,Ana,Pérez,estudio,usa,,',
+        'tomado@agencia.test,Ana,Pérez,estudio,usa,,',
+        'tomado@agencia.test,Ana,Pérez,trabajo,usa,,',
+    ))
+
+    assert intentos == [['libre@agencia.test', 'tomado@agencia.test'], ['libre@agencia.test']]
+    assert [(e['fila'], e['email']) for e in resumen['errores']] == [
+        (3, 'tomado@agencia.test'), (4, 'tomado@agencia.test'),
+    ]
+    assert resumen['solicitudes_creadas'] == 1
+    # El lote revertido no deja asignaciones contadas
+    assert sum(resumen['asignaciones'].values()) == 1
+    assert not Solicitud.objects.filter(cliente__email='tomado@agencia.test').exists()
+
+
+# =====================================================
+# API
+# =====================================================
+
+def _archivo(*filas):
+    return SimpleUploadedFile('agencia.csv', _csv(*filas).getvalue().encode(), content_type='text/csv')
+
+
+@pytest.mark.django_db
+def test_simulacion_responde_sin_escribir(admin, crear_usuario, cliente_api):
+    crear_usuario('asesor')
+
+    respuesta = cliente_api(admin).post(
+        '/api/admin/importaciones/clientes/', {'archivo': _archivo(*_filas(3)), 'simular': 'true'},
+        format='multipart'
+    )
+
+    assert respuesta.status_code == 200
+    assert respuesta.data['simulacion'] is True
+    assert respuesta.data['solicitudes_creadas'] == 3
+    assert not Usuario.objects.filter(email__endswith='@agencia.test').exists()
+    assert not TrabajoImportacion.objects.exists()
+
+
+@pytest.mark.django_db
+def test_simulacion_con_encabezados_invalidos(admin, cliente_api):
+    archivo = SimpleUploadedFile('agencia.csv', b'email,nombre\nana@agencia.test,Ana\n')
+
+    respuesta = cliente_api(admin).post(
+        '/api/admin/importaciones/clientes/', {'archivo': archivo, 'simular': 'true'}, format='multipart'
+    )
+
+    assert respuesta.status_code == 400
+    assert 'first_name' in respuesta.data['error']
+
+
+@pytest.mark.django_db
+def test_importacion_en_segundo_plano(admin, crear_usuario, cliente_api, django_capture_on_commit_callbacks):
+    crear_usuario('asesor')
+    api = cliente_api(admin)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        respuesta = api.post(
+            '/api/admin/importaciones/clientes/',
+            {'archivo': _archivo(*_filas(2), 'x@agencia.test,Ana,Pérez,estudio,marte,,')},
+            format='multipart'
+        )
+
+    assert respuesta.status_code == 202
+    assert respuesta.data['estado'] == 'pendiente'
+    trabajo = TrabajoImportacion.objects.get(pk=respuesta.data['id'])
+    assert trabajo.estado == 'completada'
+    assert not trabajo.archivo
+
+    estado = api.get(respuesta.data['url_estado'])
+    assert estado.status_code == 200
+    assert estado.data['resumen']['solicitudes_creadas'] == 2
+    assert [e['fila'] for e in estado.data['resumen']['errores']] == [4]
+    assert Usuario.objects.filter(email__endswith='@agencia.test').count() == 2
+
+
+@pytest.mark.django_db
+def test_trabajo_con_csv_invalido_queda_en_error(admin, cliente_api, django_capture_on_commit_callbacks):
+    archivo = SimpleUploadedFile('agencia.csv', ENCABEZADO.encode() + b'\xff\xfe,Ana\n')
+
+    with django_capture_on_commit_callbacks(execute=True):
+        respuesta = cliente_api(admin).post(
+            '/api/admin/importaciones/clientes/', {'archivo': archivo}, format='multipart'
+        )
+
+    trabajo = TrabajoImportacion.objects.get(pk=respuesta.data['id'])
+    assert trabajo.estado == 'error'
+    assert 'utf-8' in trabajo.error
+    assert not trabajo.archivo
+
+
+@pytest.mark.django_db
+def test_supera_el_limite_de_filas(admin, cliente_api, settings):
+    settings.IMPORTACION_MAX_FILAS_API = 2
+
+    respuesta = cliente_api(admin).post(
+        '/api/admin/importaciones/clientes/', {'archivo': _archivo(*_filas(3))}, format='multipart'
+    )
+
+    assert respuesta.status_code == 400
+    assert not TrabajoImportacion.objects.exists()
+
+
+@pytest.mark.django_db
+def test_estado_de_otro_admin_no_se_ve(admin, crear_usuario, cliente_api):
+    trabajo = TrabajoImportacion.objects.create(usuario=crear_usuario('admin'))
+
+    respuesta = cliente_api(admin).get(f'/api/admin/importaciones/trabajos/{trabajo.pk}/')
+
+    assert respuesta.status_code == 404
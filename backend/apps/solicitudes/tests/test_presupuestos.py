@@ -0,0 +1,125 @@
+"""
+Presupuesto de consultas de los listados de solicitudes, de la revisión de
+documentos y de los listados de entrevistas.
+
+Cada test hace un request autenticado con JWT (incluye la consulta de la
+versión del token) sobre más filas que una página; el presupuesto no debe
+depender del número de filas.
+"""
+from datetime import time, timedelta
+
+import pytest
+from django.utils import timezone
+
+from apps.solicitudes.agendamiento.views import EntrevistasListView, EntrevistasProximasView
+from apps.solicitudes.models import Documento, Entrevista, Solicitud
+from apps.solicitudes.views import (
+    MisSolicitudesView, RevisarDocumentosView, SolicitudesAsignadasView,
+    SolicitudesPendientesView,
+)
+
+FILAS = 25
+DOCUMENTOS = 3
+
+
+@pytest.fixture
+def solicitudes(crear_usuario):
+    """
+    FILAS solicitudes de un cliente asignadas a un asesor, cada una con
+    documentos pendientes (en `solicitud.documentos`) y una entrevista en
+    los próximos días, más FILAS solicitudes pendientes sin asesor.
+    """
+    cliente = crear_usuario('cliente')
+    asesor = crear_usuario('asesor')
+    asignadas = Solicitud.objects.bulk_create([
+        Solicitud(
+            cliente=cliente, asesor=asesor, tipo_visa='estudio', embajada='usa',
+            estado='en_revision', documentos_total=DOCUMENTOS,
+        )
+        for _ in range(FILAS)
+    ])
+    Solicitud.objects.bulk_create([
+        Solicitud(cliente=cliente, tipo_visa='trabajo', embajada='canada', estado='pendiente')
+        for _ in range(FILAS)
+    ])
+    for solicitud in asignadas:
+        solicitud.documentos = Documento.objects.bulk_create([
+            Documento(solicitud=solicitud, nombre=f'Documento {i}', archivo=f'documentos/{i}.pdf')
+            for i in range(DOCUMENTOS)
+        ])
+    hoy = timezone.localdate()
+    Entrevista.objects.bulk_create([
+        Entrevista(
+            solicitud=solicitud, fecha=hoy + timedelta(days=1 + i % 5), hora=time(9, 0),
+            ubicacion='Embajada',
+        )
+        for i, solicitud in enumerate(asignadas)
+    ])
+    return asignadas
+
+
+@pytest.mark.django_db
+@pytest.mark.presupuesto_consultas(MisSolicitudesView.presupuesto_consultas)
+def test_mis_solicitudes_paginado(solicitudes, cliente_api):
+    respuesta = cliente_api(solicitudes[0].cliente).get('/api/solicitudes/mis-solicitudes/')
+
+    assert respuesta.status_code == 200
+    assert respuesta.data['count'] == 2 * FILAS
+    assert len(respuesta.data['results']) == 20
+
+
+@pytest.mark.django_db
+@pytest.mark.presupuesto_consultas(SolicitudesAsignadasView.presupuesto_consultas)
+def test_asignadas_paginado(solicitudes, cliente_api):
+    respuesta = cliente_api(solicitudes[0].asesor).get('/api/solicitudes/asignadas/')
+
+    assert respuesta.status_code == 200
+    assert respuesta.data['count'] == FILAS
+    assert len(respuesta.data['results']) == 20
+
+
+@pytest.mark.django_db
+@pytest.mark.presupuesto_consultas(SolicitudesPendientesView.presupuesto_consultas)
+def test_pendientes_paginado(solicitudes, cliente_api):
+    respuesta = cliente_api(solicitudes[0].asesor).get('/api/solicitudes/pendientes/')
+
+    assert respuesta.status_code == 200
+    assert respuesta.data['count'] == FILAS
+    assert len(respuesta.data['results']) == 20
+
+
+@pytest.mark.django_db
+@pytest.mark.presupuesto_consultas(RevisarDocumentosView.presupuesto_consultas)
+def test_revisar_documentos(solicitudes, cliente_api):
+    solicitud = solicitudes[0]
+    aprobar, *rechazar = solicitud.documentos
+    decisiones = [{'documento_id': aprobar.pk, 'accion': 'aprobar'}] + [
+        {'documento_id': documento.pk, 'accion': 'rechazar', 'motivo_rechazo': 'Ilegible'}
+        for documento in rechazar
+    ]
+
+    respuesta = cliente_api(solicitud.asesor).post(
+        f'/api/solicitudes/{solicitud.pk}/documentos/revisar/', {'decisiones': decisiones}, format='json'
+    )
+
+    assert respuesta.status_code == 200
+    assert [d['estado'] for d in respuesta.data['documentos']] == ['aprobado'] + ['rechazado'] * len(rechazar)
+    assert respuesta.data['progreso']['porcentaje'] == 33
+
+
+@pytest.mark.django_db
+@pytest.mark.presupuesto_consultas(EntrevistasListView.presupuesto_consultas)
+def test_entrevistas(solicitudes, cliente_api):
+    respuesta = cliente_api(solicitudes[0].asesor).get('/api/entrevistas/')
+
+    assert respuesta.status_code == 200
+    assert len(respuesta.data) == FILAS
+
+
+@pytest.mark.django_db
+@pytest.mark.presupuesto_consultas(EntrevistasProximasView.presupuesto_consultas)
+def test_entrevistas_proximas(solicitudes, cliente_api):
+    respuesta = cliente_api(solicitudes[0].cliente).get('/api/entrevistas/proximas/?dias=7')
+
+    assert respuesta.status_code == 200
+    assert len(respuesta.data) == FILAS
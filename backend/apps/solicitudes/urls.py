@@ -18,11 +18,14 @@ from .views import (
     ActualizarSolicitudView,
     AsignarAsesorView,
     EstadisticasAsesorView,
+    AnaliticaSolicitudesView,
     
     # Documentos
     DocumentoDetailView,
+    DescargarDocumentoView,
     AprobarDocumentoView,
     RechazarDocumentoView,
+    RevisarDocumentosView,
 )
 
 app_name = 'solicitudes'
@@ -43,9 +46,12 @@ urlpatterns = [
     path('solicitudes/<int:pk>/actualizar/', ActualizarSolicitudView.as_view(), name='actualizar_solicitud'),
     path('solicitudes/<int:pk>/asignar/', AsignarAsesorView.as_view(), name='asignar_asesor'),
     path('solicitudes/estadisticas/asesor/', EstadisticasAsesorView.as_view(), name='estadisticas_asesor'),
+    path('solicitudes/analitica/', AnaliticaSolicitudesView.as_view(), name='analitica'),
     
     # Documentos
     path('documentos/<int:pk>/', DocumentoDetailView.as_view(), name='documento_detail'),
+    path('documentos/<int:pk>/archivo/', DescargarDocumentoView.as_view(), name='descargar_documento'),
     path('documentos/<int:pk>/aprobar/', AprobarDocumentoView.as_view(), name='aprobar_documento'),
     path('documentos/<int:pk>/rechazar/', RechazarDocumentoView.as_view(), name='rechazar_documento'),
+    path('solicitudes/<int:pk>/documentos/revisar/', RevisarDocumentosView.as_view(), name='revisar_documentos'),
 ]
@@ -0,0 +1,115 @@
+"""
+Alertas de vencimiento de documentos.
+
+La tarea diaria `solicitudes.escanear_vencimientos` recorre solo los
+documentos que vencen entre hoy y la ventana más amplia de
+VENCIMIENTO_DOCUMENTOS_VENTANAS. Usa el índice parcial
+(fecha_vencimiento, id), en páginas keyset: cada página continúa después
+del último (fecha, id) leído, sin OFFSET. El costo es proporcional a los
+documentos por vencer, no al total de documentos.
+
+Cada documento recibe el aviso de la ventana más cercana que ya alcanzó.
+Con ventanas 30/7/1, uno que vence en 5 días se avisa en la de 7 y no en
+la de 30. Las alertas y las notificaciones se insertan con bulk_create,
+una transacción por página. La restricción única (documento, ventana)
+impide avisos repetidos.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import AlertaVencimiento, Documento
+
+logger = logging.getLogger(__name__)
+
+
+def ventana_para(dias, ventanas):
+    """Ventana más pequeña que contiene `dias` (None si ninguna)."""
+    return min((ventana for ventana in ventanas if dias <= ventana), default=None)
+
+
+def documentos_por_vencer(hoy, ventanas):
+    """Documentos vigentes que vencen dentro de la ventana más amplia, en orden (fecha, id)."""
+    return Documento.objects.filter(
+        fecha_vencimiento__range=(hoy, hoy + timedelta(days=max(ventanas))),
+        solicitud__is_deleted=False,
+    ).exclude(
+        # Un documento rechazado se reemplaza: no tiene sentido avisar
+        estado='rechazado'
+    ).select_related('solicitud').only(
+        'id', 'nombre', 'fecha_vencimiento', 'solicitud_id', 'solicitud__cliente_id'
+    ).order_by('fecha_vencimiento', 'id')
+
+
+def escanear(hoy=None, lote=None):
+    """
+    Genera las alertas pendientes. Devuelve {'documentos': revisados,
+    'alertas': creadas}.
+    """
+    hoy = hoy or timezone.localdate()
+    lote = lote or settings.VENCIMIENTO_DOCUMENTOS_LOTE
+    ventanas = settings.VENCIMIENTO_DOCUMENTOS_VENTANAS
+    documentos = documentos_por_vencer(hoy, ventanas)
+
+    resumen = {'documentos': 0, 'alertas': 0}
+    ultimo = None
+    while True:
+        pagina = documentos
+        if ultimo is not None:
+            fecha, pk = ultimo
+            pagina = pagina.filter(
+                Q(fecha_vencimiento__gt=fecha) | Q(fecha_vencimiento=fecha, id__gt=pk)
+            )
+        pagina = list(pagina[:lote])
+        if not pagina:
+            break
+        resumen['documentos'] += len(pagina)
+        resumen['alertas'] += _alertar(pagina, hoy, ventanas)
+        if len(pagina) < lote:
+            break
+        ultimo = (pagina[-1].fecha_vencimiento, pagina[-1].pk)
+    return resumen
+
+
+def _alertar(documentos, hoy, ventanas):
+    """Alertas y notificaciones de una página (una transacción)."""
+    from apps.notificaciones.services import NotificacionService
+
+    ids = [documento.pk for documento in documentos]
+    with transaction.atomic():
+        # Si el documento cambió de vencimiento, sus avisos anteriores ya no valen
+        AlertaVencimiento.objects.filter(documento_id__in=ids).exclude(
+            fecha_vencimiento=F('documento__fecha_vencimiento')
+        ).delete()
+        enviadas = set(AlertaVencimiento.objects.filter(
+            documento_id__in=ids
+        ).values_list('documento_id', 'ventana'))
+
+        alertas, notificaciones = [], []
+        for documento in documentos:
+            dias = (documento.fecha_vencimiento - hoy).days
+            ventana = ventana_para(dias, ventanas)
+            if ventana is None or (documento.pk, ventana) in enviadas:
+                continue
+            alertas.append(AlertaVencimiento(
+                documento=documento,
+                ventana=ventana,
+                fecha_vencimiento=documento.fecha_vencimiento,
+            ))
+            notificaciones.append(NotificacionService.construir_documento_por_vencer(documento, dias))
+        if not alertas:
+            return 0
+
+        try:
+            with transaction.atomic():
+                AlertaVencimiento.objects.bulk_create(alertas)
+                NotificacionService.crear_en_lote(notificaciones)
+        except IntegrityError:
+            # Otra ejecución avisó esta página primero
+            logger.warning(f"Alertas de vencimiento ya registradas para los documentos {ids[0]}..{ids[-1]}")
+            return 0
+    return len(alertas)
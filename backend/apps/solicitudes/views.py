@@ -1,15 +1,21 @@
 """
 Views para la API de Solicitudes.
 """
-from rest_framework import status, generics, permissions
+from rest_framework import status, generics, permissions, serializers
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
+from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 
-from .models import Solicitud, Documento, Entrevista
+from apps.core.consultas import presupuesto_consultas
+from apps.core.media import respuesta_archivo
+from apps.core.outbox import publicar
+from apps.core.tasks import programar_derivados
+
+from .models import CAMPOS_CONTADORES, Solicitud, Documento, Entrevista
 from .serializers import (
     SolicitudListSerializer,
     SolicitudDetailSerializer,
@@ -18,6 +24,7 @@ from .serializers import (
     DocumentoSerializer,
     EntrevistaSerializer,
     AsignarAsesorSerializer,
+    RevisionDocumentosSerializer,
 )
 
 # Importar servicio de notificaciones
@@ -50,6 +57,7 @@ class EsAsesorOAdmin(permissions.BasePermission):
 # VISTAS DE CLIENTE
 # =====================================================
 
+@presupuesto_consultas(3)
 class MisSolicitudesView(generics.ListAPIView):
     """
     GET /api/solicitudes/mis-solicitudes/
@@ -62,11 +70,12 @@ class MisSolicitudesView(generics.ListAPIView):
         user = self.request.user
         
         if user.rol == 'cliente':
-            return Solicitud.objects.filter(cliente=user, is_deleted=False)
+            queryset = Solicitud.objects.filter(cliente=user)
         elif user.rol == 'asesor':
-            return Solicitud.objects.filter(asesor=user, is_deleted=False)
+            queryset = Solicitud.objects.filter(asesor=user)
         else:
-            return Solicitud.objects.filter(is_deleted=False)
+            queryset = Solicitud.objects.all()
+        return SolicitudListSerializer.preparar_queryset(queryset)
 
 
 class CrearSolicitudView(generics.CreateAPIView):
@@ -103,20 +112,20 @@ class SolicitudDetailView(generics.RetrieveAPIView):
         user = self.request.user
         
         if user.rol == 'cliente':
-            return Solicitud.objects.filter(cliente=user, is_deleted=False)
+            return Solicitud.objects.filter(cliente=user)
         elif user.rol == 'asesor':
             return Solicitud.objects.filter(
-                Q(asesor=user) | Q(asesor__isnull=True),
-                is_deleted=False
+                Q(asesor=user) | Q(asesor__isnull=True)
             )
         else:
-            return Solicitud.objects.filter(is_deleted=False)
+            return Solicitud.objects.all()
 
 
 # =====================================================
 # VISTAS DE ASESOR
 # =====================================================
 
+@presupuesto_consultas(4)
 class SolicitudesAsignadasView(generics.ListAPIView):
     """
     GET /api/solicitudes/asignadas/
@@ -127,7 +136,9 @@ class SolicitudesAsignadasView(generics.ListAPIView):
     
     def get_queryset(self):
         user = self.request.user
-        queryset = Solicitud.objects.filter(is_deleted=False).prefetch_related('documentos_adjuntos')
+        queryset = Solicitud.objects.select_related(
+            'cliente', 'asesor', 'entrevista'
+        ).prefetch_related('documentos_adjuntos')
         
         if user.rol == 'asesor':
             queryset = queryset.filter(asesor=user)
@@ -144,6 +155,7 @@ class SolicitudesAsignadasView(generics.ListAPIView):
         return queryset
 
 
+@presupuesto_consultas(3)
 class SolicitudesPendientesView(generics.ListAPIView):
     """
     GET /api/solicitudes/pendientes/
@@ -153,11 +165,10 @@ class SolicitudesPendientesView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated, EsAsesorOAdmin]
     
     def get_queryset(self):
-        return Solicitud.objects.filter(
+        return SolicitudListSerializer.preparar_queryset(Solicitud.objects.filter(
             asesor__isnull=True,
-            estado='pendiente',
-            is_deleted=False
-        )
+            estado='pendiente'
+        ))
 
 
 class ActualizarSolicitudView(generics.UpdateAPIView):
@@ -171,11 +182,15 @@ class ActualizarSolicitudView(generics.UpdateAPIView):
     def get_queryset(self):
         user = self.request.user
         if user.rol == 'asesor':
-            return Solicitud.objects.filter(asesor=user, is_deleted=False)
-        return Solicitud.objects.filter(is_deleted=False)
+            return Solicitud.objects.filter(asesor=user)
+        return Solicitud.objects.all()
     
     def perform_update(self, serializer):
-        instance = serializer.save()
+        # El cambio de estado queda en el historial con su autor y motivo
+        instance = serializer.save(
+            responsable_cambio=self.request.user,
+            observacion_cambio=serializer.validated_data.get('observaciones', '')
+        )
         
         # Registrar fecha de revisión si se actualiza
         if instance.estado in ['aprobada', 'rechazada']:
@@ -216,7 +231,7 @@ class EnviarSolicitudView(APIView):
     
     def post(self, request, pk):
         try:
-            solicitud = Solicitud.objects.get(pk=pk, cliente=request.user, is_deleted=False)
+            solicitud = Solicitud.objects.get(pk=pk, cliente=request.user)
         except Solicitud.DoesNotExist:
             return Response(
                 {'error': 'Solicitud no encontrada'},
@@ -230,6 +245,7 @@ class EnviarSolicitudView(APIView):
             )
         
         solicitud.estado = 'pendiente'
+        solicitud.responsable_cambio = request.user
         solicitud.save()
         
         # Notificar que la solicitud fue enviada
@@ -258,7 +274,7 @@ class SubirDocumentoView(APIView):
     
     def post(self, request, pk):
         try:
-            solicitud = Solicitud.objects.get(pk=pk, cliente=request.user, is_deleted=False)
+            solicitud = Solicitud.objects.get(pk=pk, cliente=request.user)
         except Solicitud.DoesNotExist:
             return Response(
                 {'error': 'Solicitud no encontrada'},
@@ -274,18 +290,30 @@ class SubirDocumentoView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        documento = Documento.objects.create(
-            solicitud=solicitud,
-            nombre=nombre,
-            archivo=archivo,
-            estado='pendiente'
-        )
+        # Opcional: habilita las alertas de vencimiento (apps.solicitudes.vencimientos)
+        fecha_vencimiento = request.data.get('fecha_vencimiento') or None
+        if fecha_vencimiento:
+            try:
+                fecha_vencimiento = serializers.DateField().to_internal_value(fecha_vencimiento)
+            except serializers.ValidationError:
+                return Response(
+                    {'error': 'Fecha de vencimiento inválida (use AAAA-MM-DD)'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
         
-        # Notificar al asesor que el cliente subió un documento
-        try:
-            NotificacionService.notificar_documento_subido(documento, solicitud)
-        except Exception as e:
-            print(f"Error creando notificación: {e}")
+        with transaction.atomic():
+            documento = Documento.objects.create(
+                solicitud=solicitud,
+                nombre=nombre,
+                archivo=archivo,
+                estado='pendiente',
+                fecha_vencimiento=fecha_vencimiento
+            )
+            # El asesor se notifica desde el outbox, después del commit
+            publicar('documento.subido', f'documento.subido:{documento.pk}', documento_id=documento.pk)
+        
+        # Miniatura y vista previa se generan en segundo plano
+        programar_derivados('solicitudes.Documento', documento.pk, documento.archivo.name)
         
         return Response({
             'mensaje': 'Documento subido exitosamente',
@@ -302,7 +330,7 @@ class AsignarAsesorView(APIView):
     
     def post(self, request, pk):
         try:
-            solicitud = Solicitud.objects.get(pk=pk, is_deleted=False)
+            solicitud = Solicitud.objects.get(pk=pk)
         except Solicitud.DoesNotExist:
             return Response(
                 {'error': 'Solicitud no encontrada'},
@@ -319,13 +347,15 @@ class AsignarAsesorView(APIView):
         serializer.is_valid(raise_exception=True)
         
         asesor = Usuario.objects.get(id=serializer.validated_data['asesor_id'])
-        solicitud.asignar_asesor(asesor)
-        
-        # Notificar asignación a cliente y asesor
-        try:
-            NotificacionService.notificar_solicitud_asignada(solicitud)
-        except Exception as e:
-            print(f"Error creando notificación: {e}")
+        with transaction.atomic():
+            solicitud.asignar_asesor(asesor, responsable=request.user)
+            # Cliente y asesor se notifican desde el outbox, después del commit
+            publicar(
+                'solicitud.asignada',
+                f'solicitud.asignada:{solicitud.pk}:{asesor.pk}:{solicitud.fecha_asignacion:%Y%m%d%H%M%S%f}',
+                solicitud_id=solicitud.pk,
+                asesor_id=asesor.pk
+            )
         
         return Response({
             'mensaje': f'Solicitud asignada a {asesor.nombre_completo()}',
@@ -347,7 +377,7 @@ class EstadisticasClienteView(APIView):
     def get(self, request):
         user = request.user
         
-        solicitudes = Solicitud.objects.filter(cliente=user, is_deleted=False)
+        solicitudes = Solicitud.objects.filter(cliente=user)
         
         return Response({
             'total_solicitudes': solicitudes.count(),
@@ -375,9 +405,9 @@ class EstadisticasAsesorView(APIView):
         hoy = timezone.now().date()
         
         if user.rol == 'asesor':
-            solicitudes = Solicitud.objects.filter(asesor=user, is_deleted=False)
+            solicitudes = Solicitud.objects.filter(asesor=user)
         else:
-            solicitudes = Solicitud.objects.filter(is_deleted=False)
+            solicitudes = Solicitud.objects.all()
         
         return Response({
             'total_asignadas': solicitudes.count(),
@@ -399,6 +429,41 @@ class EstadisticasAsesorView(APIView):
         })
 
 
+class AnaliticaSolicitudesView(APIView):
+    """
+    GET /api/solicitudes/analitica/?dias=90
+    Permanencia por estado (percentiles) y embudo de conversión, desglosados
+    por embajada, tipo de visa y asesor. `dias=todo` usa todo el historial.
+    El asesor solo recibe sus propias cifras.
+    """
+    permission_classes = [permissions.IsAuthenticated, EsAsesorOAdmin]
+
+    def get(self, request):
+        from django.conf import settings
+        from .analitica import obtener
+
+        ventanas = settings.ANALITICA_SOLICITUDES_VENTANAS
+        dias = request.query_params.get('dias', '90')
+        dias = None if dias == 'todo' else int(dias) if dias.isdigit() else dias
+        if dias not in ventanas:
+            opciones = ', '.join('todo' if v is None else str(v) for v in ventanas)
+            return Response(
+                {'error': f'Parámetro dias inválido. Opciones: {opciones}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        datos = obtener(dias)
+        if request.user.rol == 'asesor':
+            propio = str(request.user.id)
+            datos = {
+                'dias': datos['dias'],
+                'generado_en': datos['generado_en'],
+                'permanencia': datos['permanencia']['asesor'].get(propio, {}),
+                'embudo': datos['embudo']['asesor'].get(propio),
+            }
+        return Response(datos)
+
+
 # =====================================================
 # VISTAS DE DOCUMENTOS
 # =====================================================
@@ -420,6 +485,33 @@ class DocumentoDetailView(generics.RetrieveAPIView):
         return Documento.objects.all()
 
 
+class DescargarDocumentoView(APIView):
+    """
+    GET /api/documentos/<id>/archivo/
+    Verifica permisos y delega la entrega del archivo al servidor frontal
+    (X-Accel-Redirect / X-Sendfile).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, pk):
+        user = request.user
+        documentos = Documento.objects.all()
+        if user.rol == 'cliente':
+            documentos = documentos.filter(solicitud__cliente=user)
+        elif user.rol == 'asesor':
+            documentos = documentos.filter(solicitud__asesor=user)
+        
+        archivo = documentos.filter(pk=pk).values_list('archivo', flat=True).first()
+        if not archivo:
+            return Response(
+                {'error': 'Documento no encontrado'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        descarga = request.query_params.get('descargar') == 'true'
+        return respuesta_archivo(archivo, descarga=descarga)
+
+
 class AprobarDocumentoView(APIView):
     """
     PATCH /api/documentos/<id>/aprobar/
@@ -443,13 +535,14 @@ class AprobarDocumentoView(APIView):
             documento.revisado_por = user
             documento.fecha_revision = timezone.now()
             documento.motivo_rechazo = ''
-            documento.save()
-            
-            # Notificar al cliente
-            try:
-                NotificacionService.notificar_documento_aprobado(documento, documento.solicitud)
-            except Exception as e:
-                print(f"Error creando notificación: {e}")
+            with transaction.atomic():
+                documento.save()
+                # El cliente se notifica desde el outbox, después del commit
+                publicar(
+                    'documento.aprobado',
+                    f'documento.aprobado:{documento.pk}:{documento.fecha_revision:%Y%m%d%H%M%S%f}',
+                    documento_id=documento.pk
+                )
             
             return Response({
                 'mensaje': 'Documento aprobado exitosamente',
@@ -492,13 +585,14 @@ class RechazarDocumentoView(APIView):
             documento.revisado_por = user
             documento.fecha_revision = timezone.now()
             documento.motivo_rechazo = motivo
-            documento.save()
-            
-            # Notificar al cliente
-            try:
-                NotificacionService.notificar_documento_rechazado(documento, documento.solicitud, motivo)
-            except Exception as e:
-                print(f"Error creando notificación: {e}")
+            with transaction.atomic():
+                documento.save()
+                # El cliente se notifica desde el outbox, después del commit
+                publicar(
+                    'documento.rechazado',
+                    f'documento.rechazado:{documento.pk}:{documento.fecha_revision:%Y%m%d%H%M%S%f}',
+                    documento_id=documento.pk
+                )
             
             return Response({
                 'mensaje': 'Documento rechazado',
@@ -511,6 +605,97 @@ class RechazarDocumentoView(APIView):
             )
 
 
+@presupuesto_consultas(9)
+class RevisarDocumentosView(APIView):
+    """
+    POST /api/solicitudes/<id>/documentos/revisar/
+    Aprueba y/o rechaza varios documentos de una solicitud (asesor):
+        {"decisiones": [{"documento_id": 1, "accion": "aprobar"},
+                        {"documento_id": 2, "accion": "rechazar", "motivo_rechazo": "..."}]}
+    
+    Se aplican en una transacción con bulk_update; los contadores de la
+    solicitud se ajustan una vez y el cliente recibe una sola notificación.
+    """
+    permission_classes = [permissions.IsAuthenticated, EsAsesorOAdmin]
+    
+    def post(self, request, pk):
+        from django.db import transaction
+        
+        try:
+            solicitud = Solicitud.objects.select_related('cliente').get(pk=pk)
+        except Solicitud.DoesNotExist:
+            return Response(
+                {'error': 'Solicitud no encontrada'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        user = request.user
+        if user.rol == 'asesor' and solicitud.asesor_id != user.id:
+            return Response(
+                {'error': 'No tienes permiso para revisar los documentos de esta solicitud'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        serializer = RevisionDocumentosSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        decisiones = {d['documento_id']: d for d in serializer.validated_data['decisiones']}
+        
+        ahora = timezone.now()
+        aprobados, rechazados = [], []
+        with transaction.atomic():
+            documentos = list(
+                solicitud.documentos_adjuntos.select_for_update().filter(pk__in=decisiones)
+            )
+            faltantes = set(decisiones) - {documento.pk for documento in documentos}
+            if faltantes:
+                return Response(
+                    {'error': f'Documentos que no pertenecen a la solicitud: {sorted(faltantes)}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            deltas = [0, 0, 0]
+            for documento in documentos:
+                decision = decisiones[documento.pk]
+                anterior = documento.estado
+                documento.revisado_por = user
+                documento.fecha_revision = ahora
+                if decision['accion'] == 'aprobar':
+                    documento.estado = 'aprobado'
+                    documento.motivo_rechazo = ''
+                    aprobados.append(documento)
+                else:
+                    documento.estado = 'rechazado'
+                    documento.motivo_rechazo = decision['motivo_rechazo']
+                    rechazados.append(documento)
+                for i, delta in enumerate(Documento.deltas_contadores(anterior, documento.estado)):
+                    deltas[i] += delta
+            Documento.objects.bulk_update(
+                documentos, ['estado', 'revisado_por', 'fecha_revision', 'motivo_rechazo']
+            )
+            # bulk_update no pasa por Documento.save(): contadores en un solo UPDATE
+            solicitud.actualizar_contadores(*deltas)
+            solicitud.refresh_from_db(fields=CAMPOS_CONTADORES)
+            progreso = solicitud.progreso_documentos()
+            # Una sola notificación al cliente, desde el outbox
+            publicar(
+                'documentos.revisados',
+                f'documentos.revisados:{solicitud.pk}:{ahora:%Y%m%d%H%M%S%f}',
+                solicitud_id=solicitud.pk,
+                aprobados=[documento.pk for documento in aprobados],
+                rechazados=[documento.pk for documento in rechazados]
+            )
+        
+        return Response({
+            'mensaje': f'{len(aprobados)} documentos aprobados, {len(rechazados)} rechazados',
+            'progreso': progreso,
+            'documentos': DocumentoSerializer(
+                sorted(documentos, key=lambda documento: documento.pk),
+                many=True,
+                context={'request': request}
+            ).data,
+        })
+
+
 class ListarDocumentosSolicitudView(generics.ListAPIView):
     """
     GET /api/solicitudes/<id>/documentos/
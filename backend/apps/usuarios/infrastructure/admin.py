@@ -4,7 +4,9 @@ Panel de administración para gestionar usuarios, asesores y clientes.
 """
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from django.db.models import F
 from django.utils.html import format_html
+from .authentication import olvidar_version_token
 from .models import Usuario
 
 
@@ -80,22 +82,22 @@ class UsuarioAdmin(UserAdmin):
     
     @admin.action(description='Convertir seleccionados en Asesor')
     def make_asesor(self, request, queryset):
-        updated = queryset.update(rol='asesor', is_staff=True)
+        updated = self._actualizar_revocando(queryset, rol='asesor', is_staff=True)
         self.message_user(request, f'{updated} usuario(s) convertidos a asesor.')
     
     @admin.action(description='Convertir seleccionados en Cliente')
     def make_cliente(self, request, queryset):
-        updated = queryset.update(rol='cliente', is_staff=False)
+        updated = self._actualizar_revocando(queryset, rol='cliente', is_staff=False)
         self.message_user(request, f'{updated} usuario(s) convertidos a cliente.')
     
     @admin.action(description='Activar usuarios seleccionados')
     def activate_users(self, request, queryset):
-        updated = queryset.update(is_active=True)
+        updated = self._actualizar_revocando(queryset, is_active=True)
         self.message_user(request, f'{updated} usuario(s) activados.')
     
     @admin.action(description='Desactivar usuarios seleccionados')
     def deactivate_users(self, request, queryset):
-        updated = queryset.update(is_active=False)
+        updated = self._actualizar_revocando(queryset, is_active=False)
         self.message_user(request, f'{updated} usuario(s) desactivados.')
     
     def save_model(self, request, obj, form, change):
@@ -106,6 +108,24 @@ class UsuarioAdmin(UserAdmin):
             obj.is_staff = True
             obj.is_superuser = True
         super().save_model(request, obj, form, change)
+        if change and {'rol', 'is_active', 'password'} & set(form.changed_data):
+            obj.revocar_tokens()
+    
+    def user_change_password(self, request, id, form_url=''):
+        respuesta = super().user_change_password(request, id, form_url)
+        if request.method == 'POST' and respuesta.status_code == 302:
+            Usuario.objects.get(pk=id).revocar_tokens()
+        return respuesta
+    
+    def _actualizar_revocando(self, queryset, **campos):
+        """Actualización masiva que además revoca los JWT emitidos."""
+        ids = list(queryset.values_list('pk', flat=True))
+        updated = Usuario.objects.filter(pk__in=ids).update(
+            token_version=F('token_version') + 1, **campos
+        )
+        for usuario_id in ids:
+            olvidar_version_token(usuario_id)
+        return updated
 
 
 # Personalizar título del admin
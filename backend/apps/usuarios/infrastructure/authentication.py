@@ -0,0 +1,93 @@
+"""
+Autenticación JWT sin consulta del usuario por request.
+
+El access token lleva en sus claims el id, el rol y la versión de token
+del usuario. La vista recibe un `UsuarioToken` construido desde esos
+claims: solo consulta la base de datos si se accede a un atributo que no
+viene en el token (email, nombre, contraseña...).
+
+Revocación: cada usuario tiene un `token_version` que se incrementa al
+cambiar la contraseña, el rol o al desactivarlo. La versión vigente se
+guarda en caché (`usuario:tv:<id>`), así que validar un token no cuesta
+una consulta salvo cuando la caché está fría.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import Usuario, UsuarioToken
+
+CLAIM_ROL = 'rol'
+CLAIM_VERSION = 'tv'
+
+# La revocación se propaga como máximo en este tiempo si falla el borrado
+TIMEOUT_VERSION = 60 * 60
+
+
+def _clave_version(usuario_id):
+    return f'usuario:tv:{usuario_id}'
+
+
+def version_token(usuario_id):
+    """Versión de token vigente del usuario (None si no existe o está inactivo)."""
+    clave = _clave_version(usuario_id)
+    version = cache.get(clave)
+    if version is None:
+        version = Usuario.objects.filter(pk=usuario_id, is_active=True).values_list(
+            'token_version', flat=True
+        ).first()
+        # -1 marca usuarios inexistentes/inactivos para no consultar en cada request
+        cache.set(clave, -1 if version is None else version, TIMEOUT_VERSION)
+        return version
+    return None if version == -1 else version
+
+
+def olvidar_version_token(usuario_id):
+    """Descarta la versión en caché tras confirmar la transacción en curso."""
+    clave = _clave_version(usuario_id)
+    cache.delete(clave)
+    transaction.on_commit(lambda: cache.delete(clave))
+
+
+# =====================================================
+# TOKENS
+# =====================================================
+
+class TokenUsuario(RefreshToken):
+    """Refresh token con rol y versión; el access token hereda los claims."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[CLAIM_ROL] = user.rol
+        token[CLAIM_VERSION] = user.token_version
+        return token
+
+
+# =====================================================
+# AUTENTICACIÓN
+# =====================================================
+
+class JWTAutenticacionClaims(JWTAuthentication):
+    """JWTAuthentication que no carga el Usuario en cada request."""
+
+    def get_user(self, validated_token):
+        try:
+            usuario_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        rol = validated_token.get(CLAIM_ROL)
+        version = validated_token.get(CLAIM_VERSION)
+        if rol is None or version is None:
+            # Tokens emitidos antes de incluir los claims
+            return super().get_user(validated_token)
+
+        if version != version_token(usuario_id):
+            raise AuthenticationFailed('Token revocado', code='token_revoked')
+
+        return UsuarioToken.desde_claims(usuario_id, rol)
@@ -1,7 +1,7 @@
 """
 Modelo de Usuario personalizado para autenticación.
 """
-from django.db import models
+from django.db import models, router
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from apps.core.models import TimeStampedModel
 
@@ -67,6 +67,13 @@ class Usuario(AbstractUser):
         null=True,
         blank=True
     )
+    foto_perfil_miniatura = models.ImageField(
+        'Miniatura de foto de perfil',
+        upload_to='usuarios/fotos/',
+        null=True,
+        blank=True,
+        editable=False
+    )
     
     # Para asesores: límite diario de solicitudes
     limite_solicitudes_diarias = models.PositiveIntegerField(
@@ -74,6 +81,13 @@ class Usuario(AbstractUser):
         default=10
     )
     
+    # Se incrementa para revocar todos los JWT emitidos al usuario
+    token_version = models.PositiveIntegerField(
+        'Versión de token',
+        default=0,
+        editable=False
+    )
+    
     # Campos de auditoría
     created_at = models.DateTimeField('Fecha de creación', auto_now_add=True)
     updated_at = models.DateTimeField('Fecha de actualización', auto_now=True)
@@ -107,3 +121,47 @@ class Usuario(AbstractUser):
     def es_cliente(self) -> bool:
         """Verifica si el usuario es cliente."""
         return self.rol == 'cliente'
+    
+    def revocar_tokens(self):
+        """
+        Invalida todos los JWT emitidos al usuario.
+        Se llama al cambiar la contraseña, el rol o al desactivarlo.
+        """
+        Usuario.objects.filter(pk=self.pk).update(
+            token_version=models.F('token_version') + 1
+        )
+        self.refresh_from_db(fields=['token_version'])
+        
+        from .authentication import olvidar_version_token
+        olvidar_version_token(self.pk)
+
+
+class UsuarioToken(Usuario):
+    """
+    Usuario construido desde los claims del access token.
+    
+    Es una instancia real de Usuario con los campos fuera del token
+    diferidos: se puede asignar a ForeignKeys y usar en filtros sin
+    consultar la base de datos. El primer acceso a un campo diferido
+    carga todos los demás en una sola consulta.
+    """
+    
+    class Meta:
+        proxy = True
+        verbose_name = 'Usuario (token)'
+        verbose_name_plural = 'Usuarios (token)'
+    
+    @classmethod
+    def desde_claims(cls, usuario_id, rol):
+        """Crea la instancia sin consultar la base de datos."""
+        valores = {'id': usuario_id, 'rol': rol, 'is_active': True}
+        campos = [f.attname for f in cls._meta.concrete_fields if f.attname in valores]
+        return cls.from_db(
+            router.db_for_read(Usuario), campos, [valores[c] for c in campos]
+        )
+    
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        diferidos = self.get_deferred_fields()
+        if fields is not None and diferidos and set(fields) <= diferidos:
+            fields = list(diferidos)
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-19 11:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usuario',
+            name='foto_perfil_miniatura',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='usuarios/fotos/', verbose_name='Miniatura de foto de perfil'),
+        ),
+    ]
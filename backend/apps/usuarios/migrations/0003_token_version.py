@@ -0,0 +1,31 @@
+# Generated by Django 5.2.10 on 2026-10-19 11:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0002_derivados_imagen'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UsuarioToken',
+            fields=[
+            ],
+            options={
+                'verbose_name': 'Usuario (token)',
+                'verbose_name_plural': 'Usuarios (token)',
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('usuarios.usuario',),
+        ),
+        migrations.AddField(
+            model_name='usuario',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Versión de token'),
+        ),
+    ]
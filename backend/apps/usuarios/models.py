@@ -2,6 +2,6 @@
 Modelos de la app Usuarios.
 Re-exporta desde infrastructure para que Django los encuentre.
 """
-from .infrastructure.models import Usuario, UsuarioManager
+from .infrastructure.models import Usuario, UsuarioManager, UsuarioToken
 
-__all__ = ['Usuario', 'UsuarioManager']
+__all__ = ['Usuario', 'UsuarioManager', 'UsuarioToken']
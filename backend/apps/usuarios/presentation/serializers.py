@@ -4,21 +4,39 @@ Serializers para la API de Usuarios.
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.core.media import url_firmada
+
+from ..infrastructure.authentication import CLAIM_ROL, CLAIM_VERSION, TokenUsuario
 
 Usuario = get_user_model()
 
 
+class ImagenFirmadaField(serializers.ImageField):
+    """ImageField que se lee como URL firmada de corta duración (ver apps.core.media)."""
+
+    def to_representation(self, value):
+        return url_firmada(value, self.context.get('request'))
+
+
 class UsuarioSerializer(serializers.ModelSerializer):
     """Serializer para ver/listar usuarios."""
     nombre_completo = serializers.SerializerMethodField()
+    # Las fotos se sirven como los documentos: sin URL pública en /media/
+    foto_perfil = ImagenFirmadaField(required=False, allow_null=True)
+    foto_perfil_miniatura = ImagenFirmadaField(read_only=True)
 
     class Meta:
         model = Usuario
         fields = [
             'id', 'email', 'first_name', 'last_name', 'nombre_completo',
-            'rol', 'telefono', 'foto_perfil', 'is_active', 'created_at'
+            'rol', 'telefono', 'foto_perfil', 'foto_perfil_miniatura',
+            'is_active', 'created_at'
         ]
-        read_only_fields = ['id', 'created_at']
+        read_only_fields = ['id', 'foto_perfil_miniatura', 'created_at']
 
     def get_nombre_completo(self, obj):
         return obj.nombre_completo()
@@ -80,6 +98,39 @@ class LoginSerializer(serializers.Serializer):
     password = serializers.CharField(required=True, write_only=True)
 
 
+class RefreshTokenSerializer(TokenRefreshSerializer):
+    """
+    Refresh que valida la versión de token y actualiza el rol en los claims.
+    Es el único punto (fuera del login) que consulta el usuario.
+    """
+    token_class = TokenUsuario
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+
+        usuario = Usuario.objects.filter(
+            pk=refresh.payload.get(api_settings.USER_ID_CLAIM),
+            is_active=True
+        ).only('id', 'rol', 'token_version').first()
+        version = refresh.payload.get(CLAIM_VERSION, 0)
+        if usuario is None or version != usuario.token_version:
+            raise AuthenticationFailed(
+                self.error_messages['no_active_account'], 'no_active_account'
+            )
+
+        refresh[CLAIM_ROL] = usuario.rol
+        refresh[CLAIM_VERSION] = usuario.token_version
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+
+        return data
+
+
 class CambiarPasswordSerializer(serializers.Serializer):
     """Serializer para cambiar contraseña."""
     password_actual = serializers.CharField(required=True, write_only=True)
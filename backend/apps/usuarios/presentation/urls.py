@@ -19,6 +19,10 @@ from .views import (
     AdminAsesorDetailView,
     ToggleAsesorEstadoView,
     AdminEstadisticasView,
+    AdminExportarView,
+    AdminExportacionView,
+    AdminImportarClientesView,
+    AdminImportacionView,
 )
 
 app_name = 'usuarios'
@@ -41,6 +45,10 @@ urlpatterns = [
     
     # Administración
     path('admin/estadisticas/', AdminEstadisticasView.as_view(), name='admin_estadisticas'),
+    path('admin/exportaciones/trabajos/<int:pk>/', AdminExportacionView.as_view(), name='admin_exportacion'),
+    path('admin/exportaciones/<str:recurso>/', AdminExportarView.as_view(), name='admin_exportar'),
+    path('admin/importaciones/trabajos/<int:pk>/', AdminImportacionView.as_view(), name='admin_importacion'),
+    path('admin/importaciones/clientes/', AdminImportarClientesView.as_view(), name='admin_importar_clientes'),
     path('admin/asesores/', AdminAsesoresListView.as_view(), name='admin_asesores_list'),
     path('admin/asesores/crear/', CrearAsesorView.as_view(), name='admin_crear_asesor'),
     path('admin/asesores/<int:pk>/', AdminAsesorDetailView.as_view(), name='admin_asesor_detail'),
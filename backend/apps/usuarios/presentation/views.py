@@ -8,6 +8,7 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model, authenticate
 from django.db import models
 
+from ..infrastructure.authentication import TokenUsuario
 from .serializers import (
     UsuarioSerializer,
     RegistroSerializer,
@@ -38,7 +39,7 @@ class RegistroView(generics.CreateAPIView):
         user = serializer.save()
 
         # Generar tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = TokenUsuario.for_user(user)
 
         return Response({
             'mensaje': 'Usuario registrado exitosamente',
@@ -77,7 +78,7 @@ class LoginView(APIView):
             }, status=status.HTTP_401_UNAUTHORIZED)
 
         # Generar tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = TokenUsuario.for_user(user)
 
         return Response({
             'mensaje': 'Login exitoso',
@@ -130,7 +131,11 @@ class PerfilView(APIView):
             partial=True
         )
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        usuario = serializer.save()
+
+        if 'foto_perfil' in request.FILES:
+            from apps.core.tasks import programar_derivados
+            programar_derivados('usuarios.Usuario', usuario.pk, usuario.foto_perfil.name)
 
         return Response({
             'mensaje': 'Perfil actualizado',
@@ -158,7 +163,17 @@ class CambiarPasswordView(APIView):
         user.set_password(serializer.validated_data['password_nuevo'])
         user.save()
 
-        return Response({'mensaje': 'Contraseña actualizada exitosamente'})
+        # Revocar las sesiones abiertas y emitir tokens nuevos para esta
+        user.revocar_tokens()
+        refresh = TokenUsuario.for_user(user)
+
+        return Response({
+            'mensaje': 'Contraseña actualizada exitosamente',
+            'tokens': {
+                'access': str(refresh.access_token),
+                'refresh': str(refresh),
+            }
+        })
 
 
 # =====================================================
@@ -201,7 +216,17 @@ class AsesoresListView(generics.ListAPIView):
         return Usuario.objects.filter(rol='asesor', is_active=True)
 
 
-class UsuarioDetailView(generics.RetrieveUpdateAPIView):
+class RevocarTokensMixin:
+    """Revoca los JWT del usuario si una actualización cambia su rol o estado."""
+
+    def perform_update(self, serializer):
+        anterior = (serializer.instance.rol, serializer.instance.is_active)
+        usuario = serializer.save()
+        if (usuario.rol, usuario.is_active) != anterior:
+            usuario.revocar_tokens()
+
+
+class UsuarioDetailView(RevocarTokensMixin, generics.RetrieveUpdateAPIView):
     """
     GET /api/usuarios/<id>/
     PATCH /api/usuarios/<id>/
@@ -282,7 +307,7 @@ class AdminAsesoresListView(generics.ListAPIView):
         return queryset.order_by('-created_at')
 
 
-class AdminAsesorDetailView(generics.RetrieveUpdateDestroyAPIView):
+class AdminAsesorDetailView(RevocarTokensMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     GET/PUT/DELETE /api/admin/asesores/<id>/
     Detalle, actualización y eliminación de asesor - solo admin.
@@ -296,6 +321,7 @@ class AdminAsesorDetailView(generics.RetrieveUpdateDestroyAPIView):
         instance = self.get_object()
         instance.is_active = False
         instance.save()
+        instance.revocar_tokens()
         return Response({'message': 'Asesor desactivado exitosamente'}, status=status.HTTP_200_OK)
 
 
@@ -317,6 +343,7 @@ class ToggleAsesorEstadoView(APIView):
         
         asesor.is_active = not asesor.is_active
         asesor.save()
+        asesor.revocar_tokens()
         
         estado = 'activado' if asesor.is_active else 'desactivado'
         return Response({
@@ -329,31 +356,248 @@ class AdminEstadisticasView(APIView):
     """
     GET /api/admin/estadisticas/
     Estadísticas del sistema para el dashboard admin.
+    
+    Lee los resúmenes materializados (apps.core.resumenes), así que el
+    costo no crece con el tamaño de las tablas. Con ?serie=<métrica>
+    devuelve la serie temporal para gráficos de tendencia:
+        ?serie=solicitudes_creadas&granularidad=dia&dias=30&dimension=embajada
     """
     permission_classes = [permissions.IsAuthenticated, EsAdmin]
     
     def get(self, request):
-        from apps.solicitudes.models import Solicitud
-        from apps.preparacion.models import Simulacro
+        from apps.core import resumenes
+        
+        if request.query_params.get('serie'):
+            return self._serie(request)
+        return Response(resumenes.tablero())
+    
+    def _serie(self, request):
+        from apps.core import resumenes
         from django.utils import timezone
         from datetime import timedelta
         
-        hoy = timezone.now().date()
+        params = request.query_params
+        metrica = params['serie']
+        granularidad = params.get('granularidad', 'dia')
+        if metrica not in resumenes.METRICAS or granularidad not in resumenes.DURACIONES:
+            return Response(
+                {'error': f"Métrica o granularidad inválida. Métricas: {', '.join(resumenes.METRICAS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            dias = min(max(int(params.get('dias', 30)), 1), 366)
+        except ValueError:
+            return Response(
+                {'error': 'dias debe ser un número entero'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        stats = {
-            'total_usuarios': Usuario.objects.count(),
-            'total_asesores': Usuario.objects.filter(rol='asesor').count(),
-            'asesores_activos': Usuario.objects.filter(rol='asesor', is_active=True).count(),
-            'total_clientes': Usuario.objects.filter(rol='cliente').count(),
-            'clientes_activos': Usuario.objects.filter(rol='cliente', is_active=True).count(),
-            'solicitudes_totales': Solicitud.objects.count(),
-            'solicitudes_pendientes': Solicitud.objects.filter(estado='pendiente').count(),
-            'solicitudes_hoy': Solicitud.objects.filter(created_at__date=hoy).count(),
-            'simulacros_hoy': Simulacro.objects.filter(fecha=hoy, is_deleted=False).count(),
-            'simulacros_semana': Simulacro.objects.filter(
-                fecha__gte=hoy - timedelta(days=7),
-                is_deleted=False
-            ).count(),
-        }
+        ahora = timezone.now()
+        hasta = resumenes.inicio_periodo(ahora, granularidad)
+        if granularidad == 'hora':
+            # Las filas horarias solo cubren el día en curso
+            desde = resumenes.inicio_periodo(ahora, 'dia')
+        else:
+            desde = hasta - timedelta(days=dias - 1)
+        dimension = params.get('dimension', '')
         
-        return Response(stats)
\ No newline at end of file
+        return Response({
+            'metrica': metrica,
+            'granularidad': granularidad,
+            'dimension': dimension,
+            'puntos': resumenes.serie(metrica, granularidad, desde, hasta, dimension),
+        })
+
+
+class AdminExportarView(APIView):
+    """
+    GET /api/admin/exportaciones/<recurso>/?formato=csv&json=columnas&estado=...
+    Exporta solicitudes, simulacros o recomendaciones (solo admin).
+    
+    CSV se transmite fila a fila; XLSX requiere openpyxl. Si el resultado
+    supera EXPORTACION_MAX_FILAS_SINCRONA filas (o con ?segundo_plano=1)
+    responde 202 con el trabajo creado; la descarga queda disponible en
+    /api/admin/exportaciones/trabajos/<id>/.
+    """
+    permission_classes = [permissions.IsAuthenticated, EsAdmin]
+    
+    def perform_content_negotiation(self, request, force=False):
+        # Accept: text/csv no debe terminar en 406
+        return super().perform_content_negotiation(request, force=True)
+    
+    def get(self, request, recurso):
+        from apps.core import exportaciones
+        from apps.core.models import Exportacion
+        from apps.core.tasks import generar_exportacion
+        from django.db import transaction
+        
+        params = request.query_params
+        formato = params.get('formato', 'csv')
+        modo_json = params.get('json', 'texto')
+        try:
+            exportaciones.validar(recurso, formato, modo_json)
+            filtros = exportaciones.limpiar_filtros(recurso, {
+                clave: params[clave]
+                for clave in exportaciones.RECURSOS[recurso].filtros if clave in params
+            })
+        except exportaciones.ErrorExportacion as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        segundo_plano = params.get('segundo_plano') in ('1', 'true')
+        if not segundo_plano and not exportaciones.supera_limite_sincrono(recurso, filtros):
+            return exportaciones.respuesta(recurso, formato, filtros, modo_json)
+        
+        exportacion = Exportacion.objects.create(
+            usuario=request.user,
+            recurso=recurso,
+            formato=formato,
+            parametros={'filtros': filtros, 'json': modo_json},
+        )
+        transaction.on_commit(lambda: generar_exportacion.delay(exportacion.pk))
+        return Response(
+            _datos_exportacion(exportacion, request),
+            status=status.HTTP_202_ACCEPTED
+        )
+
+
+class AdminExportacionView(APIView):
+    """
+    GET /api/admin/exportaciones/trabajos/<id>/
+    Estado de una exportación en segundo plano y, si terminó, su URL de
+    descarga firmada (vigencia MEDIA_URL_FIRMADA_MAX_AGE).
+    """
+    permission_classes = [permissions.IsAuthenticated, EsAdmin]
+    
+    def get(self, request, pk):
+        from apps.core.models import Exportacion
+        
+        try:
+            exportacion = Exportacion.objects.get(pk=pk, usuario=request.user)
+        except Exportacion.DoesNotExist:
+            return Response(
+                {'error': 'Exportación no encontrada'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(_datos_exportacion(exportacion, request))
+
+
+class AdminImportarClientesView(APIView):
+    """
+    POST /api/admin/importaciones/clientes/
+    Alta masiva de clientes y solicitudes desde CSV (multipart: archivo,
+    simular=true para validar sin escribir).
+    
+    La simulación responde en el acto el resumen con las asignaciones por
+    asesor y los errores por fila. La importación real responde 202 con el
+    trabajo creado: la tarea solicitudes.importar_clientes hashea las
+    contraseñas y escribe los lotes, y el resumen queda en
+    /api/admin/importaciones/trabajos/<id>/.
+    
+    Archivos de más de IMPORTACION_MAX_FILAS_API filas se importan con
+    `python manage.py importar_clientes`, que además hashea las contraseñas
+    en un pool de procesos.
+    """
+    permission_classes = [permissions.IsAuthenticated, EsAdmin]
+    
+    def post(self, request):
+        import io
+        from django.conf import settings
+        from django.db import transaction
+        from apps.solicitudes.importacion import ErrorImportacion, Importacion
+        from apps.solicitudes.models import TrabajoImportacion
+        from apps.solicitudes.tasks import importar_clientes
+        
+        archivo = request.FILES.get('archivo')
+        if archivo is None:
+            return Response(
+                {'error': 'Se requiere el archivo CSV (campo "archivo")'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # Cota superior (un registro puede ocupar varias líneas)
+        lineas = sum(1 for _ in archivo) - 1
+        if lineas > settings.IMPORTACION_MAX_FILAS_API:
+            return Response(
+                {'error': f'El archivo supera {settings.IMPORTACION_MAX_FILAS_API} filas; '
+                          'usa el comando importar_clientes'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        archivo.seek(0)
+        
+        simular = str(request.data.get('simular', '')).lower() in ('1', 'true')
+        if not simular:
+            trabajo = TrabajoImportacion(usuario=request.user)
+            trabajo.archivo.save(archivo.name, archivo, save=False)
+            trabajo.save()
+            transaction.on_commit(lambda: importar_clientes.delay(trabajo.pk))
+            return Response(
+                _datos_importacion(trabajo, request),
+                status=status.HTTP_202_ACCEPTED
+            )
+        
+        # La simulación no hashea contraseñas: se responde en el acto
+        importacion = Importacion(responsable=request.user, simular=True)
+        try:
+            resumen = importacion.ejecutar(
+                io.TextIOWrapper(archivo.file, encoding='utf-8-sig', newline='')
+            )
+        except (ErrorImportacion, UnicodeDecodeError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(resumen, status=status.HTTP_200_OK)
+
+
+class AdminImportacionView(APIView):
+    """
+    GET /api/admin/importaciones/trabajos/<id>/
+    Estado de una importación en segundo plano y, si terminó, su resumen
+    (asignaciones por asesor y errores por fila).
+    """
+    permission_classes = [permissions.IsAuthenticated, EsAdmin]
+    
+    def get(self, request, pk):
+        from apps.solicitudes.models import TrabajoImportacion
+        
+        try:
+            trabajo = TrabajoImportacion.objects.get(pk=pk, usuario=request.user)
+        except TrabajoImportacion.DoesNotExist:
+            return Response(
+                {'error': 'Importación no encontrada'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(_datos_importacion(trabajo, request))
+
+
+def _datos_importacion(trabajo, request):
+    from django.urls import reverse
+    
+    return {
+        'id': trabajo.id,
+        'estado': trabajo.estado,
+        'error': trabajo.error,
+        'resumen': trabajo.resumen or None,
+        'created_at': trabajo.created_at,
+        'completada_en': trabajo.completada_en,
+        'url_estado': request.build_absolute_uri(
+            reverse('usuarios:admin_importacion', kwargs={'pk': trabajo.pk})
+        ),
+    }
+
+
+def _datos_exportacion(exportacion, request):
+    from apps.core.media import url_firmada
+    from django.urls import reverse
+    
+    return {
+        'id': exportacion.id,
+        'recurso': exportacion.recurso,
+        'formato': exportacion.formato,
+        'estado': exportacion.estado,
+        'filas': exportacion.filas,
+        'error': exportacion.error,
+        'created_at': exportacion.created_at,
+        'completada_en': exportacion.completada_en,
+        'url_estado': request.build_absolute_uri(
+            reverse('usuarios:admin_exportacion', kwargs={'pk': exportacion.pk})
+        ),
+        'url_descarga': url_firmada(exportacion.archivo, request, descarga=True)
+        if exportacion.estado == 'completada' else None,
+    }
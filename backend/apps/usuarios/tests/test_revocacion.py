@@ -0,0 +1,76 @@
+"""
+Revocación de JWT con la versión de token en caché.
+
+Usa una caché local real (en tests es DummyCache): lo que se prueba es
+precisamente que una entrada vieja en caché no deje pasar un token revocado.
+"""
+import pytest
+from django.core.cache import cache
+
+from apps.usuarios.infrastructure.authentication import _clave_version, version_token
+
+PERFIL = '/api/auth/perfil/'
+
+
+@pytest.fixture(autouse=True)
+def cache_local(settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_token_rechazado_tras_revocar_con_la_cache_caliente(crear_usuario, cliente_api):
+    usuario = crear_usuario('cliente')
+    api = cliente_api(usuario)
+    assert api.get(PERFIL).status_code == 200
+    assert cache.get(_clave_version(usuario.pk)) == usuario.token_version
+
+    usuario.revocar_tokens()
+
+    respuesta = api.get(PERFIL)
+    assert respuesta.status_code == 401
+    assert respuesta.data['code'] == 'token_revoked'
+    assert cliente_api(usuario).get(PERFIL).status_code == 200
+
+
+@pytest.mark.django_db
+def test_token_rechazado_tras_desactivar(crear_usuario, cliente_api):
+    admin = crear_usuario('admin')
+    asesor = crear_usuario('asesor')
+    api = cliente_api(asesor)
+    assert api.get(PERFIL).status_code == 200
+
+    respuesta = cliente_api(admin).post(f'/api/admin/asesores/{asesor.pk}/toggle-estado/')
+
+    assert respuesta.status_code == 200
+    assert api.get(PERFIL).status_code == 401
+
+
+@pytest.mark.django_db
+def test_token_rechazado_tras_cambiar_password(crear_usuario, cliente_api):
+    usuario = crear_usuario('cliente')
+    api = cliente_api(usuario)
+    assert api.get(PERFIL).status_code == 200
+
+    respuesta = api.post('/api/auth/cambiar-password/', {
+        'password_actual': 'Clave12345!',
+        'password_nuevo': 'OtraClave678!',
+        'password_confirmar': 'OtraClave678!',
+    }, format='json')
+
+    assert respuesta.status_code == 200
+    assert api.get(PERFIL).status_code == 401
+    api.credentials(HTTP_AUTHORIZATION=f"Bearer {respuesta.data['tokens']['access']}")
+    assert api.get(PERFIL).status_code == 200
+
+
+@pytest.mark.django_db
+def test_usuario_inactivo_queda_marcado_en_cache(crear_usuario, django_assert_num_queries):
+    usuario = crear_usuario('cliente', is_active=False)
+
+    assert version_token(usuario.pk) is None
+    assert cache.get(_clave_version(usuario.pk)) == -1
+    with django_assert_num_queries(0):
+        assert version_token(usuario.pk) is None
@@ -36,6 +36,48 @@ app.conf.beat_schedule = {
         'schedule': crontab(hour=3, minute=0, day_of_week=0),  # Domingo 3:00
         'kwargs': {'dias': 90}
     },
+    
+    # Entregas de notificaciones por email/push (outbox) - cada minuto
+    'enviar-entregas-notificaciones': {
+        'task': 'notificaciones.enviar_entregas',
+        'schedule': crontab(),
+    },
+    
+    # Analítica de solicitudes (permanencia y embudo) - cada hora
+    'calcular-analitica-solicitudes': {
+        'task': 'solicitudes.calcular_analitica',
+        'schedule': crontab(minute=30),
+    },
+    
+    # Resúmenes de KPIs del dashboard admin - cada 15 minutos (existencias: una vez por hora)
+    'actualizar-resumenes-metricas': {
+        'task': 'core.actualizar_resumenes',
+        'schedule': crontab(minute='*/15'),
+    },
+    
+    # Purgar exportaciones vencidas - diariamente a las 4:00
+    'purgar-exportaciones': {
+        'task': 'core.purgar_exportaciones',
+        'schedule': crontab(hour=4, minute=0),
+    },
+    
+    # Relay del outbox de eventos (red de seguridad) - cada minuto
+    'despachar-eventos-outbox': {
+        'task': 'core.despachar_eventos',
+        'schedule': crontab(),
+    },
+    
+    # Purgar eventos del outbox ya procesados - diariamente a las 4:30
+    'purgar-eventos-outbox': {
+        'task': 'core.purgar_eventos',
+        'schedule': crontab(hour=4, minute=30),
+    },
+    
+    # Alertas de documentos por vencer - diariamente a las 8:00
+    'escanear-vencimientos-documentos': {
+        'task': 'solicitudes.escanear_vencimientos',
+        'schedule': crontab(hour=8, minute=0),
+    },
 }
 
 
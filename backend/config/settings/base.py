@@ -39,6 +39,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Perfilado bajo demanda (cabecera X-Perfilar firmada o muestreo desde el admin).
+    # Va por fuera para que sus consultas no cuenten en métricas ni presupuestos.
+    'apps.core.middleware.perfilado.PerfiladoMiddleware',
+    # Para medir el request completo (se descarta si está deshabilitado)
+    'apps.core.middleware.metricas.MetricasMiddleware',
+    # Detector de consultas N+1 (solo desarrollo y tests)
+    'apps.core.middleware.consultas.DetectorConsultasMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -103,6 +110,144 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Media protegida: Django autoriza y el servidor frontal entrega el archivo.
+# 'django' (desarrollo) | 'nginx' (X-Accel-Redirect) | 'apache' (X-Sendfile)
+MEDIA_SENDFILE_BACKEND = os.environ.get('MEDIA_SENDFILE_BACKEND', 'django')
+# Location interna de nginx que apunta a MEDIA_ROOT
+MEDIA_SENDFILE_PREFIX = '/media-protegida/'
+# Vigencia de las URLs firmadas (segundos)
+MEDIA_URL_FIRMADA_MAX_AGE = int(os.environ.get('MEDIA_URL_FIRMADA_MAX_AGE', 300))
+
+# Derivados de imágenes (miniaturas y vistas previas web)
+IMAGEN_MINIATURA_TAMANO = (320, 320)
+IMAGEN_VISTA_PREVIA_TAMANO = (1600, 1600)
+IMAGEN_CALIDAD_JPEG = 82
+
+# Canal en tiempo real de salas de simulacro (SSE sobre ASGI).
+# Sin URL de Redis se usa un canal en memoria (un solo proceso).
+SALAS_REDIS_URL = os.environ.get('SALAS_REDIS_URL', '')
+SALAS_TOKEN_MAX_AGE = 12 * 60 * 60  # Vigencia del token del canal (segundos)
+SALAS_HEARTBEAT = 15  # Intervalo de latido SSE (segundos)
+SALAS_PRESENCIA_TTL = 45  # Presencia expira sin latidos (segundos)
+SALAS_ESTADO_TTL = 24 * 60 * 60
+SALAS_COLA_MAXIMA = 32  # Eventos pendientes por conexión
+
+# Métricas por endpoint expuestas en /metrics (formato Prometheus).
+# Sin URL de Redis se agregan en memoria de cada proceso.
+METRICAS_HABILITADAS = os.environ.get('METRICAS_HABILITADAS', 'False').lower() == 'true'
+METRICAS_REDIS_URL = os.environ.get('METRICAS_REDIS_URL', '')
+METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN', '')
+
+# Detector de consultas N+1: agrupa el SQL de cada request por sentencia y
+# sitio de llamada. En modo estricto, las vistas con @presupuesto_consultas
+# que lo superan lanzan ExcesoConsultas (tests).
+DETECTOR_CONSULTAS = False
+DETECTOR_CONSULTAS_UMBRAL = 5  # Repeticiones de una misma consulta para avisar
+DETECTOR_CONSULTAS_ESTRICTO = False
+
+# Perfilado de requests bajo demanda. Los perfiles (cProfile + línea de
+# tiempo SQL) se revisan en el admin: Core > Perfiles de requests.
+# Desactivado por defecto: habilitado, cada request resuelve su ruta y
+# consulta el muestreo. Se activa con PERFILADO_HABILITADO=True.
+PERFILADO_HABILITADO = os.environ.get('PERFILADO_HABILITADO', 'False').lower() == 'true'
+PERFILADO_FIRMA_MAX_AGE = 24 * 60 * 60  # Vigencia del token de X-Perfilar (segundos)
+PERFILADO_RECARGA = 30  # Segundos entre recargas de las configuraciones de muestreo
+PERFILADO_LINEAS = 80  # Funciones guardadas en el resumen de cProfile
+PERFILADO_MAX_CONSULTAS = 500  # Consultas guardadas en la línea de tiempo
+
+# Presupuesto de arranque (ms, mediana) verificado por `manage.py perfil_arranque`:
+# 'check' = arranque de un pod web, 'worker' = arranque en frío de un worker.
+ARRANQUE_PRESUPUESTO_MS = {'check': 1500, 'worker': 1500}
+# Dependencias pesadas que deben importarse dentro de la función que las usa.
+# `requests` no se incluye: rest_framework.compat lo importa si está instalado.
+ARRANQUE_MODULOS_DIFERIDOS = ['weasyprint', 'google.generativeai', 'redis']
+
+# Tamaño máximo de las transcripciones de simulacros (bytes, texto normalizado)
+TRANSCRIPCION_MAX_BYTES = int(os.environ.get('TRANSCRIPCION_MAX_BYTES', 2 * 1024 * 1024))
+
+# Agenda de asesores (apps.preparacion.agenda): duración de cada evento,
+# horario de atención (hora local) y granularidad de los horarios libres.
+AGENDA_DURACION_SIMULACRO = 60  # minutos
+AGENDA_DURACION_ENTREVISTA = 30  # minutos
+AGENDA_JORNADA = ('09:00', '18:00')
+AGENDA_DIAS_HABILES = (0, 1, 2, 3, 4)  # lunes a viernes
+AGENDA_PASO_MINUTOS = 30
+AGENDA_MAX_DIAS = 31  # Rango máximo consultable en /simulacros/disponibilidad/
+
+# Resúmenes de KPIs del dashboard admin (apps.core.resumenes), recalculados
+# por Celery beat. Si el resumen del día tiene más de RESUMENES_MAX_ANTIGUEDAD
+# segundos (beat detenido), el endpoint lo sirve igual y encola la tarea, como
+# mucho una vez cada RESUMENES_REFRESCO_ESPERA segundos.
+RESUMENES_MAX_ANTIGUEDAD = 60 * 60
+RESUMENES_REFRESCO_ESPERA = 5 * 60
+RESUMENES_RETENCION_HORAS = 48  # Filas horarias conservadas
+
+# Analítica de solicitudes (permanencia por estado y embudo), calculada
+# sobre el historial de estados. La tarea periódica la deja en caché para
+# cada ventana (días; None = todo el historial).
+ANALITICA_SOLICITUDES_VENTANAS = [30, 90, 365, None]
+ANALITICA_SOLICITUDES_TTL = 2 * 60 * 60  # segundos
+
+# Exportaciones CSV/XLSX (apps.core.exportaciones). Por encima del límite
+# síncrono se generan en segundo plano y se descargan con URL firmada.
+EXPORTACION_CHUNK = 2000  # Filas leídas por bloque del cursor
+EXPORTACION_MAX_FILAS_SINCRONA = 50000
+EXPORTACION_RETENCION_DIAS = 7
+# Claves de los campos JSON que se abren en columnas (?json=columnas).
+# Los campos sin claves (listas) se resumen en una sola columna.
+EXPORTACION_CLAVES_JSON = {
+    'datos_personales': ('nombres', 'apellidos', 'pasaporte', 'nacionalidad', 'fecha_nacimiento'),
+}
+
+# Importación masiva de clientes y solicitudes (apps.solicitudes.importacion)
+IMPORTACION_LOTE = 500  # Filas validadas y escritas por transacción
+IMPORTACION_PROCESOS_HASH = min(4, os.cpu_count() or 1)  # Pool para hashear contraseñas
+IMPORTACION_MAX_FILAS_API = 5000  # Archivos más grandes: manage.py importar_clientes
+
+# Alertas de vencimiento de documentos (apps.solicitudes.vencimientos). La
+# tarea diaria avisa al cliente una vez por ventana (días antes de vencer);
+# un documento que entra tarde solo recibe la ventana más cercana.
+VENCIMIENTO_DOCUMENTOS_VENTANAS = [30, 7, 1]
+VENCIMIENTO_DOCUMENTOS_LOTE = 1000  # Documentos leídos por página (keyset)
+
+# Entregas de notificaciones por email/push (apps.notificaciones.entregas).
+# Cada notificación creada encola una entrega por canal permitido por las
+# preferencias del usuario; la tarea periódica las envía por lotes sobre
+# una sola conexión del EMAIL_BACKEND. 'push' requiere un enviador.
+ENTREGAS_CANALES = ['email']
+ENTREGAS_LOTE = 500  # Entregas reservadas por lote
+ENTREGAS_MAX_INTENTOS = 5
+ENTREGAS_BACKOFF_BASE = 60  # segundos; se duplica en cada reintento
+ENTREGAS_BACKOFF_MAX = 6 * 60 * 60
+ENTREGAS_RESERVA = 10 * 60  # segundos que un worker aparta un lote
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'Immigration CRM <no-reply@localhost>')
+
+# Outbox de eventos de dominio (apps.core.outbox). Las vistas publican el
+# evento en la transacción del cambio de estado; el relay lo entrega a los
+# manejadores después del commit, con reintentos.
+OUTBOX_LOTE = 200  # Eventos reservados por lote
+OUTBOX_MAX_INTENTOS = 8
+OUTBOX_BACKOFF_BASE = 30  # segundos; se duplica en cada reintento
+OUTBOX_BACKOFF_MAX = 60 * 60
+OUTBOX_RESERVA = 5 * 60  # segundos que un relay aparta un lote
+OUTBOX_RETENCION_DIAS = 7  # Eventos procesados que se conservan
+
+# Backend de tareas en segundo plano (apps.core.tareas): 'celery', 'hilos'
+# (pool de hilos en el proceso, sin broker), 'sincrono' o 'auto' (celery si
+# está instalado y CELERY_BROKER_URL está definido; si no, hilos).
+TAREAS_BACKEND = os.environ.get('TAREAS_BACKEND', 'auto')
+TAREAS_HILOS = int(os.environ.get('TAREAS_HILOS', 4))
+TAREAS_COLA_MAX = 1000  # Tareas en espera; con la cola llena se ejecutan en el llamador
+TAREAS_REINTENTOS = 2  # Reintentos por defecto de una tarea que lanza una excepción
+TAREAS_REINTENTO_ESPERA = 5  # segundos; se duplica en cada reintento
+TAREAS_APAGADO_TIMEOUT = 30  # segundos que se espera a vaciar la cola al salir
+
+# Las tareas de imágenes se procesan en un pool de workers dedicado:
+#   celery -A config worker -Q media --concurrency=4
+CELERY_TASK_ROUTES = {
+    'core.generar_derivados_imagen': {'queue': 'media'},
+}
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -111,7 +256,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # =====================================================
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.usuarios.infrastructure.authentication.JWTAutenticacionClaims',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -135,6 +280,8 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
+    # Valida la versión de token (revocación) y refresca el rol en los claims
+    'TOKEN_REFRESH_SERIALIZER': 'apps.usuarios.presentation.serializers.RefreshTokenSerializer',
 }
 
 # =====================================================
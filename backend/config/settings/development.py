@@ -12,6 +12,13 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Las transacciones toman el lock de escritura al empezar: con el
+            # modo diferido, una que lee (select_for_update) y luego escribe
+            # falla con "database is locked" si otra escribe a la vez
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
@@ -48,6 +55,12 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Registrar en el log las consultas N+1
+DETECTOR_CONSULTAS = True
+
+# Perfilado bajo demanda (X-Perfilar y muestreo desde el admin)
+PERFILADO_HABILITADO = os.environ.get('PERFILADO_HABILITADO', 'True').lower() == 'true'
+
 # Email backend para desarrollo (console)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
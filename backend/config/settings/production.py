@@ -33,6 +33,9 @@ SECURE_HSTS_SECONDS = 31536000
 SECURE_HSTS_INCLUDE_SUBDOMAINS = True
 SECURE_HSTS_PRELOAD = True
 
+# Archivos protegidos entregados por nginx (X-Accel-Redirect)
+MEDIA_SENDFILE_BACKEND = os.environ.get('MEDIA_SENDFILE_BACKEND', 'nginx')
+
 # Email backend para producción
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = os.environ.get('EMAIL_HOST')
@@ -49,6 +52,12 @@ CACHES = {
     }
 }
 
+# Canal de salas compartido entre nodos
+SALAS_REDIS_URL = os.environ.get('SALAS_REDIS_URL', os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/1'))
+
+# Métricas agregadas entre todos los workers
+METRICAS_REDIS_URL = os.environ.get('METRICAS_REDIS_URL', os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/1'))
+
 # Celery Configuration (para tareas asíncronas)
 CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://127.0.0.1:6379/0')
 CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://127.0.0.1:6379/0')
@@ -21,6 +21,13 @@ PASSWORD_HASHERS = [
     'django.contrib.auth.hashers.MD5PasswordHasher',
 ]
 
+# Fallar si una vista supera su presupuesto de consultas
+DETECTOR_CONSULTAS = True
+DETECTOR_CONSULTAS_ESTRICTO = True
+
+# Tareas en el llamador: los escenarios ven sus efectos al instante
+TAREAS_BACKEND = 'sincrono'
+
 # Email backend para testing
 EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
 
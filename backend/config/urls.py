@@ -6,22 +6,29 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from apps.core.views import MetricasView
+
 urlpatterns = [
     # Admin
     path('admin/', admin.site.urls),
 
     # API v1
+    path('api/', include('apps.core.urls')),
     path('api/', include('apps.usuarios.presentation.urls')),
     path('api/', include('apps.solicitudes.urls')),
     path('api/', include('apps.solicitudes.agendamiento.urls')),
     path('api/', include('apps.preparacion.urls')),
     path('api/', include('apps.notificaciones.urls')),
+
+    # Métricas (Prometheus)
+    path('metrics', MetricasView.as_view(), name='metricas'),
 ]
 
-# Servir archivos estáticos y media en desarrollo
+# Servir archivos estáticos en desarrollo. Media no tiene ruta pública: los
+# documentos, transcripciones y PDFs se entregan con URLs firmadas
+# (apps.core.media), también en desarrollo.
 if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
 # Personalizar el admin
 admin.site.site_header = 'CRM Migratorio - Administración'
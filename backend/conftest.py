@@ -0,0 +1,78 @@
+"""
+Fixtures compartidas de pytest.
+"""
+import itertools
+
+import pytest
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings(tmp_path_factory):
+    """
+    Base de pruebas SQLite en archivo (no en memoria): los tests de
+    concurrencia abren una conexión por hilo y necesitan ver la misma base.
+    """
+    from django.conf import settings
+
+    base = settings.DATABASES['default']
+    base.setdefault('TEST', {})['NAME'] = str(tmp_path_factory.mktemp('db') / 'test.sqlite3')
+    base.setdefault('OPTIONS', {}).update(timeout=20, transaction_mode='IMMEDIATE')
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    """
+    Hace cumplir @pytest.mark.presupuesto_consultas(n): el test falla si
+    ejecuta más de n consultas SQL (ver apps.core.consultas). Solo cuenta
+    el cuerpo del test, no los datos que crean sus fixtures ni la recarga
+    periódica del muestreo de perfilado, que tampoco cuenta el middleware.
+    """
+    marca = item.get_closest_marker('presupuesto_consultas')
+    if marca is None:
+        return (yield)
+
+    from apps.core.consultas import detectar_consultas, verificar_presupuesto
+    from apps.core.perfilado import muestreo
+    muestreo.cargar()
+    with detectar_consultas() as registro:
+        resultado = yield
+    verificar_presupuesto(registro, marca.args[0], item.nodeid)
+    return resultado
+
+
+# =====================================================
+# USUARIOS Y CLIENTES HTTP
+# =====================================================
+
+_emails = itertools.count(1)
+
+
+@pytest.fixture
+def crear_usuario(db):
+    """Fábrica de usuarios: crear_usuario('asesor', first_name='Ana')."""
+    from django.contrib.auth import get_user_model
+
+    def crear(rol='cliente', **campos):
+        campos.setdefault('email', f'{rol}{next(_emails)}@test.local')
+        campos.setdefault('first_name', rol.capitalize())
+        campos.setdefault('last_name', 'Prueba')
+        return get_user_model().objects.create_user(password='Clave12345!', rol=rol, **campos)
+    return crear
+
+
+@pytest.fixture
+def cliente_api():
+    """
+    Fábrica de APIClient autenticados con un access token real, como el
+    frontend: la autenticación consulta la versión del token en cada request.
+    """
+    from rest_framework.test import APIClient
+
+    from apps.usuarios.infrastructure.authentication import TokenUsuario
+
+    def crear(usuario):
+        cliente = APIClient()
+        token = TokenUsuario.for_user(usuario).access_token
+        cliente.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return cliente
+    return crear
@@ -20,14 +20,61 @@ os.environ.setdefault('DJANGO_ENV', 'testing')
 django.setup()
 
 
-def before_all(context):
+def _huella_migraciones():
+    """Hash de los archivos de migración: cambia si cambia el esquema."""
+    import hashlib
+    from pathlib import Path
+
+    huella = hashlib.sha1()
+    for archivo in sorted(Path(backend_dir, 'apps').rglob('migrations/*.py')):
+        huella.update(str(archivo.relative_to(backend_dir)).encode())
+        huella.update(archivo.read_bytes())
+    return huella.hexdigest()[:16]
+
+
+def _crear_base_datos():
     """
-    Se ejecuta una vez antes de todas las pruebas.
+    Aplica las migraciones. Con SQLite en memoria se migra una sola vez
+    a una plantilla en disco (por huella de las migraciones) y cada
+    ejecución la copia a memoria con la API de backup de SQLite.
     """
+    import sqlite3
+    import tempfile
+    from pathlib import Path
     from django.core.management import call_command
+    from django.db import connection
+
+    nombre = connection.settings_dict['NAME']
+    if connection.vendor != 'sqlite' or str(nombre) != ':memory:':
+        call_command('migrate', '--run-syncdb', verbosity=0)
+        return
+
+    plantilla = Path(tempfile.gettempdir()) / f'crm-behave-{_huella_migraciones()}.sqlite3'
+    if not plantilla.exists():
+        temporal = plantilla.with_suffix(f'.{os.getpid()}.tmp')
+        connection.close()
+        connection.settings_dict['NAME'] = str(temporal)
+        try:
+            call_command('migrate', '--run-syncdb', verbosity=0)
+        finally:
+            connection.close()
+            connection.settings_dict['NAME'] = nombre
+        os.replace(temporal, plantilla)
 
+    connection.ensure_connection()
+    origen = sqlite3.connect(plantilla)
+    try:
+        origen.backup(connection.connection)
+    finally:
+        origen.close()
+
+
+def before_all(context):
+    """
+    Se ejecuta una vez antes de todas las pruebas.
+    """
     # Crear tablas de la base de datos
-    call_command('migrate', '--run-syncdb', verbosity=0)
+    _crear_base_datos()
     
     # Registrar steps adicionales
     from behave.runner import Context
@@ -58,12 +105,27 @@ def before_scenario(context, scenario):
     from django.core.management import call_command
     call_command('flush', '--no-input', verbosity=0)
 
+    # Presupuesto de consultas: @max_consultas_<n> en el escenario o la feature
+    for tag in scenario.effective_tags:
+        if tag.startswith('max_consultas_'):
+            from apps.core.consultas import detectar_consultas
+            context.presupuesto_consultas = int(tag[len('max_consultas_'):])
+            context.detector_consultas = detectar_consultas()
+            context.registro_consultas = context.detector_consultas.__enter__()
+            break
+
 
 def after_scenario(context, scenario):
     """
     Se ejecuta después de cada escenario.
     """
-    pass
+    detector = getattr(context, 'detector_consultas', None)
+    if detector is not None:
+        from apps.core.consultas import verificar_presupuesto
+        detector.__exit__(None, None, None)
+        verificar_presupuesto(
+            context.registro_consultas, context.presupuesto_consultas, scenario.name
+        )
 
 
 def after_all(context):
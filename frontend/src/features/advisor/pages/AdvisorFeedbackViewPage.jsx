@@ -22,6 +22,7 @@ export default function AdvisorFeedbackViewPage() {
   const [loading, setLoading] = useState(true)
   const [simulacro, setSimulacro] = useState(null)
   const [recomendacion, setRecomendacion] = useState(null)
+  const [transcripcion, setTranscripcion] = useState('')
   const [error, setError] = useState(null)
 
   useEffect(() => {
@@ -38,6 +39,13 @@ export default function AdvisorFeedbackViewPage() {
         if (simData?.recomendacion) {
           setRecomendacion(simData.recomendacion)
         }
+        
+        // La transcripción no viene en el detalle: se descarga aparte
+        if (simData?.tiene_transcripcion) {
+          simulacrosService.getTranscripcion(id)
+            .then((texto) => setTranscripcion(texto))
+            .catch((err) => console.error('Error fetching transcripción:', err))
+        }
       } catch (err) {
         console.error('Error fetching data:', err)
         setError('No se pudo cargar la información del feedback')
@@ -311,12 +319,12 @@ export default function AdvisorFeedbackViewPage() {
       )}
 
       {/* Transcripción (si está disponible) */}
-      {simulacro.transcripcion_texto && (
+      {transcripcion && (
         <Card>
           <h3 className="text-lg font-semibold text-gray-900 mb-4">📝 Transcripción</h3>
           <div className="bg-gray-50 rounded-lg p-4 max-h-64 overflow-y-auto">
             <pre className="text-sm text-gray-700 whitespace-pre-wrap font-sans">
-              {simulacro.transcripcion_texto}
+              {transcripcion}
             </pre>
           </div>
         </Card>
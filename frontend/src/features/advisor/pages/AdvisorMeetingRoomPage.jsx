@@ -81,21 +81,10 @@ export default function AdvisorMeetingRoomPage() {
     fetchData()
   }, [id])
 
-  // Polling del estado de la sala
+  // Estado de la sala en tiempo real (con polling como respaldo)
   useEffect(() => {
-    const pollEstado = async () => {
-      try {
-        const response = await simulacrosService.getEstadoSala(id)
-        setEstadoSala(response.data)
-      } catch (err) {
-        console.error('Error polling estado:', err)
-      }
-    }
-
-    pollEstado()
-    const interval = setInterval(pollEstado, 5000)
-    return () => clearInterval(interval)
-  }, [id])
+    return simulacrosService.suscribirEstadoSala(id, salaInfo?.canal_url, setEstadoSala)
+  }, [id, salaInfo?.canal_url])
 
   // Session timer
   useEffect(() => {
@@ -77,12 +77,12 @@ export default function ApplicationReviewPage() {
             return {
               id: doc.id || i + 1,
               name: doc.nombre || doc.name || 'Documento',
-              filename: doc.archivo || doc.filename || '',
+              filename: doc.archivo_nombre || doc.filename || '',
               status: mapEstado(doc.estado),
               uploadedAt: doc.fecha_subida || doc.created_at || '',
               size: doc.tamano || '',
-              type: doc.archivo?.endsWith('.pdf') ? 'pdf' : (doc.tipo || 'pdf'),
-              preview: buildAbsoluteUrl(doc.archivo_url || doc.archivo || doc.url)
+              type: doc.archivo_nombre?.endsWith('.pdf') ? 'pdf' : (doc.tipo || 'pdf'),
+              preview: buildAbsoluteUrl(doc.archivo_url || doc.url)
             }
           })
         }
@@ -61,12 +61,12 @@ export default function DocumentExplorerPage() {
           docsMap[clientFolderId] = documentos.map(doc => ({
             id: doc.id,
             name: doc.nombre || 'Documento',
-            type: doc.archivo ? doc.archivo.split('.').pop() : 'pdf',
+            type: doc.archivo_nombre ? doc.archivo_nombre.split('.').pop() : 'pdf',
             size: 'N/A',
             uploadedAt: new Date(doc.created_at).toLocaleDateString('es-ES'),
             status: doc.estado || 'pendiente',
-            preview: buildAbsoluteUrl(doc.archivo_url || doc.archivo),
-            archivo: buildAbsoluteUrl(doc.archivo_url || doc.archivo)
+            preview: buildAbsoluteUrl(doc.archivo_url),
+            archivo: buildAbsoluteUrl(doc.archivo_url)
           }))
         })
         
@@ -66,7 +66,7 @@ export default function ApplicationDetailPage() {
           name: doc.nombre,
           status: doc.estado,
           statusName: doc.estado === 'aprobado' ? 'Aprobado' : doc.estado === 'rechazado' ? 'Rechazado' : 'Pendiente',
-          url: buildAbsoluteUrl(doc.archivo_url || doc.archivo),
+          url: buildAbsoluteUrl(doc.archivo_url),
           motivo_rechazo: doc.motivo_rechazo,
           fecha_revision: doc.fecha_revision,
           size: doc.tamanio || 'PDF',
@@ -45,23 +45,11 @@ export default function MeetingRoomPage() {
     cargarInfoSala()
   }, [id])
 
-  // Polling del estado de la sala
+  // Estado de la sala en tiempo real (con polling como respaldo)
   useEffect(() => {
     if (!hasJoined) return
-
-    const pollEstado = async () => {
-      try {
-        const response = await simulacrosService.getEstadoSala(id)
-        setEstadoSala(response.data)
-      } catch (err) {
-        console.error('Error polling estado:', err)
-      }
-    }
-
-    pollEstado()
-    const interval = setInterval(pollEstado, 5000)
-    return () => clearInterval(interval)
-  }, [id, hasJoined])
+    return simulacrosService.suscribirEstadoSala(id, salaInfo?.canal_url, setEstadoSala)
+  }, [id, hasJoined, salaInfo?.canal_url])
 
   // Timer de duración
   useEffect(() => {
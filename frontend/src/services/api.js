@@ -95,7 +95,7 @@ class ApiClient {
       const data = await response.json()
       this.setTokens({
         access: data.access,
-        refresh: refreshToken
+        refresh: data.refresh || refreshToken
       })
 
       return data.access
@@ -90,11 +90,16 @@ export const authService = {
    * @param {string} passwordConfirm
    */
   async changePassword(passwordActual, passwordNuevo, passwordConfirm) {
-    return apiClient.post('/auth/cambiar-password/', {
+    const response = await apiClient.post('/auth/cambiar-password/', {
       password_actual: passwordActual,
       password_nuevo: passwordNuevo,
       password_confirm: passwordConfirm
     })
+    // El cambio revoca los tokens anteriores: guardar los nuevos
+    if (response.tokens) {
+      apiClient.setTokens(response.tokens)
+    }
+    return response
   },
 
   /**
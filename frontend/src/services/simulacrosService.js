@@ -148,6 +148,61 @@ export const simulacrosService = {
     return apiClient.get(`/simulacros/${simulacroId}/estado-sala/`)
   },
 
+  /**
+   * Se suscribe a los cambios de estado y presencia de la sala.
+   * Usa el canal en tiempo real (canal_url de getInfoSala) y, si no está
+   * disponible, vuelve al polling de getEstadoSala.
+   * @param {number} simulacroId
+   * @param {string|null} canalUrl
+   * @param {Function} onEstado - Recibe el mismo objeto que getEstadoSala
+   * @param {Function} onPresencia - Recibe la lista de participantes presentes
+   * @returns {Function} Cancela la suscripción
+   */
+  suscribirEstadoSala(simulacroId, canalUrl, onEstado, onPresencia = () => {}) {
+    const ESTADOS_FINALES = ['completado', 'cancelado', 'no_asistio']
+    let interval = null
+    let source = null
+
+    const iniciarPolling = () => {
+      if (interval) return
+      const pollEstado = async () => {
+        try {
+          const response = await simulacrosService.getEstadoSala(simulacroId)
+          onEstado(response.data)
+        } catch (err) {
+          console.error('Error polling estado:', err)
+        }
+      }
+      pollEstado()
+      interval = setInterval(pollEstado, 5000)
+    }
+
+    if (canalUrl && typeof window !== 'undefined' && window.EventSource) {
+      source = new EventSource(canalUrl)
+      source.addEventListener('estado', (event) => {
+        const data = JSON.parse(event.data)
+        onEstado(data)
+        if (ESTADOS_FINALES.includes(data.estado)) source.close()
+      })
+      source.addEventListener('presencia', (event) => {
+        onPresencia(JSON.parse(event.data).presentes)
+      })
+      source.onerror = () => {
+        // Servidor sin ASGI o token expirado: volver al polling
+        if (source.readyState === EventSource.CLOSED) {
+          iniciarPolling()
+        }
+      }
+    } else {
+      iniciarPolling()
+    }
+
+    return () => {
+      if (source) source.close()
+      if (interval) clearInterval(interval)
+    }
+  },
+
   /**
    * Inicia el simulacro (Asesor)
    * @param {number} simulacroId